@@ -24,11 +24,11 @@ from src.analysis.post_market import PostMarketAnalyst
 from src.analysis.sentiment.dashboard import SentimentDashboard
 from src.analysis.commodities.gold_silver import GoldSilverAnalyst
 from src.analysis.dashboard import DashboardService
-from src.analysis.fund import FundDiagnosis, RiskMetricsCalculator, DrawdownAnalyzer, FundComparison, PortfolioAnalyzer
+from src.analysis.fund import FundComparison, PortfolioAnalyzer
 from src.analysis.portfolio import RiskMetricsCalculator as PortfolioRiskMetrics, CorrelationAnalyzer, StressTestEngine, SignalGenerator
 from src.analysis.portfolio.stress_test import StressScenario, ScenarioType, PREDEFINED_SCENARIOS
 from src.data_sources.akshare_api import search_funds
-from src.storage.db import init_db, get_active_funds, get_all_funds, upsert_fund, delete_fund, get_fund_by_code, get_all_stocks, upsert_stock, delete_stock, get_stock_by_code, search_stock_basic, get_stock_basic_count, get_stock_basic_last_updated
+from src.storage.db import init_db, get_all_funds, upsert_fund, delete_fund, get_fund_by_code, get_all_stocks, upsert_stock, delete_stock, get_stock_by_code, search_stock_basic, get_stock_basic_count, get_stock_basic_last_updated
 from src.storage.db import get_user_positions, get_position_by_id, create_position, update_position, delete_position, get_portfolio_summary, get_diagnosis_cache, save_diagnosis_cache
 # New portfolio management imports
 from src.storage.db import (
@@ -45,7 +45,9 @@ from src.storage.db import (
 )
 from src.services.news_service import news_service
 from src.services.assistant_service import assistant_service
+from src.services.fund_analytics import fund_analytics
 from src.scheduler.manager import scheduler_manager
+from src.jobs import job_queue, PRIORITY_HIGH, PRIORITY_NORMAL
 from src.report_gen import save_report, save_stock_report
 # Updated import
 from src.data_sources.akshare_api import get_all_fund_list, get_stock_realtime_quote, get_all_stock_spot_map, get_stock_history
@@ -101,8 +103,11 @@ async def lifespan(app: FastAPI):
     # Run scheduler init in a separate thread so it doesn't block startup
     loop = asyncio.get_running_loop()
     loop.run_in_executor(None, scheduler_manager.start)
+    job_queue.start()
     yield
-    # Shutdown logic if needed
+    job_queue.stop()
+    # Release scheduler leadership so a standby worker takes over immediately
+    scheduler_manager.shutdown()
 
 app = FastAPI(title="EastMoney Report API", lifespan=lifespan)
 
@@ -624,6 +629,13 @@ async def search_market_funds(query: str = ""):
         return []
 
     try:
+        # Prefer the local fund_basic index (synced from TuShare)
+        from src.storage.db import search_fund_basic, get_fund_basic_count
+        if get_fund_basic_count() > 0:
+            return [
+                {'code': f['code'], 'name': f['name'], 'type': f['fund_type'] or '', 'ts_code': f['ts_code']}
+                for f in search_fund_basic(query, limit=50)
+            ]
         results = search_funds_tushare(query, limit=50)
         return results
     except Exception as e:
@@ -663,27 +675,20 @@ async def generate_report_endpoint(mode: str, request: GenerateRequest = None, c
     fund_code = request.fund_code if request else None
 
     try:
-        print(f"Generating {mode}-market report for User {current_user.id}... (Fund: {fund_code if fund_code else 'ALL'})")
-        
-        if fund_code:
-            # Run analysis in a thread to avoid blocking the event loop
-            # Note: This will still block the HTTP response until completion.
-            # For true async (fire-and-forget), use BackgroundTasks.
-            # But here the user likely wants to wait for completion? 
-            # The current implementation returns a message *after* completion (sync).
-            # So we use await asyncio.to_thread to keep server responsive for others.
-            await asyncio.to_thread(scheduler_manager.run_analysis_task, fund_code, mode, user_id=current_user.id)
-            return {"status": "success", "message": f"Task triggered for {fund_code}"}
-        else:
-            funds = get_active_funds(user_id=current_user.id)
-            results = []
-            for fund in funds:
-                try:
-                    await asyncio.to_thread(scheduler_manager.run_analysis_task, fund['code'], mode, user_id=current_user.id)
-                    results.append(fund['code'])
-                except:
-                    pass
-            return {"status": "success", "message": f"Triggered tasks for {len(results)} funds"}
+        print(f"Queueing {mode}-market report for User {current_user.id}... (Fund: {fund_code if fund_code else 'ALL'})")
+
+        # Reports run on the durable job queue; poll /api/jobs/{job_id}
+        job_id, created = job_queue.submit(
+            'report_generation',
+            {'mode': mode, 'fund_code': fund_code},
+            user_id=current_user.id,
+            priority=PRIORITY_HIGH if fund_code else PRIORITY_NORMAL
+        )
+        return {
+            "status": "queued" if created else "already_queued",
+            "job_id": job_id,
+            "message": f"Task queued for {fund_code if fund_code else 'all funds'}"
+        }
             
     except Exception as e:
         import traceback
@@ -1030,10 +1035,9 @@ async def get_fund_market_details(code: str):
 
         portfolio = []
         try:
-            df_hold = ak.fund_portfolio_hold_em(symbol=code)
-            if df_hold is not None and not df_hold.empty:
-                portfolio = df_hold.head(10).to_dict(orient='records')
-        except:
+            from src.services.fund_holdings import fund_holdings_store, to_akshare_records
+            portfolio = to_akshare_records(await asyncio.to_thread(fund_holdings_store.get_holdings, code, 10))
+        except Exception:
             pass
 
         return sanitize_data({
@@ -1099,12 +1103,6 @@ def _enrich_stock_info(stock_dict):
             print(f"Auto-fetch sector failed: {e}")
     return stock_dict
 
-from concurrent.futures import ThreadPoolExecutor
-import uuid
-
-# Global thread pool for background tasks
-_recommendation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="recommend_")
-
 @app.get("/api/stocks", response_model=List[StockItem])
 async def get_stocks_endpoint(current_user: User = Depends(get_current_user)):
     try:
@@ -1113,82 +1111,21 @@ async def get_stocks_endpoint(current_user: User = Depends(get_current_user)):
         if not stocks:
             return []
 
-        # Batch fetch realtime quotes using tushare (more reliable than akshare)
-        try:
-            from src.data_sources.tushare_client import get_realtime_quotes
-
-            # Get all stock codes
-            stock_codes = [s['code'] for s in stocks]
-
-            # Fetch realtime quotes in batch
-            quotes_df = await asyncio.to_thread(get_realtime_quotes, stock_codes)
-
-            # Build a lookup dict for quick access
-            quotes_lookup = {}
-            if quotes_df is not None and not quotes_df.empty:
-                for _, row in quotes_df.iterrows():
-                    # The ts_code might have suffix, extract plain code
-                    ts_code = str(row.get('ts_code', ''))
-                    plain_code = ts_code.split('.')[0] if '.' in ts_code else ts_code
-                    quotes_lookup[plain_code] = row
-
-            # Merge quotes with stock data
-            results = []
-            for stock in stocks:
-                item = dict(stock)
-                code = stock['code']
-
-                if code in quotes_lookup:
-                    row = quotes_lookup[code]
-                    # Map tushare fields to our schema
-                    price = row.get('price')
-                    pct_chg = row.get('pct_chg')
-                    vol = row.get('vol')
-
-                    if price is not None and pd.notna(price):
-                        item['price'] = float(price)
-                    if pct_chg is not None and pd.notna(pct_chg):
-                        item['change_pct'] = float(pct_chg)
-                    if vol is not None and pd.notna(vol):
-                        # tushare vol is in shares, convert to hands (100 shares = 1 hand)
-                        item['volume'] = float(vol)
-
-                results.append(StockItem(**item))
-
-            return results
-
-        except ImportError:
-            # Fallback to old akshare method if tushare not available
-            print("TuShare not available, falling back to akshare")
-
-            def fetch_single_quote(stock):
-                item = dict(stock)
-                try:
-                    df = ak.stock_bid_ask_em(symbol=stock['code'])
-                    if not df.empty:
-                        info = dict(zip(df['item'], df['value']))
-                        price = info.get('最新') or info.get('最新价')
-                        change = info.get('涨幅') or info.get('涨跌幅')
-                        vol = info.get('总手') or info.get('成交量')
-
-                        if price is not None and str(price) != '':
-                            item['price'] = float(price)
-                        if change is not None and str(change) != '':
-                            item['change_pct'] = float(change)
-                        if vol is not None and str(vol) != '':
-                            v = float(vol)
-                            if info.get('总手') is not None:
-                                v = v * 100
-                            item['volume'] = v
-                except Exception:
-                    pass
-                return StockItem(**item)
+        # Per-symbol quote store: cache hits plus one bulk fill for the misses
+        from src.services.quote_store import quote_store
+        quotes = await asyncio.to_thread(quote_store.get_quotes, [s['code'] for s in stocks])
 
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                results = await loop.run_in_executor(None, lambda: list(executor.map(fetch_single_quote, stocks)))
+        results = []
+        for stock in stocks:
+            item = dict(stock)
+            quote = quotes.get(stock['code'])
+            if quote:
+                item['price'] = quote['price']
+                item['change_pct'] = quote['change_pct']
+                item['volume'] = quote.get('volume')
+            results.append(StockItem(**item))
 
-            return results
+        return results
 
     except Exception as e:
         print(f"Error reading stocks: {e}")
@@ -2168,99 +2105,6 @@ class RecommendationResponse(BaseModel):
     metadata: Dict[str, Any]
 
 
-def _run_recommendation_task(task_id: str, mode: str, user_id: int, user_preferences: Optional[Dict] = None):
-    """
-    Background task worker for generating recommendations.
-    Stores progress and results in cache.
-    """
-    from src.cache import cache_manager
-
-    cache_key = f"recommend_task:{task_id}"
-
-    try:
-        # Update status to running
-        cache_manager.set(cache_key, {
-            "status": "running",
-            "progress": "Initializing recommendation engine...",
-            "started_at": datetime.now().isoformat(),
-            "user_id": user_id,
-            "mode": mode
-        }, ttl=3600)  # 1 hour TTL
-
-        from src.analysis.recommendation import RecommendationEngine
-        from src.llm.client import get_llm_client
-        from src.data_sources.web_search import WebSearch
-
-        # Update progress
-        cache_manager.set(cache_key, {
-            "status": "running",
-            "progress": "Screening stocks and funds...",
-            "started_at": datetime.now().isoformat(),
-            "user_id": user_id,
-            "mode": mode
-        }, ttl=3600)
-
-        llm_client = get_llm_client()
-        web_search = WebSearch()
-        engine = RecommendationEngine(
-            llm_client=llm_client,
-            web_search=web_search,
-            cache_manager=cache_manager
-        )
-
-        # Generate recommendations
-        results = engine.generate_recommendations(
-            mode=mode,
-            use_llm=True,
-            user_preferences=user_preferences
-        )
-
-        # Sanitize results
-        results = sanitize_for_json(results)
-
-        # Cache the recommendation results
-        prefs_hash = "personalized" if user_preferences else "default"
-        result_cache_key = f"recommendations:{user_id}:{mode}:{prefs_hash}"
-        cache_manager.set(result_cache_key, results, ttl=14400)  # 4 hours
-
-        # Save to database
-        from src.storage.db import save_recommendation_report
-        save_recommendation_report({
-            "mode": mode,
-            "recommendations_json": results,
-            "market_context": results.get("metadata", {})
-        }, user_id=user_id)
-
-        # Update task status to completed
-        cache_manager.set(cache_key, {
-            "status": "completed",
-            "progress": "Recommendations generated successfully!",
-            "started_at": datetime.now().isoformat(),
-            "completed_at": datetime.now().isoformat(),
-            "user_id": user_id,
-            "mode": mode,
-            "result": results
-        }, ttl=3600)
-
-        print(f"[Task {task_id}] Recommendation generation completed for user {user_id}")
-
-    except Exception as e:
-        import traceback
-        error_msg = str(e)
-        traceback.print_exc()
-
-        # Update task status to failed
-        cache_manager.set(cache_key, {
-            "status": "failed",
-            "progress": f"Error: {error_msg}",
-            "error": error_msg,
-            "user_id": user_id,
-            "mode": mode
-        }, ttl=3600)
-
-        print(f"[Task {task_id}] Recommendation generation failed: {error_msg}")
-
-
 @app.post("/api/recommend/generate")
 async def generate_recommendations_endpoint(
     request: RecommendationRequest = None,
@@ -2307,27 +2151,11 @@ async def generate_recommendations_endpoint(
                     "result": sanitize_for_json(cached)
                 }
 
-        # Generate unique task ID
-        task_id = str(uuid.uuid4())
-
-        # Initialize task status
-        cache_manager.set(f"recommend_task:{task_id}", {
-            "status": "pending",
-            "progress": "Task queued...",
-            "user_id": current_user.id,
-            "mode": mode
-        }, ttl=3600)
-
-        # Submit to background executor
-        _recommendation_executor.submit(
-            _run_recommendation_task,
-            task_id,
-            mode,
-            current_user.id,
-            user_preferences
+        # Queue on the durable job queue (identical pending requests share one job)
+        task_id, created = job_queue.submit(
+            'recommendation', {'mode': mode}, user_id=current_user.id, priority=PRIORITY_HIGH
         )
-
-        print(f"Started recommendation task {task_id} for user {current_user.id}")
+        print(f"{'Queued' if created else 'Reusing'} recommendation job {task_id} for user {current_user.id}")
 
         return {
             "status": "started",
@@ -2355,32 +2183,30 @@ async def get_recommendation_task_status(
     - result: Full recommendation data (only when status is "completed")
     """
     try:
-        from src.cache import cache_manager
-
-        cache_key = f"recommend_task:{task_id}"
-        task_data = cache_manager.get(cache_key)
+        job = job_queue.get(task_id)
 
-        if not task_data:
+        if not job:
             raise HTTPException(status_code=404, detail="Task not found or expired")
 
         # Security check: ensure task belongs to current user
-        if task_data.get("user_id") != current_user.id:
+        if job.get("user_id") != current_user.id:
             raise HTTPException(status_code=403, detail="Access denied")
 
-        # Return task status
+        # Map job states onto the task states this endpoint has always returned
+        status = {"queued": "pending", "cancelled": "failed"}.get(job["status"], job["status"])
         response = {
             "task_id": task_id,
-            "status": task_data.get("status"),
-            "progress": task_data.get("progress"),
-            "mode": task_data.get("mode")
+            "status": status,
+            "progress": job.get("progress_message") or "Task queued...",
+            "mode": (job.get("params") or {}).get("mode")
         }
 
-        if task_data.get("status") == "completed":
-            response["result"] = task_data.get("result")
-            response["completed_at"] = task_data.get("completed_at")
+        if status == "completed":
+            response["result"] = sanitize_for_json(job.get("result"))
+            response["completed_at"] = job.get("finished_at")
 
-        if task_data.get("status") == "failed":
-            response["error"] = task_data.get("error")
+        if status == "failed":
+            response["error"] = job.get("error") or "Cancelled"
 
         return response
 
@@ -2657,51 +2483,12 @@ async def get_stock_details(
 ):
     """Get detailed stock information."""
     try:
-        import akshare as ak
-
-        # Get basic info
-        spot_df = ak.stock_zh_a_spot_em()
-        stock_info = spot_df[spot_df['代码'] == code]
+        from src.services.stock_detail import stock_detail_service
 
-        if stock_info.empty:
+        detail = await asyncio.to_thread(stock_detail_service.get_detail, code)
+        if not detail:
             raise HTTPException(status_code=404, detail="Stock not found")
-
-        stock_data = stock_info.iloc[0].to_dict()
-
-        # Get historical data (last 60 days)
-        try:
-            hist_df = ak.stock_zh_a_hist(symbol=code, period="daily", adjust="qfq")
-            if not hist_df.empty:
-                hist_df = hist_df.tail(60)
-                history = hist_df.to_dict('records')
-            else:
-                history = []
-        except:
-            history = []
-
-        # Get financial indicators
-        try:
-            financial_df = ak.stock_financial_analysis_indicator(symbol=code)
-            if not financial_df.empty:
-                financial_data = financial_df.iloc[0].to_dict()
-            else:
-                financial_data = {}
-        except:
-            financial_data = {}
-
-        return {
-            "code": code,
-            "name": stock_data.get('名称'),
-            "price": stock_data.get('最新价'),
-            "change_pct": stock_data.get('涨跌幅'),
-            "volume": stock_data.get('成交量'),
-            "turnover": stock_data.get('成交额'),
-            "pe": stock_data.get('市盈率-动态'),
-            "pb": stock_data.get('市净率'),
-            "market_cap": stock_data.get('总市值'),
-            "history": history,
-            "financial": financial_data,
-        }
+        return sanitize_data(detail)
     except HTTPException:
         raise
     except Exception as e:
@@ -2743,14 +2530,11 @@ async def get_fund_details(
         except:
             manager_info = []
 
-        # Get holdings info
+        # Get holdings info (top 10, from the quarterly holdings store)
         try:
-            holdings_df = ak.fund_portfolio_hold_em(symbol=code, date="")
-            if not holdings_df.empty:
-                holdings = holdings_df.head(10).to_dict('records')  # Top 10 holdings
-            else:
-                holdings = []
-        except:
+            from src.services.fund_holdings import fund_holdings_store, to_akshare_records
+            holdings = to_akshare_records(await asyncio.to_thread(fund_holdings_store.get_holdings, code, 10))
+        except Exception:
             holdings = []
 
         return {
@@ -2821,42 +2605,29 @@ async def compare_funds(
 ):
     """Compare multiple funds side by side."""
     try:
-        import akshare as ak
-
         if len(codes) < 2 or len(codes) > 5:
             raise HTTPException(status_code=400, detail="Please select 2-5 funds to compare")
 
-        comparisons = []
+        # One indexed lookup in the ranking snapshot (off the event loop)
+        from src.services.fund_rankings import fund_ranking_snapshot
+        rankings = await asyncio.to_thread(fund_ranking_snapshot.lookup, codes)
 
+        comparisons = []
         for code in codes:
-            try:
-                # Get fund ranking data
-                rank_data = None
-                for fund_type in ["股票型", "混合型", "指数型"]:
-                    try:
-                        df = ak.fund_open_fund_rank_em(symbol=fund_type)
-                        fund_row = df[df['基金代码'] == code]
-                        if not fund_row.empty:
-                            rank_data = fund_row.iloc[0]
-                            break
-                    except:
-                        continue
-
-                if rank_data is not None:
-                    comparisons.append({
-                        "code": code,
-                        "name": rank_data.get('基金简称'),
-                        "fund_type": fund_type,
-                        "nav": rank_data.get('单位净值'),
-                        "return_1w": rank_data.get('近1周'),
-                        "return_1m": rank_data.get('近1月'),
-                        "return_3m": rank_data.get('近3月'),
-                        "return_6m": rank_data.get('近6月'),
-                        "return_1y": rank_data.get('近1年'),
-                        "return_3y": rank_data.get('近3年'),
-                    })
-            except:
-                continue
+            rank_data = rankings.get(code)
+            if rank_data is not None:
+                comparisons.append({
+                    "code": code,
+                    "name": rank_data['name'],
+                    "fund_type": rank_data['category'],
+                    "nav": rank_data['nav'],
+                    "return_1w": rank_data['return_1w'],
+                    "return_1m": rank_data['return_1m'],
+                    "return_3m": rank_data['return_3m'],
+                    "return_6m": rank_data['return_6m'],
+                    "return_1y": rank_data['return_1y'],
+                    "return_3y": rank_data['return_3y'],
+                })
 
         if not comparisons:
             raise HTTPException(status_code=404, detail="No valid funds found")
@@ -3626,6 +3397,25 @@ class PortfolioAIChatRequest(BaseModel):
     context: Optional[Dict[str, Any]] = None
 
 
+@app.get("/api/funds/{code}/analytics")
+async def get_fund_analytics(
+    code: str,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Diagnosis, risk metrics and drawdown history computed together from one NAV fetch."""
+    try:
+        bundle = await asyncio.to_thread(fund_analytics.get_bundle, code, force_refresh)
+        if not bundle:
+            raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
+        return sanitize_for_json(bundle)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error calculating fund analytics for {code}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/funds/{code}/diagnosis")
 async def get_fund_diagnosis(
     code: str,
@@ -3640,16 +3430,10 @@ async def get_fund_diagnosis(
             if cached and cached.get('diagnosis'):
                 return cached['diagnosis']
 
-        # Fetch NAV history
-        loop = asyncio.get_running_loop()
-        nav_history = await loop.run_in_executor(None, _get_fund_nav_history, code, 500)
-
-        if not nav_history:
+        bundle = await asyncio.to_thread(fund_analytics.get_bundle, code, force_refresh)
+        if not bundle:
             raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
-
-        # Calculate diagnosis
-        diagnoser = FundDiagnosis()
-        diagnosis = diagnoser.diagnose(code, nav_history)
+        diagnosis = bundle['diagnosis']
 
         # Cache result (6 hours TTL)
         if diagnosis.get('score', 0) > 0:
@@ -3670,18 +3454,11 @@ async def get_fund_risk_metrics(
 ):
     """Get comprehensive risk metrics for a fund."""
     try:
-        # Fetch NAV history
-        loop = asyncio.get_running_loop()
-        nav_history = await loop.run_in_executor(None, _get_fund_nav_history, code, 500)
-
-        if not nav_history:
+        bundle = await asyncio.to_thread(fund_analytics.get_bundle, code)
+        if not bundle:
             raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
 
-        # Calculate risk metrics
-        calculator = RiskMetricsCalculator()
-        metrics = calculator.calculate_all_metrics(nav_history)
-
-        return sanitize_for_json(metrics)
+        return sanitize_for_json(bundle['risk_metrics'])
     except HTTPException:
         raise
     except Exception as e:
@@ -3697,17 +3474,10 @@ async def get_fund_drawdown_history(
 ):
     """Get detailed drawdown history analysis for a fund."""
     try:
-        # Fetch NAV history
-        loop = asyncio.get_running_loop()
-        nav_history = await loop.run_in_executor(None, _get_fund_nav_history, code, 500)
-
-        if not nav_history:
+        analysis = await asyncio.to_thread(fund_analytics.get_drawdowns, code, threshold)
+        if not analysis:
             raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
 
-        # Analyze drawdowns
-        analyzer = DrawdownAnalyzer(threshold=threshold)
-        analysis = analyzer.analyze_drawdowns(nav_history)
-
         return sanitize_for_json(analysis)
     except HTTPException:
         raise
@@ -3963,16 +3733,15 @@ async def get_portfolio_overlap(
             fund_values[fund_code] = fund_values.get(fund_code, 0) + position_value
             total_value += position_value
 
-        # Calculate weights and fetch holdings
+        # Calculate weights and fetch holdings (one store read for all funds)
         for fund_code, value in fund_values.items():
             position_weights[fund_code] = value / total_value if total_value > 0 else 0
 
-            try:
-                holdings = await loop.run_in_executor(None, _get_fund_holdings_list, fund_code)
-                if holdings:
-                    fund_holdings[fund_code] = holdings
-            except:
-                pass
+        try:
+            from src.services.fund_holdings import fund_holdings_store
+            fund_holdings = await loop.run_in_executor(None, fund_holdings_store.get_many, list(fund_values), 10)
+        except Exception as e:
+            print(f"Error fetching portfolio fund holdings: {e}")
 
         if not fund_holdings:
             return {"message": "No holdings data available for portfolio funds"}
@@ -5667,30 +5436,11 @@ def _get_fund_basic_info(fund_code: str) -> Optional[Dict]:
 def _get_fund_holdings_list(fund_code: str) -> List[Dict]:
     """Get fund top holdings as a list."""
     try:
-        year = str(datetime.now().year)
-        df = ak.fund_portfolio_hold_em(symbol=fund_code, date=year)
-
-        if df is None or df.empty:
-            # Try previous year
-            df = ak.fund_portfolio_hold_em(symbol=fund_code, date=str(int(year) - 1))
-
-        if df is None or df.empty:
-            return []
-
-        # Get latest quarter data
-        if '季度' in df.columns:
-            latest_quarter = df['季度'].max()
-            df = df[df['季度'] == latest_quarter]
-
-        holdings = []
-        for _, row in df.head(10).iterrows():
-            holdings.append({
-                'code': row.get('股票代码', ''),
-                'name': row.get('股票名称', ''),
-                'weight': float(row.get('占净值比例', 0)) if row.get('占净值比例') else 0,
-            })
-
-        return holdings
+        from src.services.fund_holdings import fund_holdings_store
+        return [
+            {'code': h['code'], 'name': h['name'], 'weight': h['weight']}
+            for h in fund_holdings_store.get_holdings(fund_code, top_n=10)
+        ]
     except Exception as e:
         print(f"Error fetching holdings for {fund_code}: {e}")
         return []
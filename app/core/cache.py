@@ -6,50 +6,58 @@ from threading import Lock
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
+from src.cache.near_cache import NearCache
+
 
 class IndicesCache:
     """
     Thread-safe cache for market indices data.
     Handles different cache TTL for active vs inactive market hours.
+
+    Backed by a NearCache so all API workers share one snapshot. The entry is
+    retained for a day; the freshness expiry is stored alongside the data.
     """
+    CACHE_KEY = "indices"
+    RETENTION_SECONDS = 86400
+
     def __init__(self):
-        self.data = []
-        self.expiry = 0
-        self._lock = Lock()
+        self._cache = NearCache('indices', default_ttl=self.RETENTION_SECONDS, max_entries=4)
 
     def get(self) -> list:
         """Get cached data if still valid."""
-        with self._lock:
-            now_ts = time.time()
-            now_dt = datetime.now()
-            current_hm = now_dt.hour * 100 + now_dt.minute
+        entry = self._cache.get(self.CACHE_KEY)
+        data = entry['data'] if entry else None
 
-            # Active Hours: 08:00 - 15:00 OR 21:30 - 05:00
-            is_active_session_1 = 800 <= current_hm < 1500
-            is_active_session_2 = (2130 <= current_hm) or (current_hm < 500)
-            is_active = is_active_session_1 or is_active_session_2
+        now_ts = time.time()
+        now_dt = datetime.now()
+        current_hm = now_dt.hour * 100 + now_dt.minute
 
-            # If inactive and we have data, use it indefinitely
-            if not is_active and self.data:
-                return self.data
+        # Active Hours: 08:00 - 15:00 OR 21:30 - 05:00
+        is_active_session_1 = 800 <= current_hm < 1500
+        is_active_session_2 = (2130 <= current_hm) or (current_hm < 500)
+        is_active = is_active_session_1 or is_active_session_2
 
-            # Otherwise (Active OR Empty Cache), check standard expiry
-            if self.data and now_ts < self.expiry:
-                return self.data
+        # If inactive and we have data, use it indefinitely
+        if not is_active and data:
+            return data
 
-            return None
+        # Otherwise (Active OR Empty Cache), check standard expiry
+        if data and now_ts < entry['expiry']:
+            return data
+
+        return None
 
     def set(self, data: list, ttl_seconds: int = 60):
         """Set cache with TTL."""
-        with self._lock:
-            self.data = data
-            self.expiry = time.time() + ttl_seconds
+        self._cache.set(
+            self.CACHE_KEY,
+            {'data': data, 'expiry': time.time() + ttl_seconds},
+            ttl=self.RETENTION_SECONDS
+        )
 
     def clear(self):
         """Clear the cache."""
-        with self._lock:
-            self.data = []
-            self.expiry = 0
+        self._cache.invalidate()
 
 
 class StockFeatureCache:
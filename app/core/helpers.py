@@ -2,13 +2,10 @@
 Data retrieval helper functions for funds, stocks, and portfolios.
 """
 import asyncio
-from datetime import datetime
 from typing import List, Dict, Optional, Any
-import pandas as pd
 import akshare as ak
 
 from src.data_sources.akshare_api import get_all_fund_list, get_stock_realtime_quote, get_stock_history
-from src.data_sources.data_source_manager import get_fund_info_from_tushare
 
 
 def get_fund_nav_history(fund_code: str, days: int = 100) -> List[Dict]:
@@ -23,31 +20,13 @@ def get_fund_nav_history(fund_code: str, days: int = 100) -> List[Dict]:
         List of dicts with 'date' and 'value' keys
     """
     try:
-        # Use TuShare via data_source_manager
-        df = get_fund_info_from_tushare(fund_code)
-        
-        if df is None or df.empty:
+        # Shared with the fund analytics bundle: one TuShare download per fund per 30 min
+        # (windows longer than the bundle's NAV_DAYS are cached on their own)
+        from src.services.fund_analytics import fund_analytics
+        nav = fund_analytics.get_nav_series(fund_code, days=days)
+        if nav is None:
             return []
-
-        # Data from data_source_manager already has standard columns:
-        # '净值日期' (YYYYMMDD string), '单位净值' (float)
-
-        if '净值日期' not in df.columns or '单位净值' not in df.columns:
-            return []
-
-        df['净值日期'] = pd.to_datetime(df['净值日期'], errors='coerce')
-        df = df.dropna(subset=['净值日期', '单位净值'])
-        
-        # Sort by date ascending to get chronological order
-        df = df.sort_values('净值日期')
-        
-        # Take the last 'days' entries
-        df = df.tail(days)
-
-        return [
-            {'date': row['净值日期'].strftime('%Y-%m-%d'), 'value': float(row['单位净值'])}
-            for _, row in df.iterrows()
-        ]
+        return nav.to_history()[-days:]
     except Exception as e:
         print(f"Error fetching NAV history for {fund_code}: {e}")
         return []
@@ -86,30 +65,11 @@ def get_fund_holdings_list(fund_code: str) -> List[Dict]:
         List of dicts with holding information
     """
     try:
-        year = str(datetime.now().year)
-        df = ak.fund_portfolio_hold_em(symbol=fund_code, date=year)
-
-        if df is None or df.empty:
-            # Try previous year
-            df = ak.fund_portfolio_hold_em(symbol=fund_code, date=str(int(year) - 1))
-
-        if df is None or df.empty:
-            return []
-
-        # Get latest quarter data
-        if '季度' in df.columns:
-            latest_quarter = df['季度'].max()
-            df = df[df['季度'] == latest_quarter]
-
-        holdings = []
-        for _, row in df.head(10).iterrows():
-            holdings.append({
-                'code': row.get('股票代码', ''),
-                'name': row.get('股票名称', ''),
-                'weight': float(row.get('占净值比例', 0)) if row.get('占净值比例') else 0,
-            })
-
-        return holdings
+        from src.services.fund_holdings import fund_holdings_store
+        return [
+            {'code': h['code'], 'name': h['name'], 'weight': h['weight']}
+            for h in fund_holdings_store.get_holdings(fund_code, top_n=10)
+        ]
     except Exception as e:
         print(f"Error fetching holdings for {fund_code}: {e}")
         return []
@@ -10,6 +10,8 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from src.storage.db import init_db, get_stock_basic_count
 from src.scheduler.manager import scheduler_manager
+from src.jobs import job_queue
+from src.services.market_hub import market_hub
 
 from app.routers import (
     health_router, auth_router, settings_router, funds_router,
@@ -17,7 +19,7 @@ from app.routers import (
     sentiment_router, dashboard_router, widgets_router, news_router,
     recommendations_router, assistant_router, preferences_router,
     details_router, compare_router, alerts_router, admin_router,
-    generate_router, portfolios_router
+    generate_router, portfolios_router, jobs_router, stream_router
 )
 from app.static import setup_static_files
 
@@ -44,9 +46,16 @@ async def lifespan(app: FastAPI):
     else:
         print(f"[OK] Stock basic table has {stock_count} records")
 
-    # Start scheduler
+    # Start scheduler (only the elected worker runs jobs)
     scheduler_manager.start()
-    print("[OK] Scheduler started")
+    print(f"[OK] Scheduler started (leader election: {scheduler_manager.elector.holder_id})")
+
+    # Start background job workers
+    job_queue.start()
+    print("[OK] Job queue started")
+
+    # Start market data pollers (idle until a client asks for data)
+    market_hub.start()
 
     # Refresh dashboard cache in background
     try:
@@ -76,6 +85,10 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("Shutting down...")
+    market_hub.stop()
+    print("[OK] Market hub stopped")
+    job_queue.stop()
+    print("[OK] Job queue stopped")
     scheduler_manager.shutdown()
     print("[OK] Scheduler stopped")
 
@@ -126,6 +139,7 @@ def create_app() -> FastAPI:
     # Dashboard & widgets
     app.include_router(dashboard_router)
     app.include_router(widgets_router)
+    app.include_router(stream_router)
 
     # News & recommendations
     app.include_router(news_router)
@@ -149,6 +163,7 @@ def create_app() -> FastAPI:
 
     # Generation
     app.include_router(generate_router)
+    app.include_router(jobs_router)
 
     # Portfolios (largest router, includes all portfolio-related endpoints)
     app.include_router(portfolios_router)
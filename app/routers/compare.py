@@ -1,12 +1,14 @@
 """
 Comparison endpoints.
 """
+import asyncio
 from typing import List
 from fastapi import APIRouter, HTTPException, Depends
 import akshare as ak
 
 from app.models.auth import User
 from app.core.dependencies import get_current_user
+from src.services.fund_rankings import fund_ranking_snapshot
 
 router = APIRouter(prefix="/api/compare", tags=["Compare"])
 
@@ -56,37 +58,25 @@ async def compare_funds(codes: List[str], current_user: User = Depends(get_curre
         if len(codes) < 2 or len(codes) > 5:
             raise HTTPException(status_code=400, detail="Please select 2-5 funds to compare")
 
-        comparisons = []
+        # One indexed lookup in the ranking snapshot (off the event loop)
+        rankings = await asyncio.to_thread(fund_ranking_snapshot.lookup, codes)
 
+        comparisons = []
         for code in codes:
-            try:
-                # Get fund ranking data
-                rank_data = None
-                for fund_type in ["股票型", "混合型", "指数型"]:
-                    try:
-                        df = ak.fund_open_fund_rank_em(symbol=fund_type)
-                        fund_row = df[df['基金代码'] == code]
-                        if not fund_row.empty:
-                            rank_data = fund_row.iloc[0]
-                            break
-                    except:
-                        continue
-
-                if rank_data is not None:
-                    comparisons.append({
-                        "code": code,
-                        "name": rank_data.get('基金简称'),
-                        "fund_type": fund_type,
-                        "nav": rank_data.get('单位净值'),
-                        "return_1w": rank_data.get('近1周'),
-                        "return_1m": rank_data.get('近1月'),
-                        "return_3m": rank_data.get('近3月'),
-                        "return_6m": rank_data.get('近6月'),
-                        "return_1y": rank_data.get('近1年'),
-                        "return_3y": rank_data.get('近3年'),
-                    })
-            except:
-                continue
+            rank_data = rankings.get(code)
+            if rank_data is not None:
+                comparisons.append({
+                    "code": code,
+                    "name": rank_data['name'],
+                    "fund_type": rank_data['category'],
+                    "nav": rank_data['nav'],
+                    "return_1w": rank_data['return_1w'],
+                    "return_1m": rank_data['return_1m'],
+                    "return_3m": rank_data['return_3m'],
+                    "return_6m": rank_data['return_6m'],
+                    "return_1y": rank_data['return_1y'],
+                    "return_3y": rank_data['return_3y'],
+                })
 
         if not comparisons:
             raise HTTPException(status_code=404, detail="No valid funds found")
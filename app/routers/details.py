@@ -7,6 +7,9 @@ import akshare as ak
 
 from app.models.auth import User
 from app.core.dependencies import get_current_user
+from app.core.utils import sanitize_data
+from src.services.stock_detail import stock_detail_service
+from src.services.fund_holdings import fund_holdings_store, to_akshare_records
 
 router = APIRouter(prefix="/api/details", tags=["Details"])
 
@@ -15,49 +18,10 @@ router = APIRouter(prefix="/api/details", tags=["Details"])
 async def get_stock_details(code: str, current_user: User = Depends(get_current_user)):
     """Get detailed stock information."""
     try:
-        # Get basic info
-        spot_df = ak.stock_zh_a_spot_em()
-        stock_info = spot_df[spot_df['代码'] == code]
-
-        if stock_info.empty:
+        detail = await asyncio.to_thread(stock_detail_service.get_detail, code)
+        if not detail:
             raise HTTPException(status_code=404, detail="Stock not found")
-
-        stock_data = stock_info.iloc[0].to_dict()
-
-        # Get historical data (last 60 days)
-        try:
-            hist_df = ak.stock_zh_a_hist(symbol=code, period="daily", adjust="qfq")
-            if not hist_df.empty:
-                hist_df = hist_df.tail(60)
-                history = hist_df.to_dict('records')
-            else:
-                history = []
-        except:
-            history = []
-
-        # Get financial indicators
-        try:
-            financial_df = ak.stock_financial_analysis_indicator(symbol=code)
-            if not financial_df.empty:
-                financial_data = financial_df.iloc[0].to_dict()
-            else:
-                financial_data = {}
-        except:
-            financial_data = {}
-
-        return {
-            "code": code,
-            "name": stock_data.get('名称'),
-            "price": stock_data.get('最新价'),
-            "change_pct": stock_data.get('涨跌幅'),
-            "volume": stock_data.get('成交量'),
-            "turnover": stock_data.get('成交额'),
-            "pe": stock_data.get('市盈率-动态'),
-            "pb": stock_data.get('市净率'),
-            "market_cap": stock_data.get('总市值'),
-            "history": history,
-            "financial": financial_data,
-        }
+        return sanitize_data(detail)
     except HTTPException:
         raise
     except Exception as e:
@@ -96,12 +60,8 @@ async def get_fund_details(code: str, current_user: User = Depends(get_current_u
 
         # Get holdings info
         try:
-            holdings_df = ak.fund_portfolio_hold_em(symbol=code, date="")
-            if not holdings_df.empty:
-                holdings = holdings_df.head(10).to_dict('records')
-            else:
-                holdings = []
-        except:
+            holdings = to_akshare_records(await asyncio.to_thread(fund_holdings_store.get_holdings, code, 10))
+        except Exception:
             holdings = []
 
         return {
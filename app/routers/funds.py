@@ -14,7 +14,10 @@ from src.storage.db import (
     get_all_funds, upsert_fund, delete_fund, get_diagnosis_cache, save_diagnosis_cache
 )
 from src.scheduler.manager import scheduler_manager
-from src.analysis.fund import FundDiagnosis, RiskMetricsCalculator, DrawdownAnalyzer, FundComparison
+from src.analysis.fund import FundComparison
+from src.services.fund_rankings import fund_ranking_snapshot, SORT_COLUMNS
+from src.services.fund_analytics import fund_analytics
+from src.services.fund_estimation import fund_estimation_snapshot, is_trading_hours, snapshot_ttl
 
 import asyncio
 
@@ -89,6 +92,25 @@ async def delete_fund_endpoint(code: str, current_user: User = Depends(get_curre
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{code}/analytics")
+async def get_fund_analytics(
+    code: str,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Diagnosis, risk metrics and drawdown history computed together from one NAV fetch."""
+    try:
+        bundle = await asyncio.to_thread(fund_analytics.get_bundle, code, force_refresh)
+        if not bundle:
+            raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
+        return sanitize_for_json(bundle)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error calculating fund analytics for {code}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{code}/diagnosis")
 async def get_fund_diagnosis(
     code: str,
@@ -103,16 +125,10 @@ async def get_fund_diagnosis(
             if cached and cached.get('diagnosis'):
                 return cached['diagnosis']
 
-        # Fetch NAV history
-        loop = asyncio.get_running_loop()
-        nav_history = await loop.run_in_executor(None, get_fund_nav_history, code, 500)
-
-        if not nav_history:
+        bundle = await asyncio.to_thread(fund_analytics.get_bundle, code, force_refresh)
+        if not bundle:
             raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
-
-        # Calculate diagnosis
-        diagnoser = FundDiagnosis()
-        diagnosis = diagnoser.diagnose(code, nav_history)
+        diagnosis = bundle['diagnosis']
 
         # Cache result (6 hours TTL)
         if diagnosis.get('score', 0) > 0:
@@ -133,16 +149,11 @@ async def get_fund_risk_metrics(
 ):
     """Get comprehensive risk metrics for a fund."""
     try:
-        loop = asyncio.get_running_loop()
-        nav_history = await loop.run_in_executor(None, get_fund_nav_history, code, 500)
-
-        if not nav_history:
+        bundle = await asyncio.to_thread(fund_analytics.get_bundle, code)
+        if not bundle:
             raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
 
-        calculator = RiskMetricsCalculator()
-        metrics = calculator.calculate_all_metrics(nav_history)
-
-        return sanitize_for_json(metrics)
+        return sanitize_for_json(bundle['risk_metrics'])
     except HTTPException:
         raise
     except Exception as e:
@@ -158,15 +169,10 @@ async def get_fund_drawdown_history(
 ):
     """Get detailed drawdown history analysis for a fund."""
     try:
-        loop = asyncio.get_running_loop()
-        nav_history = await loop.run_in_executor(None, get_fund_nav_history, code, 500)
-
-        if not nav_history:
+        analysis = await asyncio.to_thread(fund_analytics.get_drawdowns, code, threshold)
+        if not analysis:
             raise HTTPException(status_code=404, detail=f"No NAV history found for fund {code}")
 
-        analyzer = DrawdownAnalyzer(threshold=threshold)
-        analysis = analyzer.analyze_drawdowns(nav_history)
-
         return sanitize_for_json(analysis)
     except HTTPException:
         raise
@@ -228,20 +234,11 @@ async def compare_funds_advanced(
 # ==================== Enhanced Fund Page Endpoints ====================
 
 import akshare as ak
-import time
-import threading
 from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
-# ==================== Batch Estimation Cache ====================
-# Cache for fund estimation data (shared across requests)
-_estimation_cache_lock = threading.Lock()
-_estimation_cache_data: dict = {}  # {code: {...estimation_data...}}
-_estimation_cache_timestamp: float = 0.0
-_ESTIMATION_CACHE_TTL = 60  # 60 seconds for trading hours, longer for non-trading
-
 # Load .env file first
 load_dotenv()
 
@@ -286,106 +283,6 @@ def _safe_str(val, default=""):
 import pandas as pd
 
 
-def _is_trading_hours() -> bool:
-    """Check if current time is within A-share trading hours (9:30-15:00 Beijing time)."""
-    now = datetime.now()
-    # A-share trading hours: 9:30-11:30, 13:00-15:00
-    current_time = now.hour * 60 + now.minute
-    morning_start = 9 * 60 + 30
-    morning_end = 11 * 60 + 30
-    afternoon_start = 13 * 60
-    afternoon_end = 15 * 60
-    
-    # Also check if it's a weekday
-    if now.weekday() >= 5:  # Saturday=5, Sunday=6
-        return False
-    
-    return (morning_start <= current_time <= morning_end) or (afternoon_start <= current_time <= afternoon_end)
-
-
-def _get_estimation_cache_ttl() -> int:
-    """Return appropriate cache TTL based on trading hours."""
-    if _is_trading_hours():
-        return 60  # 1 minute during trading
-    else:
-        return 3600  # 1 hour after market close (use 15:00 data)
-
-
-def _fetch_all_estimations() -> dict:
-    """
-    Fetch all fund estimations from AkShare and return as dict keyed by code.
-    This is called with caching to avoid repeated API calls.
-    """
-    global _estimation_cache_data, _estimation_cache_timestamp
-    
-    now = time.time()
-    ttl = _get_estimation_cache_ttl()
-    
-    with _estimation_cache_lock:
-        # Check if cache is still valid
-        if _estimation_cache_data and (now - _estimation_cache_timestamp) < ttl:
-            return _estimation_cache_data
-        
-        try:
-            df = ak.fund_value_estimation_em()
-            if df is None or df.empty:
-                return _estimation_cache_data  # Return old cache if fetch fails
-            
-            # AkShare returns dynamic column names with dates like:
-            # '2026-01-30-估算数据-估算值', '2026-01-30-估算数据-估算增长率', etc.
-            # We need to find columns by pattern matching
-            columns = df.columns.tolist()
-            
-            # Find the estimation columns dynamically
-            est_nav_col = None
-            est_change_col = None
-            prev_nav_col = None
-            
-            for col in columns:
-                if '估算数据-估算值' in col:
-                    est_nav_col = col
-                elif '估算数据-估算增长率' in col:
-                    est_change_col = col
-                elif col.endswith('-单位净值') and '公布数据' not in col:
-                    prev_nav_col = col
-            
-            # Extract date from column name (e.g., '2026-01-30-估算数据-估算值' -> '2026-01-30')
-            estimation_date = ''
-            if est_nav_col:
-                parts = est_nav_col.split('-估算数据')
-                if parts:
-                    estimation_date = parts[0]
-            
-            # Build dict keyed by fund code
-            result = {}
-            for _, row in df.iterrows():
-                code = str(row.get('基金代码', '')).strip()
-                if code:
-                    # Parse estimated change percentage (remove % sign)
-                    est_change_str = str(row.get(est_change_col, '0')) if est_change_col else '0'
-                    est_change = _safe_float(est_change_str.replace('%', '').strip())
-                    
-                    result[code] = {
-                        'code': code,
-                        'name': _safe_str(row.get('基金名称')),
-                        'estimated_nav': _safe_float(row.get(est_nav_col)) if est_nav_col else 0.0,
-                        'estimated_change_pct': est_change,
-                        'prev_nav': _safe_float(row.get(prev_nav_col)) if prev_nav_col else 0.0,
-                        'prev_nav_date': estimation_date,
-                        'estimation_time': estimation_date,
-                    }
-            
-            _estimation_cache_data = result
-            _estimation_cache_timestamp = now
-            print(f"[Estimation] Loaded {len(result)} funds, columns: est_nav={est_nav_col}, est_change={est_change_col}")
-            return result
-        except Exception as e:
-            print(f"Error fetching fund estimations: {e}")
-            import traceback
-            traceback.print_exc()
-            return _estimation_cache_data  # Return old cache on error
-
-
 @router.get("/batch-estimation")
 async def get_batch_fund_estimation(
     codes: str = "",  # Comma-separated fund codes
@@ -415,12 +312,12 @@ async def get_batch_fund_estimation(
         if not code_list:
             return {
                 'estimations': [],
-                'is_trading': _is_trading_hours(),
+                'is_trading': is_trading_hours(),
                 'timestamp': datetime.now().isoformat(),
             }
         
-        # Fetch all estimations (cached)
-        all_estimations = await loop.run_in_executor(None, _fetch_all_estimations)
+        # Lookups in the shared estimation snapshot
+        all_estimations = await loop.run_in_executor(None, fund_estimation_snapshot.get_many, code_list)
         
         # Filter for requested codes
         result = []
@@ -442,8 +339,8 @@ async def get_batch_fund_estimation(
         
         return {
             'estimations': result,
-            'is_trading': _is_trading_hours(),
-            'cache_ttl': _get_estimation_cache_ttl(),
+            'is_trading': is_trading_hours(),
+            'cache_ttl': snapshot_ttl(),
             'timestamp': datetime.now().isoformat(),
         }
     except Exception as e:
@@ -460,60 +357,8 @@ async def get_fund_market_overview(current_user: User = Depends(get_current_user
     Returns aggregated data about different fund categories.
     """
     try:
-        loop = asyncio.get_running_loop()
-        
-        async def fetch_category_stats(fund_type: str, display_name: str):
-            """Fetch stats for a specific fund category."""
-            try:
-                df = await loop.run_in_executor(None, lambda: ak.fund_open_fund_rank_em(symbol=fund_type))
-                if df is None or df.empty:
-                    return None
-                    
-                total_count = len(df)
-                avg_return_1m = _safe_float(df['近1月'].astype(float).mean())
-                avg_return_3m = _safe_float(df['近3月'].astype(float).mean())
-                avg_return_1y = _safe_float(df['近1年'].astype(float).mean())
-                
-                # Top performers
-                df_sorted = df.sort_values('近1月', ascending=False)
-                top_funds = []
-                for _, row in df_sorted.head(3).iterrows():
-                    top_funds.append({
-                        'code': _safe_str(row.get('基金代码')),
-                        'name': _safe_str(row.get('基金简称')),
-                        'return_1m': _safe_float(row.get('近1月')),
-                    })
-                
-                return {
-                    'category': display_name,
-                    'type_key': fund_type,
-                    'total_count': total_count,
-                    'avg_return_1m': round(avg_return_1m, 2),
-                    'avg_return_3m': round(avg_return_3m, 2),
-                    'avg_return_1y': round(avg_return_1y, 2),
-                    'top_performers': top_funds,
-                }
-            except Exception as e:
-                print(f"Error fetching {fund_type}: {e}")
-                return None
-        
-        categories = [
-            ("股票型", "股票型基金"),
-            ("混合型", "混合型基金"),
-            ("债券型", "债券型基金"),
-            ("指数型", "指数型基金"),
-            ("QDII", "QDII基金"),
-            ("FOF", "FOF基金"),
-        ]
-        
-        tasks = [fetch_category_stats(t, n) for t, n in categories]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        overview = []
-        for r in results:
-            if isinstance(r, dict):
-                overview.append(r)
-        
+        overview = await asyncio.to_thread(fund_ranking_snapshot.overview)
+
         return {
             'timestamp': datetime.now().isoformat(),
             'categories': overview,
@@ -539,43 +384,36 @@ async def get_fund_ranking(
         limit: Number of results to return
     """
     try:
-        loop = asyncio.get_running_loop()
-        df = await loop.run_in_executor(None, lambda: ak.fund_open_fund_rank_em(symbol=fund_type))
-        
-        if df is None or df.empty:
-            return {'funds': [], 'total': 0}
-        
         # Validate sort column
-        valid_sort_cols = ['近1周', '近1月', '近3月', '近6月', '近1年', '近3年']
-        if sort_by not in valid_sort_cols:
+        if sort_by not in SORT_COLUMNS:
             sort_by = '近1月'
-        
-        # Convert sort column to numeric and sort
-        df[sort_by] = pd.to_numeric(df[sort_by], errors='coerce')
-        df_sorted = df.dropna(subset=[sort_by]).sort_values(sort_by, ascending=False)
-        
+
+        rows, total = await asyncio.to_thread(fund_ranking_snapshot.top, fund_type, sort_by, limit)
+        if not total:
+            return {'funds': [], 'total': 0}
+
         funds = []
-        for idx, row in df_sorted.head(limit).iterrows():
+        for row in rows:
             funds.append({
                 'rank': len(funds) + 1,
-                'code': _safe_str(row.get('基金代码')),
-                'name': _safe_str(row.get('基金简称')),
-                'nav': _safe_float(row.get('单位净值')),
-                'acc_nav': _safe_float(row.get('累计净值')),
-                'return_1w': _safe_float(row.get('近1周')),
-                'return_1m': _safe_float(row.get('近1月')),
-                'return_3m': _safe_float(row.get('近3月')),
-                'return_6m': _safe_float(row.get('近6月')),
-                'return_1y': _safe_float(row.get('近1年')),
-                'return_3y': _safe_float(row.get('近3年')),
-                'fee': _safe_str(row.get('手续费')),
+                'code': row['code'],
+                'name': row['name'] or '',
+                'nav': row['nav'],
+                'acc_nav': row['acc_nav'],
+                'return_1w': row['return_1w'],
+                'return_1m': row['return_1m'],
+                'return_3m': row['return_3m'],
+                'return_6m': row['return_6m'],
+                'return_1y': row['return_1y'],
+                'return_3y': row['return_3y'],
+                'fee': row['fee'] or '',
             })
-        
+
         return {
             'fund_type': fund_type,
             'sort_by': sort_by,
             'funds': funds,
-            'total': len(df),
+            'total': total,
         }
     except Exception as e:
         print(f"Error in fund ranking: {e}")
@@ -636,53 +474,12 @@ async def get_fund_estimation(
     Get intraday fund NAV estimation.
     """
     try:
-        loop = asyncio.get_running_loop()
-        df = await loop.run_in_executor(None, ak.fund_value_estimation_em)
-        
-        if df is None or df.empty:
-            raise HTTPException(status_code=404, detail="Estimation data not available")
-        
-        # Find the specific fund
-        fund_row = df[df['基金代码'] == code]
-        
-        if fund_row.empty:
+        estimation = await asyncio.to_thread(fund_estimation_snapshot.get, code)
+        if not estimation:
             raise HTTPException(status_code=404, detail=f"Estimation not found for fund {code}")
-        
-        row = fund_row.iloc[0]
-        
-        # AkShare returns dynamic column names with dates
-        columns = df.columns.tolist()
-        est_nav_col = None
-        est_change_col = None
-        prev_nav_col = None
-        
-        for col in columns:
-            if '估算数据-估算值' in col:
-                est_nav_col = col
-            elif '估算数据-估算增长率' in col:
-                est_change_col = col
-            elif col.endswith('-单位净值') and '公布数据' not in col:
-                prev_nav_col = col
-        
-        # Extract date from column name
-        estimation_date = ''
-        if est_nav_col:
-            parts = est_nav_col.split('-估算数据')
-            if parts:
-                estimation_date = parts[0]
-        
-        # Parse estimated change percentage (remove % sign)
-        est_change_str = str(row.get(est_change_col, '0')) if est_change_col else '0'
-        est_change = _safe_float(est_change_str.replace('%', '').strip())
-        
+
         return {
-            'code': code,
-            'name': _safe_str(row.get('基金名称')),
-            'estimated_nav': _safe_float(row.get(est_nav_col)) if est_nav_col else 0.0,
-            'estimated_change_pct': est_change,
-            'prev_nav': _safe_float(row.get(prev_nav_col)) if prev_nav_col else 0.0,
-            'prev_nav_date': estimation_date,
-            'estimation_time': estimation_date,
+            **estimation,
             'timestamp': datetime.now().isoformat(),
         }
     except HTTPException:
@@ -1053,32 +850,26 @@ async def get_fund_full_detail(
             return await loop.run_in_executor(None, get_fund_holdings_list, code)
         
         async def fetch_ranking_data():
-            """Get fund ranking data from market."""
+            """Get fund ranking data from the ranking snapshot."""
             try:
-                for fund_type in ["股票型", "混合型", "指数型", "债券型", "QDII", "FOF"]:
-                    df = await loop.run_in_executor(
-                        None, 
-                        lambda ft=fund_type: ak.fund_open_fund_rank_em(symbol=ft)
-                    )
-                    if df is not None and not df.empty:
-                        fund_row = df[df['基金代码'] == code]
-                        if not fund_row.empty:
-                            row = fund_row.iloc[0]
-                            return {
-                                'fund_type': fund_type,
-                                'nav': _safe_float(row.get('单位净值')),
-                                'acc_nav': _safe_float(row.get('累计净值')),
-                                'return_1w': _safe_float(row.get('近1周')),
-                                'return_1m': _safe_float(row.get('近1月')),
-                                'return_3m': _safe_float(row.get('近3月')),
-                                'return_6m': _safe_float(row.get('近6月')),
-                                'return_1y': _safe_float(row.get('近1年')),
-                                'return_2y': _safe_float(row.get('近2年')),
-                                'return_3y': _safe_float(row.get('近3年')),
-                                'return_ytd': _safe_float(row.get('今年来')),
-                                'return_since_inception': _safe_float(row.get('成立来')),
-                                'fee': _safe_str(row.get('手续费')),
-                            }
+                rankings = await loop.run_in_executor(None, fund_ranking_snapshot.lookup, [code])
+                row = rankings.get(code)
+                if row:
+                    return {
+                        'fund_type': row['category'],
+                        'nav': row['nav'],
+                        'acc_nav': row['acc_nav'],
+                        'return_1w': row['return_1w'],
+                        'return_1m': row['return_1m'],
+                        'return_3m': row['return_3m'],
+                        'return_6m': row['return_6m'],
+                        'return_1y': row['return_1y'],
+                        'return_2y': row['return_2y'],
+                        'return_3y': row['return_3y'],
+                        'return_ytd': row['return_ytd'],
+                        'return_since_inception': row['return_since_inception'],
+                        'fee': row['fee'] or '',
+                    }
             except Exception as e:
                 print(f"Error fetching ranking data: {e}")
             return None
@@ -1238,8 +1029,8 @@ async def get_fund_full_detail(
         risk_metrics = {}
         if nav_history and len(nav_history) >= 20:
             try:
-                calculator = RiskMetricsCalculator()
-                risk_metrics = calculator.calculate_all_metrics(nav_history)
+                bundle = await asyncio.to_thread(fund_analytics.get_bundle, code)
+                risk_metrics = bundle['risk_metrics'] if bundle else {}
             except Exception as e:
                 print(f"Error calculating risk metrics: {e}")
         
@@ -1,14 +1,12 @@
 """
 Generate report endpoints.
 """
-import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 
 from app.models.settings import GenerateRequest
 from app.models.auth import User
 from app.core.dependencies import get_current_user
-from src.storage.db import get_active_funds
-from src.scheduler.manager import scheduler_manager
+from src.jobs import job_queue, PRIORITY_HIGH, PRIORITY_NORMAL
 
 router = APIRouter(prefix="/api/generate", tags=["Generate"])
 
@@ -19,28 +17,31 @@ async def generate_report_endpoint(
     request: GenerateRequest = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Generate pre-market or post-market report."""
+    """
+    Queue pre-market or post-market report generation.
+
+    Returns a job_id immediately. Poll GET /api/jobs/{job_id} for progress.
+    """
     if mode not in ["pre", "post"]:
         raise HTTPException(status_code=400, detail="Invalid mode. Use 'pre' or 'post'.")
 
     fund_code = request.fund_code if request else None
 
     try:
-        print(f"Generating {mode}-market report for User {current_user.id}... (Fund: {fund_code if fund_code else 'ALL'})")
-
-        if fund_code:
-            await asyncio.to_thread(scheduler_manager.run_analysis_task, fund_code, mode, user_id=current_user.id)
-            return {"status": "success", "message": f"Task triggered for {fund_code}"}
-        else:
-            funds = get_active_funds(user_id=current_user.id)
-            results = []
-            for fund in funds:
-                try:
-                    await asyncio.to_thread(scheduler_manager.run_analysis_task, fund['code'], mode, user_id=current_user.id)
-                    results.append(fund['code'])
-                except:
-                    pass
-            return {"status": "success", "message": f"Triggered tasks for {len(results)} funds"}
+        print(f"Queueing {mode}-market report for User {current_user.id}... (Fund: {fund_code if fund_code else 'ALL'})")
+
+        # Single-fund reports are interactive; full runs can wait behind them
+        job_id, created = job_queue.submit(
+            'report_generation',
+            {'mode': mode, 'fund_code': fund_code},
+            user_id=current_user.id,
+            priority=PRIORITY_HIGH if fund_code else PRIORITY_NORMAL
+        )
+        return {
+            "status": "queued" if created else "already_queued",
+            "job_id": job_id,
+            "message": f"Task queued for {fund_code if fund_code else 'all funds'}"
+        }
 
     except Exception as e:
         import traceback
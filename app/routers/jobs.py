@@ -0,0 +1,56 @@
+"""
+Background job endpoints.
+"""
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.models.auth import User
+from app.core.dependencies import get_current_user
+from app.core.utils import sanitize_for_json
+from src.jobs import job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+def _get_owned_job(job_id: str, user: User) -> dict:
+    """Load a job visible to the user (their own, or a system job, read-only)."""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("user_id") not in (None, user.id):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return job
+
+
+@router.get("")
+async def list_jobs_endpoint(
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user)
+):
+    """List the current user's jobs, newest first."""
+    jobs = job_queue.list(user_id=current_user.id, status=status, job_type=job_type, limit=min(limit, 200))
+    return sanitize_for_json(jobs)
+
+
+@router.get("/{job_id}")
+async def get_job_endpoint(job_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Get a job's status, progress and result.
+
+    - status: "queued", "running", "completed", "failed" or "cancelled"
+    - result: Only present once completed
+    """
+    return sanitize_for_json(_get_owned_job(job_id, current_user))
+
+
+@router.delete("/{job_id}")
+async def cancel_job_endpoint(job_id: str, current_user: User = Depends(get_current_user)):
+    """Cancel a queued job, or ask a running job to stop (own jobs only)."""
+    job = _get_owned_job(job_id, current_user)
+    if job.get("user_id") != current_user.id:
+        # System jobs are readable but only cancellable by their owner
+        raise HTTPException(status_code=403, detail="Access denied")
+    status = job_queue.cancel(job_id, user_id=current_user.id)
+    return {"job_id": job_id, "status": status}
@@ -14,9 +14,10 @@ import pandas as pd
 from app.core.config import MARKET_FUNDS_CACHE, MARKET_STOCKS_CACHE, CONFIG_DIR
 from app.core.cache import indices_cache
 from app.core.utils import sanitize_data
-from src.data_sources.akshare_api import search_funds, get_stock_realtime_quote, get_stock_realtime_quote_min, get_stock_history
+from src.data_sources.akshare_api import search_funds, get_stock_realtime_quote, get_stock_realtime_quote_min, get_stock_history, get_global_index_spot
 from src.data_sources.tushare_client import search_funds_tushare, _get_tushare_pro
-from src.storage.db import search_stock_basic, get_stock_basic_count
+from src.storage.db import search_stock_basic, get_stock_basic_count, search_fund_basic, get_fund_basic_count
+from src.services.market_hub import market_hub
 
 router = APIRouter(tags=["Market"])
 
@@ -44,6 +45,12 @@ async def search_market_funds_alt(query: str = ""):
         return []
 
     try:
+        # Prefer the local fund_basic index (synced from TuShare)
+        if get_fund_basic_count() > 0:
+            return [
+                {'code': f['code'], 'name': f['name'], 'type': f['fund_type'] or '', 'ts_code': f['ts_code']}
+                for f in search_fund_basic(query, limit=50)
+            ]
         results = search_funds_tushare(query, limit=50)
         return results
     except Exception as e:
@@ -87,7 +94,12 @@ def get_market_indices():
     now_dt = datetime.now()
     current_hm = now_dt.hour * 100 + now_dt.minute
 
-    # Check cache first
+    # Shared snapshot kept warm by the market hub
+    hub_data = market_hub.get('indices')
+    if hub_data:
+        return sanitize_data(hub_data)
+
+    # Check cache
     cached = indices_cache.get()
     if cached:
         return cached
@@ -107,27 +119,7 @@ def get_market_indices():
 
     # Fallback to AkShare
     try:
-        indices_df = ak.index_global_spot_em()
-
-        target_names = [
-            "上证指数", "深证成指", "创业板指",
-            "恒生指数", "日经225", "纳斯达克", "标普500"
-        ]
-
-        if not indices_df.empty:
-            filtered_df = indices_df[indices_df['名称'].isin(target_names)]
-
-            results = []
-            for _, row in filtered_df.iterrows():
-                results.append({
-                    "name": row['名称'],
-                    "code": str(row.get('代码', '')),
-                    "price": float(row['最新价']),
-                    "change_pct": float(row['涨跌幅']),
-                    "change_val": float(row['涨跌额'])
-                })
-        else:
-            results = []
+        results = get_global_index_spot()
 
         data = sanitize_data(results)
 
@@ -336,10 +328,9 @@ async def get_fund_market_details(code: str):
 
         portfolio = []
         try:
-            df_hold = ak.fund_portfolio_hold_em(symbol=code)
-            if df_hold is not None and not df_hold.empty:
-                portfolio = df_hold.head(10).to_dict(orient='records')
-        except:
+            from src.services.fund_holdings import fund_holdings_store, to_akshare_records
+            portfolio = to_akshare_records(await asyncio.to_thread(fund_holdings_store.get_holdings, code, 10))
+        except Exception:
             pass
 
         return sanitize_data({
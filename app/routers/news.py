@@ -113,6 +113,27 @@ async def search_news_research(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/search")
+async def search_news(
+    q: str,
+    category: Optional[str] = None,
+    limit: int = 30,
+    current_user: User = Depends(get_current_user)
+):
+    """Full-text search over recently fetched news titles and content."""
+    try:
+        results = await asyncio.to_thread(
+            news_service.search_news,
+            query=q,
+            category=category,
+            limit=min(limit, 100)
+        )
+        return {"results": sanitize_for_json(results), "total": len(results)}
+    except Exception as e:
+        print(f"Error searching news: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/hot")
 async def get_hot_news(limit: int = 30):
     """Get hot/trending news (no auth required)."""
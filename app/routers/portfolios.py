@@ -215,7 +215,7 @@ async def get_legacy_portfolio_summary(current_user: User = Depends(get_current_
 async def get_legacy_portfolio_overlap(current_user: User = Depends(get_current_user)):
     """Analyze holdings overlap (legacy endpoint)."""
     try:
-        from app.core.helpers import get_fund_holdings_list
+        from src.services.fund_holdings import fund_holdings_store
 
         positions = get_user_positions(current_user.id)
 
@@ -252,12 +252,11 @@ async def get_legacy_portfolio_overlap(current_user: User = Depends(get_current_
         for fund_code, value in fund_values.items():
             position_weights[fund_code] = value / total_value if total_value > 0 else 0
 
-            try:
-                holdings = await loop.run_in_executor(None, get_fund_holdings_list, fund_code)
-                if holdings:
-                    fund_holdings[fund_code] = holdings
-            except:
-                pass
+        # One store read for all funds (holdings are re-downloaded only when a new quarter is due)
+        try:
+            fund_holdings = await loop.run_in_executor(None, fund_holdings_store.get_many, list(fund_values), 10)
+        except Exception as e:
+            print(f"Error fetching portfolio fund holdings: {e}")
 
         if not fund_holdings:
             return {"message": "No holdings data available for portfolio funds"}
@@ -2087,6 +2086,82 @@ async def get_daily_returns_detail(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/portfolios/{portfolio_id}/intraday-valuation")
+async def get_intraday_valuation(
+    portfolio_id: int,
+    current_user: User = Depends(get_current_user)
+):
+    """Estimate today's portfolio value and P&L from intraday fund estimates and stock quotes."""
+    try:
+        from src.services.fund_estimation import fund_estimation_snapshot, is_trading_hours
+        from src.services.quote_store import quote_store
+
+        portfolio = get_portfolio_by_id(portfolio_id, current_user.id)
+        if not portfolio:
+            raise HTTPException(status_code=404, detail="Portfolio not found")
+
+        positions = get_portfolio_positions(portfolio_id, current_user.id)
+        fund_codes = [p['asset_code'] for p in positions if p.get('asset_type') == 'fund']
+        stock_codes = [p['asset_code'] for p in positions if p.get('asset_type') != 'fund']
+
+        # One snapshot lookup and one batch quote call for the whole portfolio
+        estimations, quotes = await asyncio.gather(
+            asyncio.to_thread(fund_estimation_snapshot.get_many, fund_codes),
+            asyncio.to_thread(quote_store.get_quotes, stock_codes),
+        )
+
+        items = []
+        total_value = 0.0
+        total_prev_value = 0.0
+        for pos in positions:
+            code = pos.get('asset_code')
+            shares = float(pos.get('total_shares') or 0)
+            if pos.get('asset_type') == 'fund':
+                est = estimations.get(code) or {}
+                price, prev_price = est.get('estimated_nav'), est.get('prev_nav')
+                change_pct = est.get('estimated_change_pct')
+            else:
+                quote = quotes.get(code) or {}
+                price, prev_price = quote.get('price'), quote.get('prev_close')
+                change_pct = quote.get('change_pct')
+
+            available = bool(price) and bool(prev_price)
+            value = shares * price if available else None
+            pnl = shares * (price - prev_price) if available else None
+            if available:
+                total_value += value
+                total_prev_value += shares * prev_price
+
+            items.append({
+                'asset_code': code,
+                'asset_name': pos.get('asset_name', code),
+                'asset_type': pos.get('asset_type'),
+                'shares': shares,
+                'price': round(price, 4) if available else None,
+                'prev_price': round(prev_price, 4) if available else None,
+                'change_pct': round(change_pct, 2) if available and change_pct is not None else None,
+                'estimated_value': round(value, 2) if value is not None else None,
+                'estimated_pnl': round(pnl, 2) if pnl is not None else None,
+                'not_available': not available,
+            })
+
+        total_pnl = total_value - total_prev_value
+        return sanitize_for_json({
+            "portfolio_id": portfolio_id,
+            "estimated_value": round(total_value, 2),
+            "estimated_pnl": round(total_pnl, 2),
+            "estimated_pnl_pct": round(total_pnl / total_prev_value * 100, 2) if total_prev_value > 0 else 0,
+            "positions": items,
+            "is_trading": is_trading_hours(),
+            "timestamp": datetime.now().isoformat(),
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting intraday valuation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/api/portfolios/{portfolio_id}/returns/explain")
 async def explain_daily_returns(
     portfolio_id: int,
@@ -27,18 +27,16 @@ async def generate_recommendations(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Generate AI investment recommendations using quantitative factor-based engine.
+    Queue AI investment recommendations using quantitative factor-based engine.
 
     - mode: "short" (7+ days), "long" (3+ months), or "all"
     - stock_limit: Maximum number of stocks to recommend
     - fund_limit: Maximum number of funds to recommend
     - use_explanations: Whether to use LLM to generate explanations
-    """
-    import time as _time
-    import asyncio
-    request_start = _time.time()
-    print(f"[Router] /generate endpoint called at {request_start}")
 
+    Returns a job_id immediately. Poll GET /api/jobs/{job_id}; the
+    recommendations are in "result" once the job is completed.
+    """
     mode = request.mode if request else "all"
     stock_limit = request.stock_limit if request else 20
     fund_limit = request.fund_limit if request else 20
@@ -48,59 +46,22 @@ async def generate_recommendations(
         raise HTTPException(status_code=400, detail="Invalid mode. Use 'short', 'long', or 'all'.")
 
     try:
-        from src.analysis.recommendation import RecommendationEngine
-        from src.storage.db import get_user_preferences
-
-        # Load user preferences
-        user_preferences = None
-        try:
-            prefs_data = get_user_preferences(current_user.id)
-            if prefs_data and prefs_data.get('preferences'):
-                user_preferences = prefs_data.get('preferences')
-        except:
-            pass
-
-        # Define synchronous engine work
-        def run_engine():
-            engine = RecommendationEngine(use_llm_explanations=use_explanations)
-            return engine.generate_recommendations(
-                mode=mode,
-                stock_limit=stock_limit,
-                fund_limit=fund_limit,
-                user_preferences=user_preferences
-            )
-
-        # Run engine in thread pool to avoid blocking event loop
-        print(f"[Router] Starting engine in thread pool...")
-        engine_start = _time.time()
-        results = await asyncio.to_thread(run_engine)
-        print(f"[Router] Engine completed in {_time.time() - engine_start:.2f}s")
-
-        # Sanitize results
-        print(f"[Router] Sanitizing results...")
-        sanitize_start = _time.time()
-        results = sanitize_for_json(results)
-        print(f"[Router] Sanitize completed in {_time.time() - sanitize_start:.2f}s")
-
-        # Save to database for persistence (also in thread pool)
-        print(f"[Router] Saving to database...")
-        save_start = _time.time()
-        from src.storage.db import save_recommendation_report
-
-        def save_to_db():
-            save_recommendation_report({
-                "mode": mode,
-                "recommendations_json": results,
-                "market_context": results.get("metadata", {})
-            }, user_id=current_user.id)
-
-        await asyncio.to_thread(save_to_db)
-        print(f"[Router] Database save completed in {_time.time() - save_start:.2f}s")
-
-        print(f"[Router] Total request time: {_time.time() - request_start:.2f}s")
+        from src.jobs import job_queue, PRIORITY_HIGH
+
+        job_id, created = job_queue.submit(
+            'recommendation',
+            {
+                'mode': mode,
+                'stock_limit': stock_limit,
+                'fund_limit': fund_limit,
+                'use_explanations': use_explanations,
+            },
+            user_id=current_user.id,
+            priority=PRIORITY_HIGH
+        )
         return {
-            "status": "completed",
-            "result": results
+            "status": "queued" if created else "already_queued",
+            "job_id": job_id
         }
 
     except Exception as e:
@@ -362,6 +323,80 @@ async def get_recommendation_performance(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/performance/evaluate")
+async def trigger_performance_evaluation(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Manually evaluate pending recommendations against realized prices.
+
+    This is normally run automatically at 18:00 on trading days.
+    """
+    try:
+        from src.jobs import job_queue, PRIORITY_LOW
+
+        # System-wide job: deduplicated across users
+        job_id, created = job_queue.submit('performance_evaluation', {}, priority=PRIORITY_LOW)
+
+        return {
+            "status": "started" if created else "already_queued",
+            "job_id": job_id,
+            "message": "Performance evaluation queued"
+        }
+
+    except Exception as e:
+        print(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/backtest")
+async def backtest_strategy(
+    asset_type: str = "stock",
+    score_type: str = "short_term",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    top_n: int = 10,
+    horizon: Optional[int] = None,
+    rebalance_every: Optional[int] = None,
+    min_score: Optional[float] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Walk-forward backtest of stored strategy scores.
+
+    - asset_type: "stock" or "fund"
+    - score_type: "short_term" or "long_term"
+    - start_date / end_date: Score date range (YYYY-MM-DD)
+    - horizon: Holding period in trading days
+    - rebalance_every: Trading days between rebalances (default: horizon)
+    """
+    try:
+        import asyncio
+        from src.analysis.recommendation.performance.backtest import walk_forward_backtester
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: walk_forward_backtester.run(
+                asset_type=asset_type,
+                score_type=score_type,
+                start_date=start_date,
+                end_date=end_date,
+                top_n=top_n,
+                horizon=horizon,
+                rebalance_every=rebalance_every,
+                min_score=min_score,
+            )
+        )
+        return sanitize_for_json(result)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/compute-factors")
 async def trigger_factor_computation(
     current_user: User = Depends(get_current_user)
@@ -377,6 +412,7 @@ async def trigger_factor_computation(
     try:
         from src.analysis.recommendation.factor_store.daily_computer import daily_computer
         from src.data_sources.tushare_client import get_latest_trade_date
+        from src.jobs import job_queue, PRIORITY_LOW
 
         if daily_computer.is_running:
             return {
@@ -386,18 +422,16 @@ async def trigger_factor_computation(
 
         trade_date = get_latest_trade_date()
 
-        # Start computation in background
-        import threading
-        thread = threading.Thread(
-            target=daily_computer.compute_all_stock_factors,
-            args=(trade_date,)
+        # System-wide job: deduplicated across users
+        job_id, created = job_queue.submit(
+            'factor_computation', {'trade_date': trade_date}, priority=PRIORITY_LOW
         )
-        thread.start()
 
         return {
-            "status": "started",
+            "status": "started" if created else "already_queued",
+            "job_id": job_id,
             "trade_date": trade_date,
-            "message": "Factor computation started in background"
+            "message": "Factor computation queued"
         }
 
     except Exception as e:
@@ -413,11 +447,13 @@ async def get_factor_computation_status(
     try:
         from src.analysis.recommendation.factor_store.daily_computer import daily_computer
         from src.analysis.recommendation.factor_store.cache import factor_cache
+        from src.analysis.recommendation.factor_store.rate_limiter import tushare_rate_limiter
 
         return {
             "is_running": daily_computer.is_running,
             "progress": daily_computer.progress,
-            "cache_stats": factor_cache.get_stats()
+            "cache_stats": factor_cache.get_stats(),
+            "rate_limiter_stats": tushare_rate_limiter.get_stats()
         }
 
     except Exception as e:
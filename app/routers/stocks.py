@@ -7,7 +7,6 @@ import asyncio
 import os
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, HTTPException, Depends
 import akshare as ak
 import pandas as pd
@@ -18,9 +17,9 @@ from app.core.dependencies import get_current_user, get_user_report_dir
 from app.core.cache import stock_feature_cache
 from app.core.utils import sanitize_for_json, sanitize_data
 from src.storage.db import get_all_stocks, upsert_stock, delete_stock
+from src.services.quote_store import quote_store
 from src.data_sources.akshare_api import (
     get_stock_realtime_quote,
-    get_stock_realtime_quote_min,
     get_market_activity,
     get_hot_stocks,
     get_limit_up_pool,
@@ -48,129 +47,17 @@ async def get_stocks_endpoint(current_user: User = Depends(get_current_user)):
         if not stocks:
             return []
 
-        # Try tushare first, then fall back to akshare
-        quotes_lookup = {}
-        use_akshare_fallback = False
+        # Per-symbol quote store: cache hits plus one bulk fill for the misses
+        quotes = await asyncio.to_thread(quote_store.get_quotes, [s['code'] for s in stocks])
 
-        try:
-            from src.data_sources.tushare_client import get_realtime_quotes
-
-            # Get all stock codes
-            stock_codes = [s['code'] for s in stocks]
-
-            # Fetch realtime quotes in batch
-            quotes_df = await asyncio.to_thread(get_realtime_quotes, stock_codes)
-
-            # Build a lookup dict for quick access
-            if quotes_df is not None and not quotes_df.empty:
-                for _, row in quotes_df.iterrows():
-                    # The ts_code might have suffix, extract plain code
-                    ts_code = str(row.get('ts_code', ''))
-                    plain_code = ts_code.split('.')[0] if '.' in ts_code else ts_code
-                    quotes_lookup[plain_code] = row
-
-            # If tushare returned no data, use akshare fallback
-            if not quotes_lookup:
-                use_akshare_fallback = True
-
-        except ImportError:
-            # TuShare not installed, use akshare
-            use_akshare_fallback = True
-        except BaseException:
-            # TuShare has known issues, silently fall back to akshare
-            use_akshare_fallback = True
-
-        # Use akshare fallback if needed
-        if use_akshare_fallback:
-            # 预先获取所有股票的昨收价（从 TuShare daily）
-            prev_close_map = {}
-            try:
-                pro = _get_tushare_pro()
-                end_date = datetime.now().strftime('%Y%m%d')
-                start_date = (datetime.now() - timedelta(days=10)).strftime('%Y%m%d')
-                
-                def fetch_prev_close(code):
-                    ts_code = f"{code}.SH" if code.startswith('6') else f"{code}.SZ"
-                    try:
-                        df_daily = pro.daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
-                        if df_daily is not None and not df_daily.empty:
-                            df_daily = df_daily.sort_values('trade_date', ascending=False)
-                            return (code, float(df_daily.iloc[0]['pre_close']))
-                    except Exception:
-                        pass
-                    return (code, None)
-                
-                # 并行获取昨收
-                with ThreadPoolExecutor(max_workers=10) as executor:
-                    results_prev = list(executor.map(fetch_prev_close, [s['code'] for s in stocks]))
-                    for code, prev_close in results_prev:
-                        if prev_close:
-                            prev_close_map[code] = prev_close
-                            
-            except Exception as e:
-                print(f"Failed to fetch prev_close from TuShare: {e}")
-
-            def fetch_single_quote(stock):
-                item = dict(stock)
-                code = stock['code']
-                try:
-                    # 优先使用分钟线获取最新价（更稳定）
-                    quote = get_stock_realtime_quote_min(code)
-                    
-                    # 如果分钟线没数据，降级到原方法
-                    if not quote or not quote.get('最新价'):
-                        quote = get_stock_realtime_quote(code)
-                    
-                    if quote:
-                        price = quote.get('最新价')
-                        volume = quote.get('成交量')
-
-                        if price is not None:
-                            item['price'] = float(price)
-                            
-                            # 使用预获取的昨收计算涨跌幅
-                            prev_close = prev_close_map.get(code)
-                            if prev_close and prev_close > 0:
-                                change_pct = ((float(price) - prev_close) / prev_close) * 100
-                                item['change_pct'] = round(change_pct, 2)
-                            elif quote.get('涨跌幅') is not None:
-                                item['change_pct'] = float(quote.get('涨跌幅'))
-                                
-                        if volume is not None:
-                            item['volume'] = float(volume)
-                except Exception as e:
-                    print(f"Error fetching quote for {code}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                return StockItem(**item)
-
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                results = await loop.run_in_executor(None, lambda: list(executor.map(fetch_single_quote, stocks)))
-
-            return results
-
-        # Use tushare data
         results = []
         for stock in stocks:
             item = dict(stock)
-            code = stock['code']
-
-            if code in quotes_lookup:
-                row = quotes_lookup[code]
-                # Map tushare fields to our schema
-                price = row.get('price')
-                pct_chg = row.get('pct_chg')
-                vol = row.get('vol')
-
-                if price is not None and pd.notna(price):
-                    item['price'] = float(price)
-                if pct_chg is not None and pd.notna(pct_chg):
-                    item['change_pct'] = float(pct_chg)
-                if vol is not None and pd.notna(vol):
-                    # tushare vol is in shares, keep as is
-                    item['volume'] = float(vol)
-
+            quote = quotes.get(stock['code'])
+            if quote:
+                item['price'] = quote['price']
+                item['change_pct'] = quote['change_pct']
+                item['volume'] = quote.get('volume')
             results.append(StockItem(**item))
 
         return results
@@ -1014,14 +901,8 @@ async def get_batch_stock_quotes(codes: str, current_user: User = Depends(get_cu
         if len(code_list) > 50:
             code_list = code_list[:50]
 
-        results = []
-        for code in code_list:
-            try:
-                quote = await asyncio.to_thread(get_stock_realtime_quote, code)
-                if quote:
-                    results.append(quote)
-            except:
-                pass
+        quotes = await asyncio.to_thread(quote_store.get_quotes, code_list)
+        results = [quote_store.as_spot_row(quote) for quote in quotes.values()]
 
         return sanitize_data({"quotes": results})
     except Exception as e:
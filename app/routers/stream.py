@@ -0,0 +1,144 @@
+"""
+Live market-data push endpoints (SSE and WebSocket), backed by the market hub.
+"""
+import json
+import time
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.models.auth import User
+from app.core.dependencies import get_current_user
+from app.core.utils import sanitize_data
+from src.services.market_hub import market_hub
+from src.storage.db import get_all_stocks
+
+router = APIRouter(prefix="/api/stream", tags=["Stream"])
+
+# How often a connection checks the hub for changes
+PUSH_INTERVAL_SECONDS = 1.0
+# SSE comment sent on idle connections so proxies keep them open
+HEARTBEAT_SECONDS = 15
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+async def _user_from_token(token: Optional[str]) -> Optional[User]:
+    """
+    Resolve a bearer token passed as a query parameter.
+
+    EventSource and browser WebSockets cannot set an Authorization header.
+    """
+    if not token:
+        return None
+    try:
+        return await get_current_user(token)
+    except HTTPException:
+        return None
+
+
+def _watchlist_codes(user: User) -> List[str]:
+    return [s['code'] for s in get_all_stocks(user_id=user.id)]
+
+
+@router.get("/market")
+async def stream_market(
+    request: Request,
+    feeds: str = "",
+    symbols: str = "",
+    watchlist: bool = False,
+    token: Optional[str] = None
+):
+    """
+    Server-Sent Events stream of market data.
+
+    - feeds: Comma-separated widget feeds (indices, northbound_flow, industry_flow, sector_performance)
+    - symbols: Comma-separated stock codes to receive quotes for
+    - watchlist: Also receive quotes for the user's watchlist (requires token)
+
+    Each event's name is the feed; "quotes" events carry only changed symbols.
+    """
+    codes = _split(symbols)
+    if watchlist:
+        user = await _user_from_token(token)
+        if not user:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        codes += await asyncio.to_thread(_watchlist_codes, user)
+
+    subscription = market_hub.subscribe(feeds=_split(feeds), symbols=codes)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            last_sent = time.time()
+            while not await request.is_disconnected():
+                for event, payload in subscription.poll():
+                    data = json.dumps(sanitize_data(payload), ensure_ascii=False)
+                    yield f"event: {event}\ndata: {data}\n\n"
+                    last_sent = time.time()
+                if time.time() - last_sent > HEARTBEAT_SECONDS:
+                    yield ": ping\n\n"
+                    last_sent = time.time()
+                await asyncio.sleep(PUSH_INTERVAL_SECONDS)
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def stream_market_ws(websocket: WebSocket, token: Optional[str] = None):
+    """
+    WebSocket stream of market data.
+
+    Client messages (JSON) replace the subscription:
+        {"feeds": ["indices"], "symbols": ["600519"], "watchlist": true}
+
+    Server messages: {"type": <feed>, "data": ...} for widget feeds,
+    {"type": "quotes", "quotes": {code: quote}} for changed symbols.
+    """
+    await websocket.accept()
+    user = await _user_from_token(token)
+    subscription = market_hub.subscribe()
+
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(), timeout=PUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                message = None
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Invalid JSON"})
+                continue
+
+            if isinstance(message, dict):
+                codes = [str(s) for s in message.get("symbols") or []]
+                if message.get("watchlist"):
+                    if user:
+                        codes += await asyncio.to_thread(_watchlist_codes, user)
+                    else:
+                        await websocket.send_json({"type": "error", "detail": "Watchlist requires a token"})
+                subscription.update(feeds=message.get("feeds") or [], symbols=codes)
+                await websocket.send_json({
+                    "type": "subscribed", "feeds": subscription.feeds, "symbols": subscription.symbols
+                })
+
+            for event, payload in subscription.poll():
+                await websocket.send_json(sanitize_data({"type": event, **payload}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
+
+
+@router.get("/status")
+async def stream_status(current_user: User = Depends(get_current_user)):
+    """Market hub status: subscribers and per-feed snapshot age."""
+    return market_hub.get_stats()
@@ -9,6 +9,7 @@ from app.models.auth import User
 from app.core.dependencies import get_current_user
 from app.core.utils import sanitize_data
 from src.analysis.widget_service import widget_service
+from src.services.market_hub import market_hub
 from src.storage.db import get_all_stocks
 
 router = APIRouter(prefix="/api/widgets", tags=["Widgets"])
@@ -18,7 +19,10 @@ router = APIRouter(prefix="/api/widgets", tags=["Widgets"])
 async def get_widget_northbound_flow(days: int = 5):
     """Get northbound capital flow data for widget."""
     try:
-        data = await asyncio.to_thread(widget_service.get_northbound_flow, days)
+        # The hub polls the default view once for all clients
+        data = market_hub.get('northbound_flow') if days == 5 else None
+        if data is None:
+            data = await asyncio.to_thread(widget_service.get_northbound_flow, days)
         return sanitize_data(data)
     except Exception as e:
         print(f"Error fetching northbound flow: {e}")
@@ -29,7 +33,10 @@ async def get_widget_northbound_flow(days: int = 5):
 async def get_widget_industry_flow(limit: int = 10):
     """Get industry money flow data for widget."""
     try:
-        data = await asyncio.to_thread(widget_service.get_industry_flow, limit)
+        # The hub polls the top rows once for all clients
+        data = market_hub.get_ranked('industry_flow', limit)
+        if data is None:
+            data = await asyncio.to_thread(widget_service.get_industry_flow, limit)
         return sanitize_data(data)
     except Exception as e:
         print(f"Error fetching industry flow: {e}")
@@ -40,7 +47,10 @@ async def get_widget_industry_flow(limit: int = 10):
 async def get_widget_sector_performance(limit: int = 10):
     """Get sector performance data for widget."""
     try:
-        data = await asyncio.to_thread(widget_service.get_sector_performance, limit)
+        # The hub polls the top rows once for all clients
+        data = market_hub.get_ranked('sector_performance', limit)
+        if data is None:
+            data = await asyncio.to_thread(widget_service.get_sector_performance, limit)
         return sanitize_data(data)
     except Exception as e:
         print(f"Error fetching sector performance: {e}")
@@ -6,11 +6,17 @@ Orchestrates the analysis of Gold (XAU) and Silver (XAG) using:
 2. Research Agent: Tavily Search
 3. Quantitative Agent: Historical Backtesting
 4. Reasoning Agent: LLM Synthesis
+
+Market context (prices, macro, SHFE/COMEX/ETF snapshots, ratio history and
+news) is cached per asset and trading session, and rendered charts per
+(series hash, chart type), both shared across API workers. Repeated requests
+within a session only pay for the LLM step.
 """
 
 import sys
 import os
-from datetime import datetime
+import hashlib
+from datetime import datetime, timedelta
 import pandas as pd
 import mplfinance as mpf
 import tempfile
@@ -26,6 +32,40 @@ from src.data_sources.web_search import WebSearch
 from src.llm.client import get_llm_client
 from src.llm.prompts import GOLD_SILVER_ANALYSIS_PROMPT_TEMPLATE
 from src.analysis.commodities.quantitative import QuantitativeAnalyst
+from src.cache.near_cache import NearCache
+
+
+# Seconds a market context stays fresh within one trading session
+CONTEXT_TTL = int(os.getenv("COMMODITY_CONTEXT_TTL", "3600"))
+CHART_TTL = 24 * 3600
+
+# Shared by every analyst instance and API worker
+_context_cache = NearCache("commodity_context", default_ttl=CONTEXT_TTL, max_entries=8)
+_chart_cache = NearCache("commodity_chart", default_ttl=CHART_TTL, max_entries=32)
+
+
+def trading_session(now: datetime = None) -> str:
+    """
+    SHFE session label for `now`: '<date>-day' (09:00-15:00), '<date>-night'
+    (21:00-02:30, dated by its evening), otherwise '<date>-pre' / '<date>-post'.
+    """
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    if minute < 2 * 60 + 30:
+        return f"{(now - timedelta(days=1)).strftime('%Y%m%d')}-night"
+    today = now.strftime('%Y%m%d')
+    if minute >= 21 * 60:
+        return f"{today}-night"
+    if 9 * 60 <= minute < 15 * 60:
+        return f"{today}-day"
+    return f"{today}-pre" if minute < 9 * 60 else f"{today}-post"
+
+
+def series_hash(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (index and values)."""
+    hashed = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.sha1(hashed.tobytes() + ",".join(map(str, df.columns)).encode()).hexdigest()
+
 
 class GoldSilverAnalyst:
     def __init__(self):
@@ -34,13 +74,22 @@ class GoldSilverAnalyst:
         self.quant = QuantitativeAnalyst()
         self.today = datetime.now().strftime("%Y-%m-%d")
 
-    def _generate_chart(self, df: pd.DataFrame, title: str) -> str:
+    def _generate_chart(self, df: pd.DataFrame, title: str, chart_type: str = "candle") -> str:
         """
         Generates a candle chart and returns the path.
+        Rendered images are cached by (series hash, chart type).
         """
         try:
             filename = f"{tempfile.gettempdir()}/{title}_{self.today}.png"
-            mpf.plot(df, type='candle', style='yahoo', title=title, savefig=filename)
+            key = f"{chart_type}:{series_hash(df)}"
+            image = _chart_cache.get(key)
+            if image is None:
+                mpf.plot(df, type=chart_type, style='yahoo', title=title, savefig=filename)
+                with open(filename, 'rb') as f:
+                    _chart_cache.set(key, f.read())
+            else:
+                with open(filename, 'wb') as f:
+                    f.write(image)
             return filename
         except Exception as e:
             print(f"Chart generation failed: {e}")
@@ -302,6 +351,32 @@ class GoldSilverAnalyst:
         - Volume Trend (20D vs 60D): {vol_trend}
         """
 
+    def _format_sweep(self, sweep: dict, signal_type: str) -> str:
+        """
+        Summarizes a threshold x holding-period sweep for the prompt, so the LLM
+        sees how robust the ratio signal is rather than a single parameter point.
+        """
+        grid = (sweep.get('grids') or {}).get(signal_type)
+        if not grid:
+            return ""
+        cells = [v for row in grid['avg_return'] for v in row if v is not None]
+        if not cells:
+            return ""
+        positive = sum(1 for v in cells if v > 0)
+        op = ">" if signal_type == 'above' else "<"
+        text = (
+            f"\n- Parameter Surface (ratio {op} {sweep['thresholds'][0]:g}-{sweep['thresholds'][-1]:g}, "
+            f"hold {sweep['holding_periods'][0]}-{sweep['holding_periods'][-1]}d): "
+            f"positive avg return in {positive}/{len(cells)} tested cells"
+        )
+        best = sweep.get('best')
+        if best:
+            text += (
+                f"; best ratio {op} {best['threshold']:g}, hold {best['holding_period']}d: "
+                f"win {best['win_rate']}%, avg {best['avg_return']}% (n={best['signal_count']})"
+            )
+        return text + "\n"
+
     def _format_sources(self, news_results: list) -> str:
         """
         Formats the list of sources for the report footer.
@@ -316,6 +391,51 @@ class GoldSilverAnalyst:
             output.append(f"{idx}. [{title}]({url})")
         return "\n".join(output)
 
+    def _load_market_context(self, asset_type: str) -> dict:
+        """
+        Downloads everything the report needs besides the LLM call.
+        """
+        asset_name = "Gold" if asset_type.lower() == "gold" else "Silver"
+        symbol = "GC=F" if asset_type.lower() == "gold" else "SI=F"
+
+        search_query = f"{asset_name} price forecast 2025 analysis last 7 days"
+        if asset_type.lower() == 'silver':
+            search_query += " solar demand deficit inventory"
+        elif asset_type.lower() == 'gold':
+            search_query += " geopolitical risk central bank buying real rates"
+
+        return {
+            "price_history": YFinanceAPI.get_price_history(symbol, period="2y"),
+            "macro_data": YFinanceAPI.get_macro_data(),
+            "dxy_hist": YFinanceAPI.get_price_history(YFinanceAPI.TICKERS['DOLLAR_INDEX'], period="1y"),
+            "tnx_hist": YFinanceAPI.get_price_history(YFinanceAPI.TICKERS['US_10Y_YIELD'], period="1y"),
+            "spx_hist": YFinanceAPI.get_price_history(YFinanceAPI.TICKERS['SP500'], period="1y"),
+            "shfe_snapshot": self._get_shfe_main_contract(asset_type),
+            "etf_snapshot": self._get_etf_snapshot(asset_type),
+            "comex_inventory": self._get_comex_inventory_snapshot(asset_type),
+            "ratio_df": YFinanceAPI.get_gold_silver_ratio(period="5y"),
+            "news_results": self.web_search.search_news(search_query, max_results=6),
+            "fetched_at": datetime.now().isoformat(),
+        }
+
+    def get_market_context(self, asset_type: str) -> dict:
+        """
+        Market context for one asset, cached per trading session.
+        A context without price history is used once but not cached.
+        """
+        key = f"{asset_type.lower()}:{trading_session()}"
+        loaded = {}
+
+        def load():
+            loaded['context'] = self._load_market_context(asset_type)
+            return loaded['context'] if not loaded['context']['price_history'].empty else None
+
+        context = _context_cache.get_or_load(key, load, ttl=CONTEXT_TTL) or loaded.get('context')
+        if context is None:
+            # Another worker's load came back incomplete
+            context = self._load_market_context(asset_type)
+        return context
+
     def analyze(self, asset_type: str = "gold", user_id: int = None) -> str:
         """
         Main analysis pipeline.
@@ -330,14 +450,15 @@ class GoldSilverAnalyst:
         
         # 1. Data Collection
         print("  ?? Fetching Market Data...")
-        price_history = YFinanceAPI.get_price_history(symbol, period="2y")
-        macro_data_dict = YFinanceAPI.get_macro_data()
-        dxy_hist = YFinanceAPI.get_price_history(YFinanceAPI.TICKERS['DOLLAR_INDEX'], period="1y")
-        tnx_hist = YFinanceAPI.get_price_history(YFinanceAPI.TICKERS['US_10Y_YIELD'], period="1y")
-        spx_hist = YFinanceAPI.get_price_history(YFinanceAPI.TICKERS['SP500'], period="1y")
-        shfe_snapshot = self._get_shfe_main_contract(asset_type)
-        etf_snapshot = self._get_etf_snapshot(asset_type)
-        comex_inventory = self._get_comex_inventory_snapshot(asset_type)
+        context = self.get_market_context(asset_type)
+        price_history = context['price_history']
+        macro_data_dict = context['macro_data']
+        dxy_hist = context['dxy_hist']
+        tnx_hist = context['tnx_hist']
+        spx_hist = context['spx_hist']
+        shfe_snapshot = context['shfe_snapshot']
+        etf_snapshot = context['etf_snapshot']
+        comex_inventory = context['comex_inventory']
 
         current_price = "N/A"
         price_date = "N/A"
@@ -385,7 +506,7 @@ class GoldSilverAnalyst:
         backtest_win_rate = "N/A"
         avg_return = "N/A"
 
-        ratio_df = YFinanceAPI.get_gold_silver_ratio(period="5y")
+        ratio_df = context['ratio_df']
         if not ratio_df.empty:
             current_ratio = ratio_df['Ratio'].iloc[-1]
             ratio_mean = ratio_df['Ratio'].tail(252 * 3).mean() if len(ratio_df) >= 252 * 3 else ratio_df['Ratio'].mean()
@@ -409,21 +530,24 @@ class GoldSilverAnalyst:
                     - Win Rate (5y): {backtest_win_rate}
                     - Avg Return (30d): {avg_return}
                     """
+                sweep = self.quant.sweep_gold_silver_ratio(
+                    ratio_df['Ratio'], ratio_df['Silver'], signal_types=('above',)
+                )
+                quant_signal_text += self._format_sweep(sweep, 'above')
             else:
                 # Gold
                 quant_signal_text = f"- Current Gold/Silver Ratio: {current_ratio:.2f} (Z-Score {ratio_z:.2f}). Neutral zone 50-80. No extreme signal triggered."
                 backtest_win_rate = "N/A (No Signal)"
                 avg_return = "N/A"
+                # Gold is cheap relative to silver when the ratio falls
+                sweep = self.quant.sweep_gold_silver_ratio(
+                    ratio_df['Ratio'], ratio_df['Gold'], thresholds=range(50, 81, 5), signal_types=('below',)
+                )
+                quant_signal_text += self._format_sweep(sweep, 'below')
 
         # 4. Deep Research
         print("  ?? Conducting Deep Web Research...")
-        search_query = f"{asset_name} price forecast 2025 analysis last 7 days"
-        if asset_type.lower() == 'silver':
-            search_query += " solar demand deficit inventory"
-        elif asset_type.lower() == 'gold':
-            search_query += " geopolitical risk central bank buying real rates"
-
-        news_results = self.web_search.search_news(search_query, max_results=6)
+        news_results = context['news_results']
 
         # Richer Fundamental Data for LLM
         fundamental_text_parts = []
@@ -2,11 +2,21 @@
 Quantitative Analysis Module for Commodities
 ============================================
 Provides backtesting and statistical analysis for Gold/Silver strategies.
+
+Backtests are vectorized: entry signals for every threshold are one boolean
+crossing mask (days x thresholds) and forward returns for every holding
+period one shifted-array matrix (days x periods), so a full parameter grid
+costs about as much as a single backtest.
 """
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List, Sequence, Tuple
+
+
+DEFAULT_SWEEP_THRESHOLDS = tuple(range(60, 101, 5))
+DEFAULT_SWEEP_HOLDING_PERIODS = (5, 10, 20, 30, 60, 90)
+SIGNAL_TYPES = ('above', 'below')
 
 class QuantitativeAnalyst:
     """
@@ -46,34 +56,12 @@ class QuantitativeAnalyst:
         if df.empty:
             return {"error": "No aligned data"}
             
-        # Generate Signals
-        if signal_type == 'above':
-            # Signal: Ratio crosses above threshold (or is just above? 
-            # Mean reversion usually means: if ratio is high, Silver is cheap relative to Gold -> Buy Silver)
-            # Let's use "is above" for simplicity, or "crosses above". 
-            # "Crosses above" is better to avoid continuous signals.
-            # But strictly for "Regime", we can check all days where ratio > 80.
-            # Let's check "Crosses Above" to identify entry points.
-            df['signal'] = (df['ratio'] > signal_threshold) & (df['ratio'].shift(1) <= signal_threshold)
-        else:
-            df['signal'] = (df['ratio'] < signal_threshold) & (df['ratio'].shift(1) >= signal_threshold)
-            
-        entry_dates = df[df['signal']].index
-        
-        results = []
-        for date in entry_dates:
-            # Find the index of the date
-            try:
-                idx = df.index.get_loc(date)
-                if idx + holding_period < len(df):
-                    entry_price = df['price'].iloc[idx]
-                    exit_price = df['price'].iloc[idx + holding_period]
-                    ret = (exit_price - entry_price) / entry_price
-                    results.append(ret)
-            except Exception:
-                continue
-                
-        if not results:
+        stats = QuantitativeAnalyst._grid_stats(
+            df['ratio'].to_numpy(dtype=np.float64), df['price'].to_numpy(dtype=np.float64),
+            [signal_threshold], [holding_period], signal_type
+        )
+        count = int(stats['signal_count'][0, 0])
+        if count == 0:
             return {
                 "signal_count": 0,
                 "win_rate": 0.0,
@@ -81,14 +69,163 @@ class QuantitativeAnalyst:
                 "max_return": 0.0,
                 "min_return": 0.0
             }
-            
-        results_series = pd.Series(results)
-        win_rate = (results_series > 0).mean() * 100
-        
+
+        return {
+            "signal_count": count,
+            "win_rate": round(float(stats['win_rate'][0, 0]) * 100, 2),
+            "avg_return": round(float(stats['avg_return'][0, 0]) * 100, 2),
+            "max_return": round(float(stats['max_return'][0, 0]) * 100, 2),
+            "min_return": round(float(stats['min_return'][0, 0]) * 100, 2)
+        }
+
+    @staticmethod
+    def _crossing_mask(ratio: np.ndarray, thresholds: np.ndarray, signal_type: str) -> np.ndarray:
+        """
+        Entry days for every threshold at once.
+
+        'above': ratio crosses above the threshold (today > t, yesterday <= t);
+        'below': ratio crosses below it. Crossings rather than "is above" avoid
+        a signal on every day of a regime.
+
+        Returns:
+            Boolean array (days x thresholds)
+        """
+        curr = ratio[1:, None]
+        prev = ratio[:-1, None]
+        if signal_type == 'above':
+            crossed = (curr > thresholds) & (prev <= thresholds)
+        else:
+            crossed = (curr < thresholds) & (prev >= thresholds)
+        first = np.zeros((1, len(thresholds)), dtype=bool)  # no previous day
+        return np.vstack([first, crossed])
+
+    @staticmethod
+    def _forward_returns(price: np.ndarray, holding_periods: Sequence[int]) -> np.ndarray:
+        """
+        Return from entry at day i to exit at day i + h for every holding period.
+
+        Returns:
+            Float array (days x periods), NaN where the exit lies beyond the data
+        """
+        n = len(price)
+        forward = np.full((n, len(holding_periods)), np.nan)
+        for j, h in enumerate(holding_periods):
+            if 0 < h < n:
+                forward[:n - h, j] = (price[h:] - price[:-h]) / price[:-h]
+        return forward
+
+    @staticmethod
+    def _grid_stats(
+        ratio: np.ndarray,
+        price: np.ndarray,
+        thresholds: Sequence[float],
+        holding_periods: Sequence[int],
+        signal_type: str
+    ) -> Dict[str, np.ndarray]:
+        """
+        Signal count, win rate, mean/max/min trade return for every
+        (threshold, holding period) pair of one direction.
+
+        Returns:
+            Dict of arrays (thresholds x periods); returns are fractions,
+            NaN where a cell has no completed trade
+        """
+        signals = QuantitativeAnalyst._crossing_mask(ratio, np.asarray(thresholds, dtype=np.float64), signal_type)
+        forward = QuantitativeAnalyst._forward_returns(price, holding_periods)
+
+        # trades[i, t, h]: entry on day i for threshold t, held h days (exit within data)
+        trades = signals[:, :, None] & ~np.isnan(forward)[:, None, :]
+        values = np.where(np.isnan(forward), 0.0, forward)[:, None, :]
+
+        count = trades.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.where(count > 0, (trades & (values > 0)).sum(axis=0) / count, np.nan)
+            avg_return = np.where(count > 0, np.where(trades, values, 0.0).sum(axis=0) / count, np.nan)
+        max_return = np.where(count > 0, np.where(trades, values, -np.inf).max(axis=0), np.nan)
+        min_return = np.where(count > 0, np.where(trades, values, np.inf).min(axis=0), np.nan)
+
+        return {
+            'signal_count': count,
+            'win_rate': win_rate,
+            'avg_return': avg_return,
+            'max_return': max_return,
+            'min_return': min_return,
+        }
+
+    @staticmethod
+    def sweep_gold_silver_ratio(
+        ratio_series: pd.Series,
+        target_asset_price: pd.Series,
+        thresholds: Sequence[float] = DEFAULT_SWEEP_THRESHOLDS,
+        holding_periods: Sequence[int] = DEFAULT_SWEEP_HOLDING_PERIODS,
+        signal_types: Sequence[str] = SIGNAL_TYPES
+    ) -> Dict:
+        """
+        Backtest the ratio strategy over a grid of thresholds x holding periods x
+        directions in one vectorized pass (same rules as backtest_gold_silver_ratio).
+
+        Args:
+            ratio_series: Historical Gold/Silver ratio.
+            target_asset_price: Historical price of the asset to trade.
+            thresholds: Ratio thresholds (heatmap rows).
+            holding_periods: Holding periods in days (heatmap columns).
+            signal_types: Directions to evaluate ('above', 'below').
+
+        Returns:
+            Dict with 'thresholds', 'holding_periods', 'observations' and
+            'grids' {signal_type: {metric: rows x columns}}; win_rate and returns
+            in %, None for cells without completed trades. 'best' is the cell
+            with the highest avg_return among cells with at least 3 trades.
+        """
+        if ratio_series.empty or target_asset_price.empty:
+            return {"error": "No data"}
+
+        df = pd.DataFrame({
+            'ratio': ratio_series,
+            'price': target_asset_price
+        }).dropna()
+
+        if df.empty:
+            return {"error": "No aligned data"}
+
+        thresholds = [float(t) for t in thresholds]
+        holding_periods = [int(h) for h in holding_periods]
+        ratio = df['ratio'].to_numpy(dtype=np.float64)
+        price = df['price'].to_numpy(dtype=np.float64)
+
+        def to_grid(values: np.ndarray, scale: float = 100.0) -> List[List]:
+            return [[None if np.isnan(v) else round(float(v) * scale, 2) for v in row] for row in values]
+
+        grids = {}
+        best = None
+        for signal_type in signal_types:
+            stats = QuantitativeAnalyst._grid_stats(ratio, price, thresholds, holding_periods, signal_type)
+            grids[signal_type] = {
+                'signal_count': stats['signal_count'].astype(int).tolist(),
+                'win_rate': to_grid(stats['win_rate']),
+                'avg_return': to_grid(stats['avg_return']),
+                'max_return': to_grid(stats['max_return']),
+                'min_return': to_grid(stats['min_return']),
+            }
+
+            ranked = np.where(stats['signal_count'] >= 3, stats['avg_return'], np.nan)
+            if np.isnan(ranked).all():
+                continue
+            i, j = np.unravel_index(np.nanargmax(ranked), ranked.shape)
+            if best is None or ranked[i, j] * 100 > best['avg_return']:
+                best = {
+                    'signal_type': signal_type,
+                    'threshold': thresholds[i],
+                    'holding_period': holding_periods[j],
+                    'signal_count': int(stats['signal_count'][i, j]),
+                    'win_rate': round(float(stats['win_rate'][i, j]) * 100, 2),
+                    'avg_return': round(float(stats['avg_return'][i, j]) * 100, 2),
+                }
+
         return {
-            "signal_count": len(results),
-            "win_rate": round(win_rate, 2),
-            "avg_return": round(results_series.mean() * 100, 2),
-            "max_return": round(results_series.max() * 100, 2),
-            "min_return": round(results_series.min() * 100, 2)
+            'thresholds': thresholds,
+            'holding_periods': holding_periods,
+            'observations': len(df),
+            'grids': grids,
+            'best': best,
         }
@@ -6,14 +6,20 @@ Professional fund analysis tools including:
 - Risk Metrics: Sharpe ratio, max drawdown, volatility analysis
 - Comparison: Multi-fund comparison (up to 10 funds)
 - Portfolio Analysis: Holdings overlap and concentration analysis
+- NavSeries: Shared NumPy NAV arrays (returns, running peak, drawdown)
+- HoldingsMatrix: Sparse fund x stock weights for look-through exposure and overlap
 """
 
+from .nav_series import NavSeries
+from .holdings_matrix import HoldingsMatrix
 from .diagnosis import FundDiagnosis
 from .risk_metrics import RiskMetricsCalculator, DrawdownAnalyzer
 from .comparison import FundComparison
 from .portfolio_analysis import PortfolioAnalyzer
 
 __all__ = [
+    'NavSeries',
+    'HoldingsMatrix',
     'FundDiagnosis',
     'RiskMetricsCalculator',
     'DrawdownAnalyzer',
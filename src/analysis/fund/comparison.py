@@ -12,7 +12,8 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
-from collections import defaultdict
+
+from .holdings_matrix import HoldingsMatrix
 
 
 class FundComparison:
@@ -237,90 +238,31 @@ class FundComparison:
 
     def _analyze_holdings_overlap(self, funds: List[Dict]) -> Dict[str, Any]:
         """Analyze holdings overlap between funds."""
-        # Extract holdings for each fund
-        fund_holdings = {}
-        all_stocks = set()
-
-        for fund in funds:
-            holdings = fund.get('holdings', [])
-            if not holdings:
-                continue
-
-            stock_set = set()
-            stock_weights = {}
-
-            for holding in holdings[:10]:  # Top 10 holdings
-                stock_code = holding.get('code') or holding.get('stock_code', '')
-                stock_name = holding.get('name') or holding.get('stock_name', '')
-                weight = holding.get('weight') or holding.get('proportion', 0)
-
-                if stock_code:
-                    stock_set.add(stock_code)
-                    stock_weights[stock_code] = {
-                        'name': stock_name,
-                        'weight': float(weight) if weight else 0
-                    }
-                    all_stocks.add(stock_code)
-
-            fund_holdings[fund['code']] = {
-                'stocks': stock_set,
-                'weights': stock_weights
-            }
+        # Top 10 holdings of each fund with holdings data
+        fund_holdings = {fund['code']: fund['holdings'] for fund in funds if fund.get('holdings')}
+        matrix = HoldingsMatrix.from_holdings(fund_holdings, top_n=10)
 
-        if len(fund_holdings) < 2:
+        if len(matrix.fund_codes) < 2:
             return {'overlap_matrix': {}, 'common_stocks': [], 'message': 'Need at least 2 funds with holdings data'}
 
-        # Calculate overlap matrix
-        overlap_matrix = {}
-        fund_codes = list(fund_holdings.keys())
-
-        for i, code1 in enumerate(fund_codes):
-            overlap_matrix[code1] = {}
-            for j, code2 in enumerate(fund_codes):
-                if i == j:
-                    overlap_matrix[code1][code2] = 100.0  # Self-overlap
-                else:
-                    stocks1 = fund_holdings[code1]['stocks']
-                    stocks2 = fund_holdings[code2]['stocks']
-
-                    if not stocks1 or not stocks2:
-                        overlap_matrix[code1][code2] = 0
-                    else:
-                        common = len(stocks1 & stocks2)
-                        total = len(stocks1 | stocks2)
-                        overlap_pct = (common / total) * 100 if total > 0 else 0
-                        overlap_matrix[code1][code2] = round(overlap_pct, 1)
-
-        # Find stocks held by multiple funds
-        stock_fund_count = defaultdict(list)
-        for code, data in fund_holdings.items():
-            for stock in data['stocks']:
-                stock_fund_count[stock].append(code)
-
-        common_stocks = []
-        for stock, fund_codes_list in stock_fund_count.items():
-            if len(fund_codes_list) >= 2:
-                # Get stock name from any fund that has it
-                stock_name = ''
-                for fc in fund_codes_list:
-                    if stock in fund_holdings[fc]['weights']:
-                        stock_name = fund_holdings[fc]['weights'][stock]['name']
-                        break
-
-                common_stocks.append({
-                    'code': stock,
-                    'name': stock_name,
-                    'held_by': fund_codes_list,
-                    'count': len(fund_codes_list)
-                })
+        # Stocks held by multiple funds
+        common_stocks = [
+            {
+                'code': matrix.stock_codes[j],
+                'name': matrix.stock_names[j],
+                'held_by': [matrix.fund_codes[i] for i in rows],
+                'count': len(rows),
+            }
+            for j, rows in enumerate(matrix.holders()) if len(rows) >= 2
+        ]
 
         # Sort by count (most common first)
         common_stocks.sort(key=lambda x: x['count'], reverse=True)
 
         return {
-            'overlap_matrix': overlap_matrix,
+            'overlap_matrix': matrix.overlap_matrix(),
             'common_stocks': common_stocks[:20],  # Top 20 common stocks
-            'total_unique_stocks': len(all_stocks),
+            'total_unique_stocks': len(matrix.stock_codes),
         }
 
     def _calculate_ranking(self, funds: List[Dict]) -> Dict[str, Any]:
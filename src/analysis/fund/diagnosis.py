@@ -13,9 +13,11 @@ Dimensions:
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 import json
 
+from .nav_series import NavSeries
+
 
 class FundDiagnosis:
     """
@@ -34,43 +36,197 @@ class FundDiagnosis:
     def __init__(self):
         pass
 
-    def diagnose(self, fund_code: str, nav_history: List[Dict],
+    def diagnose(self, fund_code: str, nav_history: Union[List[Dict], NavSeries],
                  fund_info: Dict = None, manager_info: Dict = None) -> Dict[str, Any]:
         """
         Perform comprehensive fund diagnosis.
 
         Args:
             fund_code: Fund code
-            nav_history: List of {date, value} NAV history (at least 1 year)
+            nav_history: List of {date, value} NAV history (at least 1 year), or a NavSeries
             fund_info: Optional fund basic info (type, inception date, etc.)
             manager_info: Optional fund manager info (tenure, historical funds, etc.)
 
         Returns:
             Dictionary with total score, dimension scores, and radar chart data
         """
-        if not nav_history or len(nav_history) < 20:
+        if nav_history is None or len(nav_history) < 20:
             return self._empty_diagnosis("Insufficient NAV history data")
 
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(nav_history)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
-        df['value'] = pd.to_numeric(df['value'], errors='coerce')
-        df = df.dropna(subset=['value'])
+        nav = NavSeries.coerce(nav_history)
 
-        if len(df) < 20:
+        if len(nav) < 20:
             return self._empty_diagnosis("Insufficient valid NAV data")
 
-        # Calculate daily returns
-        df['return'] = df['value'].pct_change()
+        return self._build_diagnosis(
+            fund_code,
+            profitability=self._calc_profitability(nav),
+            risk_resistance=self._calc_risk_resistance(nav),
+            stability=self._calc_stability(nav),
+            timing_ability=self._calc_timing_ability(nav),
+            management_exp=self._calc_management_exp(manager_info, fund_info),
+        )
+
+    def diagnose_matrix(self, fund_codes: List[str], dates: np.ndarray, nav_matrix: np.ndarray,
+                        fund_infos: Dict[str, Dict] = None,
+                        peer_groups: Dict[str, str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Diagnose many funds at once from an aligned NAV matrix.
+
+        Every dimension metric is computed column-wise over the whole matrix
+        and scored with the same thresholds as ``diagnose``. Each result also
+        carries percentiles relative to its peer group and to all funds scored.
 
-        # Calculate dimension scores
-        profitability = self._calc_profitability(df)
-        risk_resistance = self._calc_risk_resistance(df)
-        stability = self._calc_stability(df)
-        timing_ability = self._calc_timing_ability(df)
-        management_exp = self._calc_management_exp(manager_info, fund_info)
+        Args:
+            fund_codes: Fund code per matrix row
+            dates: Ascending dates per matrix column
+            nav_matrix: NAVs, shape (len(fund_codes), len(dates)); NaN where a fund has no NAV
+            fund_infos: Optional {code: fund info} (inception_date feeds management score)
+            peer_groups: Optional {code: group} (e.g. fund type) for peer percentiles
+
+        Returns:
+            Dict mapping code -> diagnosis; funds with fewer than 20 NAVs are absent
+        """
+        fund_infos = fund_infos or {}
+        peer_groups = peer_groups or {}
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        values = np.asarray(nav_matrix, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] < 20:
+            return {}
+
+        # Carry the last NAV forward over gaps (funds that skipped a publication day)
+        cols = np.arange(values.shape[1])
+        last_valid = np.maximum.accumulate(np.where(np.isfinite(values), cols, 0), axis=1)
+        values = np.take_along_axis(values, last_valid, axis=1)
+
+        counts = np.isfinite(values).sum(axis=1)
+        eligible = np.flatnonzero(counts >= 20)
+        if not len(eligible):
+            return {}
+        codes = [fund_codes[i] for i in eligible]
+        values, counts = values[eligible], counts[eligible]
+        metrics = self._matrix_metrics(dates, values, counts)
+
+        scores = {
+            'profitability': self.score_profitability(metrics['return_1y'], metrics['return_3m']),
+            'risk_resistance': self.score_risk_resistance(metrics['max_drawdown'], metrics['annual_volatility']),
+            'stability': self.score_stability(metrics['sharpe'], metrics['monthly_std'], metrics['positive_ratio']),
+            'timing_ability': self.score_timing_ability(metrics['capture_ratio'], metrics['avg_recovery']),
+            'management_exp': np.array([
+                self._calc_management_exp(None, fund_infos.get(code)) for code in codes
+            ]),
+        }
+        totals = sum(scores.values())
+        percentiles = self._peer_percentiles(codes, totals, scores, peer_groups)
+
+        results = {}
+        for i, code in enumerate(codes):
+            diagnosis = self._build_diagnosis(code, **{key: float(arr[i]) for key, arr in scores.items()})
+            diagnosis['peer_comparison'] = percentiles[i]
+            results[code] = diagnosis
+        return results
+
+    @staticmethod
+    def _matrix_metrics(dates: np.ndarray, values: np.ndarray, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-row dimension metrics of a forward-filled NAV matrix (leading NaN before inception)."""
+        n, total = values.shape
+        rows = np.arange(n)
+        last = values[:, -1]
+        first = values[rows, total - counts]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = values[:, 1:] / values[:, :-1] - 1
+            has_return = np.isfinite(returns)
+            return_count = has_return.sum(axis=1)
+            mean = np.nansum(returns, axis=1) / return_count
+            std = np.sqrt(np.nansum((returns - mean[:, None]) ** 2, axis=1) / (return_count - 1))
+
+            # Profitability: 1Y (or annualized since inception) and 3M returns
+            return_1y = np.where(
+                counts >= 252, (last / values[:, -min(252, total)] - 1) * 100,
+                np.where(counts >= 120, (last / first - 1) * (252 / counts) * 100, 0.0)
+            )
+            return_3m = np.where(counts >= 63, last / values[:, -min(63, total)] - 1, last / first - 1) * 100
+
+            # Risk: max drawdown and annual volatility
+            cummax = np.fmax.accumulate(values, axis=1)
+            drawdown = values / cummax - 1
+            max_drawdown = -np.nanmin(np.where(np.isfinite(drawdown), drawdown, 0.0), axis=1) * 100
+            annual_vol = std * np.sqrt(252)
+
+            # Stability: Sharpe (2% risk-free), monthly return std dev, positive day ratio
+            sharpe = np.where(annual_vol > 0, (mean * 252 - 0.02) / annual_vol, 0.0)
+            months = dates.astype('datetime64[M]')
+            month_end = np.append(np.flatnonzero(months[1:] != months[:-1]), total - 1)
+            month_values = values[:, month_end]
+            monthly = month_values[:, 1:] / month_values[:, :-1] - 1
+            monthly_count = np.isfinite(monthly).sum(axis=1)
+            monthly_mean = np.nansum(monthly, axis=1) / monthly_count
+            monthly_std = np.where(
+                monthly_count > 1,
+                np.sqrt(np.nansum((monthly - monthly_mean[:, None]) ** 2, axis=1) / (monthly_count - 1)) * 100,
+                10.0
+            )
+            positive_ratio = (returns > 0).sum(axis=1) / return_count * 100
+
+            # Timing: up/down capture and recovery from >5% drawdowns
+            up, down = returns > 0, returns < 0
+            upside = np.where(up.any(axis=1), np.where(up, returns, 0).sum(axis=1) / up.sum(axis=1), 0.0) * 100
+            downside = np.abs(np.where(down.any(axis=1), np.where(down, returns, 0).sum(axis=1) / down.sum(axis=1), 0.0)) * 100
+            capture_ratio = np.where(downside > 0, upside / downside, 1.0)
+
+        # Runs below -5%: pad both ends so every run has an edge, drop runs that never ended
+        padded = np.zeros((n, total + 2), dtype=np.int8)
+        padded[:, 1:-1] = drawdown < -0.05
+        edges = np.diff(padded, axis=1)
+        start_rows, start_cols = np.nonzero(edges == 1)
+        _, end_cols = np.nonzero(edges == -1)
+        completed = end_cols < total
+        run_rows, run_days = start_rows[completed], (end_cols - start_cols)[completed]
+        run_count = np.bincount(run_rows, minlength=n)
+        run_total = np.bincount(run_rows, weights=run_days, minlength=n)
+        avg_recovery = np.where(run_count > 0, run_total / np.maximum(run_count, 1), 30.0)
 
+        return {
+            'return_1y': return_1y,
+            'return_3m': return_3m,
+            'max_drawdown': max_drawdown,
+            'annual_volatility': annual_vol * 100,
+            'sharpe': sharpe,
+            'monthly_std': monthly_std,
+            'positive_ratio': positive_ratio,
+            'capture_ratio': capture_ratio,
+            'avg_recovery': avg_recovery,
+        }
+
+    @staticmethod
+    def _peer_percentiles(codes: List[str], totals: np.ndarray, scores: Dict[str, np.ndarray],
+                          peer_groups: Dict[str, str]) -> List[Dict]:
+        """Percentile (0-100, higher is better) of total and dimension scores within each peer group."""
+        names = dict(zip(scores.keys(), ['Profitability', 'Risk Resistance', 'Stability', 'Timing', 'Management']))
+        df = pd.DataFrame({key: arr for key, arr in scores.items()})
+        df['score'] = totals
+        df['group'] = [peer_groups.get(code) or '全部' for code in codes]
+
+        columns = ['score'] + list(scores.keys())
+        group_pct = (df.groupby('group')[columns].rank(pct=True) * 100).round(1)
+        market_pct = (df['score'].rank(pct=True) * 100).round(1)
+        group_size = df.groupby('group')['score'].transform('size')
+
+        return [
+            {
+                'group': df['group'].iat[i],
+                'peer_count': int(group_size.iat[i]),
+                'score_percentile': float(group_pct['score'].iat[i]),
+                'market_percentile': float(market_pct.iat[i]),
+                'dimension_percentiles': {names[key]: float(group_pct[key].iat[i]) for key in scores},
+            }
+            for i in range(len(codes))
+        ]
+
+    def _build_diagnosis(self, fund_code: str, profitability: float, risk_resistance: float,
+                         stability: float, timing_ability: float, management_exp: float) -> Dict[str, Any]:
+        """Assemble the diagnosis payload from the five dimension scores."""
         # Calculate total score
         total_score = (
             profitability + risk_resistance + stability +
@@ -99,194 +255,86 @@ class FundDiagnosis:
             'computed_at': datetime.now().isoformat(),
         }
 
-    def _calc_profitability(self, df: pd.DataFrame) -> float:
+    # =========================================================================
+    # Dimension metrics (one fund)
+    # =========================================================================
+
+    def _calc_profitability(self, nav: NavSeries) -> float:
         """
         Calculate profitability score based on returns.
         Metrics: 1Y return, 3M return, cumulative return
         """
         try:
-            total_days = len(df)
-
-            # Calculate returns for different periods
-            returns = {}
+            values = nav.values
+            total_days = len(values)
 
             # 1 year return (252 trading days)
             if total_days >= 252:
-                returns['1y'] = (df['value'].iloc[-1] / df['value'].iloc[-252] - 1) * 100
+                return_1y = (values[-1] / values[-252] - 1) * 100
             elif total_days >= 120:
                 # Annualize if less than 1 year
-                total_return = (df['value'].iloc[-1] / df['value'].iloc[0] - 1)
-                returns['1y'] = total_return * (252 / total_days) * 100
+                total_return = (values[-1] / values[0] - 1)
+                return_1y = total_return * (252 / total_days) * 100
             else:
-                returns['1y'] = 0
+                return_1y = 0
 
             # 3 month return (63 trading days)
             if total_days >= 63:
-                returns['3m'] = (df['value'].iloc[-1] / df['value'].iloc[-63] - 1) * 100
-            else:
-                returns['3m'] = (df['value'].iloc[-1] / df['value'].iloc[0] - 1) * 100
-
-            # Score based on returns (normalized to 0-20)
-            # Benchmark: 10% annual return = 10 points, 20% = 15 points, 30%+ = 20 points
-            score = 0
-
-            # 1Y return contributes 60%
-            if returns['1y'] >= 30:
-                score += 12
-            elif returns['1y'] >= 20:
-                score += 10
-            elif returns['1y'] >= 10:
-                score += 8
-            elif returns['1y'] >= 5:
-                score += 6
-            elif returns['1y'] >= 0:
-                score += 4
-            else:
-                score += max(0, 4 + returns['1y'] / 10)  # Negative returns reduce score
-
-            # 3M return contributes 40%
-            if returns['3m'] >= 10:
-                score += 8
-            elif returns['3m'] >= 5:
-                score += 6
-            elif returns['3m'] >= 2:
-                score += 4
-            elif returns['3m'] >= 0:
-                score += 2
+                return_3m = (values[-1] / values[-63] - 1) * 100
             else:
-                score += max(0, 2 + returns['3m'] / 5)
+                return_3m = (values[-1] / values[0] - 1) * 100
 
-            return min(20, max(0, round(score, 1)))
+            return float(self.score_profitability(return_1y, return_3m))
 
         except Exception as e:
             print(f"Error calculating profitability: {e}")
             return 10.0  # Default middle score
 
-    def _calc_risk_resistance(self, df: pd.DataFrame) -> float:
+    def _calc_risk_resistance(self, nav: NavSeries) -> float:
         """
         Calculate risk resistance score.
         Metrics: Max drawdown, annual volatility
         """
         try:
-            # Calculate max drawdown
-            cummax = df['value'].cummax()
-            drawdown = (df['value'] - cummax) / cummax
-            max_drawdown = abs(drawdown.min()) * 100
-
-            # Calculate annual volatility
-            daily_returns = df['return'].dropna()
-            annual_volatility = daily_returns.std() * np.sqrt(252) * 100
-
-            # Score based on metrics
-            score = 0
-
-            # Max drawdown (12 points)
-            # <10% = 12, <15% = 10, <20% = 8, <30% = 6, <40% = 4, >=40% = 2
-            if max_drawdown < 10:
-                score += 12
-            elif max_drawdown < 15:
-                score += 10
-            elif max_drawdown < 20:
-                score += 8
-            elif max_drawdown < 30:
-                score += 6
-            elif max_drawdown < 40:
-                score += 4
-            else:
-                score += 2
-
-            # Annual volatility (8 points)
-            # <15% = 8, <20% = 6, <25% = 4, <30% = 3, >=30% = 2
-            if annual_volatility < 15:
-                score += 8
-            elif annual_volatility < 20:
-                score += 6
-            elif annual_volatility < 25:
-                score += 4
-            elif annual_volatility < 30:
-                score += 3
-            else:
-                score += 2
-
-            return min(20, max(0, round(score, 1)))
+            max_drawdown = abs(nav.drawdown.min()) * 100
+            annual_volatility = nav.return_std * np.sqrt(252) * 100
+            return float(self.score_risk_resistance(max_drawdown, annual_volatility))
 
         except Exception as e:
             print(f"Error calculating risk resistance: {e}")
             return 10.0
 
-    def _calc_stability(self, df: pd.DataFrame) -> float:
+    def _calc_stability(self, nav: NavSeries) -> float:
         """
         Calculate stability score.
         Metrics: Monthly return std dev, Sharpe ratio, positive return ratio
         """
         try:
-            daily_returns = df['return'].dropna()
-
             # Calculate Sharpe ratio (risk-free rate assumed 2%)
-            annual_return = daily_returns.mean() * 252
-            annual_vol = daily_returns.std() * np.sqrt(252)
+            annual_return = nav.return_mean * 252
+            annual_vol = nav.return_std * np.sqrt(252)
             sharpe = (annual_return - 0.02) / annual_vol if annual_vol > 0 else 0
 
             # Calculate monthly returns std dev
-            df_copy = df.copy()
-            df_copy.set_index('date', inplace=True)
-            monthly_returns = df_copy['value'].resample('M').last().pct_change().dropna()
-            monthly_std = monthly_returns.std() * 100 if len(monthly_returns) > 1 else 10
+            monthly_returns = nav.monthly_returns()
+            monthly_std = monthly_returns.std(ddof=1) * 100 if len(monthly_returns) > 1 else 10
 
             # Calculate positive return ratio
-            positive_ratio = (daily_returns > 0).sum() / len(daily_returns) * 100
-
-            score = 0
-
-            # Sharpe ratio (10 points)
-            if sharpe >= 2:
-                score += 10
-            elif sharpe >= 1.5:
-                score += 8
-            elif sharpe >= 1:
-                score += 6
-            elif sharpe >= 0.5:
-                score += 4
-            elif sharpe >= 0:
-                score += 2
-            else:
-                score += 1
-
-            # Monthly std dev (6 points) - lower is better
-            if monthly_std < 3:
-                score += 6
-            elif monthly_std < 5:
-                score += 5
-            elif monthly_std < 8:
-                score += 4
-            elif monthly_std < 12:
-                score += 3
-            else:
-                score += 2
-
-            # Positive return ratio (4 points)
-            if positive_ratio >= 55:
-                score += 4
-            elif positive_ratio >= 52:
-                score += 3
-            elif positive_ratio >= 50:
-                score += 2
-            else:
-                score += 1
+            positive_ratio = (nav.returns > 0).sum() / len(nav.returns) * 100
 
-            return min(20, max(0, round(score, 1)))
+            return float(self.score_stability(sharpe, monthly_std, positive_ratio))
 
         except Exception as e:
             print(f"Error calculating stability: {e}")
             return 10.0
 
-    def _calc_timing_ability(self, df: pd.DataFrame) -> float:
+    def _calc_timing_ability(self, nav: NavSeries) -> float:
         """
         Calculate timing ability score.
         Metrics: Bull/bear market relative performance, recovery speed
         """
         try:
-            daily_returns = df['return'].dropna()
+            daily_returns = nav.returns
 
             # Identify bull/bear periods (simplified: positive vs negative market days)
             # In reality, should compare with benchmark index
@@ -300,57 +348,80 @@ class FundDiagnosis:
             # Better funds capture more upside and less downside
             capture_ratio = upside_capture / downside_capture if downside_capture > 0 else 1
 
-            # Calculate recovery speed after drawdowns
-            cummax = df['value'].cummax()
-            drawdown = (df['value'] - cummax) / cummax
-
-            # Find significant drawdown periods (>5%)
-            in_drawdown = drawdown < -0.05
-            recovery_speeds = []
-
-            drawdown_start = None
-            for i, (is_dd, dd_val) in enumerate(zip(in_drawdown, drawdown)):
-                if is_dd and drawdown_start is None:
-                    drawdown_start = i
-                elif not is_dd and drawdown_start is not None:
-                    recovery_days = i - drawdown_start
-                    recovery_speeds.append(recovery_days)
-                    drawdown_start = None
-
-            avg_recovery = np.mean(recovery_speeds) if recovery_speeds else 30
-
-            score = 0
-
-            # Capture ratio (12 points)
-            if capture_ratio >= 1.5:
-                score += 12
-            elif capture_ratio >= 1.2:
-                score += 10
-            elif capture_ratio >= 1.0:
-                score += 8
-            elif capture_ratio >= 0.8:
-                score += 6
-            else:
-                score += 4
-
-            # Recovery speed (8 points) - faster is better
-            if avg_recovery <= 20:
-                score += 8
-            elif avg_recovery <= 40:
-                score += 6
-            elif avg_recovery <= 60:
-                score += 4
-            elif avg_recovery <= 90:
-                score += 3
-            else:
-                score += 2
+            # Calculate recovery speed after significant drawdowns (>5%):
+            # length of each completed run below the threshold
+            in_drawdown = np.concatenate(([0], (nav.drawdown < -0.05).astype(np.int8)))
+            edges = np.diff(in_drawdown)
+            starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+            recovery_speeds = ends - starts[:len(ends)]
 
-            return min(20, max(0, round(score, 1)))
+            avg_recovery = recovery_speeds.mean() if len(recovery_speeds) else 30
+
+            return float(self.score_timing_ability(capture_ratio, avg_recovery))
 
         except Exception as e:
             print(f"Error calculating timing ability: {e}")
             return 10.0
 
+    # =========================================================================
+    # Dimension scoring (vectorized: scalars for one fund, arrays for a batch)
+    # =========================================================================
+
+    @staticmethod
+    def score_profitability(return_1y, return_3m) -> np.ndarray:
+        """
+        Score 1Y and 3M returns (%) to 0-20.
+        Benchmark: 10% annual return = 10 points, 20% = 15 points, 30%+ = 20 points
+        """
+        r1, r3 = np.asarray(return_1y, dtype=float), np.asarray(return_3m, dtype=float)
+        # 1Y return contributes 60% (negative returns reduce score)
+        score = np.select([r1 >= 30, r1 >= 20, r1 >= 10, r1 >= 5, r1 >= 0],
+                          [12, 10, 8, 6, 4], np.maximum(0, 4 + r1 / 10))
+        # 3M return contributes 40%
+        score = score + np.select([r3 >= 10, r3 >= 5, r3 >= 2, r3 >= 0],
+                                  [8, 6, 4, 2], np.maximum(0, 2 + r3 / 5))
+        return np.clip(np.round(score, 1), 0, 20)
+
+    @staticmethod
+    def score_risk_resistance(max_drawdown, annual_volatility) -> np.ndarray:
+        """Score max drawdown (%) and annual volatility (%) to 0-20."""
+        dd, vol = np.asarray(max_drawdown, dtype=float), np.asarray(annual_volatility, dtype=float)
+        # Max drawdown (12 points): <10% = 12, <15% = 10, <20% = 8, <30% = 6, <40% = 4, >=40% = 2
+        score = np.select([dd < 10, dd < 15, dd < 20, dd < 30, dd < 40], [12, 10, 8, 6, 4], 2)
+        # Annual volatility (8 points): <15% = 8, <20% = 6, <25% = 4, <30% = 3, >=30% = 2
+        score = score + np.select([vol < 15, vol < 20, vol < 25, vol < 30], [8, 6, 4, 3], 2)
+        return np.clip(np.round(score, 1), 0, 20)
+
+    @staticmethod
+    def score_stability(sharpe, monthly_std, positive_ratio) -> np.ndarray:
+        """Score Sharpe ratio, monthly return std dev (%) and positive day ratio (%) to 0-20."""
+        sharpe = np.asarray(sharpe, dtype=float)
+        monthly_std = np.asarray(monthly_std, dtype=float)
+        positive_ratio = np.asarray(positive_ratio, dtype=float)
+        # Sharpe ratio (10 points)
+        score = np.select([sharpe >= 2, sharpe >= 1.5, sharpe >= 1, sharpe >= 0.5, sharpe >= 0],
+                          [10, 8, 6, 4, 2], 1)
+        # Monthly std dev (6 points) - lower is better
+        score = score + np.select([monthly_std < 3, monthly_std < 5, monthly_std < 8, monthly_std < 12],
+                                  [6, 5, 4, 3], 2)
+        # Positive return ratio (4 points)
+        score = score + np.select([positive_ratio >= 55, positive_ratio >= 52, positive_ratio >= 50],
+                                  [4, 3, 2], 1)
+        return np.clip(np.round(score, 1), 0, 20)
+
+    @staticmethod
+    def score_timing_ability(capture_ratio, avg_recovery) -> np.ndarray:
+        """Score up/down capture ratio and average drawdown recovery days to 0-20."""
+        capture = np.asarray(capture_ratio, dtype=float)
+        recovery = np.asarray(avg_recovery, dtype=float)
+        # Capture ratio (12 points)
+        score = np.select([capture >= 1.5, capture >= 1.2, capture >= 1.0, capture >= 0.8],
+                          [12, 10, 8, 6], 4)
+        # Recovery speed (8 points) - faster is better
+        score = score + np.select([recovery <= 20, recovery <= 40, recovery <= 60, recovery <= 90],
+                                  [8, 6, 4, 3], 2)
+        return np.clip(np.round(score, 1), 0, 20)
+
     def _calc_management_exp(self, manager_info: Dict = None, fund_info: Dict = None) -> float:
         """
         Calculate management experience score.
@@ -0,0 +1,111 @@
+"""
+Holdings Matrix Module
+
+Sparse fund × stock weight matrix for look-through analysis. Portfolio stock
+exposure is one vector-matrix product, and the stock-set overlap of every
+fund pair is one matrix product of the holding indicator matrix with itself,
+instead of per-fund dict aggregation and pairwise set comparisons.
+"""
+
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Optional
+
+
+class HoldingsMatrix:
+    """
+    Fund × stock holdings.
+
+    Attributes:
+        fund_codes: Row labels
+        stock_codes: Column labels (in order of first appearance)
+        stock_names: Name per stock column
+        weights: CSR matrix, weights[i, j] = weight of stock j in fund i (% of NAV)
+        held: CSR 0/1 matrix, held[i, j] = 1 if fund i lists stock j (even at weight 0)
+    """
+
+    def __init__(self, fund_codes: List[str], stock_codes: List[str], stock_names: List[str],
+                 weights: sparse.csr_matrix, held: Optional[sparse.csr_matrix] = None):
+        self.fund_codes = fund_codes
+        self.stock_codes = stock_codes
+        self.stock_names = stock_names
+        self.weights = weights
+        self.held = held if held is not None else (weights != 0).astype(np.float64)
+
+    @classmethod
+    def from_holdings(cls, fund_holdings: Dict[str, List[Dict]], top_n: Optional[int] = None) -> 'HoldingsMatrix':
+        """
+        Build from {fund_code: [{code|stock_code, name|stock_name, weight|proportion}]}.
+
+        Args:
+            fund_holdings: Holdings per fund
+            top_n: Only use each fund's first N holdings
+        """
+        fund_codes = list(fund_holdings.keys())
+        stock_index: Dict[str, int] = {}
+        stock_names: List[str] = []
+        rows, cols, vals = [], [], []
+
+        for i, fund_code in enumerate(fund_codes):
+            holdings = fund_holdings[fund_code] or []
+            for holding in holdings[:top_n] if top_n else holdings:
+                stock_code = holding.get('code') or holding.get('stock_code', '')
+                if not stock_code:
+                    continue
+                stock_name = holding.get('name') or holding.get('stock_name', '')
+                if stock_code not in stock_index:
+                    stock_index[stock_code] = len(stock_names)
+                    stock_names.append(stock_name)
+                elif stock_name:
+                    stock_names[stock_index[stock_code]] = stock_name
+                rows.append(i)
+                cols.append(stock_index[stock_code])
+                vals.append(float(holding.get('weight') or holding.get('proportion', 0) or 0))
+
+        shape = (len(fund_codes), len(stock_names))
+        weights = sparse.csr_matrix((vals, (rows, cols)), shape=shape, dtype=np.float64)
+        held = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+        held.data[:] = 1.0  # a stock listed twice in one fund is still one holding
+        return cls(fund_codes, list(stock_index.keys()), stock_names, weights, held)
+
+    def exposure(self, fund_weights: Dict[str, float]) -> np.ndarray:
+        """
+        Look-through stock exposure of a fund portfolio.
+
+        Args:
+            fund_weights: Portfolio weight per fund (fraction; missing funds weigh 0)
+
+        Returns:
+            Array over stock_codes: exposure as a fraction of the portfolio
+        """
+        w = np.array([fund_weights.get(code, 0.0) for code in self.fund_codes], dtype=np.float64)
+        return np.asarray(self.weights.T @ w).ravel() / 100
+
+    def holders(self) -> List[List[int]]:
+        """Row indices of the funds holding each stock, in fund order."""
+        held = self.held.tocsc()
+        held.sort_indices()
+        return [held.indices[held.indptr[j]:held.indptr[j + 1]].tolist() for j in range(held.shape[1])]
+
+    def overlap_pct(self) -> np.ndarray:
+        """
+        Pairwise stock-set overlap (intersection / union, %) for all funds at once.
+
+        The diagonal is 100; pairs where either fund has no holdings are 0.
+        """
+        common = np.asarray((self.held @ self.held.T).todense())
+        sizes = np.diag(common)
+        union = sizes[:, None] + sizes[None, :] - common
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overlap = np.where(union > 0, common / union * 100, 0.0)
+        overlap = np.round(overlap, 1)
+        np.fill_diagonal(overlap, 100.0)
+        return overlap
+
+    def overlap_matrix(self) -> Dict[str, Dict[str, float]]:
+        """overlap_pct as a nested {fund: {fund: pct}} dict."""
+        overlap = self.overlap_pct()
+        return {
+            code1: {code2: float(overlap[i, j]) for j, code2 in enumerate(self.fund_codes)}
+            for i, code1 in enumerate(self.fund_codes)
+        }
@@ -0,0 +1,99 @@
+"""
+NAV Series Module
+
+One NumPy view of a fund's NAV history shared by the fund analyzers.
+Daily returns, the running peak and the drawdown series are computed once
+when the series is built; diagnosis, risk metrics and drawdown analysis all
+read from the same arrays instead of rebuilding a DataFrame each.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Union
+
+
+class NavSeries:
+    """
+    Chronological NAV series with derived arrays.
+
+    Attributes:
+        dates: datetime64[D] array (ascending)
+        values: float64 NAV array
+        returns: Daily returns (len(values) - 1)
+        return_mean / return_std: Mean and sample std (ddof=1) of daily returns
+        cummax: Running peak NAV
+        drawdown: (values - cummax) / cummax, <= 0
+        peak_idx: Index of the running peak's first occurrence at each point
+    """
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray):
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        values = np.asarray(values, dtype=np.float64)
+
+        valid = ~np.isnat(dates) & np.isfinite(values)
+        dates, values = dates[valid], values[valid]
+        order = np.argsort(dates, kind='stable')
+        self.dates = dates[order]
+        self.values = values[order]
+
+        n = len(self.values)
+        self.returns = self.values[1:] / self.values[:-1] - 1 if n > 1 else np.empty(0)
+        self.return_mean = float(self.returns.mean()) if len(self.returns) else float('nan')
+        self.return_std = float(self.returns.std(ddof=1)) if len(self.returns) > 1 else float('nan')
+        self.cummax = np.maximum.accumulate(self.values) if n else np.empty(0)
+        self.drawdown = (self.values - self.cummax) / self.cummax if n else np.empty(0)
+
+        # A new peak is a strictly higher NAV than every earlier one
+        new_high = np.ones(n, dtype=bool)
+        if n > 1:
+            new_high[1:] = self.values[1:] > self.cummax[:-1]
+        self.peak_idx = np.maximum.accumulate(np.where(new_high, np.arange(n), 0)) if n else np.empty(0, dtype=int)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    # =========================================================================
+    # Constructors
+    # =========================================================================
+
+    @classmethod
+    def from_history(cls, nav_history: List[Dict]) -> 'NavSeries':
+        """Build from a list of {date, value} dicts."""
+        if not nav_history:
+            return cls(np.empty(0), np.empty(0))
+        dates = pd.to_datetime([row.get('date') for row in nav_history], errors='coerce')
+        values = pd.to_numeric(pd.Series([row.get('value') for row in nav_history]), errors='coerce')
+        return cls(dates.values, values.to_numpy(dtype=np.float64))
+
+    @classmethod
+    def coerce(cls, nav: Union['NavSeries', List[Dict]]) -> 'NavSeries':
+        """Accept either a NavSeries or a {date, value} list."""
+        return nav if isinstance(nav, cls) else cls.from_history(nav)
+
+    # =========================================================================
+    # Helpers
+    # =========================================================================
+
+    @property
+    def last_date(self) -> Optional[str]:
+        return self.date_str(-1) if len(self) else None
+
+    def date_str(self, idx: int) -> str:
+        """Date at index as YYYY-MM-DD."""
+        return str(self.dates[idx])
+
+    def monthly_returns(self) -> np.ndarray:
+        """Month-over-month returns of month-end NAVs."""
+        if len(self) < 2:
+            return np.empty(0)
+        months = self.dates.astype('datetime64[M]')
+        month_end = np.append(np.flatnonzero(months[1:] != months[:-1]), len(self) - 1)
+        month_values = self.values[month_end]
+        return month_values[1:] / month_values[:-1] - 1
+
+    def to_history(self) -> List[Dict]:
+        """Back to the {date, value} list shape used by the API."""
+        return [
+            {'date': date, 'value': float(value)}
+            for date, value in zip(np.datetime_as_string(self.dates, unit='D'), self.values)
+        ]
@@ -12,7 +12,9 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
-from collections import defaultdict
+
+from .holdings_matrix import HoldingsMatrix
+from src.analysis.portfolio.panel import build_price_panel, panel_returns, max_drawdown as portfolio_max_drawdown
 
 
 class PortfolioAnalyzer:
@@ -135,46 +137,37 @@ class PortfolioAnalyzer:
         if not fund_holdings:
             return {'message': 'No holdings data'}
 
-        # Aggregate stock holdings across funds
-        aggregated_holdings = defaultdict(lambda: {
-            'name': '',
-            'total_weight': 0,
-            'fund_sources': [],
-        })
-
-        for fund_code, holdings in fund_holdings.items():
-            fund_weight = position_weights.get(fund_code, 1.0) if position_weights else 1.0
-
-            for holding in holdings:
-                stock_code = holding.get('code') or holding.get('stock_code', '')
-                stock_name = holding.get('name') or holding.get('stock_name', '')
-                weight = float(holding.get('weight') or holding.get('proportion', 0))
-
-                if stock_code:
-                    # Calculate effective weight in portfolio
-                    effective_weight = weight * fund_weight / 100
-
-                    aggregated_holdings[stock_code]['name'] = stock_name
-                    aggregated_holdings[stock_code]['total_weight'] += effective_weight
-                    aggregated_holdings[stock_code]['fund_sources'].append({
-                        'fund_code': fund_code,
-                        'weight_in_fund': weight,
-                        'effective_weight': round(effective_weight * 100, 2)
-                    })
-
-        # Convert to list and sort by total weight
+        # Look-through exposure of every stock in one sparse product
+        matrix = HoldingsMatrix.from_holdings(fund_holdings)
+        fund_weights = {
+            code: position_weights.get(code, 1.0) if position_weights else 1.0
+            for code in matrix.fund_codes
+        }
+        exposure = matrix.exposure(fund_weights)
+        fund_counts = np.asarray(matrix.held.sum(axis=0)).ravel().astype(int)
+
+        # Largest exposures first (stable, so ties keep first-appearance order)
+        order = np.argsort(-np.round(exposure * 100, 2), kind='stable')
+        weights_csc = matrix.weights.tocsc()
+        holders = matrix.holders()
+
         holdings_list = []
-        for stock_code, data in aggregated_holdings.items():
+        for j in order:
             holdings_list.append({
-                'stock_code': stock_code,
-                'stock_name': data['name'],
-                'total_weight': round(data['total_weight'] * 100, 2),
-                'fund_count': len(data['fund_sources']),
-                'fund_sources': data['fund_sources']
+                'stock_code': matrix.stock_codes[j],
+                'stock_name': matrix.stock_names[j],
+                'total_weight': round(float(exposure[j]) * 100, 2),
+                'fund_count': int(fund_counts[j]),
+                'fund_sources': [
+                    {
+                        'fund_code': matrix.fund_codes[i],
+                        'weight_in_fund': float(weights_csc[i, j]),
+                        'effective_weight': round(float(weights_csc[i, j]) * fund_weights[matrix.fund_codes[i]], 2),
+                    }
+                    for i in holders[j]
+                ],
             })
 
-        holdings_list.sort(key=lambda x: x['total_weight'], reverse=True)
-
         # Identify concentration warnings
         concentration_warnings = []
         for holding in holdings_list:
@@ -187,8 +180,8 @@ class PortfolioAnalyzer:
                     'message': f"{holding['stock_name']} 占组合 {holding['total_weight']:.1f}%,超过警戒线 {self.concentration_threshold*100:.0f}%"
                 })
 
-        # Calculate overlap matrix between funds
-        overlap_matrix = self._calculate_fund_overlap_matrix(fund_holdings)
+        # Pairwise overlap of all funds from the same matrix
+        overlap_matrix = matrix.overlap_matrix()
 
         # Industry breakdown
         industry_breakdown = self._calculate_industry_breakdown(holdings_list)
@@ -202,39 +195,6 @@ class PortfolioAnalyzer:
             'computed_at': datetime.now().isoformat(),
         }
 
-    def _calculate_fund_overlap_matrix(self, fund_holdings: Dict[str, List[Dict]]) -> Dict[str, Dict[str, float]]:
-        """Calculate pairwise overlap between funds."""
-        fund_stocks = {}
-        for fund_code, holdings in fund_holdings.items():
-            stocks = set()
-            for h in holdings:
-                stock_code = h.get('code') or h.get('stock_code', '')
-                if stock_code:
-                    stocks.add(stock_code)
-            fund_stocks[fund_code] = stocks
-
-        overlap_matrix = {}
-        fund_codes = list(fund_stocks.keys())
-
-        for code1 in fund_codes:
-            overlap_matrix[code1] = {}
-            for code2 in fund_codes:
-                if code1 == code2:
-                    overlap_matrix[code1][code2] = 100.0
-                else:
-                    stocks1 = fund_stocks[code1]
-                    stocks2 = fund_stocks[code2]
-
-                    if not stocks1 or not stocks2:
-                        overlap_matrix[code1][code2] = 0
-                    else:
-                        common = len(stocks1 & stocks2)
-                        total = len(stocks1 | stocks2)
-                        overlap_pct = (common / total) * 100 if total > 0 else 0
-                        overlap_matrix[code1][code2] = round(overlap_pct, 1)
-
-        return overlap_matrix
-
     def _calculate_industry_breakdown(self, holdings_list: List[Dict]) -> List[Dict]:
         """
         Calculate industry breakdown from holdings.
@@ -279,58 +239,22 @@ class PortfolioAnalyzer:
 
         weights = {code: val / total_value for code, val in position_values.items()}
 
-        # Build portfolio return series
-        # Find common date range
-        date_sets = []
-        for fund_code in position_values.keys():
-            nav_history = fund_nav_histories.get(fund_code, [])
-            if nav_history:
-                dates = {h['date'] for h in nav_history}
-                date_sets.append(dates)
-
-        if not date_sets:
+        # Align NAVs on the dates every fund with history has in common
+        panel = build_price_panel(fund_nav_histories, codes=position_values.keys(),
+                                  value_keys=('value',), join='inner')
+        if panel.empty:
             return {'message': 'No NAV history available'}
-
-        common_dates = set.intersection(*date_sets) if date_sets else set()
-        if len(common_dates) < 20:
+        if len(panel) < 20:
             return {'message': 'Insufficient common trading days'}
 
-        # Calculate weighted portfolio returns
-        portfolio_returns = []
-        sorted_dates = sorted(common_dates)
-
-        for i, date in enumerate(sorted_dates[1:], 1):
-            prev_date = sorted_dates[i - 1]
-            daily_return = 0
-
-            for fund_code, weight in weights.items():
-                nav_history = fund_nav_histories.get(fund_code, [])
-                nav_map = {h['date']: h['value'] for h in nav_history}
-
-                current_val = nav_map.get(date)
-                prev_val = nav_map.get(prev_date)
-
-                if current_val and prev_val and float(prev_val) > 0:
-                    fund_return = (float(current_val) / float(prev_val) - 1)
-                    daily_return += fund_return * weight
-
-            portfolio_returns.append(daily_return)
-
-        if not portfolio_returns:
-            return {'message': 'Could not calculate portfolio returns'}
-
-        # Calculate portfolio metrics
-        returns_array = np.array(portfolio_returns)
+        # Weighted portfolio returns (a fund without a valid NAV pair contributes 0 that day)
+        fund_returns, _ = panel_returns(panel)
+        returns_array = fund_returns @ np.array([weights[code] for code in panel.columns])
 
         annual_return = returns_array.mean() * 252
         annual_vol = returns_array.std() * np.sqrt(252)
         sharpe = (annual_return - 0.02) / annual_vol if annual_vol > 0 else 0
-
-        # Calculate portfolio drawdown
-        cumulative = np.cumprod(1 + returns_array)
-        cummax = np.maximum.accumulate(cumulative)
-        drawdown = (cumulative - cummax) / cummax
-        max_drawdown = abs(drawdown.min())
+        max_drawdown = portfolio_max_drawdown(returns_array)
 
         return {
             'portfolio_sharpe': round(sharpe, 3),
@@ -338,7 +262,7 @@ class PortfolioAnalyzer:
             'portfolio_return': round(annual_return * 100, 2),
             'portfolio_max_drawdown': round(max_drawdown * 100, 2),
             'portfolio_calmar': round((annual_return * 100) / (max_drawdown * 100), 3) if max_drawdown > 0 else None,
-            'analysis_period_days': len(common_dates),
+            'analysis_period_days': len(panel),
             'weights': {k: round(v * 100, 2) for k, v in weights.items()},
             'computed_at': datetime.now().isoformat(),
         }
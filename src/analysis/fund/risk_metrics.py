@@ -10,9 +10,10 @@ Provides comprehensive risk analysis including:
 """
 
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
+
+from .nav_series import NavSeries
 
 
 class RiskMetricsCalculator:
@@ -26,47 +27,38 @@ class RiskMetricsCalculator:
     def __init__(self, risk_free_rate: float = 0.02):
         self.risk_free_rate = risk_free_rate
 
-    def calculate_all_metrics(self, nav_history: List[Dict],
+    def calculate_all_metrics(self, nav_history: Union[List[Dict], NavSeries],
                               benchmark_history: List[Dict] = None) -> Dict[str, Any]:
         """
         Calculate all risk metrics for a fund.
 
         Args:
-            nav_history: List of {date, value} NAV history
+            nav_history: List of {date, value} NAV history, or a NavSeries
             benchmark_history: Optional benchmark index history for comparison
 
         Returns:
             Dictionary with all risk metrics
         """
-        if not nav_history or len(nav_history) < 20:
+        if nav_history is None or len(nav_history) < 20:
             return self._empty_metrics("Insufficient NAV history data")
 
-        # Convert to DataFrame
-        df = pd.DataFrame(nav_history)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
-        df['value'] = pd.to_numeric(df['value'], errors='coerce')
-        df = df.dropna(subset=['value'])
+        nav = NavSeries.coerce(nav_history)
 
-        if len(df) < 20:
+        if len(nav) < 20:
             return self._empty_metrics("Insufficient valid NAV data")
 
-        # Calculate daily returns
-        df['return'] = df['value'].pct_change()
-        daily_returns = df['return'].dropna()
-
         # Calculate metrics
         metrics = {
-            'sharpe_ratio': self._calc_sharpe_ratio(daily_returns),
-            'max_drawdown': self._calc_max_drawdown(df),
-            'annual_volatility': self._calc_annual_volatility(daily_returns),
+            'sharpe_ratio': self._calc_sharpe_ratio(nav),
+            'max_drawdown': self._calc_max_drawdown(nav),
+            'annual_volatility': self._calc_annual_volatility(nav),
             'calmar_ratio': None,  # Will be calculated after max_drawdown
-            'sortino_ratio': self._calc_sortino_ratio(daily_returns),
-            'annual_return': self._calc_annual_return(df),
-            'total_return': self._calc_total_return(df),
-            'var_95': self._calc_var(daily_returns, 0.95),
-            'var_99': self._calc_var(daily_returns, 0.99),
-            'win_rate': self._calc_win_rate(daily_returns),
+            'sortino_ratio': self._calc_sortino_ratio(nav),
+            'annual_return': self._calc_annual_return(nav),
+            'total_return': self._calc_total_return(nav),
+            'var_95': self._calc_var(nav, 0.95),
+            'var_99': self._calc_var(nav, 0.99),
+            'win_rate': self._calc_win_rate(nav),
         }
 
         # Calculate Calmar ratio
@@ -80,20 +72,20 @@ class RiskMetricsCalculator:
 
         # Add period info
         metrics['period'] = {
-            'start_date': df['date'].iloc[0].strftime('%Y-%m-%d'),
-            'end_date': df['date'].iloc[-1].strftime('%Y-%m-%d'),
-            'trading_days': len(df),
+            'start_date': nav.date_str(0),
+            'end_date': nav.date_str(-1),
+            'trading_days': len(nav),
         }
 
         metrics['computed_at'] = datetime.now().isoformat()
 
         return metrics
 
-    def _calc_sharpe_ratio(self, daily_returns: pd.Series) -> Dict:
+    def _calc_sharpe_ratio(self, nav: NavSeries) -> Dict:
         """Calculate annualized Sharpe ratio."""
         try:
-            annual_return = daily_returns.mean() * 252
-            annual_vol = daily_returns.std() * np.sqrt(252)
+            annual_return = nav.return_mean * 252
+            annual_vol = nav.return_std * np.sqrt(252)
 
             if annual_vol == 0:
                 sharpe = 0
@@ -120,24 +112,22 @@ class RiskMetricsCalculator:
         except Exception as e:
             return {'value': 0, 'rating': 'unknown', 'error': str(e)}
 
-    def _calc_max_drawdown(self, df: pd.DataFrame) -> Dict:
+    def _calc_max_drawdown(self, nav: NavSeries) -> Dict:
         """Calculate maximum drawdown."""
         try:
-            cummax = df['value'].cummax()
-            drawdown = (df['value'] - cummax) / cummax
-            max_dd = drawdown.min()
-            max_dd_idx = drawdown.idxmin()
+            max_dd_idx = int(np.argmin(nav.drawdown))
+            max_dd = nav.drawdown[max_dd_idx]
 
             # Find peak before max drawdown
-            peak_idx = df.loc[:max_dd_idx, 'value'].idxmax()
+            peak_idx = int(nav.peak_idx[max_dd_idx])
 
             # Find recovery point after max drawdown
-            peak_value = df.loc[peak_idx, 'value']
+            peak_value = nav.values[peak_idx]
             recovery_idx = None
-            if max_dd_idx < len(df) - 1:
-                recovery_mask = df.loc[max_dd_idx:, 'value'] >= peak_value
-                if recovery_mask.any():
-                    recovery_idx = recovery_mask.idxmax()
+            if max_dd_idx < len(nav) - 1:
+                recovered = np.flatnonzero(nav.values[max_dd_idx:] >= peak_value)
+                if len(recovered):
+                    recovery_idx = max_dd_idx + int(recovered[0])
 
             recovery_days = None
             if recovery_idx is not None:
@@ -158,9 +148,9 @@ class RiskMetricsCalculator:
 
             return {
                 'value': round(max_dd_pct, 2),
-                'peak_date': df.loc[peak_idx, 'date'].strftime('%Y-%m-%d'),
-                'trough_date': df.loc[max_dd_idx, 'date'].strftime('%Y-%m-%d'),
-                'recovery_date': df.loc[recovery_idx, 'date'].strftime('%Y-%m-%d') if recovery_idx else None,
+                'peak_date': nav.date_str(peak_idx),
+                'trough_date': nav.date_str(max_dd_idx),
+                'recovery_date': nav.date_str(recovery_idx) if recovery_idx else None,
                 'recovery_days': int(recovery_days) if recovery_days else None,
                 'rating': rating,
                 'description': '最大回撤是基金历史最大亏损幅度'
@@ -168,10 +158,10 @@ class RiskMetricsCalculator:
         except Exception as e:
             return {'value': 0, 'rating': 'unknown', 'error': str(e)}
 
-    def _calc_annual_volatility(self, daily_returns: pd.Series) -> Dict:
+    def _calc_annual_volatility(self, nav: NavSeries) -> Dict:
         """Calculate annualized volatility."""
         try:
-            annual_vol = daily_returns.std() * np.sqrt(252) * 100
+            annual_vol = nav.return_std * np.sqrt(252) * 100
 
             # Rating based on volatility
             if annual_vol < 10:
@@ -193,12 +183,12 @@ class RiskMetricsCalculator:
         except Exception as e:
             return {'value': 0, 'rating': 'unknown', 'error': str(e)}
 
-    def _calc_sortino_ratio(self, daily_returns: pd.Series) -> Dict:
+    def _calc_sortino_ratio(self, nav: NavSeries) -> Dict:
         """Calculate Sortino ratio (only penalizes downside volatility)."""
         try:
-            annual_return = daily_returns.mean() * 252
-            downside_returns = daily_returns[daily_returns < 0]
-            downside_vol = downside_returns.std() * np.sqrt(252)
+            annual_return = nav.return_mean * 252
+            downside_returns = nav.returns[nav.returns < 0]
+            downside_vol = downside_returns.std(ddof=1) * np.sqrt(252) if len(downside_returns) > 1 else float('nan')
 
             if downside_vol == 0:
                 sortino = 0
@@ -212,11 +202,11 @@ class RiskMetricsCalculator:
         except Exception as e:
             return {'value': 0, 'error': str(e)}
 
-    def _calc_annual_return(self, df: pd.DataFrame) -> Dict:
+    def _calc_annual_return(self, nav: NavSeries) -> Dict:
         """Calculate annualized return."""
         try:
-            total_days = len(df)
-            total_return = df['value'].iloc[-1] / df['value'].iloc[0] - 1
+            total_days = len(nav)
+            total_return = nav.values[-1] / nav.values[0] - 1
             annual_return = (1 + total_return) ** (252 / total_days) - 1
 
             return {
@@ -226,10 +216,10 @@ class RiskMetricsCalculator:
         except Exception as e:
             return {'value': 0, 'error': str(e)}
 
-    def _calc_total_return(self, df: pd.DataFrame) -> Dict:
+    def _calc_total_return(self, nav: NavSeries) -> Dict:
         """Calculate total return."""
         try:
-            total_return = (df['value'].iloc[-1] / df['value'].iloc[0] - 1) * 100
+            total_return = (nav.values[-1] / nav.values[0] - 1) * 100
             return {
                 'value': round(total_return, 2),
                 'description': '期间总收益率'
@@ -237,10 +227,10 @@ class RiskMetricsCalculator:
         except Exception as e:
             return {'value': 0, 'error': str(e)}
 
-    def _calc_var(self, daily_returns: pd.Series, confidence: float) -> Dict:
+    def _calc_var(self, nav: NavSeries, confidence: float) -> Dict:
         """Calculate Value at Risk."""
         try:
-            var = np.percentile(daily_returns, (1 - confidence) * 100) * 100
+            var = np.percentile(nav.returns, (1 - confidence) * 100) * 100
             return {
                 'value': round(var, 3),
                 'confidence': confidence,
@@ -249,10 +239,10 @@ class RiskMetricsCalculator:
         except Exception as e:
             return {'value': 0, 'error': str(e)}
 
-    def _calc_win_rate(self, daily_returns: pd.Series) -> Dict:
+    def _calc_win_rate(self, nav: NavSeries) -> Dict:
         """Calculate win rate (positive return days percentage)."""
         try:
-            win_rate = (daily_returns > 0).sum() / len(daily_returns) * 100
+            win_rate = (nav.returns > 0).sum() / len(nav.returns) * 100
             return {
                 'value': round(win_rate, 2),
                 'description': '正收益交易日占比'
@@ -286,39 +276,31 @@ class DrawdownAnalyzer:
         """
         self.threshold = threshold
 
-    def analyze_drawdowns(self, nav_history: List[Dict]) -> Dict[str, Any]:
+    def analyze_drawdowns(self, nav_history: Union[List[Dict], NavSeries]) -> Dict[str, Any]:
         """
         Analyze all significant drawdown periods.
 
         Args:
-            nav_history: List of {date, value} NAV history
+            nav_history: List of {date, value} NAV history, or a NavSeries
 
         Returns:
             Dictionary with drawdown analysis
         """
-        if not nav_history or len(nav_history) < 20:
+        if nav_history is None or len(nav_history) < 20:
             return self._empty_analysis("Insufficient NAV history data")
 
-        # Convert to DataFrame
-        df = pd.DataFrame(nav_history)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
-        df['value'] = pd.to_numeric(df['value'], errors='coerce')
-        df = df.dropna(subset=['value'])
+        nav = NavSeries.coerce(nav_history)
 
-        if len(df) < 20:
+        if len(nav) < 20:
             return self._empty_analysis("Insufficient valid NAV data")
 
-        # Calculate drawdown series
-        cummax = df['value'].cummax()
-        drawdown = (df['value'] - cummax) / cummax
-        df['drawdown'] = drawdown
+        drawdown = nav.drawdown
 
         # Find drawdown periods
-        periods = self._find_drawdown_periods(df)
+        periods = self._find_drawdown_periods(nav)
 
         # Calculate current drawdown
-        current_dd = drawdown.iloc[-1]
+        current_dd = drawdown[-1]
         current_dd_pct = abs(current_dd) * 100
 
         # Calculate statistics
@@ -338,7 +320,7 @@ class DrawdownAnalyzer:
 
         return {
             'current_drawdown': round(current_dd_pct, 2),
-            'is_in_drawdown': current_dd < -self.threshold,
+            'is_in_drawdown': bool(current_dd < -self.threshold),
             'max_drawdown': {
                 'value': round(abs(drawdown.min()) * 100, 2),
                 'period': max_dd_period
@@ -350,86 +332,78 @@ class DrawdownAnalyzer:
                 'avg_duration_days': round(avg_duration, 1),
                 'avg_recovery_days': round(avg_recovery, 1) if avg_recovery else None,
             },
-            'drawdown_series': self._get_drawdown_series(df),
+            'drawdown_series': self._get_drawdown_series(nav),
             'computed_at': datetime.now().isoformat(),
         }
 
-    def _find_drawdown_periods(self, df: pd.DataFrame) -> List[Dict]:
-        """Find all significant drawdown periods."""
+    def _find_drawdown_periods(self, nav: NavSeries) -> List[Dict]:
+        """
+        Find all significant drawdown periods.
+
+        A period starts when the drawdown first falls below -threshold, runs
+        from the preceding peak to the first point back at a new high, and its
+        trough is the deepest point in between.
+        """
         periods = []
-        in_drawdown = False
-        peak_idx = 0
-        trough_idx = 0
-        trough_value = 0
-
-        for i, row in df.iterrows():
-            dd = row['drawdown']
-
-            if not in_drawdown:
-                if dd < -self.threshold:
-                    # Start of new drawdown period
-                    in_drawdown = True
-                    # Find peak (last point before drawdown started)
-                    peak_idx = df.loc[:i, 'value'].idxmax()
-                    trough_idx = i
-                    trough_value = dd
-                else:
-                    # Update potential peak
-                    if df.loc[i, 'value'] == df.loc[:i, 'value'].max():
-                        peak_idx = i
-            else:
-                if dd < trough_value:
-                    # Deeper drawdown
-                    trough_idx = i
-                    trough_value = dd
-                elif dd >= 0:
-                    # Recovered - end of drawdown period
-                    recovery_idx = i
-
-                    period = {
-                        'start_date': df.loc[peak_idx, 'date'].strftime('%Y-%m-%d'),
-                        'trough_date': df.loc[trough_idx, 'date'].strftime('%Y-%m-%d'),
-                        'recovery_date': df.loc[recovery_idx, 'date'].strftime('%Y-%m-%d'),
-                        'drawdown': round(abs(trough_value) * 100, 2),
-                        'duration': int(trough_idx - peak_idx),
-                        'recovery_days': int(recovery_idx - trough_idx),
-                        'total_days': int(recovery_idx - peak_idx),
-                    }
-                    periods.append(period)
-                    in_drawdown = False
-                    peak_idx = i
-
-        # Handle ongoing drawdown
-        if in_drawdown:
-            period = {
-                'start_date': df.loc[peak_idx, 'date'].strftime('%Y-%m-%d'),
-                'trough_date': df.loc[trough_idx, 'date'].strftime('%Y-%m-%d'),
-                'recovery_date': None,
+        drawdown = nav.drawdown
+        n = len(drawdown)
+        below = np.flatnonzero(drawdown < -self.threshold)
+        recovered = np.flatnonzero(drawdown >= 0)
+
+        pos = 0
+        while True:
+            # Next breach of the threshold at or after pos
+            k = np.searchsorted(below, pos)
+            if k >= len(below):
+                break
+            start = int(below[k])
+            peak_idx = int(nav.peak_idx[start])
+
+            # First recovery after the breach
+            r = np.searchsorted(recovered, start)
+            recovery_idx = int(recovered[r]) if r < len(recovered) else None
+            end = recovery_idx if recovery_idx is not None else n
+            trough_idx = start + int(np.argmin(drawdown[start:end]))
+            trough_value = drawdown[trough_idx]
+
+            if recovery_idx is None:
+                # Ongoing drawdown
+                periods.append({
+                    'start_date': nav.date_str(peak_idx),
+                    'trough_date': nav.date_str(trough_idx),
+                    'recovery_date': None,
+                    'drawdown': round(abs(trough_value) * 100, 2),
+                    'duration': int(trough_idx - peak_idx),
+                    'recovery_days': None,
+                    'total_days': None,
+                    'is_ongoing': True,
+                })
+                break
+
+            periods.append({
+                'start_date': nav.date_str(peak_idx),
+                'trough_date': nav.date_str(trough_idx),
+                'recovery_date': nav.date_str(recovery_idx),
                 'drawdown': round(abs(trough_value) * 100, 2),
                 'duration': int(trough_idx - peak_idx),
-                'recovery_days': None,
-                'total_days': None,
-                'is_ongoing': True,
-            }
-            periods.append(period)
+                'recovery_days': int(recovery_idx - trough_idx),
+                'total_days': int(recovery_idx - peak_idx),
+            })
+            pos = recovery_idx + 1
 
         return periods
 
-    def _get_drawdown_series(self, df: pd.DataFrame, sample_rate: int = 5) -> List[Dict]:
+    def _get_drawdown_series(self, nav: NavSeries, sample_rate: int = 5) -> List[Dict]:
         """Get drawdown series for charting (sampled for performance)."""
         # Sample every N points for large datasets
-        if len(df) > 500:
-            sampled = df.iloc[::sample_rate].copy()
-        else:
-            sampled = df.copy()
+        step = sample_rate if len(nav) > 500 else 1
+        dates = np.datetime_as_string(nav.dates[::step], unit='D')
+        drawdowns = np.round(nav.drawdown[::step] * 100, 2)
+        values = np.round(nav.values[::step], 4)
 
         return [
-            {
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'drawdown': round(row['drawdown'] * 100, 2),
-                'value': round(row['value'], 4)
-            }
-            for _, row in sampled.iterrows()
+            {'date': date, 'drawdown': float(dd), 'value': float(value)}
+            for date, dd, value in zip(dates, drawdowns, values)
         ]
 
     def _empty_analysis(self, reason: str) -> Dict:
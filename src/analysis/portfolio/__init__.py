@@ -6,16 +6,19 @@ Institutional-grade portfolio analysis tools including:
 - Correlation analysis
 - Stress testing
 - AI smart signals
+- Aligned price panels shared by the risk calculators
 """
 
 from .risk_metrics import RiskMetricsCalculator
 from .correlation import CorrelationAnalyzer
 from .stress_test import StressTestEngine
 from .signals import SignalGenerator
+from .panel import build_price_panel
 
 __all__ = [
     'RiskMetricsCalculator',
     'CorrelationAnalyzer',
     'StressTestEngine',
-    'SignalGenerator'
+    'SignalGenerator',
+    'build_price_panel'
 ]
@@ -0,0 +1,80 @@
+"""
+Price Panel Module
+
+Aligns per-asset price/NAV histories into one date × asset matrix shared by
+the portfolio risk calculators. Daily returns, weighted portfolio returns and
+drawdowns are then whole-matrix operations instead of per-date dict lookups.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+PRICE_KEYS = ("price", "close", "value")
+
+
+def build_price_panel(
+    histories: Dict[str, List[Dict]],
+    codes: Optional[Iterable[str]] = None,
+    value_keys: Sequence[str] = PRICE_KEYS,
+    join: str = "outer"
+) -> pd.DataFrame:
+    """
+    Align price histories on date.
+
+    Args:
+        histories: Dict mapping asset code to [{date, price|close|value}]
+        codes: Assets to include, in column order (default: all with history)
+        value_keys: Fields tried in order; the first truthy one is the price
+        join: 'outer' keeps every date any asset has, 'inner' only common dates
+
+    Returns:
+        DataFrame indexed by date (sorted as given, e.g. YYYY-MM-DD or YYYYMMDD),
+        one float column per asset with history. Missing or zero prices are NaN;
+        the date itself is still part of the asset's dates.
+    """
+    columns = {}
+    for code in (codes if codes is not None else histories.keys()):
+        history = histories.get(code) or []
+        dates, values = [], []
+        for h in history:
+            date = h.get("date")
+            if not date:
+                continue
+            dates.append(date)
+            values.append(next((h.get(key) for key in value_keys if h.get(key)), None))
+        if not dates:
+            continue
+        series = pd.to_numeric(pd.Series(values, index=dates, dtype=object), errors="coerce")
+        # Later entries win for duplicate dates
+        columns[code] = series.groupby(level=0).last().replace(0, np.nan)
+
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat(columns, axis=1, join=join).sort_index().astype(np.float64)
+
+
+def panel_returns(panel: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Day-over-day returns between consecutive panel rows.
+
+    Returns:
+        (returns, valid): arrays of shape (len(panel) - 1, n_assets); returns are 0
+        where either price is missing or the previous price is not positive
+    """
+    values = panel.to_numpy(dtype=np.float64)
+    curr, prev = values[1:], values[:-1]
+    valid = np.isfinite(curr) & np.isfinite(prev) & (prev > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(valid, curr / np.where(valid, prev, 1.0) - 1, 0.0)
+    return returns, valid
+
+
+def max_drawdown(returns: np.ndarray) -> float:
+    """Maximum drawdown (positive fraction) of a compounded return series."""
+    if len(returns) == 0:
+        return 0.0
+    cumulative = np.cumprod(1 + returns)
+    running_max = np.maximum.accumulate(cumulative)
+    return float(abs(np.min((cumulative - running_max) / running_max)))
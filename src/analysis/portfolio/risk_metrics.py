@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from scipy import stats
 
+from .panel import build_price_panel, panel_returns, max_drawdown
+
 
 class RiskMetricsCalculator:
     """
@@ -140,47 +142,21 @@ class RiskMetricsCalculator:
         price_histories: Dict[str, List[Dict]]
     ) -> Dict[str, float]:
         """Calculate weighted portfolio daily returns."""
-        # Get all dates across all positions
-        all_dates = set()
-        price_maps = {}
-
-        for pos in positions:
-            code = pos.get("asset_code")
-            history = price_histories.get(code, [])
-            price_map = {}
-            for h in history:
-                date = h.get("date")
-                price = h.get("price") or h.get("close") or h.get("value")
-                if date and price:
-                    price_map[date] = float(price)
-                    all_dates.add(date)
-            price_maps[code] = price_map
-
-        # Calculate daily portfolio returns
-        sorted_dates = sorted(all_dates)
-        portfolio_returns = {}
-
-        for i in range(1, len(sorted_dates)):
-            date = sorted_dates[i]
-            prev_date = sorted_dates[i - 1]
-
-            daily_return = 0
-            valid_weight = 0
-
-            for code, weight in weights.items():
-                price_map = price_maps.get(code, {})
-                curr_price = price_map.get(date)
-                prev_price = price_map.get(prev_date)
-
-                if curr_price and prev_price and prev_price > 0:
-                    asset_return = (curr_price / prev_price) - 1
-                    daily_return += asset_return * weight
-                    valid_weight += weight
-
-            if valid_weight > 0.5:  # At least 50% of portfolio has data
-                portfolio_returns[date] = daily_return
-
-        return portfolio_returns
+        codes = [pos.get("asset_code") for pos in positions]
+        # Every date any position has a price for
+        panel = build_price_panel(price_histories, codes=codes).dropna(how="all")
+        if len(panel) < 2:
+            return {}
+
+        asset_returns, valid = panel_returns(panel)
+        w = np.array([weights.get(code, 0) for code in panel.columns])
+        daily_returns = asset_returns @ w
+        valid_weight = valid @ w
+
+        # At least 50% of portfolio has data
+        keep = valid_weight > 0.5
+        dates = panel.index[1:][keep]
+        return dict(zip(dates, daily_returns[keep].tolist()))
 
     def _calculate_benchmark_returns(
         self,
@@ -282,12 +258,7 @@ class RiskMetricsCalculator:
         """Calculate maximum drawdown."""
         if len(portfolio_returns) < 2:
             return 0
-
-        cumulative = np.cumprod(1 + portfolio_returns)
-        running_max = np.maximum.accumulate(cumulative)
-        drawdowns = (cumulative - running_max) / running_max
-
-        return abs(np.min(drawdowns))
+        return max_drawdown(portfolio_returns)
 
     def _calculate_health_score(
         self,
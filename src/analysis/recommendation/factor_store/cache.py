@@ -2,7 +2,8 @@
 Factor Cache - Multi-level caching for recommendation factors.
 
 Cache hierarchy:
-1. Memory cache: 5-minute TTL for hot data
+1. Near cache: 5-minute TTL for hot data (process-local L1 + shared L2,
+   so API workers share entries and a recompute invalidates all of them)
 2. Database cache: 24-hour TTL for factor data
 
 Optimized for 2H4G server with limited resources.
@@ -13,6 +14,8 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime, date
 from functools import wraps
 
+from src.cache.near_cache import NearCache
+
 
 class MemoryCache:
     """Thread-safe in-memory cache with TTL support."""
@@ -49,6 +52,28 @@ class MemoryCache:
                 'expires_at': time.time() + (ttl or self._default_ttl)
             }
 
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get multiple values under a single lock. Missing/expired keys are omitted."""
+        result = {}
+        with self._lock:
+            now = time.time()
+            for key in keys:
+                entry = self._cache.get(key)
+                if entry is None:
+                    continue
+                if now > entry['expires_at']:
+                    del self._cache[key]
+                    continue
+                result[key] = entry['value']
+        return result
+
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Set multiple values under a single lock."""
+        with self._lock:
+            expires_at = time.time() + (ttl or self._default_ttl)
+            for key, value in mapping.items():
+                self._cache[key] = {'value': value, 'expires_at': expires_at}
+
     def delete(self, key: str) -> bool:
         """Delete key from cache."""
         with self._lock:
@@ -101,9 +126,9 @@ class FactorCache:
 
     def __init__(self):
         """Initialize factor cache."""
-        self._stock_cache = MemoryCache(default_ttl=self.MEMORY_TTL_HOT)
-        self._fund_cache = MemoryCache(default_ttl=self.MEMORY_TTL_HOT)
-        self._metadata_cache = MemoryCache(default_ttl=self.MEMORY_TTL_WARM)
+        self._stock_cache = NearCache('factor_stock', default_ttl=self.MEMORY_TTL_HOT, max_entries=8192)
+        self._fund_cache = NearCache('factor_fund', default_ttl=self.MEMORY_TTL_HOT, max_entries=8192)
+        self._metadata_cache = NearCache('factor_meta', default_ttl=self.MEMORY_TTL_WARM, max_entries=256)
 
     def _make_key(self, prefix: str, code: str, trade_date: str) -> str:
         """Generate cache key."""
@@ -158,26 +183,21 @@ class FactorCache:
         """
         from src.storage.db import get_stock_factors_batch as db_get_batch
 
-        result = {}
-        missing_codes = []
-
-        # Check memory cache for each code
-        for code in codes:
-            cache_key = self._make_key('stock', code, trade_date)
-            cached = self._stock_cache.get(cache_key)
-            if cached is not None:
-                result[code] = cached
-            else:
-                missing_codes.append(code)
+        # Check memory cache for all codes at once
+        keys = {code: self._make_key('stock', code, trade_date) for code in codes}
+        cached = self._stock_cache.get_many(list(keys.values()))
+        result = {code: cached[key] for code, key in keys.items() if key in cached}
+        missing_codes = [code for code in codes if code not in result]
 
         # Batch fetch missing from database
         if missing_codes:
             db_results = db_get_batch(missing_codes, trade_date)
             for factors in db_results:
-                code = factors['code']
-                result[code] = factors
-                cache_key = self._make_key('stock', code, trade_date)
-                self._stock_cache.set(cache_key, factors)
+                result[factors['code']] = factors
+            self._stock_cache.set_many({
+                self._make_key('stock', factors['code'], trade_date): factors
+                for factors in db_results
+            })
 
         return result
 
@@ -242,10 +262,10 @@ class FactorCache:
         self._metadata_cache.set(cache_key, results)
 
         # Also cache individual entries
-        for factors in results:
-            code = factors['code']
-            stock_key = self._make_key('stock', code, trade_date)
-            self._stock_cache.set(stock_key, factors)
+        self._stock_cache.set_many({
+            self._make_key('stock', factors['code'], trade_date): factors
+            for factors in results
+        })
 
         return results
 
@@ -295,24 +315,19 @@ class FactorCache:
         """
         from src.storage.db import get_fund_factors_batch as db_get_batch
 
-        result = {}
-        missing_codes = []
-
-        for code in codes:
-            cache_key = self._make_key('fund', code, trade_date)
-            cached = self._fund_cache.get(cache_key)
-            if cached is not None:
-                result[code] = cached
-            else:
-                missing_codes.append(code)
+        keys = {code: self._make_key('fund', code, trade_date) for code in codes}
+        cached = self._fund_cache.get_many(list(keys.values()))
+        result = {code: cached[key] for code, key in keys.items() if key in cached}
+        missing_codes = [code for code in codes if code not in result]
 
         if missing_codes:
             db_results = db_get_batch(missing_codes, trade_date)
             for factors in db_results:
-                code = factors['code']
-                result[code] = factors
-                cache_key = self._make_key('fund', code, trade_date)
-                self._fund_cache.set(cache_key, factors)
+                result[factors['code']] = factors
+            self._fund_cache.set_many({
+                self._make_key('fund', factors['code'], trade_date): factors
+                for factors in db_results
+            })
 
         return result
 
@@ -371,10 +386,10 @@ class FactorCache:
 
         self._metadata_cache.set(cache_key, results)
 
-        for factors in results:
-            code = factors['code']
-            fund_key = self._make_key('fund', code, trade_date)
-            self._fund_cache.set(fund_key, factors)
+        self._fund_cache.set_many({
+            self._make_key('fund', factors['code'], trade_date): factors
+            for factors in results
+        })
 
         return results
 
@@ -390,8 +405,8 @@ class FactorCache:
 
     def clear_for_date(self, trade_date: str) -> None:
         """Clear cache entries for a specific date (used when recomputing)."""
-        # Memory caches use key patterns, so we can't selectively clear by date
-        # without iterating. For simplicity, clear all.
+        # Invalidation is per namespace (version bump), which also reaches
+        # every other worker's L1. For simplicity, clear all.
         self.clear_all()
 
     def cleanup(self) -> Dict[str, int]:
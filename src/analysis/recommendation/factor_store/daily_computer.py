@@ -6,12 +6,19 @@ Designed for 2H4G server:
 - Limited concurrency (4 threads max)
 - Scheduled to run at 6:00 AM daily
 - Tier-based rate limiting for TuShare API (auto-configured from TUSHARE_POINTS env var)
+
+Optional process mode (FACTOR_EXECUTION_MODE=process) runs factor math in a
+process pool so pandas work scales across cores. Workers share the parent's
+rate limiter through a token dispenser, and results stream back to the parent,
+which remains the only writer to SQLite.
 """
+import os
 import time
 import threading
+import multiprocessing
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import pandas as pd
 
 from src.data_sources.tushare_client import (
@@ -22,20 +29,20 @@ from src.storage.db import (
     get_db_connection,
     upsert_stock_factors,
     upsert_fund_factors,
+    get_fund_factors_by_date,
+    update_fund_factor_ranks,
+    get_fund_basic_profiles,
     delete_old_stock_factors,
     delete_old_fund_factors,
 )
 from .cache import factor_cache
-from .rate_limiter import tushare_rate_limiter
-
-# Print rate limiter configuration on module load
-_rate_limiter_stats = tushare_rate_limiter.get_stats()
-print(f"[RateLimiter] Initialized for {_rate_limiter_stats['tier_name']} "
-      f"({_rate_limiter_stats['points']} points): "
-      f"{_rate_limiter_stats['max_calls']} calls/minute "
-      f"(raw limit: {_rate_limiter_stats['raw_limit']}, "
-      f"safety margin: {_rate_limiter_stats['safety_margin']:.0%})")
-
+from .rate_limiter import (
+    tushare_rate_limiter,
+    SharedRateLimiterServer,
+    connect_shared_rate_limiter,
+    rate_limit_priority,
+    PRIORITY_BATCH,
+)
 
 class DailyFactorComputer:
     """
@@ -50,8 +57,36 @@ class DailyFactorComputer:
     # Configuration
     BATCH_SIZE = 100
     MAX_WORKERS = 4  # Parallel workers per batch
+    MIN_PEER_GROUP = 10  # Smaller fund-type groups are ranked against all funds
+    EXECUTION_MODES = ('thread', 'process')
+
+    def __init__(self, execution_mode: Optional[str] = None, process_workers: Optional[int] = None):
+        """
+        Args:
+            execution_mode: 'thread' (default) or 'process'
+                (auto-detected from FACTOR_EXECUTION_MODE env if not provided)
+            process_workers: Worker processes for process mode
+                (auto-detected from FACTOR_PROCESS_WORKERS env, default: CPU count)
+        """
+        if execution_mode is None:
+            execution_mode = os.getenv('FACTOR_EXECUTION_MODE', 'thread').lower()
+        if execution_mode not in self.EXECUTION_MODES:
+            print(f"[FactorComputer] Invalid execution mode: {execution_mode}, using 'thread'")
+            execution_mode = 'thread'
+
+        if process_workers is None:
+            try:
+                process_workers = int(os.getenv('FACTOR_PROCESS_WORKERS', '0'))
+            except ValueError:
+                process_workers = 0
+        if process_workers <= 0:
+            process_workers = os.cpu_count() or 2
+
+        self.execution_mode = execution_mode
+        self.process_workers = process_workers
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._limiter_server: Optional[SharedRateLimiterServer] = None
 
-    def __init__(self):
         self._running = False
         self._progress = {
             'total': 0,
@@ -159,10 +194,12 @@ class DailyFactorComputer:
             return ts_code, None
 
         try:
-            # Compute individual factor groups
-            technical = TechnicalFactors.compute(ts_code, trade_date)
-            fundamental = FundamentalFactors.compute(ts_code, trade_date)
-            sentiment = SentimentFactors.compute(ts_code, trade_date)
+            # Compute individual factor groups on the batch lane so
+            # interactive API traffic is served first
+            with rate_limit_priority(PRIORITY_BATCH):
+                technical = TechnicalFactors.compute(ts_code, trade_date)
+                fundamental = FundamentalFactors.compute(ts_code, trade_date)
+                sentiment = SentimentFactors.compute(ts_code, trade_date)
 
             # Merge all factors
             factors = {
@@ -209,9 +246,10 @@ class DailyFactorComputer:
             return fund_code, None
 
         try:
-            performance = PerformanceFactors.compute(fund_code, trade_date)
-            risk = RiskFactors.compute(fund_code, trade_date)
-            manager = ManagerFactors.compute(fund_code, trade_date)
+            with rate_limit_priority(PRIORITY_BATCH):
+                performance = PerformanceFactors.compute(fund_code, trade_date)
+                risk = RiskFactors.compute(fund_code, trade_date)
+                manager = ManagerFactors.compute(fund_code, trade_date)
 
             factors = {
                 **performance,
@@ -245,9 +283,6 @@ class DailyFactorComputer:
         Returns:
             Tuple of (success_count, failure_count)
         """
-        success = 0
-        failure = 0
-
         compute_func = (
             self._compute_stock_factors_single if asset_type == 'stock'
             else self._compute_fund_factors_single
@@ -263,6 +298,34 @@ class DailyFactorComputer:
               f"Usage: {stats['current_calls']}/{stats['max_calls']} calls "
               f"({stats['utilization']:.1f}%)")
 
+        if self._process_pool is not None:
+            success, failure = self._process_batch_streaming(
+                codes, trade_date, trade_date_db, asset_type, persist_func
+            )
+        else:
+            success, failure = self._process_batch_threaded(
+                codes, trade_date, trade_date_db, compute_func, persist_func
+            )
+
+        # Print rate limiter stats after batch
+        stats = tushare_rate_limiter.get_stats()
+        print(f"[Batch End] Usage: {stats['current_calls']}/{stats['max_calls']} calls "
+              f"({stats['utilization']:.1f}%)")
+
+        return success, failure
+
+    def _process_batch_threaded(
+        self,
+        codes: List[str],
+        trade_date: str,
+        trade_date_db: str,
+        compute_func,
+        persist_func
+    ) -> Tuple[int, int]:
+        """Compute a batch on the thread pool, then persist serially."""
+        success = 0
+        failure = 0
+
         # Collect factors first, then persist in batches to reduce lock contention
         computed_factors = []
 
@@ -296,13 +359,88 @@ class DailyFactorComputer:
             except Exception as e:
                 print(f"Failed to persist factors for {factors.get('code')}: {e}")
 
-        # Print rate limiter stats after batch
-        stats = tushare_rate_limiter.get_stats()
-        print(f"[Batch End] Usage: {stats['current_calls']}/{stats['max_calls']} calls "
-              f"({stats['utilization']:.1f}%)")
+        return success, failure
+
+    def _process_batch_streaming(
+        self,
+        codes: List[str],
+        trade_date: str,
+        trade_date_db: str,
+        asset_type: str,
+        persist_func
+    ) -> Tuple[int, int]:
+        """
+        Compute a batch on the process pool.
+
+        Results are persisted by this (parent) process as each worker finishes,
+        so SQLite only ever sees a single writer.
+        """
+        success = 0
+        failure = 0
+
+        futures = {
+            self._process_pool.submit(_compute_factors_in_worker, asset_type, code, trade_date): code
+            for code in codes
+        }
+
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                _, factors = future.result()
+            except Exception as e:
+                print(f"Batch processing error for {code}: {e}")
+                failure += 1
+                continue
+
+            if not factors:
+                failure += 1
+                continue
+
+            factors['code'] = code.split('.')[0] if '.' in code else code
+            factors['trade_date'] = trade_date_db
+            try:
+                persist_func(factors)
+                success += 1
+            except Exception as e:
+                print(f"Failed to persist factors for {factors.get('code')}: {e}")
+                failure += 1
 
         return success, failure
 
+    def _start_process_pool(self) -> None:
+        """Start the shared limiter server and worker processes (process mode only)."""
+        if self.execution_mode != 'process' or self._process_pool is not None:
+            return
+
+        # Logged here in the parent only; spawned workers re-import this module
+        stats = tushare_rate_limiter.get_stats()
+        print(f"[RateLimiter] Initialized for {stats['tier_name']} "
+              f"({stats['points']} points): "
+              f"{stats['max_calls']} calls/minute "
+              f"(raw limit: {stats['raw_limit']}, "
+              f"safety margin: {stats['safety_margin']:.0%})")
+
+        self._limiter_server = SharedRateLimiterServer()
+        address, authkey = self._limiter_server.start()
+
+        # Spawn rather than fork: the API process already runs scheduler and server threads
+        self._process_pool = ProcessPoolExecutor(
+            max_workers=self.process_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=connect_shared_rate_limiter,
+            initargs=(address, authkey),
+        )
+        print(f"[FactorComputer] Process mode: {self.process_workers} workers sharing one rate limiter")
+
+    def _stop_process_pool(self) -> None:
+        """Shut down worker processes and the limiter server."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
+        if self._limiter_server is not None:
+            self._limiter_server.stop()
+            self._limiter_server = None
+
     def compute_all_stock_factors(self, trade_date: str = None) -> Dict:
         """
         Compute factors for all A-shares.
@@ -326,6 +464,8 @@ class DailyFactorComputer:
         print(f"Starting stock factor computation for {trade_date}...")
 
         try:
+            self._start_process_pool()
+
             # Get all stock codes
             all_codes = self._get_all_stock_codes()
 
@@ -388,6 +528,7 @@ class DailyFactorComputer:
             return {'error': str(e)}
 
         finally:
+            self._stop_process_pool()
             self._running = False
 
     def compute_all_fund_factors(self, trade_date: str = None, universe: str = "market_otc") -> Dict:
@@ -418,6 +559,8 @@ class DailyFactorComputer:
         print(f"Starting fund factor computation for {trade_date} (universe={universe})...")
 
         try:
+            self._start_process_pool()
+
             all_codes = self._get_all_fund_codes(universe=universe)
             total = len(all_codes)
 
@@ -462,6 +605,9 @@ class DailyFactorComputer:
                     failed=self._progress['failed'] + failure
                 )
 
+            # Peer ranks need every fund's returns, so they are a post-pass
+            ranked = self.rank_fund_returns(trade_date)
+
             factor_cache.clear_for_date(trade_date)
 
             self._update_progress(status='completed')
@@ -469,6 +615,7 @@ class DailyFactorComputer:
             result = {
                 'trade_date': trade_date,
                 'universe': universe,
+                'ranked': ranked,
                 'total': total,
                 'success': total_success,
                 'failure': total_failure,
@@ -483,8 +630,59 @@ class DailyFactorComputer:
             return {'error': str(e)}
 
         finally:
+            self._stop_process_pool()
             self._running = False
 
+    def rank_fund_returns(self, trade_date: str) -> int:
+        """
+        Fill return_rank_1w / return_rank_1m with percentile ranks (0-100) of
+        each fund's return within its fund-type peer group, then recompute the
+        composite scores that use them.
+
+        Groups smaller than MIN_PEER_GROUP are ranked against all funds.
+
+        Args:
+            trade_date: Trade date in YYYYMMDD format
+
+        Returns:
+            Number of funds updated
+        """
+        from src.analysis.recommendation.fund_engine.strategies.momentum import MomentumStrategy
+        from src.analysis.recommendation.fund_engine.strategies.alpha import AlphaStrategy
+
+        trade_date_db = f"{trade_date[:4]}-{trade_date[4:6]}-{trade_date[6:8]}"
+        try:
+            rows = get_fund_factors_by_date(trade_date_db)
+            if not rows:
+                return 0
+
+            fund_types = {code: p.get('fund_type') for code, p in get_fund_basic_profiles(status=None).items()}
+            df = pd.DataFrame(rows)
+            df['peer_group'] = df['code'].map(fund_types).fillna('其他')
+            small = df.groupby('peer_group')['code'].transform('size') < self.MIN_PEER_GROUP
+
+            returns = df[['return_1w', 'return_1m']].apply(pd.to_numeric, errors='coerce')
+            ranks = returns.groupby(df['peer_group']).rank(pct=True)
+            ranks.loc[small] = returns.rank(pct=True).loc[small]
+            ranks = (ranks * 100).round(2)
+            df['return_rank_1w'] = ranks['return_1w']
+            df['return_rank_1m'] = ranks['return_1m']
+
+            records = df.drop(columns='peer_group')
+            updates = []
+            for factors in records.astype(object).where(records.notna(), None).to_dict('records'):
+                factors['short_term_score'] = MomentumStrategy.compute_score(factors)
+                factors['long_term_score'] = AlphaStrategy.compute_score(factors)
+                updates.append(factors)
+
+            updated = update_fund_factor_ranks(trade_date_db, updates)
+            print(f"[FactorComputer] Ranked returns of {updated} funds across "
+                  f"{df.loc[~small, 'peer_group'].nunique()} peer groups")
+            return updated
+        except Exception as e:
+            print(f"[FactorComputer] Fund return ranking failed: {e}")
+            return 0
+
     def cleanup_old_data(self, days_to_keep: int = 30) -> Dict:
         """
         Clean up old factor data to save disk space.
@@ -508,6 +706,18 @@ class DailyFactorComputer:
 daily_computer = DailyFactorComputer()
 
 
+def _compute_factors_in_worker(asset_type: str, code: str, trade_date: str) -> Tuple[str, Optional[Dict]]:
+    """
+    Process-pool entry point.
+
+    Runs in a worker process, where ``connect_shared_rate_limiter`` has already
+    swapped in the parent's limiter proxy.
+    """
+    if asset_type == 'stock':
+        return daily_computer._compute_stock_factors_single(code, trade_date)
+    return daily_computer._compute_fund_factors_single(code, trade_date)
+
+
 def run_daily_computation():
     """
     Entry point for scheduled daily factor computation.
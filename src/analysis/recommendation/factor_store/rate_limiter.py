@@ -3,11 +3,132 @@ Rate Limiter for TuShare API calls.
 
 Implements per-interface rate limiting to ensure we don't exceed API rate limits.
 Each TuShare interface has its own independent rate limit based on user points level.
+
+Each interface is a token bucket (O(1) per acquire) with two priority lanes:
+interactive requests (user-facing endpoints) may dip into a reserved slice of
+the bucket and pre-empt waiting batch requests (nightly factor jobs), so a
+long batch run cannot starve the API.
 """
 import os
 import time
+import asyncio
+import logging
 import threading
-from typing import Optional, Dict
+import secrets
+import socket
+import contextvars
+from contextlib import contextmanager
+from multiprocessing.managers import BaseManager, Server
+from typing import Optional, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+# Lane used when acquire() is called without an explicit priority
+_current_priority: contextvars.ContextVar = contextvars.ContextVar(
+    'tushare_rate_limit_priority', default=PRIORITY_INTERACTIVE
+)
+
+
+def current_priority() -> str:
+    """Get the priority lane for TuShare calls made from the current context."""
+    return _current_priority.get()
+
+
+@contextmanager
+def rate_limit_priority(priority: str):
+    """
+    Run TuShare calls in the enclosed block on the given priority lane.
+
+    Example:
+        with rate_limit_priority(PRIORITY_BATCH):
+            TechnicalFactors.compute(ts_code, trade_date)
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Invalid priority: {priority}. Must be one of {PRIORITIES}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class _TokenBucket:
+    """
+    Token bucket for a single interface.
+
+    Capacity (burst) plus one minute of refill never exceeds the per-minute
+    limit, so any 60s window stays within quota.
+    """
+
+    __slots__ = (
+        'limit', 'capacity', 'rate', 'reserve', 'tokens', 'updated_at',
+        'interactive_waiters', 'window_start', 'window_count', 'metrics',
+    )
+
+    def __init__(self, limit: int, burst_ratio: float, reserve_ratio: float, now: float):
+        self.limit = max(1, limit)
+        self.capacity = max(1.0, float(int(self.limit * burst_ratio)))
+        self.rate = max(self.limit - self.capacity, 1.0) / 60.0  # tokens per second
+        self.reserve = float(int(self.capacity * reserve_ratio)) if self.capacity > 1 else 0.0
+        self.tokens = self.capacity
+        self.updated_at = now
+        self.interactive_waiters = 0
+        # Fixed one-minute window counter for usage stats
+        self.window_start = now
+        self.window_count = 0
+        self.metrics = {
+            lane: {'granted': 0, 'waited': 0, 'timeouts': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for lane in PRIORITIES
+        }
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_take(self, priority: str, now: float) -> float:
+        """
+        Take a token if the lane allows it.
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until it is worth retrying
+        """
+        self.refill(now)
+        floor = self.reserve if priority == PRIORITY_BATCH else 0.0
+
+        # Batch requests yield while any interactive request is queued
+        if priority == PRIORITY_BATCH and self.interactive_waiters > 0:
+            return max((floor + 1.0 - self.tokens) / self.rate, 1.0 / self.rate)
+
+        if self.tokens >= floor + 1.0:
+            self.tokens -= 1.0
+            if now - self.window_start >= 60.0:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            return 0.0
+
+        return (floor + 1.0 - self.tokens) / self.rate
+
+    def current_calls(self, now: float) -> int:
+        return self.window_count if now - self.window_start < 60.0 else 0
+
+    def record(self, priority: str, waited: float, granted: bool = True) -> None:
+        m = self.metrics[priority]
+        if not granted:
+            m['timeouts'] += 1
+            return
+        m['granted'] += 1
+        if waited > 0.001:
+            m['waited'] += 1
+            m['total_wait'] += waited
+            m['max_wait'] = max(m['max_wait'], waited)
 
 
 class TuShareRateLimiter:
@@ -22,6 +143,10 @@ class TuShareRateLimiter:
 
     Each interface (fund_nav, fund_manager, daily, etc.) has its own independent quota.
     Some interfaces have special lower limits regardless of points level.
+
+    Interactive callers can always use the reserved slice of each bucket and
+    are served before queued batch callers. Both a blocking ``acquire`` and an
+    asyncio-friendly ``acquire_async`` are provided.
     """
 
     # Predefined tier configurations based on TuShare points
@@ -42,6 +167,11 @@ class TuShareRateLimiter:
         # Add more interfaces with special limits as needed
     }
 
+    # Share of the per-minute limit that may be spent as an instant burst
+    BURST_RATIO = 0.2
+    # Share of the burst capacity reserved for interactive requests
+    INTERACTIVE_RESERVE_RATIO = 0.3
+
     def __init__(self, points: Optional[int] = None, safety_margin: Optional[float] = None):
         """
         Initialize rate limiter with tier-based configuration.
@@ -72,9 +202,10 @@ class TuShareRateLimiter:
         self.max_calls = int(self.tier_limit * safety_margin)
         self.raw_limit = self.tier_limit
 
-        # Per-interface rate limiting state (each interface tracked independently)
-        self.interface_calls: Dict[str, list] = {}  # interface_name -> list of timestamps
+        # Per-interface token buckets (each interface tracked independently)
+        self.buckets: Dict[str, _TokenBucket] = {}
         self.lock = threading.Lock()  # Single lock for all operations
+        self._cond = threading.Condition(self.lock)
 
     def _detect_points_from_env(self) -> int:
         """
@@ -146,7 +277,25 @@ class TuShareRateLimiter:
 
         return int(raw_limit * self.safety_margin)
 
-    def acquire(self, interface: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+    def _get_bucket(self, interface: str, now: float) -> _TokenBucket:
+        """Get or create the token bucket for an interface. Caller holds the lock."""
+        bucket = self.buckets.get(interface)
+        if bucket is None:
+            bucket = _TokenBucket(
+                self._get_interface_limit(interface),
+                self.BURST_RATIO,
+                self.INTERACTIVE_RESERVE_RATIO,
+                now,
+            )
+            self.buckets[interface] = bucket
+        return bucket
+
+    def acquire(
+        self,
+        interface: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+    ) -> bool:
         """
         Acquire permission to make an API call for a specific interface.
 
@@ -156,6 +305,7 @@ class TuShareRateLimiter:
         Args:
             interface: Interface name (e.g., 'fund_nav', 'daily'). Required for proper limiting.
             timeout: Maximum time to wait in seconds (None = wait forever)
+            priority: 'interactive' or 'batch' (default: lane of the current context)
 
         Returns:
             True if permission granted, False if timeout
@@ -163,45 +313,97 @@ class TuShareRateLimiter:
         # Use 'unknown' if interface not specified (backward compatibility)
         if not interface:
             interface = 'unknown'
+        if priority not in PRIORITIES:
+            priority = current_priority()
+
+        start_time = time.monotonic()
+        queued = False
+
+        with self._cond:
+            bucket = self._get_bucket(interface, start_time)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait_time = bucket.try_take(priority, now)
+                    if wait_time == 0.0:
+                        bucket.record(priority, now - start_time)
+                        return True
+
+                    if timeout is not None:
+                        remaining = timeout - (now - start_time)
+                        if remaining <= 0:
+                            bucket.record(priority, now - start_time, granted=False)
+                            return False
+                        wait_time = min(wait_time, remaining)
+
+                    if priority == PRIORITY_INTERACTIVE and not queued:
+                        bucket.interactive_waiters += 1
+                        queued = True
+
+                    logger.debug(f"[RateLimiter] Interface '{interface}' ({priority}) waiting {wait_time:.2f}s")
+                    # Releases the lock while waiting so other interfaces proceed
+                    self._cond.wait(wait_time)
+            finally:
+                if queued:
+                    bucket.interactive_waiters -= 1
+                    # Let batch waiters re-check now that the interactive queue shrank
+                    self._cond.notify_all()
+
+    async def acquire_async(
+        self,
+        interface: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+    ) -> bool:
+        """
+        Asyncio-friendly variant of ``acquire``.
 
-        start_time = time.time()
-        max_calls = self._get_interface_limit(interface)
-
-        while True:
-            with self.lock:
-                now = time.time()
-
-                # Initialize interface tracking if needed
-                if interface not in self.interface_calls:
-                    self.interface_calls[interface] = []
-
-                # Clean up old calls for this interface
-                self.interface_calls[interface] = [
-                    t for t in self.interface_calls[interface]
-                    if now - t < self.time_window
-                ]
-
-                current_calls = len(self.interface_calls[interface])
+        Waits with ``asyncio.sleep`` instead of blocking the event loop. Shares
+        buckets, lanes and metrics with the sync ``acquire``.
 
-                # Check if we can make a call
-                if current_calls < max_calls:
-                    self.interface_calls[interface].append(now)
-                    return True
+        Args:
+            interface: Interface name (e.g., 'fund_nav', 'daily')
+            timeout: Maximum time to wait in seconds (None = wait forever)
+            priority: 'interactive' or 'batch' (default: lane of the current context)
 
-                # Calculate wait time
-                oldest_call = min(self.interface_calls[interface])
-                wait_time = self.time_window - (now - oldest_call) + 0.1
+        Returns:
+            True if permission granted, False if timeout
+        """
+        if not interface:
+            interface = 'unknown'
+        if priority not in PRIORITIES:
+            priority = current_priority()
 
-            # Check timeout
-            if timeout is not None:
-                elapsed = time.time() - start_time
-                if elapsed >= timeout:
-                    return False
-                wait_time = min(wait_time, timeout - elapsed)
+        start_time = time.monotonic()
+        queued_bucket: Optional[_TokenBucket] = None
 
-            # Wait before retrying
-            print(f"[RateLimiter] Interface '{interface}' rate limit reached ({current_calls}/{max_calls}), waiting {wait_time:.1f}s...")
-            time.sleep(wait_time)
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    bucket = self._get_bucket(interface, now)
+                    wait_time = bucket.try_take(priority, now)
+                    if wait_time == 0.0:
+                        bucket.record(priority, now - start_time)
+                        return True
+
+                    if timeout is not None:
+                        remaining = timeout - (now - start_time)
+                        if remaining <= 0:
+                            bucket.record(priority, now - start_time, granted=False)
+                            return False
+                        wait_time = min(wait_time, remaining)
+
+                    if priority == PRIORITY_INTERACTIVE and queued_bucket is None:
+                        bucket.interactive_waiters += 1
+                        queued_bucket = bucket
+
+                await asyncio.sleep(wait_time)
+        finally:
+            if queued_bucket is not None:
+                with self._cond:
+                    queued_bucket.interactive_waiters -= 1
+                    self._cond.notify_all()
 
     def get_stats(self, interface: Optional[str] = None) -> dict:
         """
@@ -211,16 +413,13 @@ class TuShareRateLimiter:
             interface: Optional interface name to get interface-specific stats
 
         Returns:
-            Dict with current usage statistics
+            Dict with current usage statistics and per-lane wait-time metrics
         """
         with self.lock:
-            now = time.time()
+            now = time.monotonic()
 
             # Calculate total calls across all interfaces for backward compatibility
-            total_calls = 0
-            for iface, calls in self.interface_calls.items():
-                self.interface_calls[iface] = [t for t in calls if now - t < self.time_window]
-                total_calls += len(self.interface_calls[iface])
+            total_calls = sum(b.current_calls(now) for b in self.buckets.values())
 
             stats = {
                 'tier_name': self.tier_name,
@@ -230,45 +429,44 @@ class TuShareRateLimiter:
                 'max_calls': self.max_calls,  # backward compatibility
                 'raw_limit': self.raw_limit,  # backward compatibility
                 'time_window': self.time_window,
-                'active_interfaces': len(self.interface_calls),
+                'active_interfaces': len(self.buckets),
                 # Backward compatibility fields
                 'current_calls': total_calls,
-                'utilization': total_calls / (self.max_calls * max(1, len(self.interface_calls))) * 100 if self.max_calls > 0 else 0,
+                'utilization': total_calls / (self.max_calls * max(1, len(self.buckets))) * 100 if self.max_calls > 0 else 0,
             }
 
             # Add interface-specific stats if requested
             if interface:
-                if interface not in self.interface_calls:
-                    self.interface_calls[interface] = []
-
-                self.interface_calls[interface] = [
-                    t for t in self.interface_calls[interface]
-                    if now - t < self.time_window
-                ]
-
-                interface_max = self._get_interface_limit(interface)
-                current_calls = len(self.interface_calls[interface])
+                bucket = self._get_bucket(interface, now)
+                bucket.refill(now)
+                current_calls = bucket.current_calls(now)
 
                 stats['interface'] = interface
                 stats['interface_current_calls'] = current_calls
-                stats['interface_max_calls'] = interface_max
-                stats['interface_utilization'] = (
-                    current_calls / interface_max * 100
-                    if interface_max > 0 else 0
-                )
+                stats['interface_max_calls'] = bucket.limit
+                stats['interface_utilization'] = current_calls / bucket.limit * 100
+                stats['interface_tokens'] = round(bucket.tokens, 2)
 
             # Add summary of all active interfaces
             interface_summary = {}
-            for iface, calls in self.interface_calls.items():
-                calls = [t for t in calls if now - t < self.time_window]
-                self.interface_calls[iface] = calls
-                iface_max = self._get_interface_limit(iface)
+            wait_metrics = {}
+            for iface, bucket in self.buckets.items():
+                current = bucket.current_calls(now)
                 interface_summary[iface] = {
-                    'current': len(calls),
-                    'max': iface_max,
-                    'utilization': len(calls) / iface_max * 100 if iface_max > 0 else 0
+                    'current': current,
+                    'max': bucket.limit,
+                    'utilization': current / bucket.limit * 100,
+                    'interactive_waiters': bucket.interactive_waiters,
+                }
+                wait_metrics[iface] = {
+                    lane: {
+                        **m,
+                        'avg_wait': m['total_wait'] / m['waited'] if m['waited'] else 0.0,
+                    }
+                    for lane, m in bucket.metrics.items()
                 }
             stats['interfaces'] = interface_summary
+            stats['wait_metrics'] = wait_metrics
 
             return stats
 
@@ -279,13 +477,133 @@ class TuShareRateLimiter:
         Args:
             interface: Optional interface to reset. If None, resets all interfaces.
         """
-        with self.lock:
+        with self._cond:
             if interface:
-                self.interface_calls[interface] = []
+                self.buckets.pop(interface, None)
             else:
-                self.interface_calls = {}
+                self.buckets = {}
+            self._cond.notify_all()
 
 
 # Global rate limiter instance for TuShare API
 # Automatically configured based on environment variables
 tushare_rate_limiter = TuShareRateLimiter()
+
+
+# =============================================================================
+# Cross-process sharing (parent-owned token dispenser)
+# =============================================================================
+
+class _RateLimiterServer(Server):
+    """Manager server whose accept loop ends once the listener is closed."""
+
+    def accepter(self):
+        # The stock accepter retries on every OSError, so after the listener
+        # is closed it would spin forever
+        while True:
+            try:
+                c = self.listener.accept()
+            except OSError:
+                if self.stop_event.is_set():
+                    return
+                continue
+            t = threading.Thread(target=self.handle_request, args=(c,))
+            t.daemon = True
+            t.start()
+
+
+class _RateLimiterManager(BaseManager):
+    """Manager used to expose the parent's limiter to worker processes."""
+
+    def get_server(self):
+        # BaseManager.get_server always builds a stock Server
+        return _RateLimiterServer(self._registry, self._address, self._authkey, self._serializer)
+
+
+_LIMITER_METHODS = ('acquire', 'get_stats', 'reset')
+_RateLimiterManager.register(
+    'get_limiter',
+    callable=lambda: tushare_rate_limiter,
+    exposed=_LIMITER_METHODS,
+)
+
+
+class _RateLimiterClient(BaseManager):
+    """Client-side manager used by worker processes to reach the dispenser."""
+    pass
+
+
+_RateLimiterClient.register('get_limiter', exposed=_LIMITER_METHODS)
+
+
+class SharedRateLimiterServer:
+    """
+    Serves the parent process's ``tushare_rate_limiter`` to worker processes.
+
+    The server runs in a daemon thread inside the parent, so the parent's own
+    TuShare calls (HTTP endpoints, scheduler jobs) and every worker process
+    draw from the same per-interface budget.
+    """
+
+    def __init__(self):
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self.address: Optional[Tuple[str, int]] = None
+        self.authkey: bytes = secrets.token_bytes(16)
+
+    def start(self) -> Tuple[Tuple[str, int], bytes]:
+        """
+        Start serving the limiter on a random localhost port.
+
+        Returns:
+            Tuple of (address, authkey) to hand to worker processes
+        """
+        if self._server is None:
+            manager = _RateLimiterManager(address=('127.0.0.1', 0), authkey=self.authkey)
+            self._server = manager.get_server()
+            self.address = self._server.address
+            self._thread = threading.Thread(
+                target=self._server.serve_forever,
+                name='tushare-rate-limiter-server',
+                daemon=True,
+            )
+            self._thread.start()
+            print(f"[RateLimiter] Shared limiter serving on {self.address[0]}:{self.address[1]}")
+        return self.address, self.authkey
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the server: close the listener and wait for the server thread."""
+        if self._server is not None:
+            self._server.stop_event.set()
+            # close() alone does not wake a thread blocked in accept() on Linux;
+            # shutting the socket down does, and the accepter then returns
+            sock = getattr(getattr(self._server.listener, '_listener', None), '_socket', None)
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self._server.listener.close()
+            if self._thread is not None:
+                self._thread.join(timeout)
+            self._server = None
+            self._thread = None
+            self.address = None
+
+
+def connect_shared_rate_limiter(address: Tuple[str, int], authkey: bytes):
+    """
+    Replace this process's ``tushare_rate_limiter`` with a proxy to the parent's.
+
+    Intended as a ``ProcessPoolExecutor`` initializer. ``tushare_call_with_retry``
+    looks the limiter up at call time, so every TuShare call made by the worker
+    afterwards is throttled against the shared budget.
+
+    Args:
+        address: Address returned by ``SharedRateLimiterServer.start``
+        authkey: Auth key returned by ``SharedRateLimiterServer.start``
+    """
+    global tushare_rate_limiter
+    client = _RateLimiterClient(address=address, authkey=authkey)
+    client.connect()
+    tushare_rate_limiter = client.get_limiter()
@@ -2,13 +2,13 @@
 Fund Performance Factors - Return and ranking metrics for fund recommendation.
 
 Key factors:
-- Return rankings (weekly, monthly)
+- Return rankings (weekly, monthly; percentile within fund-type peers)
 - Risk-adjusted momentum
 - Performance consistency
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional, List
+from typing import Dict, List
 from datetime import datetime, timedelta
 
 from src.data_sources.tushare_client import (
@@ -95,10 +95,8 @@ class PerformanceFactors:
                     ret = (current_nav - past_nav) / past_nav * 100
                     factors[f'return_{period_name}'] = round(ret, 4)
 
-            # Rankings would need to compare against other funds
-            # This is a placeholder - actual ranking needs peer comparison
-            factors['return_rank_1w'] = cls._estimate_rank(factors.get('return_1w'))
-            factors['return_rank_1m'] = cls._estimate_rank(factors.get('return_1m'))
+            # return_rank_1w / return_rank_1m need every peer's return; they are
+            # filled by DailyFactorComputer.rank_fund_returns once all funds are stored
 
         except Exception as e:
             print(f"Error computing performance factors for {fund_code}: {e}")
@@ -118,30 +116,6 @@ class PerformanceFactors:
         else:
             return f"{code}.OF"
 
-    @classmethod
-    def _estimate_rank(cls, return_pct: Optional[float]) -> Optional[float]:
-        """
-        Estimate percentile rank based on return.
-
-        This is a rough estimate - actual ranking needs peer comparison.
-        Assumes normal distribution of fund returns.
-        """
-        if return_pct is None:
-            return None
-
-        # Rough percentile mapping based on typical fund return distribution
-        # These are approximations
-        if return_pct >= 5:
-            return 90 + min(10, (return_pct - 5) * 2)
-        elif return_pct >= 2:
-            return 70 + (return_pct - 2) * 6.67
-        elif return_pct >= 0:
-            return 50 + return_pct * 10
-        elif return_pct >= -2:
-            return 30 + (return_pct + 2) * 10
-        else:
-            return max(0, 30 + return_pct * 5)
-
 
 def compute_performance_score(factors: Dict) -> float:
     """
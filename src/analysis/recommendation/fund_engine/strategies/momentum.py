@@ -81,18 +81,26 @@ class MomentumStrategy:
         score = 0
         weights = 0
 
-        # 1-week return
+        # 1-week return: peer percentile rank when available
         ret_1w = factors.get('return_1w')
-        if ret_1w is not None:
+        rank_1w = factors.get('return_rank_1w')
+        if rank_1w is not None:
+            score += rank_1w * 0.30
+            weights += 0.30
+        elif ret_1w is not None:
             # Normalize: -5% to 5% -> 0 to 100
             ret_score = 50 + (ret_1w * 10)
             ret_score = max(0, min(100, ret_score))
             score += ret_score * 0.30
             weights += 0.30
 
-        # 1-month return
+        # 1-month return: peer percentile rank when available
         ret_1m = factors.get('return_1m')
-        if ret_1m is not None:
+        rank_1m = factors.get('return_rank_1m')
+        if rank_1m is not None:
+            score += rank_1m * 0.40
+            weights += 0.40
+        elif ret_1m is not None:
             ret_score = 50 + (ret_1m * 5)
             ret_score = max(0, min(100, ret_score))
             score += ret_score * 0.40
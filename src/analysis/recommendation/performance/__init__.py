@@ -0,0 +1,5 @@
+# Performance - Recommendation evaluation and factor backtests
+from .evaluator import RecommendationEvaluator, run_performance_evaluation
+from .backtest import WalkForwardBacktester
+
+__all__ = ['RecommendationEvaluator', 'run_performance_evaluation', 'WalkForwardBacktester']
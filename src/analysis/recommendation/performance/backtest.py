@@ -0,0 +1,249 @@
+"""
+Walk-Forward Factor Backtest - Replay stored strategy scores against realized prices.
+
+``short_term_score`` / ``long_term_score`` in the factor tables are the
+``ShortTermStrategy`` / ``LongTermStrategy`` (stocks) and ``MomentumStrategy``
+/ ``AlphaStrategy`` (funds) outputs computed each day by the daily factor
+job. This backtest pivots that history into a dates x codes score matrix,
+aligns it with the price panel, and evaluates every rebalance date at once:
+
+- Top-N portfolio (scores >= the strategy's MIN_SCORE_THRESHOLD) vs the
+  equal-weight universe, held for ``horizon`` trading days
+- Rank IC (Spearman) between scores and forward returns
+- Top/bottom quintile spread
+
+Rebalances step forward by ``rebalance_every`` trading days, so each period
+only uses scores known on its own rebalance date.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.storage.db import get_factor_score_history
+from src.analysis.recommendation.stock_engine.strategies import ShortTermStrategy, LongTermStrategy
+from src.analysis.recommendation.fund_engine.strategies import MomentumStrategy, AlphaStrategy
+from .price_panel import load_price_panel
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _row_rank(matrix: np.ndarray) -> np.ndarray:
+    """Rank each row (1 = smallest), leaving NaNs as NaN."""
+    return pd.DataFrame(matrix).rank(axis=1, method='average').to_numpy()
+
+
+def _row_corr(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pearson correlation per row, ignoring positions where either side is NaN."""
+    mask = np.isfinite(a) & np.isfinite(b)
+    count = mask.sum(axis=1)
+    a = np.where(mask, a, 0.0)
+    b = np.where(mask, b, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_a = a.sum(axis=1) / count
+        mean_b = b.sum(axis=1) / count
+        da = np.where(mask, a - mean_a[:, None], 0.0)
+        db = np.where(mask, b - mean_b[:, None], 0.0)
+        corr = (da * db).sum(axis=1) / np.sqrt((da ** 2).sum(axis=1) * (db ** 2).sum(axis=1))
+    return np.where(count >= 3, corr, np.nan)
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    count = mask.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, np.where(mask, values, 0.0).sum(axis=1) / count, np.nan)
+
+
+class WalkForwardBacktester:
+    """Vectorized walk-forward backtest over the factor score history."""
+
+    STRATEGIES = {
+        ('stock', 'short_term'): ShortTermStrategy,
+        ('stock', 'long_term'): LongTermStrategy,
+        ('fund', 'short_term'): MomentumStrategy,
+        ('fund', 'long_term'): AlphaStrategy,
+    }
+    # Default holding periods in trading days (~2 weeks / ~3 months)
+    DEFAULT_HORIZON = {
+        'short_term': 10,
+        'long_term': 60,
+    }
+
+    def run(
+        self,
+        asset_type: str = 'stock',
+        score_type: str = 'short_term',
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        top_n: int = 10,
+        horizon: Optional[int] = None,
+        rebalance_every: Optional[int] = None,
+        min_score: Optional[float] = None,
+        fetch_missing: bool = True
+    ) -> Dict:
+        """
+        Backtest a strategy's stored scores.
+
+        Args:
+            asset_type: 'stock' or 'fund'
+            score_type: 'short_term' or 'long_term'
+            start_date: First score date (YYYY-MM-DD, default: all history)
+            end_date: Last score date (YYYY-MM-DD, default: all history)
+            top_n: Names held per rebalance
+            horizon: Holding period in trading days (default per strategy)
+            rebalance_every: Trading days between rebalances (default: horizon,
+                i.e. non-overlapping periods)
+            min_score: Minimum score to hold (default: strategy MIN_SCORE_THRESHOLD)
+            fetch_missing: Fetch trading days missing from the price store
+
+        Returns:
+            Dict with 'summary' metrics and per-rebalance 'periods'
+        """
+        strategy = self.STRATEGIES.get((asset_type, score_type))
+        if strategy is None:
+            raise ValueError(f"Unknown asset_type/score_type: {asset_type}/{score_type}")
+
+        horizon = horizon or self.DEFAULT_HORIZON[score_type]
+        rebalance_every = rebalance_every or horizon
+        if min_score is None:
+            min_score = strategy.MIN_SCORE_THRESHOLD
+
+        config = {
+            'asset_type': asset_type,
+            'score_type': score_type,
+            'strategy': strategy.__name__,
+            'top_n': top_n,
+            'horizon': horizon,
+            'rebalance_every': rebalance_every,
+            'min_score': min_score,
+        }
+
+        rows = get_factor_score_history(asset_type, score_type, start_date, end_date)
+        if not rows:
+            return {'config': config, 'summary': None, 'periods': [], 'message': 'No factor history'}
+
+        scores = pd.DataFrame(rows, columns=['code', 'trade_date', 'score'])
+        scores['trade_date'] = scores['trade_date'].astype(str).str.replace('-', '', regex=False)
+        score_panel = scores.pivot_table(index='trade_date', columns='code', values='score', aggfunc='last').sort_index()
+
+        # Prices must extend past the last score date by the holding period
+        last_score_dt = datetime.strptime(score_panel.index[-1], '%Y%m%d')
+        price_end = (last_score_dt + timedelta(days=int(horizon * 1.6) + 10)).strftime('%Y%m%d')
+        prices = load_price_panel(
+            asset_type,
+            start_date=score_panel.index[0],
+            end_date=price_end,
+            fetch_missing=fetch_missing
+        )
+        if prices.empty:
+            return {'config': config, 'summary': None, 'periods': [], 'message': 'No price data'}
+
+        # Forward returns on the trading calendar, sampled at rebalance dates
+        forward = prices.shift(-horizon) / prices - 1
+        rebalance_dates = self._walk_forward_dates(score_panel.index, forward.index, rebalance_every)
+        codes = score_panel.columns.intersection(forward.columns)
+        if not rebalance_dates or codes.empty:
+            return {'config': config, 'summary': None, 'periods': [], 'message': 'Scores and prices do not overlap'}
+
+        s = score_panel.loc[rebalance_dates, codes].to_numpy(dtype=float)
+        f = forward.loc[rebalance_dates, codes].to_numpy(dtype=float)
+
+        # Drop trailing rebalances whose holding period hasn't completed
+        complete = np.isfinite(f).any(axis=1)
+        s, f = s[complete], f[complete]
+        rebalance_dates = [d for d, ok in zip(rebalance_dates, complete) if ok]
+        if not rebalance_dates:
+            return {'config': config, 'summary': None, 'periods': [], 'message': 'No completed holding periods'}
+
+        tradable = np.isfinite(s) & np.isfinite(f)
+        s_tradable = np.where(tradable, s, np.nan)
+
+        # Top-N by score (rank 1 = highest) above the strategy threshold
+        rank_desc = pd.DataFrame(-s_tradable).rank(axis=1, method='first').to_numpy()
+        held = tradable & (rank_desc <= top_n) & (s_tradable >= min_score)
+
+        portfolio = _masked_mean(f, held)
+        benchmark = _masked_mean(f, tradable)
+        ic = _row_corr(_row_rank(s_tradable), _row_rank(np.where(tradable, f, np.nan)))
+
+        # Quintile spread: top 20% minus bottom 20% by score
+        pct_rank = pd.DataFrame(s_tradable).rank(axis=1, pct=True).to_numpy()
+        spread = _masked_mean(f, tradable & (pct_rank > 0.8)) - _masked_mean(f, tradable & (pct_rank <= 0.2))
+
+        periods = [
+            {
+                'date': date,
+                'holdings': int(held[i].sum()),
+                'universe': int(tradable[i].sum()),
+                'return': _pct(portfolio[i]),
+                'benchmark': _pct(benchmark[i]),
+                'ic': _num(ic[i]),
+            }
+            for i, date in enumerate(rebalance_dates)
+        ]
+
+        return {
+            'config': config,
+            'summary': self._summarize(portfolio, benchmark, ic, spread, rebalance_every),
+            'periods': periods,
+        }
+
+    @staticmethod
+    def _walk_forward_dates(score_dates: pd.Index, trading_dates: pd.Index, step: int) -> list:
+        """Pick score dates at least ``step`` trading days apart."""
+        positions = trading_dates.get_indexer(score_dates)
+        selected = []
+        next_allowed = -1
+        for date, pos in zip(score_dates, positions):
+            if pos >= next_allowed and pos >= 0:
+                selected.append(date)
+                next_allowed = pos + step
+        return selected
+
+    @staticmethod
+    def _summarize(portfolio, benchmark, ic, spread, rebalance_every: int) -> Dict:
+        """Aggregate per-period results into headline metrics."""
+        invested = np.isfinite(portfolio)
+        period_returns = np.where(invested, portfolio, 0.0)  # cash when nothing qualifies
+        equity = np.cumprod(1 + period_returns)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+        excess = portfolio - benchmark
+
+        periods_per_year = TRADING_DAYS_PER_YEAR / rebalance_every
+        years = len(period_returns) / periods_per_year
+        std = period_returns.std(ddof=1) if len(period_returns) > 1 else 0.0
+        ic_valid = ic[np.isfinite(ic)]
+        ic_std = ic_valid.std(ddof=1) if len(ic_valid) > 1 else 0.0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'periods': int(len(period_returns)),
+                'invested_periods': int(invested.sum()),
+                'total_return': _pct(equity[-1] - 1),
+                'annualized_return': _pct(equity[-1] ** (1 / years) - 1) if years > 0 else None,
+                'avg_period_return': _pct(np.nanmean(portfolio)) if invested.any() else None,
+                'avg_benchmark_return': _pct(np.nanmean(benchmark)),
+                'avg_excess_return': _pct(np.nanmean(excess)) if invested.any() else None,
+                'win_rate': _num(np.mean(portfolio[invested] > 0)) if invested.any() else None,
+                'beat_benchmark_rate': _num(np.mean(excess[invested] > 0)) if invested.any() else None,
+                'sharpe': _num(period_returns.mean() / std * np.sqrt(periods_per_year)) if std else None,
+                'max_drawdown': _pct(drawdown.min()),
+                'ic_mean': _num(ic_valid.mean()) if len(ic_valid) else None,
+                'ic_ir': _num(ic_valid.mean() / ic_std) if ic_std else None,
+                'quintile_spread': _pct(np.nanmean(spread)) if np.isfinite(spread).any() else None,
+            }
+
+
+def _num(value, digits: int = 4) -> Optional[float]:
+    return round(float(value), digits) if value is not None and np.isfinite(value) else None
+
+
+def _pct(value) -> Optional[float]:
+    """Fraction -> percent, rounded."""
+    return _num(value * 100, 2) if value is not None and np.isfinite(value) else None
+
+
+# Global instance
+walk_forward_backtester = WalkForwardBacktester()
@@ -0,0 +1,177 @@
+"""
+Recommendation Performance Evaluator - Score past recommendations against realized prices.
+
+Loads every pending ``recommendation_performance`` record and the price panel
+for all of them in one pass, computes 7d/30d returns and target/stop hits as
+array operations over the whole set, then bulk-updates the table.
+
+Windows are calendar days from rec_date, evaluated on the first trading day
+on or after the window end. Prices are adjusted closes, so only returns are
+stored; price_7d/price_30d (quoted prices) are left unset rather than written
+on the adjusted scale.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.storage.db import get_evaluable_performance_records, bulk_update_recommendation_performance
+from .price_panel import load_price_panel
+
+
+class RecommendationEvaluator:
+    """Vectorized evaluator for recommendation_performance records."""
+
+    SHORT_WINDOW_DAYS = 7
+    LONG_WINDOW_DAYS = 30
+    # Records still without a 30d price this long after rec_date are closed as 'no_data'
+    NO_DATA_AFTER_DAYS = 45
+
+    def evaluate_pending(self, fetch_missing: bool = True) -> Dict:
+        """
+        Evaluate all pending records that are at least 7 days old.
+
+        Args:
+            fetch_missing: Fetch trading days missing from the price store
+
+        Returns:
+            Summary dict with per-asset counts
+        """
+        records = get_evaluable_performance_records(min_age_days=self.SHORT_WINDOW_DAYS)
+        summary = {'pending': len(records), 'updated': 0, 'completed': 0, 'no_data': 0, 'by_asset': {}}
+        if not records:
+            return summary
+
+        frame = pd.DataFrame(records)
+        frame['asset_type'] = frame['rec_type'].str.split('_').str[-1]
+
+        updates: List[Dict] = []
+        for asset_type, group in frame.groupby('asset_type'):
+            group_updates = self._evaluate_group(asset_type, group, fetch_missing)
+            updates.extend(group_updates)
+            summary['by_asset'][asset_type] = {
+                'pending': len(group),
+                'updated': len(group_updates),
+                'completed': sum(1 for u in group_updates if u['evaluation_status'] == 'evaluated'),
+            }
+
+        summary['updated'] = bulk_update_recommendation_performance(updates) if updates else 0
+        summary['completed'] = sum(1 for u in updates if u['evaluation_status'] == 'evaluated')
+        summary['no_data'] = sum(1 for u in updates if u['evaluation_status'] == 'no_data')
+        print(f"[Evaluator] {summary['pending']} pending, {summary['updated']} updated, "
+              f"{summary['completed']} completed, {summary['no_data']} without price data")
+        return summary
+
+    def _evaluate_group(self, asset_type: str, group: pd.DataFrame, fetch_missing: bool) -> List[Dict]:
+        """Evaluate records of one asset type against a single price panel."""
+        rec_dates = group['rec_date'].astype(str).str.replace('-', '', regex=False).to_numpy()
+        rec_dt = pd.to_datetime(rec_dates, format='%Y%m%d')
+        date_7d = (rec_dt + timedelta(days=self.SHORT_WINDOW_DAYS)).strftime('%Y%m%d').to_numpy()
+        date_30d = (rec_dt + timedelta(days=self.LONG_WINDOW_DAYS)).strftime('%Y%m%d').to_numpy()
+
+        today = datetime.now().strftime('%Y%m%d')
+        panel = load_price_panel(
+            asset_type,
+            start_date=rec_dates.min(),
+            end_date=min(date_30d.max(), today),
+            codes=group['code'].astype(str).unique().tolist(),
+            fetch_missing=fetch_missing
+        )
+
+        n = len(group)
+        if panel.empty:
+            dates = np.array([], dtype=object)
+            prices = np.full((1, 1), np.nan)
+            cols = np.full(n, -1)
+        else:
+            dates = panel.index.to_numpy()
+            prices = panel.to_numpy(dtype=float)
+            col_index = {code: i for i, code in enumerate(panel.columns)}
+            cols = np.array([col_index.get(code, -1) for code in group['code'].astype(str)])
+
+        num_dates = len(dates)
+        d0 = np.searchsorted(dates, rec_dates, side='left')
+        d7 = np.searchsorted(dates, date_7d, side='left')
+        d30 = np.searchsorted(dates, date_30d, side='left')
+
+        has_col = cols >= 0
+        safe_cols = np.where(has_col, cols, 0)
+        last = max(num_dates - 1, 0)
+
+        def price_at(idx: np.ndarray) -> np.ndarray:
+            values = prices[np.minimum(idx, last), safe_cols]
+            return np.where(has_col & (idx < num_dates), values, np.nan)
+
+        base = price_at(d0)
+        valid = np.isfinite(base) & (base > 0)
+        price_7d = price_at(d7)
+        price_30d = price_at(d30)
+        avail_7d = valid & np.isfinite(price_7d)
+        avail_30d = valid & np.isfinite(price_30d)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return_7d = (price_7d / base - 1) * 100
+            return_30d = (price_30d / base - 1) * 100
+
+        target_pct = group['target_return_pct'].fillna(5.0).to_numpy(dtype=float)
+        stop_pct = group['stop_loss_pct'].fillna(-3.0).to_numpy(dtype=float)
+
+        # Price paths after rec_date up to the 30d check (or latest available day)
+        path_end = np.where(avail_30d, d30, last)
+        width = int(max((path_end - d0).max(), 0)) if n else 0
+        hit_target = np.zeros(n, dtype=bool)
+        hit_stop = np.zeros(n, dtype=bool)
+        if width > 0 and num_dates:
+            offsets = d0[:, None] + 1 + np.arange(width)[None, :]
+            in_window = offsets <= path_end[:, None]
+            path = prices[np.minimum(offsets, last), safe_cols[:, None]]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rel = (path / base[:, None] - 1) * 100
+
+            target_mask = in_window & (rel >= target_pct[:, None])
+            stop_mask = in_window & (rel <= stop_pct[:, None])
+
+            # First crossing wins; a same-day tie counts as a stop (conservative)
+            never = width + 1
+            first_target = np.where(target_mask.any(axis=1), target_mask.argmax(axis=1), never)
+            first_stop = np.where(stop_mask.any(axis=1), stop_mask.argmax(axis=1), never)
+            hit_target = valid & (first_target < first_stop)
+            hit_stop = valid & (first_stop <= first_target) & (first_stop < never)
+
+        final_return = np.where(hit_target, target_pct, np.where(hit_stop, stop_pct, return_30d))
+
+        age_days = (pd.Timestamp(datetime.now()) - rec_dt).days.to_numpy()
+        # Covers both a missing entry price and a 30d price that never arrived
+        no_data = ~avail_30d & (age_days >= self.NO_DATA_AFTER_DAYS)
+
+        updates = []
+        for i, record_id in enumerate(group['id'].to_numpy()):
+            if not (avail_7d[i] or no_data[i]):
+                continue
+            status = 'evaluated' if avail_30d[i] else ('no_data' if no_data[i] else 'pending')
+            updates.append({
+                'id': int(record_id),
+                'check_date_7d': str(dates[d7[i]]) if avail_7d[i] else None,
+                'return_7d': _round(return_7d[i]) if avail_7d[i] else None,
+                'check_date_30d': str(dates[d30[i]]) if avail_30d[i] else None,
+                'return_30d': _round(return_30d[i]) if avail_30d[i] else None,
+                'hit_target': int(hit_target[i]),
+                'hit_stop': int(hit_stop[i]),
+                'final_return': _round(final_return[i]) if avail_30d[i] else None,
+                'evaluation_status': status,
+            })
+        return updates
+
+
+def _round(value: float, digits: int = 4) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+# Global instance
+recommendation_evaluator = RecommendationEvaluator()
+
+
+def run_performance_evaluation() -> Dict:
+    """Entry point for the scheduled evaluation job."""
+    return recommendation_evaluator.evaluate_pending()
@@ -0,0 +1,152 @@
+"""
+Price Panel - Dates x codes matrix of adjusted closes.
+
+Prices are stored in the ``asset_daily_prices`` table. Missing trading days
+are filled with one cross-sectional TuShare call per day (every stock or
+fund at once) rather than one call per code, so years of history load in a
+few hundred calls once and in milliseconds afterwards.
+
+- Stocks: ``daily`` close x ``adj_factor`` (backward adjusted, split-safe)
+- Funds: ``fund_nav`` adjusted NAV; see ``fund_nav_values``, which every
+  fund NAV path uses so panels and per-fund series are on the same basis
+"""
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+from src.data_sources.tushare_client import tushare_call_with_retry, denormalize_ts_code
+from src.storage.db import upsert_asset_daily_prices, get_asset_price_dates, get_asset_price_rows
+from src.analysis.recommendation.factor_store.rate_limiter import rate_limit_priority, PRIORITY_BATCH
+
+
+def _trading_dates(start_date: str, end_date: str) -> Optional[List[str]]:
+    """Get SSE trading days (YYYYMMDD) in range, or None if the calendar is unavailable."""
+    df = tushare_call_with_retry('trade_cal', exchange='SSE', start_date=start_date, end_date=end_date)
+    if df is None or df.empty:
+        return None
+    open_days = df[df['is_open'].astype(int) == 1]['cal_date'].astype(str)
+    return sorted(open_days.tolist())
+
+
+def _fetch_stock_cross_section(trade_date: str) -> List[tuple]:
+    daily = tushare_call_with_retry('daily', trade_date=trade_date)
+    if daily is None or daily.empty:
+        return []
+
+    adj = tushare_call_with_retry('adj_factor', trade_date=trade_date)
+    if adj is not None and not adj.empty:
+        daily = daily.merge(adj[['ts_code', 'adj_factor']], on='ts_code', how='left')
+        daily['adj_factor'] = daily['adj_factor'].fillna(1.0)
+    else:
+        daily['adj_factor'] = 1.0
+
+    daily['adj_close'] = daily['close'] * daily['adj_factor']
+    return [
+        (denormalize_ts_code(ts_code), trade_date, float(close))
+        for ts_code, close in zip(daily['ts_code'], daily['adj_close'])
+        if pd.notna(close)
+    ]
+
+
+def fund_nav_values(nav: pd.DataFrame, unit_column: str = 'unit_nav') -> pd.Series:
+    """
+    Fund NAVs on the panel's basis: adjusted NAV.
+
+    Rows without an adjusted NAV are NaN (treated as missing days) rather than
+    filled with unit NAV, so one series never mixes the two bases. Unit NAV is
+    used only when the response has no ``adj_nav`` field at all.
+
+    Args:
+        nav: TuShare ``fund_nav`` rows
+        unit_column: Name of the unit NAV column (renamed by some callers)
+    """
+    column = 'adj_nav' if 'adj_nav' in nav.columns else unit_column
+    return pd.to_numeric(nav[column], errors='coerce')
+
+
+def _fetch_fund_cross_section(trade_date: str) -> List[tuple]:
+    nav = tushare_call_with_retry('fund_nav', nav_date=trade_date)
+    if nav is None or nav.empty:
+        return []
+
+    nav = nav.drop_duplicates(subset='ts_code', keep='first')
+    values = fund_nav_values(nav)
+
+    return [
+        (denormalize_ts_code(ts_code), trade_date, float(value))
+        for ts_code, value in zip(nav['ts_code'], values)
+        if pd.notna(value)
+    ]
+
+
+def sync_price_history(asset_type: str, start_date: str, end_date: str) -> int:
+    """
+    Fetch and store prices for trading days in range that are not stored yet.
+
+    Args:
+        asset_type: 'stock' or 'fund'
+        start_date: Start date (YYYYMMDD)
+        end_date: End date (YYYYMMDD, clamped to today)
+
+    Returns:
+        Number of trading days fetched
+    """
+    end_date = min(end_date, datetime.now().strftime('%Y%m%d'))
+    if start_date > end_date:
+        return 0
+
+    fetch = _fetch_stock_cross_section if asset_type == 'stock' else _fetch_fund_cross_section
+
+    with rate_limit_priority(PRIORITY_BATCH):
+        trading_dates = _trading_dates(start_date, end_date)
+        if trading_dates is None:
+            print(f"[PricePanel] Trading calendar unavailable, using stored {asset_type} prices only")
+            return 0
+
+        stored = set(get_asset_price_dates(asset_type, start_date, end_date))
+        missing = [d for d in trading_dates if d not in stored]
+        if not missing:
+            return 0
+
+        print(f"[PricePanel] Fetching {len(missing)} {asset_type} trading days ({missing[0]} - {missing[-1]})")
+        fetched = 0
+        for trade_date in missing:
+            rows = fetch(trade_date)
+            if rows:
+                upsert_asset_daily_prices(asset_type, rows)
+                fetched += 1
+
+    print(f"[PricePanel] Stored {fetched}/{len(missing)} {asset_type} trading days")
+    return fetched
+
+
+def load_price_panel(
+    asset_type: str,
+    start_date: str,
+    end_date: str,
+    codes: Optional[List[str]] = None,
+    fetch_missing: bool = True
+) -> pd.DataFrame:
+    """
+    Load adjusted closes as a DataFrame indexed by trade_date (YYYYMMDD), one column per code.
+
+    Args:
+        asset_type: 'stock' or 'fund'
+        start_date: Start date (YYYYMMDD)
+        end_date: End date (YYYYMMDD)
+        codes: Restrict columns to these codes (default: all stored codes)
+        fetch_missing: Fetch trading days not stored yet from TuShare
+
+    Returns:
+        Price panel (empty DataFrame if no prices are available)
+    """
+    if fetch_missing:
+        sync_price_history(asset_type, start_date, end_date)
+
+    rows = get_asset_price_rows(asset_type, start_date, end_date, codes)
+    if not rows:
+        return pd.DataFrame()
+
+    frame = pd.DataFrame(rows, columns=['code', 'trade_date', 'close'])
+    return frame.pivot(index='trade_date', columns='code', values='close').sort_index()
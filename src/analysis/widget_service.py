@@ -5,8 +5,6 @@ Provides unified data fetching for all Dashboard widgets.
 Integrates with TuShare, AkShare, and yFinance with caching, rate limiting, and circuit breaker.
 """
 
-import time
-import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
@@ -20,8 +18,6 @@ from src.data_sources.tushare_client import (
     get_moneyflow_cnt_ths,
     get_index_daily,
     get_fx_daily_tushare,
-    get_latest_trade_date,
-    normalize_ts_code,
     denormalize_ts_code,
 )
 from src.data_sources.data_source_manager import (
@@ -32,6 +28,7 @@ from src.data_sources.data_source_manager import (
 from src.data_sources.rate_limiter import rate_limiter
 from src.data_sources.circuit_breaker import circuit_breaker
 from src.data_sources.utils import format_date_yyyymmdd
+from src.cache.near_cache import NearCache
 
 
 class WidgetType(str, Enum):
@@ -88,23 +85,16 @@ class WidgetDataService:
     """
 
     def __init__(self):
-        self._cache: Dict[str, tuple] = {}  # key -> (data, expiry_time)
-        self._cache_lock = threading.Lock()
+        # Two-tier cache shared across API workers (L1 in-process, L2 Redis/SQLite)
+        self._cache = NearCache('widgets', default_ttl=300)
 
     def _get_cache(self, key: str) -> Optional[Any]:
         """Get data from cache if not expired"""
-        with self._cache_lock:
-            if key in self._cache:
-                data, expiry = self._cache[key]
-                if time.time() < expiry:
-                    return data
-                del self._cache[key]
-        return None
+        return self._cache.get(key)
 
     def _set_cache(self, key: str, data: Any, ttl: int):
         """Set data in cache with TTL"""
-        with self._cache_lock:
-            self._cache[key] = (data, time.time() + ttl)
+        self._cache.set(key, data, ttl)
 
     def _is_market_open(self) -> bool:
         """Check if Chinese market is open (09:30 - 15:00)"""
@@ -984,49 +974,29 @@ class WidgetDataService:
         if not stock_codes:
             return {"stocks": [], "updated_at": datetime.now().isoformat()}
 
-        cache_key = f"watchlist:{','.join(sorted(stock_codes))}"
-        config = WIDGET_CACHE_CONFIG[WidgetType.WATCHLIST]
-
-        # Check cache
-        cached = self._get_cache(cache_key)
-        if cached:
-            return cached
+        # Assembled from per-symbol cached quotes; misses are filled in one bulk call
+        from src.services.quote_store import quote_store
 
         try:
-            trade_date = get_latest_trade_date()
-            if not trade_date:
-                trade_date = format_date_yyyymmdd()
-
-            result = {
-                "stocks": [],
-                "trade_date": trade_date,
+            rows = quote_store.get_watchlist(stock_codes[:20])  # Limit to 20 stocks
+            return {
+                "stocks": [
+                    {
+                        "code": row["code"],
+                        "ts_code": row["ts_code"],
+                        "close": row["price"],
+                        "change_pct": row["change_pct"],
+                        "pe": row.get("pe"),
+                        "pb": row.get("pb"),
+                        "total_mv": row.get("total_mv"),
+                        "turnover_rate": row.get("turnover_rate"),
+                    }
+                    for row in rows
+                ],
+                "trade_date": quote_store.latest_trade_date() or format_date_yyyymmdd(),
                 "updated_at": datetime.now().isoformat()
             }
 
-            for code in stock_codes[:20]:  # Limit to 20 stocks
-                try:
-                    ts_code = normalize_ts_code(code)
-                    df = tushare_call_with_retry('daily_basic', ts_code=ts_code, trade_date=trade_date)
-
-                    if df is not None and not df.empty:
-                        row = df.iloc[0]
-                        result["stocks"].append({
-                            "code": code,
-                            "ts_code": ts_code,
-                            "close": self._safe_float(row.get('close')),
-                            "change_pct": self._safe_float(row.get('pct_chg')),
-                            "pe": self._safe_float(row.get('pe')) if row.get('pe') is not None else None,
-                            "pb": self._safe_float(row.get('pb')) if row.get('pb') is not None else None,
-                            "total_mv": round(self._safe_float(row.get('total_mv')) / 10000, 2) if row.get('total_mv') is not None else None,
-                            "turnover_rate": self._safe_float(row.get('turnover_rate')) if row.get('turnover_rate') is not None else None,
-                        })
-                except Exception as e:
-                    print(f"Failed to fetch {code}: {e}")
-                    continue
-
-            self._set_cache(cache_key, result, config.ttl)
-            return result
-
         except Exception as e:
             return {"error": str(e), "stocks": []}
 
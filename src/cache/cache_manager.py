@@ -1,12 +1,20 @@
 """
 Cache Manager - Provides unified caching interface with Redis and in-memory fallback.
+
+Bulk operations (get_many / set_many / delete_many) cost a single round trip
+on Redis (MGET and pipelines) and a single lock acquisition in memory.
 """
-import json
+import os
+import pickle
+import sqlite3
 import time
 import threading
-from typing import Any, Optional, Dict
+import zlib
+from typing import Any, Optional, Dict, Iterable
 from datetime import datetime
 
+from . import serializer
+
 # Try to import redis, but don't fail if not installed
 try:
     import redis
@@ -46,6 +54,13 @@ class InMemoryCache:
             }
             return True
 
+    def add(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set value only if the key is absent or expired. Returns True if set."""
+        with self._lock:
+            if self.get(key) is not None:
+                return False
+            return self.set(key, value, ttl)
+
     def delete(self, key: str) -> bool:
         """Delete a key from cache."""
         with self._lock:
@@ -58,6 +73,43 @@ class InMemoryCache:
         """Check if key exists and is not expired."""
         return self.get(key) is not None
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get multiple values. Missing or expired keys are omitted."""
+        result = {}
+        with self._lock:
+            now = time.time()
+            for key in keys:
+                entry = self._cache.get(key)
+                if entry is None:
+                    continue
+                if entry['expires_at'] and now > entry['expires_at']:
+                    del self._cache[key]
+                    continue
+                result[key] = entry['value']
+        return result
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int = None) -> bool:
+        """Set multiple values with a shared optional TTL in seconds."""
+        with self._lock:
+            now = time.time()
+            expires_at = now + ttl if ttl else None
+            for key, value in mapping.items():
+                self._cache[key] = {
+                    'value': value,
+                    'expires_at': expires_at,
+                    'created_at': now
+                }
+            return True
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete multiple keys. Returns count of removed keys."""
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if self._cache.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
     def clear(self) -> bool:
         """Clear all cache entries."""
         with self._lock:
@@ -87,40 +139,59 @@ class InMemoryCache:
 
 
 class RedisCache:
-    """Redis-based cache implementation."""
+    """
+    Redis-based cache implementation.
+
+    Values are stored as versioned binary frames (see ``serializer``): pickle
+    for general Python objects, Arrow IPC for DataFrames, zlib above a size
+    threshold. Legacy JSON entries are still readable.
+    """
 
-    def __init__(self, redis_url: str):
-        self._client = redis.from_url(redis_url, decode_responses=True)
+    def __init__(self, redis_url: str, compress_threshold: int = serializer.COMPRESS_THRESHOLD):
+        # Binary values, so responses must not be decoded
+        self._client = redis.from_url(redis_url, decode_responses=False)
         self._prefix = "valpha:"  # Key prefix for namespacing
+        self._compress_threshold = compress_threshold
 
     def _key(self, key: str) -> str:
         """Add prefix to key."""
         return f"{self._prefix}{key}"
 
+    def _dumps(self, value: Any) -> bytes:
+        return serializer.dumps(value, compress_threshold=self._compress_threshold)
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from Redis."""
         try:
             value = self._client.get(self._key(key))
             if value is None:
                 return None
-            return json.loads(value)
-        except (redis.RedisError, json.JSONDecodeError) as e:
+            return serializer.loads(value)
+        except (redis.RedisError, ValueError, pickle.UnpicklingError, zlib.error) as e:
             print(f"Redis GET error for {key}: {e}")
             return None
 
     def set(self, key: str, value: Any, ttl: int = None) -> bool:
         """Set value with optional TTL in seconds."""
         try:
-            serialized = json.dumps(value, ensure_ascii=False, default=str)
+            serialized = self._dumps(value)
             if ttl:
                 self._client.setex(self._key(key), ttl, serialized)
             else:
                 self._client.set(self._key(key), serialized)
             return True
-        except (redis.RedisError, TypeError) as e:
+        except (redis.RedisError, TypeError, pickle.PicklingError) as e:
             print(f"Redis SET error for {key}: {e}")
             return False
 
+    def add(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set value only if the key is absent (SET NX). Returns True if set."""
+        try:
+            return bool(self._client.set(self._key(key), self._dumps(value), ex=ttl or None, nx=True))
+        except (redis.RedisError, TypeError, pickle.PicklingError) as e:
+            print(f"Redis ADD error for {key}: {e}")
+            return False
+
     def delete(self, key: str) -> bool:
         """Delete a key from Redis."""
         try:
@@ -136,6 +207,52 @@ class RedisCache:
         except redis.RedisError:
             return False
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get multiple values with a single MGET. Missing keys are omitted."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            values = self._client.mget([self._key(k) for k in keys])
+        except redis.RedisError as e:
+            print(f"Redis MGET error: {e}")
+            return {}
+
+        result = {}
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            try:
+                result[key] = serializer.loads(value)
+            except (ValueError, pickle.UnpicklingError, zlib.error) as e:
+                print(f"Redis MGET decode error for {key}: {e}")
+        return result
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int = None) -> bool:
+        """Set multiple values in one pipelined round trip."""
+        if not mapping:
+            return True
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.set(self._key(key), self._dumps(value), ex=ttl or None)
+            pipe.execute()
+            return True
+        except (redis.RedisError, TypeError, pickle.PicklingError) as e:
+            print(f"Redis SET_MANY error: {e}")
+            return False
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete multiple keys with a single DEL."""
+        keys = [self._key(k) for k in keys]
+        if not keys:
+            return 0
+        try:
+            return int(self._client.delete(*keys))
+        except redis.RedisError as e:
+            print(f"Redis DELETE_MANY error: {e}")
+            return 0
+
     def clear(self) -> bool:
         """Clear all keys with our prefix."""
         try:
@@ -164,6 +281,173 @@ class RedisCache:
             return {'type': 'redis', 'error': 'unable to get stats'}
 
 
+class SqliteCache:
+    """
+    SQLite-backed cache shared by all processes on one host.
+
+    Used as the shared tier when Redis is not configured, so several uvicorn
+    workers on the same machine still share cached upstream results.
+    Values use the same binary frames as RedisCache.
+    """
+
+    def __init__(self, db_path: str):
+        self._db_path = db_path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries(expires_at)')
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection (SQLite connections are not shared across threads)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expires_at(ttl: Optional[int]) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value, returns None if expired or not found."""
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set value with optional TTL in seconds."""
+        return self.set_many({key: value}, ttl)
+
+    def add(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set value only if the key is absent or expired. Returns True if set."""
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    'DELETE FROM cache_entries WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?',
+                    (key, time.time())
+                )
+                cur = conn.execute(
+                    'INSERT OR IGNORE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, serializer.dumps(value), self._expires_at(ttl))
+                )
+            return cur.rowcount > 0
+        except (sqlite3.Error, TypeError, pickle.PicklingError) as e:
+            print(f"SQLite cache ADD error for {key}: {e}")
+            return False
+
+    def delete(self, key: str) -> bool:
+        """Delete a key."""
+        return self.delete_many([key]) > 0
+
+    def exists(self, key: str) -> bool:
+        """Check if key exists and is not expired."""
+        return self.get(key) is not None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get multiple values in one query. Missing or expired keys are omitted."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            placeholders = ', '.join('?' for _ in keys)
+            rows = self._conn().execute(
+                f'''SELECT key, value FROM cache_entries
+                    WHERE key IN ({placeholders})
+                    AND (expires_at IS NULL OR expires_at > ?)''',
+                (*keys, time.time())
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"SQLite cache GET error: {e}")
+            return {}
+
+        result = {}
+        for key, value in rows:
+            try:
+                result[key] = serializer.loads(value)
+            except (ValueError, pickle.UnpicklingError, zlib.error) as e:
+                print(f"SQLite cache decode error for {key}: {e}")
+        return result
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int = None) -> bool:
+        """Set multiple values in one transaction."""
+        if not mapping:
+            return True
+        try:
+            expires_at = self._expires_at(ttl)
+            rows = [(k, serializer.dumps(v), expires_at) for k, v in mapping.items()]
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                    rows
+                )
+            return True
+        except (sqlite3.Error, TypeError, pickle.PicklingError) as e:
+            print(f"SQLite cache SET error: {e}")
+            return False
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete multiple keys in one statement."""
+        keys = list(keys)
+        if not keys:
+            return 0
+        try:
+            conn = self._conn()
+            with conn:
+                placeholders = ', '.join('?' for _ in keys)
+                cur = conn.execute(f'DELETE FROM cache_entries WHERE key IN ({placeholders})', keys)
+            return cur.rowcount
+        except sqlite3.Error as e:
+            print(f"SQLite cache DELETE error: {e}")
+            return 0
+
+    def clear(self) -> bool:
+        """Clear all cache entries."""
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute('DELETE FROM cache_entries')
+            return True
+        except sqlite3.Error as e:
+            print(f"SQLite cache CLEAR error: {e}")
+            return False
+
+    def cleanup_expired(self) -> int:
+        """Remove expired entries. Returns count of removed entries."""
+        try:
+            conn = self._conn()
+            with conn:
+                cur = conn.execute(
+                    'DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?',
+                    (time.time(),)
+                )
+            return cur.rowcount
+        except sqlite3.Error:
+            return 0
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics."""
+        try:
+            count = self._conn().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+            return {
+                'type': 'sqlite',
+                'total_keys': count,
+                'memory_usage': 'N/A',
+                'path': self._db_path
+            }
+        except sqlite3.Error:
+            return {'type': 'sqlite', 'error': 'unable to get stats'}
+
+
 class CacheManager:
     """
     Unified cache manager that uses Redis if available, falls back to in-memory.
@@ -179,6 +463,10 @@ class CacheManager:
 
         # Delete
         cache_manager.delete('my_key')
+
+        # Bulk (one round trip on Redis)
+        cache_manager.set_many({'a': 1, 'b': 2}, ttl=300)
+        values = cache_manager.get_many(['a', 'b'])
     """
 
     def __init__(self, redis_url: str = None):
@@ -233,6 +521,10 @@ class CacheManager:
         """Set value with optional TTL in seconds."""
         return self.backend.set(key, value, ttl)
 
+    def add(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set value only if the key is absent. Returns True if set."""
+        return self.backend.add(key, value, ttl)
+
     def delete(self, key: str) -> bool:
         """Delete a key from cache."""
         return self.backend.delete(key)
@@ -241,6 +533,18 @@ class CacheManager:
         """Check if key exists."""
         return self.backend.exists(key)
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get multiple values in one round trip. Missing keys are omitted."""
+        return self.backend.get_many(keys)
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int = None) -> bool:
+        """Set multiple values in one round trip with optional TTL in seconds."""
+        return self.backend.set_many(mapping, ttl)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete multiple keys in one round trip."""
+        return self.backend.delete_many(keys)
+
     def clear(self) -> bool:
         """Clear all cache entries."""
         return self.backend.clear()
@@ -277,3 +581,28 @@ class CacheManager:
 
 # Global singleton instance
 cache_manager = CacheManager()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """
+    Get the cache tier shared across worker processes.
+
+    Redis when configured and reachable, otherwise a host-local SQLite file
+    (CACHE_DB_PATH env, default: cache.db in the project root).
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                if cache_manager.is_redis():
+                    _shared_cache = cache_manager.backend
+                else:
+                    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+                    db_path = os.environ.get("CACHE_DB_PATH", os.path.join(base_dir, "cache.db"))
+                    _shared_cache = SqliteCache(db_path)
+                    print(f"✓ Shared cache: Using SQLite ({db_path})")
+    return _shared_cache
@@ -0,0 +1,274 @@
+"""
+Near Cache - Two-tier cache for multi-worker deployments.
+
+L1: small process-local LRU (no serialization, no I/O)
+L2: shared tier from ``get_shared_cache()`` (Redis, or host-local SQLite)
+
+Every namespace carries a version stamp stored in L2. L2 keys embed the
+stamp and L1 entries remember it, so ``invalidate()`` in any worker retires
+the namespace everywhere: other workers notice within
+``VERSION_CHECK_INTERVAL`` seconds.
+
+``get_or_load`` adds a cross-worker single-flight lease, so when N workers
+miss the same key at once only one of them calls the upstream API.
+
+Usage:
+    from src.cache.near_cache import NearCache
+
+    news_cache = NearCache('news', default_ttl=600)
+    data = news_cache.get_or_load('hot_news:30', fetch_hot_news, ttl=600)
+    news_cache.invalidate()  # all workers
+"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .cache_manager import get_shared_cache
+
+
+class NearCache:
+    """Process-local LRU in front of a shared cache tier, with version-stamped invalidation."""
+
+    # Seconds an L1 copy of the namespace version is trusted before re-reading L2
+    VERSION_CHECK_INTERVAL = 1.0
+    # Lease TTL and how long a worker waits for another worker's load
+    LOAD_LEASE_TTL = 30
+    LOAD_WAIT_TIMEOUT = 10.0
+    LOAD_POLL_INTERVAL = 0.1
+
+    def __init__(self, namespace: str, default_ttl: int = 300, max_entries: int = 1024):
+        """
+        Args:
+            namespace: Key namespace (also the unit of invalidation)
+            default_ttl: Default time-to-live in seconds
+            max_entries: L1 capacity; least recently used entries are evicted
+        """
+        self.namespace = namespace
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+
+        self._l1: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at, version)
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, list] = {}
+
+        self._version: Optional[str] = None
+        self._version_checked_at = 0.0
+
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'loads': 0, 'evictions': 0}
+
+    # =========================================================================
+    # Version stamps
+    # =========================================================================
+
+    def _version_key(self) -> str:
+        return f"nc:{self.namespace}:__version__"
+
+    def _current_version(self) -> str:
+        """Get the namespace version, re-reading L2 at most every VERSION_CHECK_INTERVAL."""
+        now = time.time()
+        with self._lock:
+            if self._version is not None and now - self._version_checked_at < self.VERSION_CHECK_INTERVAL:
+                return self._version
+
+        shared = get_shared_cache()
+        version = shared.get(self._version_key())
+        if version is None:
+            version = str(time.time_ns())
+            # Another worker may have initialized concurrently; adopt theirs
+            if not shared.add(self._version_key(), version):
+                version = shared.get(self._version_key()) or version
+
+        with self._lock:
+            if version != self._version:
+                self._l1.clear()
+            self._version = version
+            self._version_checked_at = now
+        return version
+
+    def _l2_key(self, key: str, version: str) -> str:
+        return f"nc:{self.namespace}:{version}:{key}"
+
+    # =========================================================================
+    # L1 helpers
+    # =========================================================================
+
+    def _l1_get(self, key: str, version: str, now: float):
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        value, expires_at, entry_version = entry
+        if entry_version != version or now > expires_at:
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return value
+
+    def _l1_set(self, key: str, value: Any, ttl: int, version: str, now: float) -> None:
+        self._l1[key] = (value, now + ttl, version)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self._max_entries:
+            self._l1.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    # =========================================================================
+    # Public API
+    # =========================================================================
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from L1, falling back to L2. Returns None if absent."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get multiple values; L1 misses are fetched from L2 in one round trip."""
+        keys = list(keys)
+        version = self._current_version()
+        now = time.time()
+        result = {}
+        missing: List[str] = []
+
+        with self._lock:
+            for key in keys:
+                value = self._l1_get(key, version, now)
+                if value is not None:
+                    result[key] = value
+                else:
+                    missing.append(key)
+            self._stats['l1_hits'] += len(result)
+
+        if missing:
+            l2_keys = {self._l2_key(k, version): k for k in missing}
+            found = get_shared_cache().get_many(list(l2_keys))
+            with self._lock:
+                for l2_key, entry in found.items():
+                    key = l2_keys[l2_key]
+                    value, expires_at = entry['value'], entry['expires_at']
+                    if now > expires_at:
+                        continue
+                    result[key] = value
+                    self._l1_set(key, value, expires_at - now, version, now)
+                    self._stats['l2_hits'] += 1
+                self._stats['misses'] += len(missing) - sum(1 for k in missing if k in result)
+
+        return result
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set value in both tiers."""
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Set multiple values in both tiers (one L2 round trip)."""
+        if not mapping:
+            return
+        ttl = ttl or self._default_ttl
+        version = self._current_version()
+        now = time.time()
+
+        with self._lock:
+            for key, value in mapping.items():
+                self._l1_set(key, value, ttl, version, now)
+
+        # Store the absolute expiry alongside the value so L1 copies made by
+        # other workers expire at the same moment
+        get_shared_cache().set_many({
+            self._l2_key(key, version): {'value': value, 'expires_at': now + ttl}
+            for key, value in mapping.items()
+        }, ttl=ttl)
+
+    def delete(self, key: str) -> bool:
+        """Delete a key from both tiers (other workers' L1 copies expire by TTL)."""
+        version = self._current_version()
+        with self._lock:
+            existed = self._l1.pop(key, None) is not None
+        return get_shared_cache().delete(self._l2_key(key, version)) or existed
+
+    def invalidate(self) -> None:
+        """Retire every entry in this namespace, in all workers."""
+        version = str(time.time_ns())
+        get_shared_cache().set(self._version_key(), version)
+        with self._lock:
+            self._l1.clear()
+            self._version = version
+            self._version_checked_at = time.time()
+
+    def clear(self) -> None:
+        """Alias of ``invalidate`` for MemoryCache-compatible callers."""
+        self.invalidate()
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        """
+        Get a value, calling ``loader`` on a miss.
+
+        Only one thread per process, and one process per shared tier, runs the
+        loader for a given key at a time; the others wait for its result.
+        ``None`` results are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # [lock, users]; dropped once the last user is done so keys don't accumulate
+            entry = self._load_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                return self._load(key, loader, ttl)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._load_locks.pop(key, None)
+
+    def _load(self, key: str, loader: Callable[[], Any], ttl: Optional[int]) -> Any:
+        """get_or_load body, run while holding the key's load lock."""
+        # Another thread in this process may have loaded it meanwhile
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        lease_key = f"nc:{self.namespace}:lease:{key}"
+        shared = get_shared_cache()
+        acquired = shared.add(lease_key, 1, ttl=self.LOAD_LEASE_TTL)
+        if not acquired:
+            # Another worker is loading; wait for it to publish
+            deadline = time.time() + self.LOAD_WAIT_TIMEOUT
+            while time.time() < deadline:
+                time.sleep(self.LOAD_POLL_INTERVAL)
+                value = self.get(key)
+                if value is not None:
+                    return value
+                if not shared.exists(lease_key):
+                    break
+
+        try:
+            with self._lock:
+                self._stats['loads'] += 1
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl)
+            return value
+        finally:
+            if acquired:
+                shared.delete(lease_key)
+
+    def cleanup_expired(self) -> int:
+        """Drop expired L1 entries (L2 expires on its own)."""
+        with self._lock:
+            now = time.time()
+            expired = [k for k, (_, expires_at, _) in self._l1.items() if now > expires_at]
+            for key in expired:
+                del self._l1[key]
+            return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics for this namespace."""
+        with self._lock:
+            return {
+                'namespace': self.namespace,
+                'l1_entries': len(self._l1),
+                'l1_capacity': self._max_entries,
+                'version': self._version,
+                **self._stats,
+            }
@@ -0,0 +1,127 @@
+"""
+Cache Serializer - Compact, versioned binary encoding for cache values.
+
+Frame layout: MAGIC (2 bytes) + VERSION (1) + CODEC (1) + FLAGS (1) + payload
+
+Codecs:
+- pickle: default, preserves Python types (datetime, Decimal, tuples, ...)
+- arrow: pandas DataFrames via Arrow IPC (if pyarrow is installed)
+
+Large payloads are zlib-compressed. Values without the magic prefix are
+treated as legacy JSON so existing Redis entries stay readable.
+"""
+import json
+import pickle
+import zlib
+from typing import Any
+
+# Optional dependencies
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+
+MAGIC = b'\xcav'
+VERSION = 1
+
+CODEC_PICKLE = b'p'
+CODEC_ARROW = b'a'
+
+FLAG_NONE = 0
+FLAG_ZLIB = 1
+
+# Compress payloads larger than this (bytes)
+COMPRESS_THRESHOLD = 4096
+COMPRESS_LEVEL = 3
+
+_HEADER_LEN = len(MAGIC) + 3
+
+
+def _encode_dataframe(df) -> bytes:
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _decode_dataframe(payload: bytes):
+    with pa.ipc.open_stream(payload) as reader:
+        return reader.read_all().to_pandas()
+
+
+def dumps(value: Any, compress_threshold: int = COMPRESS_THRESHOLD) -> bytes:
+    """
+    Serialize a value to a versioned binary frame.
+
+    Args:
+        value: Value to serialize
+        compress_threshold: Compress payloads larger than this many bytes
+            (0 or negative disables compression)
+
+    Returns:
+        Encoded bytes
+    """
+    if ARROW_AVAILABLE and PANDAS_AVAILABLE and isinstance(value, pd.DataFrame):
+        try:
+            codec, payload = CODEC_ARROW, _encode_dataframe(value)
+        except (pa.ArrowException, TypeError, ValueError):
+            codec, payload = CODEC_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    else:
+        codec, payload = CODEC_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    flags = FLAG_NONE
+    if 0 < compress_threshold < len(payload):
+        compressed = zlib.compress(payload, COMPRESS_LEVEL)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= FLAG_ZLIB
+
+    return MAGIC + bytes([VERSION]) + codec + bytes([flags]) + payload
+
+
+def loads(data: bytes) -> Any:
+    """
+    Deserialize a frame produced by ``dumps``.
+
+    Falls back to JSON for values written before the binary format existed.
+
+    Raises:
+        ValueError: If the frame has an unknown version or codec
+    """
+    if data is None:
+        return None
+
+    if not data.startswith(MAGIC):
+        # Legacy JSON value
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    version = data[len(MAGIC)]
+    if version != VERSION:
+        raise ValueError(f"Unsupported cache frame version: {version}")
+
+    codec = data[len(MAGIC) + 1:len(MAGIC) + 2]
+    flags = data[len(MAGIC) + 2]
+    payload = data[_HEADER_LEN:]
+
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+
+    if codec == CODEC_PICKLE:
+        return pickle.loads(payload)
+    if codec == CODEC_ARROW:
+        if not ARROW_AVAILABLE:
+            raise ValueError("Cache frame requires pyarrow, which is not installed")
+        return _decode_dataframe(payload)
+
+    raise ValueError(f"Unknown cache codec: {codec!r}")
@@ -54,19 +54,22 @@ def get_all_stock_spot_map(cache_ttl_seconds: int = 30, force_refresh: bool = Fa
             print(f"Error refreshing stock spot map: {e}")
             return _A_STOCK_SPOT_CACHE_BY_CODE
 
-def get_stock_history(code: str, days: int = 100) -> List[Dict]:
+def get_stock_history(code: str, days: int = 100, adjust: str = '') -> List[Dict]:
     """
     Fetch daily history for a stock.
+
+    Bounded to the last `days` trading days (TuShare first, AkShare fallback)
+    and cached across workers; see ``StockDetailService.get_history``.
+    Closes are unadjusted unless `adjust='qfq'`, so portfolio valuation and
+    P&L use traded prices.
     """
-    # Use TuShare for stock history
     try:
-        from src.data_sources.data_source_manager import get_stock_history_from_tushare
-        result = get_stock_history_from_tushare(code, days)
-        if result:
-                return result
+        from src.services.stock_detail import stock_detail_service
+        return stock_detail_service.get_history(_normalize_a_stock_code(code), days, adjust=adjust)
     except Exception as e:
-            print(f"TuShare stock history failed, falling back to AkShare: {e}")
-    
+        print(f"Stock history failed for {code}: {e}")
+        return []
+
 
 # ============================================================================
 # SECTION 1: 全球宏观市场数据 (Global Macro Data)
@@ -481,7 +484,16 @@ def get_stock_realtime_quote(
         if not code:
             return {}
 
-        
+        # 1. Shared per-symbol quote cache (hub snapshot / bulk TuShare / spot map)
+        if use_cache and not force_refresh:
+            try:
+                from src.services.quote_store import quote_store
+                quote = quote_store.get_quotes([code]).get(code)
+                if quote and quote.get('price') is not None:
+                    return quote_store.as_spot_row(quote)
+            except Exception as e:
+                print(f"Quote store lookup failed for {code}: {e}")
+
         # 2. Fast Fetch (Single Stock)
         try:
             df = ak.stock_bid_ask_em(symbol=code)
@@ -753,6 +765,14 @@ def get_fund_holdings(fund_code: str, year: str = None):
 
     current_year = str(datetime.now().year)
     if not year:
+        # Latest quarter from the persistent holdings store (re-downloaded only when a new quarter is due)
+        try:
+            from src.services.fund_holdings import fund_holdings_store, to_akshare_records
+            holdings = fund_holdings_store.get_holdings(fund_code)
+            if holdings:
+                return pd.DataFrame(to_akshare_records(holdings))
+        except Exception as e:
+            print(f"Fund holdings store failed for {fund_code}: {e}")
         year = current_year
 
     # Use TuShare for fund holdings
@@ -861,6 +881,37 @@ def get_market_indices():
         print(f"Error fetching market indices: {e}")
         return {}
 
+GLOBAL_INDEX_NAMES = [
+    "上证指数", "深证成指", "创业板指",
+    "恒生指数", "日经225", "纳斯达克", "标普500"
+]
+
+def get_global_index_spot(names: List[str] = None) -> List[Dict]:
+    """
+    Latest quotes for the dashboard's headline indices (东方财富 global index spot).
+
+    Args:
+        names: Index names to keep (default GLOBAL_INDEX_NAMES)
+
+    Returns:
+        List of {name, code, price, change_pct, change_val}
+    """
+    df = ak.index_global_spot_em()
+    if df is None or df.empty:
+        return []
+
+    df = df[df['名称'].isin(names or GLOBAL_INDEX_NAMES)]
+    return [
+        {
+            "name": row['名称'],
+            "code": str(row.get('代码', '')),
+            "price": float(row['最新价']),
+            "change_pct": float(row['涨跌幅']),
+            "change_val": float(row['涨跌额'])
+        }
+        for _, row in df.iterrows()
+    ]
+
 def get_all_fund_list() -> List[Dict]:
 
     """
@@ -51,6 +51,37 @@ class CircuitBreaker:
         self.timeout = timeout
         self.cache_prefix = "circuit_breaker:"
 
+    def _keys(self, api_name: str) -> tuple:
+        """Cache keys for (state, failures, open_time)."""
+        base = f"{self.cache_prefix}{api_name}"
+        return f"{base}:state", f"{base}:failures", f"{base}:open_time"
+
+    def _load(self, api_name: str) -> tuple:
+        """
+        Load state, failure count and open time in one round trip.
+
+        Returns:
+            Tuple of (CircuitState, failures, open_time or None)
+        """
+        state_key, failures_key, open_time_key = self._keys(api_name)
+        values = cache_manager.get_many([state_key, failures_key, open_time_key])
+        state = values.get(state_key)
+        return (
+            CircuitState(state) if state else CircuitState.CLOSED,
+            values.get(failures_key) or 0,
+            values.get(open_time_key),
+        )
+
+    def _open(self, api_name: str):
+        """Set OPEN state and open time in one round trip."""
+        state_key, _, open_time_key = self._keys(api_name)
+        # Both expire together shortly after the timeout, so an OPEN state never
+        # outlives its open_time
+        cache_manager.set_many({
+            state_key: CircuitState.OPEN.value,
+            open_time_key: time.time(),
+        }, ttl=self.timeout + 60)
+
     def is_open(self, api_name: str) -> bool:
         """
         Check if circuit is open (should use fallback).
@@ -61,11 +92,10 @@ class CircuitBreaker:
         Returns:
             True if circuit is open (API unavailable), False otherwise
         """
-        state = self._get_state(api_name)
+        state, _, open_time = self._load(api_name)
 
         if state == CircuitState.OPEN:
             # Check if timeout expired
-            open_time = cache_manager.get(f"{self.cache_prefix}{api_name}:open_time")
             if open_time and time.time() - open_time > self.timeout:
                 # Move to half-open state (allow test call)
                 self._set_state(api_name, CircuitState.HALF_OPEN)
@@ -90,10 +120,11 @@ class CircuitBreaker:
         if current_state == CircuitState.HALF_OPEN:
             print(f"✅ Circuit breaker CLOSED for {api_name} (recovery successful)")
 
-        # Reset to closed state
-        self._set_state(api_name, CircuitState.CLOSED)
-        cache_manager.delete(f"{self.cache_prefix}{api_name}:failures")
-        cache_manager.delete(f"{self.cache_prefix}{api_name}:open_time")
+        # Reset to closed state (only touch the cache if there is something to clear)
+        if current_state != CircuitState.CLOSED:
+            self._set_state(api_name, CircuitState.CLOSED)
+        _, failures_key, open_time_key = self._keys(api_name)
+        cache_manager.delete_many([failures_key, open_time_key])
 
     def record_failure(self, api_name: str):
         """
@@ -104,33 +135,22 @@ class CircuitBreaker:
         Args:
             api_name: Name of the API
         """
-        current_state = self._get_state(api_name)
+        current_state, failures, _ = self._load(api_name)
 
         # If in HALF_OPEN and failed, immediately reopen
         if current_state == CircuitState.HALF_OPEN:
-            self._set_state(api_name, CircuitState.OPEN)
-            cache_manager.set(
-                f"{self.cache_prefix}{api_name}:open_time",
-                time.time(),
-                ttl=self.timeout + 60
-            )
+            self._open(api_name)
             print(f"🔴 Circuit breaker REOPENED for {api_name} (recovery failed)")
             return
 
         # Increment failure count
-        failures_key = f"{self.cache_prefix}{api_name}:failures"
-        failures = cache_manager.get(failures_key) or 0
+        _, failures_key, _ = self._keys(api_name)
         failures += 1
         cache_manager.set(failures_key, failures, ttl=3600)
 
         # Open circuit if threshold exceeded
         if failures >= self.failure_threshold:
-            self._set_state(api_name, CircuitState.OPEN)
-            cache_manager.set(
-                f"{self.cache_prefix}{api_name}:open_time",
-                time.time(),
-                ttl=self.timeout + 60
-            )
+            self._open(api_name)
             print(f"🔴 Circuit breaker OPENED for {api_name} (failures: {failures})")
 
     def get_status(self, api_name: str) -> dict:
@@ -143,9 +163,7 @@ class CircuitBreaker:
         Returns:
             Dictionary with circuit status information
         """
-        state = self._get_state(api_name)
-        failures = cache_manager.get(f"{self.cache_prefix}{api_name}:failures") or 0
-        open_time = cache_manager.get(f"{self.cache_prefix}{api_name}:open_time")
+        state, failures, open_time = self._load(api_name)
 
         status = {
             'api_name': api_name,
@@ -171,8 +189,8 @@ class CircuitBreaker:
             api_name: Name of the API to reset
         """
         self._set_state(api_name, CircuitState.CLOSED)
-        cache_manager.delete(f"{self.cache_prefix}{api_name}:failures")
-        cache_manager.delete(f"{self.cache_prefix}{api_name}:open_time")
+        _, failures_key, open_time_key = self._keys(api_name)
+        cache_manager.delete_many([failures_key, open_time_key])
         print(f"🔄 Circuit breaker RESET for {api_name}")
 
     def _get_state(self, api_name: str) -> CircuitState:
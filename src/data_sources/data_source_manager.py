@@ -394,7 +394,9 @@ def get_fund_info_from_tushare(fund_code: str) -> pd.DataFrame:
         # Sort by date descending for return
         df = df.sort_values('净值日期', ascending=False).reset_index(drop=True)
 
-        return df[['净值日期', '单位净值', '日增长率']]
+        # Adjusted NAV is kept for return-based analytics (see price_panel.fund_nav_values)
+        columns = ['净值日期', '单位净值', '日增长率'] + (['adj_nav'] if 'adj_nav' in df.columns else [])
+        return df[columns]
 
     except Exception as e:
         print(f"TuShare fund info failed for {fund_code}: {e}")
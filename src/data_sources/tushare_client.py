@@ -58,11 +58,15 @@ def tushare_call_with_retry(
         DataFrame with results, or None if all retries failed
     """
     # Lazy import to avoid circular dependency
-    from src.analysis.recommendation.factor_store.rate_limiter import tushare_rate_limiter
+    from src.analysis.recommendation.factor_store import rate_limiter
 
     # Acquire rate limit permission before making API call
-    # Pass the interface name for per-interface rate limiting
-    tushare_rate_limiter.acquire(interface=api_method)
+    # Pass the interface name for per-interface rate limiting, and the caller's
+    # lane explicitly so it survives the hop to a shared limiter in process mode
+    rate_limiter.tushare_rate_limiter.acquire(
+        interface=api_method,
+        priority=rate_limiter.current_priority()
+    )
 
     pro = _get_tushare_pro()
 
@@ -0,0 +1,10 @@
+"""
+Jobs module - durable SQLite-backed background job queue.
+"""
+from .queue import JobQueue, JobContext, JobCancelled, job_queue, PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH
+from . import handlers  # noqa: F401  (registers handlers)
+
+__all__ = [
+    'JobQueue', 'JobContext', 'JobCancelled', 'job_queue',
+    'PRIORITY_LOW', 'PRIORITY_NORMAL', 'PRIORITY_HIGH',
+]
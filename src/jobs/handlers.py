@@ -0,0 +1,96 @@
+"""
+Job Handlers - Long-running work that API endpoints hand to the job queue.
+
+Importing this module registers the handlers on ``job_queue``.
+"""
+from typing import Dict
+
+from .queue import job_queue, JobContext
+
+
+@job_queue.handler('report_generation')
+def generate_reports(params: Dict, ctx: JobContext) -> Dict:
+    """Pre/post-market reports for one fund, or every active fund of the user."""
+    from src.storage.db import get_active_funds
+    from src.scheduler.manager import scheduler_manager
+
+    mode = params['mode']
+    fund_code = params.get('fund_code')
+    codes = [fund_code] if fund_code else [f['code'] for f in get_active_funds(user_id=ctx.user_id)]
+
+    completed, failed, skipped = [], [], []
+    for i, code in enumerate(codes):
+        ctx.progress(i * 100 / len(codes), f"Analyzing {code} ({i + 1}/{len(codes)})")
+        # run_analysis_task logs its own errors and reports the outcome
+        saved = scheduler_manager.run_analysis_task(code, mode, user_id=ctx.user_id)
+        if saved is None:
+            skipped.append(code)
+        elif saved:
+            completed.append(code)
+        else:
+            print(f"[Job {ctx.job_id}] {mode} report for {code} failed")
+            failed.append(code)
+
+    return {'mode': mode, 'completed': completed, 'failed': failed, 'skipped': skipped}
+
+
+@job_queue.handler('recommendation')
+def generate_recommendations(params: Dict, ctx: JobContext) -> Dict:
+    """Run the recommendation engine and persist the report."""
+    from src.analysis.recommendation import RecommendationEngine
+    from src.storage.db import get_user_preferences, save_recommendation_report
+    from src.cache import cache_manager
+
+    mode = params.get('mode', 'all')
+
+    ctx.progress(5, "Loading preferences...")
+    user_preferences = None
+    try:
+        prefs_data = get_user_preferences(ctx.user_id)
+        if prefs_data and prefs_data.get('preferences'):
+            user_preferences = prefs_data.get('preferences')
+    except Exception as e:
+        print(f"No user preferences found: {e}")
+
+    ctx.progress(10, "Screening stocks and funds...")
+    engine = RecommendationEngine(use_llm_explanations=params.get('use_explanations', True))
+    results = engine.generate_recommendations(
+        mode=mode,
+        stock_limit=params.get('stock_limit', 20),
+        fund_limit=params.get('fund_limit', 20),
+        user_preferences=user_preferences
+    )
+
+    ctx.progress(90, "Saving recommendations...")
+    save_recommendation_report({
+        "mode": mode,
+        "recommendations_json": results,
+        "market_context": results.get("metadata", {})
+    }, user_id=ctx.user_id)
+
+    # Warm the per-user result cache read by the legacy endpoint
+    prefs_hash = "personalized" if user_preferences else "default"
+    cache_manager.set(f"recommendations:{ctx.user_id}:{mode}:{prefs_hash}", results, ttl=14400)
+
+    return results
+
+
+@job_queue.handler('factor_computation')
+def compute_factors(params: Dict, ctx: JobContext) -> Dict:
+    """Daily factor computation for all stocks."""
+    from src.analysis.recommendation.factor_store.daily_computer import daily_computer
+
+    if daily_computer.is_running:
+        return {'status': 'already_running', 'progress': daily_computer.progress}
+
+    ctx.progress(0, f"Computing stock factors for {params.get('trade_date') or 'latest trade date'}...")
+    return daily_computer.compute_all_stock_factors(params.get('trade_date'))
+
+
+@job_queue.handler('performance_evaluation')
+def evaluate_performance(params: Dict, ctx: JobContext) -> Dict:
+    """Evaluate pending recommendations against realized prices."""
+    from src.analysis.recommendation.performance import run_performance_evaluation
+
+    ctx.progress(0, "Evaluating pending recommendations...")
+    return run_performance_evaluation()
@@ -0,0 +1,260 @@
+"""
+Job Queue - Durable background jobs backed by SQLite.
+
+Jobs live in the ``jobs`` table, so status, progress and results survive
+restarts and are visible from every API worker. Each process runs a small
+bounded pool of worker threads that claim jobs atomically (highest priority
+first, then FIFO).
+
+- Dedup: identical (job_type, user, params) submissions share one active job
+- Cancellation: queued jobs are dropped; running jobs stop at their next
+  ``ctx.progress()`` checkpoint
+- Recovery: running jobs whose worker stopped heartbeating are requeued
+
+Usage:
+    from src.jobs import job_queue
+
+    @job_queue.handler('report_generation')
+    def generate(params, ctx):
+        ctx.progress(50, "Halfway")
+        return {"done": True}
+
+    job_id, created = job_queue.submit('report_generation', {'mode': 'pre'}, user_id=1)
+
+Environment:
+    JOB_WORKERS: Worker threads per process (default 2)
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from src.storage.db import (
+    enqueue_job,
+    claim_next_job,
+    update_job_progress,
+    finish_job,
+    cancel_job,
+    get_job,
+    list_jobs,
+    requeue_stale_jobs,
+    delete_old_jobs,
+)
+
+logger = logging.getLogger(__name__)
+
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 5
+PRIORITY_HIGH = 10
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled."""
+
+
+class JobContext:
+    """Handed to job handlers for progress reporting and cancellation checks."""
+
+    def __init__(self, job: Dict):
+        self.job_id = job['id']
+        self.user_id = job.get('user_id')
+        self.attempt = job.get('attempts', 1)
+        self._cancelled = False
+
+    def progress(self, percent: Optional[float] = None, message: Optional[str] = None) -> None:
+        """
+        Persist progress (0-100) and heartbeat.
+
+        Raises:
+            JobCancelled: If cancellation was requested
+        """
+        self._cancelled = update_job_progress(self.job_id, percent, message)
+        if self._cancelled:
+            raise JobCancelled(self.job_id)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+
+class JobQueue:
+    """Bounded worker pool over the SQLite jobs table."""
+
+    POLL_INTERVAL = 1.0
+    HEARTBEAT_INTERVAL = 30.0
+    # Running jobs without a heartbeat for this long are considered orphaned
+    STALE_AFTER_SECONDS = 5 * HEARTBEAT_INTERVAL
+    MAINTENANCE_INTERVAL = 60.0
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, num_workers: Optional[int] = None):
+        self.num_workers = num_workers or int(os.getenv('JOB_WORKERS', '2'))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._handlers: Dict[str, Callable[[Dict, JobContext], Any]] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._last_maintenance = 0.0
+
+    # =========================================================================
+    # Registration / submission
+    # =========================================================================
+
+    def handler(self, job_type: str):
+        """Decorator registering ``func(params, ctx)`` as the handler for a job type."""
+        def decorator(func):
+            self._handlers[job_type] = func
+            return func
+        return decorator
+
+    def submit(
+        self,
+        job_type: str,
+        params: Optional[Dict] = None,
+        user_id: Optional[int] = None,
+        priority: int = PRIORITY_NORMAL,
+        dedup: bool = True
+    ) -> tuple:
+        """
+        Enqueue a job.
+
+        Args:
+            job_type: Registered handler name
+            params: JSON-serializable parameters
+            user_id: Owner (None for system jobs)
+            priority: Higher runs first
+            dedup: Return the active job for identical submissions instead of
+                queueing a duplicate
+
+        Returns:
+            (job_id, created)
+        """
+        params = params or {}
+        dedup_key = None
+        if dedup:
+            payload = json.dumps([job_type, user_id, params], sort_keys=True, ensure_ascii=False, default=str)
+            dedup_key = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+        job_id, created = enqueue_job(
+            str(uuid.uuid4()), job_type, params,
+            user_id=user_id, priority=priority, dedup_key=dedup_key
+        )
+        if created:
+            print(f"[JobQueue] Queued {job_type} job {job_id} (user {user_id}, priority {priority})")
+        self._wakeup.set()
+        return job_id, created
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job's status, progress and result."""
+        return get_job(job_id)
+
+    def list(self, user_id: Optional[int] = None, status: Optional[str] = None,
+             job_type: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """List jobs, newest first."""
+        return list_jobs(user_id=user_id, status=status, job_type=job_type, limit=limit)
+
+    def cancel(self, job_id: str, user_id: Optional[int] = None) -> Optional[str]:
+        """Cancel a job; returns the new status or None if not found."""
+        return cancel_job(job_id, user_id=user_id)
+
+    # =========================================================================
+    # Workers
+    # =========================================================================
+
+    def start(self) -> None:
+        """Start worker threads (no-op if already running)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            self._maintenance(force=True)
+            for i in range(self.num_workers):
+                thread = threading.Thread(target=self._worker_loop, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        print(f"[JobQueue] Started {self.num_workers} workers ({self.worker_id})")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal workers to stop. Jobs still running are requeued on next start."""
+        with self._lock:
+            self._stop.set()
+            self._wakeup.set()
+            for thread in self._threads:
+                thread.join(timeout=timeout)
+            self._threads = []
+        print("[JobQueue] Stopped")
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._maintenance()
+                job = claim_next_job(self.worker_id, list(self._handlers))
+            except Exception as e:
+                logger.error(f"Job claim failed: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+
+            self._run(job)
+
+    def _run(self, job: Dict) -> None:
+        job_id, job_type = job['id'], job['job_type']
+        ctx = JobContext(job)
+        start = time.time()
+        print(f"[JobQueue] Running {job_type} job {job_id} (attempt {ctx.attempt})")
+
+        # Heartbeat while the handler runs, even between progress checkpoints
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.HEARTBEAT_INTERVAL):
+                try:
+                    ctx._cancelled = update_job_progress(job_id)
+                except Exception as e:
+                    logger.warning(f"Job heartbeat failed for {job_id}: {e}")
+
+        threading.Thread(target=heartbeat, name=f'job-heartbeat-{job_id[:8]}', daemon=True).start()
+        try:
+            result = self._handlers[job_type](job.get('params') or {}, ctx)
+            finish_job(job_id, 'completed', result=result)
+            print(f"[JobQueue] Completed {job_type} job {job_id} in {time.time() - start:.1f}s")
+        except JobCancelled:
+            finish_job(job_id, 'cancelled')
+            print(f"[JobQueue] Cancelled {job_type} job {job_id}")
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            finish_job(job_id, 'failed', error=str(e))
+            print(f"[JobQueue] Failed {job_type} job {job_id}: {e}")
+        finally:
+            done.set()
+
+    def _maintenance(self, force: bool = False) -> None:
+        """Requeue orphaned jobs and prune old ones (at most once per interval)."""
+        now = time.time()
+        if not force and now - self._last_maintenance < self.MAINTENANCE_INTERVAL:
+            return
+        self._last_maintenance = now
+        # On startup, anything still marked running under our own id is from a previous life
+        recovered = requeue_stale_jobs(
+            self.STALE_AFTER_SECONDS, self.MAX_ATTEMPTS,
+            worker_id=self.worker_id if force else None
+        )
+        if recovered:
+            print(f"[JobQueue] Recovered {recovered} orphaned jobs")
+        delete_old_jobs(days_to_keep=7)
+
+
+# Global instance
+job_queue = JobQueue()
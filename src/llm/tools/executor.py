@@ -482,40 +482,32 @@ class ToolExecutor:
 
     def _get_fund_holdings(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Get fund top holdings."""
-        import akshare as ak
-        import pandas as pd
-        from datetime import datetime
+        from src.services.fund_holdings import fund_holdings_store
 
         fund_code = args.get("fund_code", "")
         if not fund_code:
             return {"error": "Missing fund_code parameter"}
 
         try:
-            year = str(datetime.now().year)
-            df = ak.fund_portfolio_hold_em(symbol=fund_code, date=year)
-
-            if df is None or df.empty:
-                # Try previous year
-                year = str(int(year) - 1)
-                df = ak.fund_portfolio_hold_em(symbol=fund_code, date=year)
-
-            if df is None or df.empty:
+            top = fund_holdings_store.get_holdings(fund_code, top_n=10)
+            if not top:
                 return {"error": f"No holdings data found for fund {fund_code}"}
 
-            # Convert to list of dicts
-            holdings = []
-            for _, row in df.head(10).iterrows():
-                holdings.append({
-                    "stock_code": row.get('股票代码', ''),
-                    "stock_name": row.get('股票名称', ''),
-                    "weight": row.get('占净值比例', ''),
-                    "shares": row.get('持股数', ''),
-                    "value": row.get('持仓市值', '')
-                })
+            holdings = [
+                {
+                    "stock_code": h['code'],
+                    "stock_name": h['name'],
+                    "weight": h['weight'],
+                    "shares": h['shares'],
+                    "value": h['market_value'],
+                }
+                for h in top
+            ]
 
             return {
                 "fund_code": fund_code,
-                "report_year": year,
+                "report_year": top[0]['quarter'][:4],
+                "report_quarter": top[0]['quarter'],
                 "holdings": holdings
             }
 
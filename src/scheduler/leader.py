@@ -0,0 +1,227 @@
+"""
+Scheduler Leader Election - Ensure exactly one API worker runs scheduled jobs.
+
+Each process that starts the scheduler competes for a named, renewable lease:
+- Redis lock (SET NX EX + compare-and-renew) when Redis is configured
+- SQLite advisory lease in the ``scheduler_leases`` table otherwise
+
+The holder renews the lease every ``renew_interval`` seconds. If it dies, the
+lease expires after ``ttl`` seconds and a standby worker takes over.
+
+Workers that change jobs without being leader bump a shared "jobs version"
+stamp; the leader notices on its next heartbeat and reloads jobs from the DB.
+
+Environment:
+    SCHEDULER_ROLE: auto (default, elect), leader (always run jobs),
+        standby (never run jobs)
+    SCHEDULER_LEASE_TTL: Lease TTL in seconds (default 30)
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+from typing import Callable, Optional
+
+from src.storage.db import try_acquire_lease, release_lease, get_lease_value, set_lease_value
+
+logger = logging.getLogger(__name__)
+
+
+ROLE_AUTO = 'auto'
+ROLE_LEADER = 'leader'
+ROLE_STANDBY = 'standby'
+
+LEASE_NAME = 'scheduler_leader'
+JOBS_VERSION_NAME = 'scheduler_jobs_version'
+
+
+class _SqliteLeaseBackend:
+    """Advisory lease stored in the application SQLite database."""
+
+    name = 'sqlite'
+
+    def try_acquire(self, name: str, holder: str, ttl: int) -> bool:
+        return try_acquire_lease(name, holder, ttl)
+
+    def release(self, name: str, holder: str) -> None:
+        release_lease(name, holder)
+
+    def get_value(self, name: str) -> Optional[str]:
+        return get_lease_value(name)
+
+    def set_value(self, name: str, value: str) -> None:
+        set_lease_value(name, value)
+
+
+class _RedisLeaseBackend:
+    """Lock stored in Redis; renew/release only succeed for the current holder."""
+
+    name = 'redis'
+
+    _RENEW_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('expire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    _RELEASE_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, redis_cache):
+        self._client = redis_cache._client
+        self._key = redis_cache._key
+
+    def try_acquire(self, name: str, holder: str, ttl: int) -> bool:
+        key = self._key(f"lease:{name}")
+        if self._client.set(key, holder, nx=True, ex=ttl):
+            return True
+        return bool(self._client.eval(self._RENEW_SCRIPT, 1, key, holder, ttl))
+
+    def release(self, name: str, holder: str) -> None:
+        self._client.eval(self._RELEASE_SCRIPT, 1, self._key(f"lease:{name}"), holder)
+
+    def get_value(self, name: str) -> Optional[str]:
+        value = self._client.get(self._key(f"lease:{name}"))
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set_value(self, name: str, value: str) -> None:
+        self._client.set(self._key(f"lease:{name}"), value)
+
+
+def _default_backend():
+    try:
+        from src.cache.cache_manager import cache_manager
+        if cache_manager.is_redis():
+            return _RedisLeaseBackend(cache_manager.backend)
+    except Exception as e:
+        logger.warning(f"Redis lease backend unavailable, using SQLite: {e}")
+    return _SqliteLeaseBackend()
+
+
+class LeaderElector:
+    """
+    Heartbeat thread that holds (or waits for) the scheduler lease.
+
+    Callbacks run on the heartbeat thread:
+        on_elected: this process became leader
+        on_demoted: this process lost the lease
+        on_jobs_changed: (leader only) another worker changed the job set
+    """
+
+    def __init__(
+        self,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        on_jobs_changed: Optional[Callable[[], None]] = None,
+        role: Optional[str] = None,
+        ttl: Optional[int] = None,
+    ):
+        self.role = (role or os.getenv('SCHEDULER_ROLE', ROLE_AUTO)).lower()
+        self.ttl = ttl or int(os.getenv('SCHEDULER_LEASE_TTL', '30'))
+        self.renew_interval = max(1.0, self.ttl / 3)
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._on_jobs_changed = on_jobs_changed
+
+        self._backend = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._jobs_version: Optional[str] = None
+        self.is_leader = False
+
+    def start(self) -> None:
+        """Start competing for leadership (no-op if already started)."""
+        if self._thread is not None:
+            return
+
+        if self.role == ROLE_STANDBY:
+            print(f"Scheduler role is standby; jobs will not run in this process ({self.holder_id})")
+            return
+        if self.role == ROLE_LEADER:
+            print(f"Scheduler role is leader; running jobs without election ({self.holder_id})")
+            self._become_leader()
+            return
+
+        self._backend = _default_backend()
+        self._thread = threading.Thread(target=self._run, name='scheduler-leader', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the heartbeat and release the lease if held."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.renew_interval + 1)
+            self._thread = None
+
+        was_leader = self.is_leader
+        if was_leader:
+            self.is_leader = False
+            self._safe_call(self._on_demoted)
+        if was_leader and self._backend is not None:
+            try:
+                self._backend.release(LEASE_NAME, self.holder_id)
+                print(f"Released scheduler leadership ({self.holder_id})")
+            except Exception as e:
+                logger.warning(f"Failed to release scheduler lease: {e}")
+
+    def notify_jobs_changed(self) -> None:
+        """Tell the leader (in whichever process) to reload jobs from the DB."""
+        if self._backend is None:
+            return
+        try:
+            self._backend.set_value(JOBS_VERSION_NAME, str(time.time_ns()))
+        except Exception as e:
+            logger.warning(f"Failed to publish scheduler jobs version: {e}")
+
+    def _become_leader(self) -> None:
+        self.is_leader = True
+        self._safe_call(self._on_elected)
+
+    @staticmethod
+    def _safe_call(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Scheduler leadership callback failed: {e}")
+
+    def _run(self) -> None:
+        print(f"Scheduler leader election started via {self._backend.name} ({self.holder_id})")
+        while not self._stop.is_set():
+            try:
+                acquired = self._backend.try_acquire(LEASE_NAME, self.holder_id, self.ttl)
+            except Exception as e:
+                # Can't prove we still hold the lease, so stop running jobs
+                logger.warning(f"Scheduler lease heartbeat failed: {e}")
+                acquired = False
+
+            if acquired and not self.is_leader:
+                print(f"Acquired scheduler leadership ({self.holder_id})")
+                self._jobs_version = self._read_jobs_version()
+                self._become_leader()
+            elif not acquired and self.is_leader:
+                print(f"Lost scheduler leadership ({self.holder_id})")
+                self.is_leader = False
+                self._safe_call(self._on_demoted)
+            elif self.is_leader and self._on_jobs_changed is not None:
+                version = self._read_jobs_version()
+                if version != self._jobs_version:
+                    self._jobs_version = version
+                    print("Scheduler jobs changed in another worker; reloading")
+                    self._safe_call(self._on_jobs_changed)
+
+            self._stop.wait(self.renew_interval)
+
+    def _read_jobs_version(self) -> Optional[str]:
+        try:
+            return self._backend.get_value(JOBS_VERSION_NAME)
+        except Exception as e:
+            logger.warning(f"Failed to read scheduler jobs version: {e}")
+            return self._jobs_version
@@ -1,22 +1,35 @@
 import os
+import json
+import hashlib
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 import logging
 import asyncio
 from datetime import datetime, date
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set
 from src.storage.db import (
-    get_active_funds, get_fund_by_code, get_active_stocks, get_stock_by_code,
+    get_active_funds, get_active_funds_by_code, get_fund_by_code, get_active_stocks, get_stock_by_code,
     get_all_portfolios, get_portfolio_positions, save_portfolio_snapshot, get_latest_snapshot
 )
 from src.analysis.pre_market import PreMarketAnalyst
 from src.analysis.post_market import PostMarketAnalyst
 from src.analysis.dashboard import DashboardService
 from src.report_gen import save_report, save_stock_report
+from src.scheduler.leader import LeaderElector
+from src.cache.near_cache import NearCache
 
 logger = logging.getLogger(__name__)
 
+# Fund reports generated during today's sessions, keyed by fund profile
+_fund_report_cache = NearCache('fund_reports', default_ttl=6 * 3600, max_entries=256)
+
+
+def _fund_profile_key(fund: Dict) -> str:
+    """Hash the user-editable fields that feed the analysis prompt."""
+    profile = [fund.get('name'), fund.get('style'), sorted(map(str, fund.get('focus') or []))]
+    return hashlib.md5(json.dumps(profile, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
 
 class TradingCalendar:
     """Trading calendar utility using akshare data"""
@@ -73,24 +86,53 @@ class SchedulerManager:
         if cls._instance is None:
             cls._instance = super(SchedulerManager, cls).__new__(cls)
             cls._instance.scheduler = BackgroundScheduler()
-            cls._instance.scheduler.start()
+            # Jobs only fire once this process is elected leader
+            cls._instance.scheduler.start(paused=True)
+            cls._instance.elector = LeaderElector(
+                on_elected=cls._instance._on_elected,
+                on_demoted=cls._instance._on_demoted,
+                on_jobs_changed=cls._instance.refresh_all_jobs,
+            )
         return cls._instance
 
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process currently runs scheduled jobs."""
+        return self.elector.is_leader
+
     def start(self):
-        """Load jobs from DB and start"""
+        """Join leader election; the elected process loads jobs from DB and runs them"""
         print("Starting Scheduler Manager...")
+        self.elector.start()
+
+    def shutdown(self):
+        """Release leadership and stop the scheduler"""
+        self.elector.stop()
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def _on_elected(self):
+        """Became leader: load all jobs and start firing them"""
         self.refresh_all_jobs()
-        self.add_dashboard_refresh_job()
-        self.add_daily_snapshot_job()
-        self.add_factor_computation_job()
+        self.scheduler.resume()
+        print("Scheduler is leader; jobs resumed")
+
+    def _on_demoted(self):
+        """Lost leadership: stop firing jobs (another worker took over)"""
+        self.scheduler.pause()
+        print("Scheduler is standby; jobs paused")
+
+    def _publish_job_change(self):
+        """Job set changed in a standby worker; ask the leader to reload"""
+        if not self.is_leader:
+            self.elector.notify_jobs_changed()
 
     def refresh_all_jobs(self):
         """Clear all and reload from DB (All users)"""
         self.scheduler.remove_all_jobs()
         # Fetch ALL active funds from ALL users
         funds = get_active_funds(user_id=None)
-        for fund in funds:
-            self.add_fund_jobs(fund)
+        self._schedule_fund_groups(funds)
         # Fetch ALL active stocks from ALL users
         stocks = get_active_stocks(user_id=None)
         for stock in stocks:
@@ -101,6 +143,18 @@ class SchedulerManager:
         self.add_daily_snapshot_job()
         # Re-add factor computation job
         self.add_factor_computation_job()
+        # Re-add recommendation performance evaluation job
+        self.add_performance_evaluation_job()
+        # Re-add news ingestion job
+        self.add_news_ingestion_job()
+        # Re-add news sentiment job
+        self.add_news_sentiment_job()
+        # Re-add fund ranking snapshot job
+        self.add_fund_ranking_job()
+        # Re-add nightly fund diagnosis job
+        self.add_fund_diagnosis_job()
+        # Re-add intraday fund estimation refresh job
+        self.add_fund_estimation_job()
 
     def add_dashboard_refresh_job(self):
         """Schedule dashboard cache refresh every 5 minutes"""
@@ -154,6 +208,149 @@ class SchedulerManager:
             )
             print("Scheduled daily factor computation at 06:00")
 
+    def add_performance_evaluation_job(self):
+        """Schedule recommendation performance evaluation at 18:00 (after daily prices publish)"""
+        job_id = "recommendation_performance_evaluation"
+        if not self.scheduler.get_job(job_id):
+            self.scheduler.add_job(
+                self.run_performance_evaluation,
+                trigger=CronTrigger(hour=18, minute=0),
+                id=job_id,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            print("Scheduled recommendation performance evaluation at 18:00")
+
+    def add_news_ingestion_job(self):
+        """Poll news sources into the local news store every minute (sources have their own intervals)"""
+        job_id = "news_ingestion"
+        if not self.scheduler.get_job(job_id):
+            self.scheduler.add_job(
+                self.run_news_ingestion,
+                trigger=IntervalTrigger(minutes=1),
+                id=job_id,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            print("Scheduled news ingestion every minute")
+
+    def run_news_ingestion(self):
+        """Worker to ingest due news sources"""
+        try:
+            from src.services.news_ingestor import news_ingestor
+            news_ingestor.run_due()
+        except Exception as e:
+            print(f"Error running news ingestion: {e}")
+
+    def add_news_sentiment_job(self):
+        """Analyze newly ingested news in batched LLM prompts every 5 minutes"""
+        job_id = "news_sentiment_analysis"
+        if not self.scheduler.get_job(job_id):
+            self.scheduler.add_job(
+                self.run_news_sentiment_analysis,
+                trigger=IntervalTrigger(minutes=5),
+                id=job_id,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            print("Scheduled news sentiment analysis every 5 minutes")
+
+    def run_news_sentiment_analysis(self):
+        """Worker to analyze news that has no sentiment yet"""
+        try:
+            from src.services.news_sentiment import news_sentiment_batcher
+            news_sentiment_batcher.analyze_pending()
+        except Exception as e:
+            print(f"Error running news sentiment analysis: {e}")
+
+    def add_fund_ranking_job(self):
+        """Refresh stale fund ranking categories every hour (each is kept at most 6 hours)"""
+        job_id = "fund_ranking_snapshot"
+        if not self.scheduler.get_job(job_id):
+            self.scheduler.add_job(
+                self.run_fund_ranking_refresh,
+                trigger=IntervalTrigger(hours=1),
+                id=job_id,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            print("Scheduled fund ranking snapshot refresh every hour")
+
+    def run_fund_ranking_refresh(self):
+        """Worker to refresh the fund ranking snapshot"""
+        try:
+            from src.services.fund_rankings import fund_ranking_snapshot
+            fund_ranking_snapshot.refresh_stale()
+        except Exception as e:
+            print(f"Error refreshing fund rankings: {e}")
+
+    def add_fund_diagnosis_job(self):
+        """Schedule nightly batch fund diagnosis at 23:30 (after NAVs publish)"""
+        job_id = "nightly_fund_diagnosis"
+        if not self.scheduler.get_job(job_id):
+            self.scheduler.add_job(
+                self.run_fund_diagnosis_batch,
+                trigger=CronTrigger(hour=23, minute=30),
+                id=job_id,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            print("Scheduled nightly fund diagnosis at 23:30")
+
+    def run_fund_diagnosis_batch(self):
+        """Worker to precompute diagnosis for every tracked and market fund"""
+        if not trading_calendar.is_trading_day():
+            print("Skipping fund diagnosis batch - not a trading day")
+            return
+
+        try:
+            from src.services.fund_diagnosis_batch import fund_diagnosis_batch
+            fund_diagnosis_batch.run()
+        except Exception as e:
+            print(f"Error running fund diagnosis batch: {e}")
+
+    def add_fund_estimation_job(self):
+        """Keep the intraday fund estimation snapshot warm every minute during trading hours"""
+        job_id = "fund_estimation_snapshot"
+        if not self.scheduler.get_job(job_id):
+            self.scheduler.add_job(
+                self.run_fund_estimation_refresh,
+                trigger=IntervalTrigger(minutes=1),
+                id=job_id,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            print("Scheduled fund estimation snapshot refresh every minute (trading hours)")
+
+    def run_fund_estimation_refresh(self):
+        """Worker to refresh the fund estimation snapshot while the market is open"""
+        if not trading_calendar.is_trading_day():
+            return
+
+        try:
+            from src.services.fund_estimation import fund_estimation_snapshot
+            fund_estimation_snapshot.refresh_if_trading()
+        except Exception as e:
+            print(f"Error refreshing fund estimations: {e}")
+
+    def run_performance_evaluation(self):
+        """Worker to evaluate pending recommendations against realized prices"""
+        if not trading_calendar.is_trading_day():
+            print("Skipping performance evaluation - not a trading day")
+            return
+
+        try:
+            from src.analysis.recommendation.performance import run_performance_evaluation
+            run_performance_evaluation()
+        except Exception as e:
+            print(f"Error running performance evaluation: {e}")
+
     def run_daily_factor_computation(self):
         """Worker to run daily factor computation for recommendation system v2"""
         # Check if today is a trading day
@@ -314,61 +511,124 @@ class SchedulerManager:
         return None
 
     def add_fund_jobs(self, fund: Dict):
-        """Add Pre/Post market jobs for a single fund"""
-        code = fund['code']
-        # Ensure we have user_id, fallback to None (Admin/Legacy)
-        user_id = fund.get('user_id') 
-        
-        # Pre-market
-        if fund.get('pre_market_time'):
+        """(Re)schedule the shared Pre/Post market jobs for a fund's code"""
+        self.sync_fund_jobs(fund['code'])
+        self._publish_job_change()
+
+    def remove_fund_jobs(self, code: str):
+        """
+        Reschedule jobs for a fund after a user removed it.
+        Jobs are shared across users, so remaining users keep their schedules.
+        """
+        self.sync_fund_jobs(code)
+        self._publish_job_change()
+
+    def sync_fund_jobs(self, code: str):
+        """Rebuild the jobs for one fund code from every user's active entry"""
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith(f"pre_{code}_") or job.id.startswith(f"post_{code}_"):
+                self.scheduler.remove_job(job.id)
+        self._schedule_fund_groups(get_active_funds_by_code(code))
+
+    def _schedule_fund_groups(self, funds: List[Dict]):
+        """
+        Register one job per (fund code, mode, time) instead of one per user.
+        Users tracking the same fund at the same time share a single analysis.
+        """
+        groups = {}
+        for fund in funds:
+            for mode in ('pre', 'post'):
+                run_time = fund.get(f'{mode}_market_time')
+                if run_time:
+                    groups.setdefault((fund['code'], mode, run_time), []).append(fund.get('user_id'))
+
+        for (code, mode, run_time), user_ids in groups.items():
             try:
-                hour, minute = fund['pre_market_time'].split(':')
-                job_id = f"pre_{code}_{user_id}"
+                hour, minute = run_time.split(':')
+                job_id = f"{mode}_{code}_{hour}{minute}"
                 self.scheduler.add_job(
-                    self.run_analysis_task,
+                    self.run_fund_group_task,
                     trigger=CronTrigger(hour=hour, minute=minute),
                     id=job_id,
-                    args=[code, 'pre', user_id],
+                    args=[code, mode, run_time],
                     replace_existing=True
                 )
-                print(f"Scheduled PRE-market for {code} (User {user_id}) at {hour}:{minute}")
+                print(f"Scheduled {mode.upper()}-market for {code} at {hour}:{minute} ({len(user_ids)} users)")
             except Exception as e:
-                print(f"Error scheduling PRE task for {code}: {e}")
+                print(f"Error scheduling {mode.upper()} task for {code}: {e}")
 
-        # Post-market
-        if fund.get('post_market_time'):
+    def run_fund_group_task(self, fund_code: str, mode: str, run_time: str):
+        """
+        Worker for a shared fund job: analyze once per distinct fund profile, then
+        save a copy of the report for every user scheduled at this time.
+        """
+        if not trading_calendar.is_trading_day():
+            print(f"Skipping {mode.upper()}-market task for fund {fund_code} - not a trading day")
+            return
+
+        funds = [
+            f for f in get_active_funds_by_code(fund_code)
+            if f.get(f'{mode}_market_time') == run_time
+        ]
+        if not funds:
+            print(f"No active subscribers for {fund_code} at {run_time}. Skipping.")
+            return
+
+        # Users only share a report when the inputs to the prompt match
+        profiles: Dict[str, List[Dict]] = {}
+        for fund in funds:
+            profiles.setdefault(_fund_profile_key(fund), []).append(fund)
+
+        print(f"Executing {mode.upper()}-market task for {fund_code}: "
+              f"{len(funds)} users, {len(profiles)} distinct analyses")
+
+        analysts = {}
+        for profile_key, subscribers in profiles.items():
+            report = self._get_session_fund_report(fund_code, mode, profile_key, subscribers[0], analysts)
+            if not report:
+                continue
+            for fund in subscribers:
+                try:
+                    save_report(report, mode, fund['name'], fund['code'], user_id=fund.get('user_id'))
+                except Exception as e:
+                    logger.error(f"Failed to save {mode} report for {fund_code} (User {fund.get('user_id')}): {e}")
+
+    def _get_session_fund_report(
+        self, fund_code: str, mode: str, profile_key: str, fund: Dict, analysts: Dict
+    ) -> Optional[str]:
+        """
+        Get today's report for a fund profile, generating it at most once per session.
+        Failed analyses are returned but not cached, so the next slot retries.
+        """
+        failure = {}
+
+        def load():
+            if mode not in analysts:
+                analysts[mode] = PreMarketAnalyst() if mode == 'pre' else PostMarketAnalyst()
             try:
-                hour, minute = fund['post_market_time'].split(':')
-                job_id = f"post_{code}_{user_id}"
-                self.scheduler.add_job(
-                    self.run_analysis_task,
-                    trigger=CronTrigger(hour=hour, minute=minute),
-                    id=job_id,
-                    args=[code, 'post', user_id],
-                    replace_existing=True
-                )
-                print(f"Scheduled POST-market for {code} (User {user_id}) at {hour}:{minute}")
+                report = analysts[mode].analyze_fund(fund)
             except Exception as e:
-                print(f"Error scheduling POST task for {code}: {e}")
+                logger.error(f"Task failed for {fund_code}: {e}")
+                report = None
+            if not report or report.startswith("Analysis Failed"):
+                failure['report'] = report
+                return None
+            return report
 
-    def remove_fund_jobs(self, code: str):
-        """
-        Remove jobs for a fund. 
-        Note: This naive implementation removes jobs matching ID pattern.
+        cache_key = f"{date.today().isoformat()}:{mode}:{fund_code}:{profile_key}"
+        return _fund_report_cache.get_or_load(cache_key, load) or failure.get('report')
+
+    def run_analysis_task(self, fund_code: str, mode: str, user_id: Optional[int] = None) -> Optional[bool]:
         """
-        # We need to find jobs starting with pre_{code}_ or post_{code}_
-        # Iterate all jobs and match
-        for job in self.scheduler.get_jobs():
-            if job.id.startswith(f"pre_{code}_") or job.id.startswith(f"post_{code}_"):
-                self.scheduler.remove_job(job.id)
-                print(f"Removed job {job.id}")
+        Worker function
 
-    def run_analysis_task(self, fund_code: str, mode: str, user_id: Optional[int] = None):
-        """Worker function"""
+        Returns:
+            True if a report was saved, False if the analysis failed, None if skipped
+        """
         # Check if today is a trading day
         if not trading_calendar.is_trading_day():
             print(f"Skipping {mode.upper()}-market task for fund {fund_code} - not a trading day")
-            return
+            return None
 
         print(f"Executing {mode.upper()}-market task for {fund_code} (User: {user_id})...")
 
@@ -378,7 +638,7 @@ class SchedulerManager:
         
         if not fund or not fund.get('is_active'):
             print(f"Fund {fund_code} is inactive or deleted. Skipping.")
-            return
+            return None
 
         report = ""
         try:
@@ -394,11 +654,14 @@ class SchedulerManager:
             
             if report:
                 save_report(report, mode, fund['name'], fund['code'], user_id=user_id)
-                
+                return True
+            return False
+
         except Exception as e:
             logger.error(f"Task failed for {fund_code}: {e}")
             import traceback
             traceback.print_exc()
+            return False
 
     def add_stock_jobs(self, stock: Dict):
         """Add Pre/Post market jobs for a single stock"""
@@ -437,12 +700,15 @@ class SchedulerManager:
             except Exception as e:
                 print(f"Error scheduling STOCK POST task for {code}: {e}")
 
+        self._publish_job_change()
+
     def remove_stock_jobs(self, code: str):
         """Remove jobs for a stock."""
         for job in self.scheduler.get_jobs():
             if job.id.startswith(f"stock_pre_{code}_") or job.id.startswith(f"stock_post_{code}_"):
                 self.scheduler.remove_job(job.id)
                 print(f"Removed stock job {job.id}")
+        self._publish_job_change()
 
     def run_stock_analysis_task(self, stock_code: str, mode: str, user_id: Optional[int] = None):
         """Worker function for stock analysis"""
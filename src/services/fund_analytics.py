@@ -0,0 +1,131 @@
+"""
+Fund Analytics - One NAV fetch and one shared computation per fund.
+
+The fund detail page shows diagnosis, risk metrics and drawdown history.
+Each used to download the NAV history and rebuild its own DataFrame. Here the
+NAV history is fetched once into a ``NavSeries`` (returns, running peak and
+drawdown computed once) and all three analyses are computed from it as one
+bundle, cached per (fund, last NAV date) so it is recomputed only when a new
+NAV is published.
+
+Usage:
+    from src.services.fund_analytics import fund_analytics
+
+    bundle = fund_analytics.get_bundle('110011')
+    # -> {'fund_code', 'nav_date', 'diagnosis', 'risk_metrics', 'drawdown'}
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+
+from src.cache.near_cache import NearCache
+from src.analysis.fund import FundDiagnosis, RiskMetricsCalculator, DrawdownAnalyzer
+from src.analysis.fund.nav_series import NavSeries
+
+
+NAV_DAYS = 500
+NAV_TTL = 1800  # NAVs are published once a day; re-check for a new one every 30 min
+BUNDLE_TTL = 24 * 3600  # keyed by last NAV date, so only evicted, never stale
+DEFAULT_DRAWDOWN_THRESHOLD = 0.05
+
+
+def fetch_nav_series(fund_code: str, days: int = NAV_DAYS) -> Optional[NavSeries]:
+    """
+    Download a fund's NAV history as a NavSeries.
+
+    NAVs are on the fund price panel's basis (adjusted NAV), so on-demand and
+    nightly diagnosis score the same series.
+
+    Args:
+        fund_code: Fund code
+        days: Keep the most recent N NAVs
+
+    Returns:
+        NavSeries, or None when no NAV history is available
+    """
+    from src.data_sources.data_source_manager import get_fund_info_from_tushare
+    from src.analysis.recommendation.performance.price_panel import fund_nav_values
+
+    df = get_fund_info_from_tushare(fund_code)
+    if df is None or df.empty or '净值日期' not in df.columns or '单位净值' not in df.columns:
+        return None
+
+    dates = pd.to_datetime(df['净值日期'].astype(str), format='%Y%m%d', errors='coerce')
+    values = fund_nav_values(df, unit_column='单位净值')
+    nav = NavSeries(dates.values, values.to_numpy())
+    if not len(nav):
+        return None
+    if len(nav) > days:
+        nav = NavSeries(nav.dates[-days:], nav.values[-days:])
+    return nav
+
+
+class FundAnalytics:
+    """Cached NAV series and analytics bundles per fund."""
+
+    def __init__(self):
+        # Two-tier cache shared across API workers (L1 in-process, L2 Redis/SQLite)
+        self._cache = NearCache('fund_analytics', default_ttl=NAV_TTL, max_entries=512)
+
+    def get_nav_series(self, fund_code: str, days: int = NAV_DAYS) -> Optional[NavSeries]:
+        """
+        NAV series for a fund (one download per NAV_TTL across workers).
+
+        Args:
+            fund_code: Fund code
+            days: Most recent N NAVs; longer windows than NAV_DAYS are cached separately
+        """
+        if days <= NAV_DAYS:
+            return self._cache.get_or_load(f"nav:{fund_code}", lambda: fetch_nav_series(fund_code), ttl=NAV_TTL)
+        return self._cache.get_or_load(
+            f"nav:{fund_code}:{days}", lambda: fetch_nav_series(fund_code, days=days), ttl=NAV_TTL
+        )
+
+    @staticmethod
+    def compute_bundle(fund_code: str, nav: NavSeries) -> Dict:
+        """Diagnosis, risk metrics and drawdown analysis from one NavSeries."""
+        return {
+            'fund_code': fund_code,
+            'nav_date': nav.last_date,
+            'diagnosis': FundDiagnosis().diagnose(fund_code, nav),
+            'risk_metrics': RiskMetricsCalculator().calculate_all_metrics(nav),
+            'drawdown': DrawdownAnalyzer(threshold=DEFAULT_DRAWDOWN_THRESHOLD).analyze_drawdowns(nav),
+            'computed_at': datetime.now().isoformat(),
+        }
+
+    def get_bundle(self, fund_code: str, force_refresh: bool = False) -> Optional[Dict]:
+        """
+        Analytics bundle for a fund, cached per (fund, last NAV date).
+
+        Args:
+            fund_code: Fund code
+            force_refresh: Re-download the NAV history and recompute
+
+        Returns:
+            Bundle dict, or None when no NAV history is available
+        """
+        if force_refresh:
+            self._cache.delete(f"nav:{fund_code}")
+        nav = self.get_nav_series(fund_code)
+        if nav is None:
+            return None
+
+        key = f"bundle:{fund_code}:{nav.last_date}"
+        if force_refresh:
+            self._cache.delete(key)
+        return self._cache.get_or_load(key, lambda: self.compute_bundle(fund_code, nav), ttl=BUNDLE_TTL)
+
+    def get_drawdowns(self, fund_code: str, threshold: float = DEFAULT_DRAWDOWN_THRESHOLD) -> Optional[Dict]:
+        """Drawdown analysis; non-default thresholds are computed from the cached series."""
+        if threshold == DEFAULT_DRAWDOWN_THRESHOLD:
+            bundle = self.get_bundle(fund_code)
+            return bundle['drawdown'] if bundle else None
+        nav = self.get_nav_series(fund_code)
+        if nav is None:
+            return None
+        return DrawdownAnalyzer(threshold=threshold).analyze_drawdowns(nav)
+
+
+# Global instance
+fund_analytics = FundAnalytics()
@@ -0,0 +1,165 @@
+"""
+Fund Diagnosis Batch - Nightly precomputed diagnosis for tracked and market funds.
+
+``/api/funds/{code}/diagnosis`` serves ``fund_diagnosis_cache`` first. This
+stage fills it for every fund in scope each night, so viewers get cache hits
+instead of paying for a NAV download and scoring:
+
+1. NAVs come from the fund price panel (one cross-sectional ``fund_nav`` call
+   per trading day, stored locally; see ``price_panel``). Tracked funds the
+   panel lacks are fetched individually, on the same adjusted NAV basis.
+2. ``FundDiagnosis.diagnose_matrix`` scores the whole NAV matrix at once and
+   adds percentiles relative to peers of the same fund type.
+3. Results are written to the cache in one transaction.
+
+Scope (``FUND_DIAGNOSIS_SCOPE``): ``all`` = tracked funds + ``fund_basic``
+(default), ``tracked`` = funds on any watchlist or in any portfolio.
+
+Usage:
+    from src.services.fund_diagnosis_batch import fund_diagnosis_batch
+
+    fund_diagnosis_batch.run()
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.fund import FundDiagnosis
+from src.services.fund_analytics import NAV_DAYS
+from src.storage.db import get_tracked_fund_codes, get_fund_basic_profiles, save_diagnosis_cache_batch
+
+
+# Same window as on-demand diagnosis (the last NAV_DAYS NAVs), so nightly and
+# on-demand scores agree; calendar days fetched to cover that many trading days
+NAV_WINDOW_CALENDAR_DAYS = NAV_DAYS * 7 // 5 + 60
+# Hours an entry outlives the next nightly run (which may be days away over
+# weekends and holidays)
+CACHE_TTL_GRACE_HOURS = 6
+CACHE_TTL_MAX_HOURS = 24 * 15
+
+
+def cache_ttl_hours(now: datetime = None) -> int:
+    """
+    Hours until the nightly run on the next trading day, plus a grace period.
+
+    ``run_fund_diagnosis_batch`` skips non-trading days, so entries written on
+    a Friday must last until Monday night (longer over holidays).
+    """
+    from src.scheduler.manager import trading_calendar
+
+    now = now or datetime.now()
+    next_day = now.date() + timedelta(days=1)
+    for _ in range(CACHE_TTL_MAX_HOURS // 24):
+        if trading_calendar.is_trading_day(next_day):
+            break
+        next_day += timedelta(days=1)
+    next_run = datetime.combine(next_day, datetime.min.time()).replace(hour=23, minute=30)
+    hours = int((next_run - now).total_seconds() // 3600) + 1 + CACHE_TTL_GRACE_HOURS
+    return min(hours, CACHE_TTL_MAX_HOURS)
+
+
+def _format_date(yyyymmdd) -> str:
+    value = str(yyyymmdd or '')
+    return f"{value[:4]}-{value[4:6]}-{value[6:8]}" if len(value) == 8 else ''
+
+
+class FundDiagnosisBatch:
+    """Score every fund in scope from one NAV matrix and bulk-write the diagnosis cache."""
+
+    def __init__(self):
+        self.scope = os.getenv('FUND_DIAGNOSIS_SCOPE', 'all').lower()
+
+    def universe(self) -> Tuple[List[str], List[str], Dict[str, Dict]]:
+        """
+        Funds to score.
+
+        Returns:
+            (all codes, tracked codes, fund_basic profiles by code)
+        """
+        tracked = get_tracked_fund_codes()
+        profiles = get_fund_basic_profiles()
+        codes = sorted(set(tracked) | set(profiles)) if self.scope == 'all' else tracked
+        return codes, tracked, profiles
+
+    def load_nav_matrix(self, codes: List[str], tracked: List[str]) -> pd.DataFrame:
+        """
+        NAV panel (index trade_date YYYYMMDD, one column per code) over the
+        last NAV_DAYS trading days.
+
+        Args:
+            codes: Funds to include
+            tracked: Funds fetched individually when the panel lacks them
+        """
+        from src.analysis.recommendation.performance.price_panel import load_price_panel
+        from src.services.fund_analytics import fund_analytics
+
+        end_date = datetime.now().strftime('%Y%m%d')
+        start_date = (datetime.now() - timedelta(days=NAV_WINDOW_CALENDAR_DAYS)).strftime('%Y%m%d')
+
+        try:
+            # A large universe reads every stored fund and filters here instead of a huge IN list
+            panel = load_price_panel('fund', start_date, end_date,
+                                     codes=codes if self.scope != 'all' else None)
+        except Exception as e:
+            print(f"[FundDiagnosis] Price panel unavailable: {e}")
+            panel = pd.DataFrame()
+        wanted = set(codes)
+        panel = panel[[code for code in panel.columns if code in wanted]]
+
+        # Tracked funds missing from the cross-section (e.g. not yet synced)
+        extra = {}
+        for code in tracked:
+            if code in panel.columns:
+                continue
+            nav = fund_analytics.get_nav_series(code)
+            if nav is not None and len(nav):
+                index = pd.to_datetime(nav.dates).strftime('%Y%m%d')
+                extra[code] = pd.Series(nav.values, index=index).groupby(level=0).last()
+        if extra:
+            panel = pd.concat([panel, pd.DataFrame(extra)], axis=1).sort_index()
+        return panel.iloc[-NAV_DAYS:]
+
+    def run(self) -> Dict:
+        """
+        Diagnose every fund in scope and write the results to the diagnosis cache.
+
+        Returns:
+            Stats dict (universe, scored, elapsed seconds)
+        """
+        start = time.time()
+        codes, tracked, profiles = self.universe()
+        if not codes:
+            return {'universe': 0, 'scored': 0, 'elapsed': 0.0}
+
+        panel = self.load_nav_matrix(codes, tracked)
+        if panel.empty:
+            print("[FundDiagnosis] No NAV data available, skipping batch diagnosis")
+            return {'universe': len(codes), 'scored': 0, 'elapsed': round(time.time() - start, 1)}
+
+        fund_codes = list(panel.columns)
+        dates = pd.to_datetime(panel.index.astype(str), format='%Y%m%d').values
+        matrix = panel.to_numpy(dtype=np.float64).T
+
+        fund_infos = {
+            code: {'inception_date': _format_date(profile.get('found_date'))}
+            for code, profile in profiles.items() if profile.get('found_date')
+        }
+        peer_groups = {code: profile.get('fund_type') for code, profile in profiles.items()}
+
+        results = FundDiagnosis().diagnose_matrix(
+            fund_codes, dates, matrix, fund_infos=fund_infos, peer_groups=peer_groups
+        )
+        written = save_diagnosis_cache_batch(results, ttl_hours=cache_ttl_hours())
+
+        elapsed = round(time.time() - start, 1)
+        print(f"[FundDiagnosis] Scored {written}/{len(codes)} funds "
+              f"({len(dates)} trading days) in {elapsed}s")
+        return {'universe': len(codes), 'scored': written, 'elapsed': elapsed}
+
+
+# Global instance
+fund_diagnosis_batch = FundDiagnosisBatch()
@@ -0,0 +1,163 @@
+"""
+Fund Estimation Snapshot - Shared intraday NAV estimates indexed by fund code.
+
+``ak.fund_value_estimation_em`` returns the whole estimate table (~10k funds)
+per call. The table is downloaded once per refresh interval into a snapshot
+keyed by fund code and shared across API workers through a ``NearCache``
+single-flight load, so the single-fund, batch and portfolio valuation
+endpoints are dictionary lookups.
+
+The refresh interval follows the A-share session: 60 seconds while trading,
+and until the next session opens (at most an hour) otherwise. During trading
+hours ``SchedulerManager.add_fund_estimation_job`` keeps the snapshot warm so
+requests do not wait on the download.
+
+Usage:
+    from src.services.fund_estimation import fund_estimation_snapshot
+
+    fund_estimation_snapshot.get('000001')
+    fund_estimation_snapshot.get_many(['000001', '110011'])
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from src.cache.near_cache import NearCache
+
+
+TRADING_TTL = 60
+IDLE_TTL_MAX = 3600
+LAST_GOOD_TTL = 24 * 3600  # served when a refresh fails
+
+# (start, end) of each A-share session, in minutes since midnight
+_SESSIONS = ((9 * 60 + 30, 11 * 60 + 30), (13 * 60, 15 * 60))
+
+
+def is_trading_hours(now: Optional[datetime] = None) -> bool:
+    """Whether `now` is within A-share trading hours (9:30-11:30, 13:00-15:00 on weekdays)."""
+    now = now or datetime.now()
+    if now.weekday() >= 5:
+        return False
+    minute = now.hour * 60 + now.minute
+    return any(start <= minute <= end for start, end in _SESSIONS)
+
+
+def snapshot_ttl(now: Optional[datetime] = None) -> int:
+    """Seconds a snapshot stays fresh: TRADING_TTL in session, else until the next session opens."""
+    now = now or datetime.now()
+    if is_trading_hours(now):
+        return TRADING_TTL
+
+    day = now.replace(second=0, microsecond=0)
+    for offset in range(8):
+        date = day + timedelta(days=offset)
+        if date.weekday() >= 5:
+            continue
+        for start, _ in _SESSIONS:
+            opens = date.replace(hour=start // 60, minute=start % 60)
+            if opens > now:
+                return int(max(TRADING_TTL, min(IDLE_TTL_MAX, (opens - now).total_seconds())))
+    return IDLE_TTL_MAX
+
+
+def parse_estimation_table(df: pd.DataFrame) -> Dict:
+    """
+    Index an AkShare estimate table by fund code.
+
+    Column names carry the estimate date (e.g. '2026-01-30-估算数据-估算值'),
+    so they are located by pattern.
+
+    Returns:
+        {'estimation_date', 'estimations': {code: estimation dict}}
+    """
+    est_nav_col = est_change_col = prev_nav_col = None
+    for col in df.columns:
+        if '估算数据-估算值' in col:
+            est_nav_col = col
+        elif '估算数据-估算增长率' in col:
+            est_change_col = col
+        elif col.endswith('-单位净值') and '公布数据' not in col:
+            prev_nav_col = col
+    estimation_date = est_nav_col.split('-估算数据')[0] if est_nav_col else ''
+
+    def numeric(col, strip_pct=False) -> pd.Series:
+        if not col:
+            return pd.Series(0.0, index=df.index)
+        values = df[col].astype(str).str.replace('%', '', regex=False).str.strip() if strip_pct else df[col]
+        return pd.to_numeric(values, errors='coerce').fillna(0.0)
+
+    table = pd.DataFrame({
+        'code': df['基金代码'].fillna('').astype(str).str.strip(),
+        'name': df['基金名称'].fillna('').astype(str) if '基金名称' in df.columns else '',
+        'estimated_nav': numeric(est_nav_col),
+        'estimated_change_pct': numeric(est_change_col, strip_pct=True),
+        'prev_nav': numeric(prev_nav_col),
+    })
+    table = table[table['code'] != ''].drop_duplicates('code')
+    table['prev_nav_date'] = estimation_date
+    table['estimation_time'] = estimation_date
+
+    return {
+        'estimation_date': estimation_date,
+        'estimations': table.set_index('code', drop=False).to_dict('index'),
+    }
+
+
+def _fetch_snapshot() -> Optional[Dict]:
+    import akshare as ak
+
+    df = ak.fund_value_estimation_em()
+    if df is None or df.empty or '基金代码' not in df.columns:
+        return None
+    snapshot = parse_estimation_table(df)
+    snapshot['fetched_at'] = datetime.now().isoformat()
+    print(f"[Estimation] Loaded {len(snapshot['estimations'])} funds ({snapshot['estimation_date']})")
+    return snapshot
+
+
+class FundEstimationSnapshot:
+    """Market-hours-aware snapshot of the intraday estimate table."""
+
+    def __init__(self):
+        # Two-tier cache shared across API workers (L1 in-process, L2 Redis/SQLite)
+        self._cache = NearCache('fund_estimation', default_ttl=TRADING_TTL, max_entries=4)
+
+    def _load(self) -> Optional[Dict]:
+        try:
+            snapshot = _fetch_snapshot()
+        except Exception as e:
+            print(f"[Estimation] Failed to fetch fund estimations: {e}")
+            snapshot = None
+        if snapshot:
+            self._cache.set('snapshot:last', snapshot, ttl=LAST_GOOD_TTL)
+            return snapshot
+        # Keep serving the last good table rather than nothing
+        return self._cache.get('snapshot:last')
+
+    def get_snapshot(self) -> Dict:
+        """
+        Current snapshot (one download per refresh interval across workers).
+
+        Returns:
+            {'estimation_date', 'estimations': {code: ...}, 'fetched_at'}; empty when unavailable
+        """
+        return self._cache.get_or_load('snapshot', self._load, ttl=snapshot_ttl()) or {}
+
+    def get(self, code: str) -> Optional[Dict]:
+        """Estimation for one fund, or None when the fund has no estimate (e.g. ETFs, money funds)."""
+        return self.get_snapshot().get('estimations', {}).get(str(code).strip())
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, Dict]:
+        """Estimations for the given funds; codes without an estimate are absent."""
+        estimations = self.get_snapshot().get('estimations', {})
+        return {code: estimations[code] for code in (str(c).strip() for c in codes) if code in estimations}
+
+    def refresh_if_trading(self) -> None:
+        """Keep the snapshot warm during trading hours (scheduler hook)."""
+        if is_trading_hours():
+            self.get_snapshot()
+
+
+# Global instance
+fund_estimation_snapshot = FundEstimationSnapshot()
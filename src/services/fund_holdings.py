@@ -0,0 +1,239 @@
+"""
+Fund Holdings Store - Persistent stock holdings per fund and report quarter.
+
+Fund holdings are published once a quarter, but the fund detail, compare and
+portfolio overlap endpoints used to download them on every request. Here they
+are stored in ``fund_holdings`` keyed by (fund, quarter) and a fund is only
+re-downloaded while a newer quarter than the stored one may have been
+published (checked at most once per RECHECK_SECONDS).
+
+Sources: TuShare ``fund_portfolio`` (last four quarters in one call, weights
+derived from ``fund_nav`` net assets), AkShare ``fund_portfolio_hold_em`` as
+fallback. Weights are % of NAV, shares are stored in 股 and market values in 元.
+
+Usage:
+    from src.services.fund_holdings import fund_holdings_store
+
+    fund_holdings_store.get_holdings('110011', top_n=10)
+    fund_holdings_store.get_many(['110011', '161725'])
+"""
+import re
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.storage.db import save_fund_holdings, get_fund_holdings_sync, get_latest_fund_holdings
+
+
+# How often to look for a report that is due but not yet stored
+RECHECK_SECONDS = 24 * 3600
+
+_QUARTER_ENDS = ('0331', '0630', '0930', '1231')
+_AKSHARE_QUARTER = re.compile(r'(\d{4})年\s*(\d)季度')
+
+
+def latest_quarter_end(today: Optional[datetime] = None) -> str:
+    """Most recent quarter end (YYYYMMDD) on or before today."""
+    today = (today or datetime.now()).strftime('%Y%m%d')
+    year = int(today[:4])
+    for y in (year, year - 1):
+        for end in reversed(_QUARTER_ENDS):
+            if f"{y}{end}" <= today:
+                return f"{y}{end}"
+    return f"{year - 1}1231"
+
+
+def quarter_start(quarter: str) -> str:
+    """'20240930' -> '20240701' (first day of the quarter)."""
+    return f"{quarter[:4]}{int(quarter[4:6]) - 2:02d}01"
+
+
+def quarter_label(quarter: str) -> str:
+    """'20240930' -> '2024年3季度股票投资明细' (the AkShare 季度 label)."""
+    return f"{quarter[:4]}年{_QUARTER_ENDS.index(quarter[4:]) + 1}季度股票投资明细"
+
+
+def to_akshare_records(holdings: List[Dict]) -> List[Dict]:
+    """Stored holdings in the AkShare fund_portfolio_hold_em row shape (万股 / 万元)."""
+    return [
+        {
+            '股票代码': h['code'],
+            '股票名称': h['name'],
+            '占净值比例': h['weight'],
+            '持股数': round(h['shares'] / 1e4, 2) if h.get('shares') is not None else None,
+            '持仓市值': round(h['market_value'] / 1e4, 2) if h.get('market_value') is not None else None,
+            '季度': quarter_label(h['quarter']),
+        }
+        for h in holdings
+    ]
+
+
+def _num(value) -> Optional[float]:
+    value = pd.to_numeric(value, errors='coerce')
+    return None if pd.isna(value) else float(value)
+
+
+def _net_assets_at(fund_nav: Optional[pd.DataFrame], quarters: List[str]) -> Dict[str, float]:
+    """Fund net assets (元) on the last NAV date at or before each quarter end."""
+    if fund_nav is None or fund_nav.empty:
+        return {}
+    # Total net assets across share classes, else this share class's
+    net_asset = pd.Series(float('nan'), index=fund_nav.index)
+    for column in ('total_netasset', 'net_asset'):
+        if column in fund_nav.columns:
+            net_asset = net_asset.fillna(pd.to_numeric(fund_nav[column], errors='coerce'))
+    nav = pd.DataFrame({'date': fund_nav['nav_date'].astype(str), 'net_asset': net_asset}).dropna()
+    nav = nav[nav['net_asset'] > 0].sort_values('date')
+    result = {}
+    for quarter in quarters:
+        before = nav[nav['date'] <= quarter]
+        # A stale figure (e.g. a gap in the NAV feed) would skew every weight
+        if not before.empty and before['date'].iloc[-1] >= quarter_start(quarter):
+            result[quarter] = float(before['net_asset'].iloc[-1])
+    return result
+
+
+def _fetch_tushare(fund_code: str) -> Dict[str, List[Dict]]:
+    from src.data_sources.tushare_client import get_fund_portfolio, get_fund_nav
+
+    start_date = (datetime.now() - timedelta(days=400)).strftime('%Y%m%d')
+    df = get_fund_portfolio(f"{fund_code}.OF", start_date=start_date)
+    if df is None or df.empty:
+        return {}
+
+    df = df.sort_values(['end_date', 'ann_date']).drop_duplicates(['end_date', 'symbol'], keep='last')
+    df['end_date'] = df['end_date'].astype(str)
+
+    # stk_mkv_ratio is the share of the fund's stock holdings, not of NAV;
+    # weights are derived from the fund's net assets on the report date instead
+    net_assets = _net_assets_at(get_fund_nav(f"{fund_code}.OF", start_date=start_date),
+                                sorted(df['end_date'].unique()))
+
+    holdings: Dict[str, List[Dict]] = {}
+    for row in df.itertuples(index=False):
+        net_asset = net_assets.get(row.end_date)
+        if not net_asset:
+            continue  # no net asset figure for this quarter, so no NAV weight
+        market_value = _num(row.mkv)
+        holdings.setdefault(row.end_date, []).append({
+            'stock_code': str(row.symbol).split('.')[0],
+            'stock_name': None,  # filled from stock_basic on read
+            'weight': round(market_value / net_asset * 100, 2) if market_value is not None else None,
+            'shares': _num(row.amount),
+            'market_value': market_value,
+        })
+    return holdings
+
+
+def _fetch_akshare(fund_code: str) -> Dict[str, List[Dict]]:
+    import akshare as ak
+
+    year = datetime.now().year
+    holdings: Dict[str, List[Dict]] = {}
+    for target_year in (year, year - 1):
+        df = ak.fund_portfolio_hold_em(symbol=fund_code, date=str(target_year))
+        if df is None or df.empty or '季度' not in df.columns:
+            continue
+        for row in df.itertuples(index=False):
+            match = _AKSHARE_QUARTER.search(str(getattr(row, '季度')))
+            if not match:
+                continue
+            quarter = f"{match.group(1)}{_QUARTER_ENDS[int(match.group(2)) - 1]}"
+            shares = _num(getattr(row, '持股数', None))
+            market_value = _num(getattr(row, '持仓市值', None))
+            holdings.setdefault(quarter, []).append({
+                'stock_code': str(getattr(row, '股票代码')),
+                'stock_name': str(getattr(row, '股票名称', '') or ''),
+                'weight': _num(getattr(row, '占净值比例', None)),
+                'shares': shares * 1e4 if shares is not None else None,  # 万股 -> 股
+                'market_value': market_value * 1e4 if market_value is not None else None,  # 万元 -> 元
+            })
+        if holdings:
+            break
+    return holdings
+
+
+class FundHoldingsStore:
+    """Quarter-keyed holdings in SQLite, re-downloaded only when a new report is due."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    # =========================================================================
+    # Refresh
+    # =========================================================================
+
+    def refresh(self, fund_code: str) -> int:
+        """
+        Download a fund's recent holdings and store them by quarter.
+
+        Returns:
+            Number of holding rows stored (0 when no source has data)
+        """
+        holdings: Dict[str, List[Dict]] = {}
+        for source in (_fetch_tushare, _fetch_akshare):
+            try:
+                holdings = source(fund_code)
+            except Exception as e:
+                print(f"[FundHoldings] {source.__name__} failed for {fund_code}: {e}")
+                continue
+            if holdings:
+                break
+        # Record the check even when nothing was found, so it is not retried on every request
+        return save_fund_holdings(fund_code, holdings)
+
+    def _stale(self, fund_codes: List[str]) -> List[str]:
+        """Funds never synced, or whose next quarterly report is due and not rechecked recently."""
+        expected = latest_quarter_end()
+        now = time.time()
+        sync = get_fund_holdings_sync(fund_codes)
+        return [
+            code for code in fund_codes
+            if code not in sync
+            or ((sync[code]['latest_quarter'] or '') < expected
+                and now - (sync[code]['checked_at'] or 0) > RECHECK_SECONDS)
+        ]
+
+    def ensure_fresh(self, fund_codes: Iterable[str]) -> None:
+        """Refresh the funds whose stored holdings may be outdated (one caller at a time)."""
+        codes = list(dict.fromkeys(str(c).strip() for c in fund_codes if c))
+        if not codes or not self._stale(codes):
+            return
+        with self._lock:
+            for code in self._stale(codes):
+                self.refresh(code)
+
+    # =========================================================================
+    # Reads
+    # =========================================================================
+
+    def get_many(self, fund_codes: Iterable[str], top_n: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Latest-quarter holdings for several funds.
+
+        Args:
+            fund_codes: Fund codes
+            top_n: Keep the N largest holdings per fund (default: all)
+
+        Returns:
+            Dict mapping fund_code -> [{code, name, weight (% of NAV), shares, market_value, quarter}],
+            largest weight first; funds without holdings are absent
+        """
+        codes = list(dict.fromkeys(str(c).strip() for c in fund_codes if c))
+        self.ensure_fresh(codes)
+        result = {}
+        for code, entry in get_latest_fund_holdings(codes).items():
+            holdings = entry['holdings'][:top_n] if top_n else entry['holdings']
+            result[code] = [dict(h, quarter=entry['quarter']) for h in holdings]
+        return result
+
+    def get_holdings(self, fund_code: str, top_n: Optional[int] = None) -> List[Dict]:
+        """Latest-quarter holdings for one fund (see get_many)."""
+        return self.get_many([fund_code], top_n=top_n).get(str(fund_code).strip(), [])
+
+
+# Global instance
+fund_holdings_store = FundHoldingsStore()
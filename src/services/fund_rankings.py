@@ -0,0 +1,222 @@
+"""
+Fund Ranking Snapshot - Periodically refreshed copy of the open-fund rankings.
+
+``ak.fund_open_fund_rank_em`` returns a whole category (thousands of funds)
+per call. Instead of downloading it per request, every category is stored in
+the ``fund_rankings`` table (keyed by category + code, indexed by code) and
+refreshed in the background (see ``SchedulerManager.add_fund_ranking_job``).
+Compare, ranking, overview and fund-detail endpoints answer from it with
+indexed lookups and SQL top-N sorts. Per-category stats and the overview are
+cached in a NearCache that every refresh invalidates (in all workers).
+
+Usage:
+    from src.services.fund_rankings import fund_ranking_snapshot
+
+    fund_ranking_snapshot.lookup(['000001', '110011'])
+    fund_ranking_snapshot.top('股票型', sort_by='近1月', limit=50)
+"""
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.cache.near_cache import NearCache
+from src.storage.db import (
+    FUND_RANKING_RETURN_COLUMNS,
+    replace_fund_rankings,
+    get_fund_rankings_by_codes,
+    get_top_fund_rankings,
+    get_fund_ranking_stats,
+)
+
+
+# (category key used by AkShare, display name)
+CATEGORIES: List[Tuple[str, str]] = [
+    ("股票型", "股票型基金"),
+    ("混合型", "混合型基金"),
+    ("债券型", "债券型基金"),
+    ("指数型", "指数型基金"),
+    ("QDII", "QDII基金"),
+    ("FOF", "FOF基金"),
+]
+
+# AkShare column -> fund_rankings column
+_COLUMN_MAP = {
+    '基金代码': 'code',
+    '基金简称': 'name',
+    '日期': 'nav_date',
+    '单位净值': 'nav',
+    '累计净值': 'acc_nav',
+    '日增长率': 'daily_growth',
+    '近1周': 'return_1w',
+    '近1月': 'return_1m',
+    '近3月': 'return_3m',
+    '近6月': 'return_6m',
+    '近1年': 'return_1y',
+    '近2年': 'return_2y',
+    '近3年': 'return_3y',
+    '今年来': 'return_ytd',
+    '成立来': 'return_since_inception',
+    '手续费': 'fee',
+}
+_NUMERIC_COLUMNS = ('nav', 'acc_nav', 'daily_growth') + FUND_RANKING_RETURN_COLUMNS
+
+# Sort keys accepted by the ranking endpoint (AkShare names) -> column
+SORT_COLUMNS = {cn: col for cn, col in _COLUMN_MAP.items() if col in FUND_RANKING_RETURN_COLUMNS}
+
+
+def _normalize(df: pd.DataFrame) -> List[Dict]:
+    """AkShare ranking frame -> fund_rankings rows (vectorized numeric coercion)."""
+    df = df.rename(columns=_COLUMN_MAP)
+    df = df[[col for col in _COLUMN_MAP.values() if col in df.columns]].copy()
+    for col in _NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['code'] = df['code'].astype(str)
+    df = df.drop_duplicates('code')
+    df = df.astype(object).where(pd.notna(df), None)
+    return df.to_dict('records')
+
+
+class FundRankingSnapshot:
+    """All ranking categories in SQLite, refreshed when older than MAX_AGE_SECONDS."""
+
+    MAX_AGE_SECONDS = 6 * 3600
+    # Don't retry a category that failed to load on every request
+    FILL_RETRY_SECONDS = 600
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fill_attempted_at = 0.0
+        # Stats and overview derived from the snapshot; invalidated by refresh()
+        self._cache = NearCache('fund_rankings', default_ttl=self.MAX_AGE_SECONDS, max_entries=16)
+
+    # =========================================================================
+    # Refresh
+    # =========================================================================
+
+    def refresh(self, categories: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Download ranking tables and replace their snapshot.
+
+        Args:
+            categories: Category keys to refresh (default: all)
+
+        Returns:
+            Dict mapping category -> rows stored (failed categories are absent)
+        """
+        import akshare as ak
+
+        results = {}
+        for category in categories or [key for key, _ in CATEGORIES]:
+            start = time.time()
+            try:
+                df = ak.fund_open_fund_rank_em(symbol=category)
+                if df is None or df.empty:
+                    continue
+                results[category] = replace_fund_rankings(category, _normalize(df))
+                print(f"[FundRankings] {category}: {results[category]} funds "
+                      f"({time.time() - start:.1f}s)")
+            except Exception as e:
+                print(f"[FundRankings] Failed to refresh {category}: {e}")
+        if results:
+            self._cache.invalidate()
+        return results
+
+    def refresh_stale(self, max_age: Optional[float] = None) -> Dict[str, int]:
+        """Refresh categories that are missing or older than max_age (one caller at a time)."""
+        max_age = self.MAX_AGE_SECONDS if max_age is None else max_age
+        with self._lock:
+            stats = get_fund_ranking_stats()
+            now = time.time()
+            stale = [
+                key for key, _ in CATEGORIES
+                if key not in stats or now - (stats[key]['updated_at'] or 0) > max_age
+            ]
+            return self.refresh(stale) if stale else {}
+
+    def _stats(self) -> Dict[str, Dict]:
+        """Per-category stats (count, average returns, updated_at) of the current snapshot."""
+        return self._cache.get_or_load('stats', get_fund_ranking_stats)
+
+    def _ensure_loaded(self) -> None:
+        """Fill categories that have never been loaded (first request after deploy)."""
+        if time.time() - self._fill_attempted_at < self.FILL_RETRY_SECONDS:
+            return
+        if len(self._stats()) < len(CATEGORIES):
+            self._fill_attempted_at = time.time()
+            self.refresh_stale(max_age=float('inf'))
+
+    # =========================================================================
+    # Reads
+    # =========================================================================
+
+    def lookup(self, codes: List[str], categories: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Ranking row per fund code.
+
+        Args:
+            codes: Fund codes
+            categories: Category preference order when a fund is ranked in several
+                (default: CATEGORIES order); funds only in other categories are skipped
+
+        Returns:
+            Dict mapping code -> row (with 'category'); unknown codes are absent
+        """
+        self._ensure_loaded()
+        order = categories or [key for key, _ in CATEGORIES]
+        rank = {category: i for i, category in enumerate(order)}
+        result = {}
+        for code, rows in get_fund_rankings_by_codes(codes).items():
+            rows = [row for row in rows if row['category'] in rank]
+            if rows:
+                result[code] = min(rows, key=lambda row: rank[row['category']])
+        return result
+
+    def top(self, category: str, sort_by: str = '近1月', limit: int = 50) -> Tuple[List[Dict], int]:
+        """
+        Top funds of a category.
+
+        Args:
+            category: Category key (e.g. 股票型)
+            sort_by: AkShare return column name (近1周 ... 近3年); invalid values fall back to 近1月
+            limit: Max rows
+
+        Returns:
+            (rows sorted descending, total funds in the category)
+        """
+        self._ensure_loaded()
+        column = SORT_COLUMNS.get(sort_by, 'return_1m')
+        total = self._stats().get(category, {}).get('total_count', 0)
+        return get_top_fund_rankings(category, column, limit), total
+
+    def overview(self, top_n: int = 3) -> List[Dict]:
+        """Per-category counts, average returns and top performers by 1-month return."""
+        self._ensure_loaded()
+        return self._cache.get_or_load(f"overview:{top_n}", lambda: self._build_overview(top_n))
+
+    def _build_overview(self, top_n: int) -> List[Dict]:
+        stats = self._stats()
+        overview = []
+        for key, display_name in CATEGORIES:
+            stat = stats.get(key)
+            if not stat:
+                continue
+            overview.append({
+                'category': display_name,
+                'type_key': key,
+                'total_count': stat['total_count'],
+                'avg_return_1m': round(stat['avg_return_1m'] or 0.0, 2),
+                'avg_return_3m': round(stat['avg_return_3m'] or 0.0, 2),
+                'avg_return_1y': round(stat['avg_return_1y'] or 0.0, 2),
+                'top_performers': [
+                    {'code': row['code'], 'name': row['name'] or '', 'return_1m': row['return_1m']}
+                    for row in get_top_fund_rankings(key, 'return_1m', top_n)
+                ],
+            })
+        return overview
+
+
+# Global instance
+fund_ranking_snapshot = FundRankingSnapshot()
@@ -0,0 +1,373 @@
+"""
+Market Data Hub - Shared pollers and push fan-out for live dashboard data.
+
+One background poller per upstream feed (indices, A-share spot quotes,
+northbound flow, industry flow, sector performance) keeps the latest snapshot
+in memory. Dashboard clients subscribe over SSE or WebSocket to the widgets
+and symbols they need and receive only what changed, so upstream load depends
+on the number of feeds, not on the number of connected users.
+
+Snapshots go through a ``NearCache`` with a single-flight load, so when
+several API workers run a hub only one of them calls upstream per interval.
+Pollers run only while there is demand (a subscriber, or a REST read within
+``DEMAND_WINDOW_SECONDS``).
+
+Usage:
+    from src.services.market_hub import market_hub
+
+    market_hub.start()
+    subscription = market_hub.subscribe(feeds=['indices'], symbols=['600519'])
+    events = subscription.poll()  # [(event, payload), ...]
+    subscription.close()
+
+Environment:
+    MARKET_HUB_ENABLED: Set to "false" to disable the pollers (REST endpoints fetch directly)
+"""
+import os
+import math
+import time
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.cache.near_cache import NearCache
+
+
+# =============================================================================
+# Feeds
+# =============================================================================
+
+def _fetch_indices() -> List[Dict]:
+    from src.data_sources.akshare_api import get_global_index_spot
+    return get_global_index_spot()
+
+
+def _num(value) -> Optional[float]:
+    """Float or None (spot rows carry NaN for suspended stocks)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _fetch_quotes() -> Dict[str, Dict]:
+    """Compact {code: quote} for every A-share, from one spot-map fetch."""
+    from src.data_sources.akshare_api import get_all_stock_spot_map
+    spot = get_all_stock_spot_map(force_refresh=True) or {}
+    quotes = {}
+    for code, row in spot.items():
+        total_mv = _num(row.get('总市值'))
+        quotes[str(code)] = {
+            "name": row.get('名称', ''),
+            "price": _num(row.get('最新价')),
+            "change_pct": _num(row.get('涨跌幅')),
+            "change_val": _num(row.get('涨跌额')),
+            "volume": _num(row.get('成交量')),
+            "amount": _num(row.get('成交额')),
+            "turnover_rate": _num(row.get('换手率')),
+            "pe": _num(row.get('市盈率-动态')),
+            "pb": _num(row.get('市净率')),
+            "total_mv": round(total_mv / 1e8, 2) if total_mv is not None else None,  # 亿元
+        }
+    return quotes
+
+
+def _widget_feed(method: str, *args) -> Callable[[], Any]:
+    def fetch():
+        from src.analysis.widget_service import widget_service
+        data = getattr(widget_service, method)(*args)
+        # Widget methods report failures in-band; don't publish those as snapshots
+        if not data or (isinstance(data, dict) and data.get('error')):
+            return None
+        return data
+    return fetch
+
+
+# Symbol-level feed: subscribers get only the quotes they asked for
+QUOTES_FEED = 'quotes'
+# Ranked widget feeds are polled at this depth; smaller views are slices of it
+TOP_N = 20
+
+
+class MarketDataHub:
+    """Polls each upstream feed once and fans snapshots out to all subscribers."""
+
+    # feed -> (fetch function, poll interval in seconds)
+    FEEDS: Dict[str, Tuple[Callable[[], Any], int]] = {
+        'indices': (_fetch_indices, 30),
+        QUOTES_FEED: (_fetch_quotes, 15),
+        'northbound_flow': (_widget_feed('get_northbound_flow', 5), 60),
+        'industry_flow': (_widget_feed('get_industry_flow', TOP_N), 60),
+        'sector_performance': (_widget_feed('get_sector_performance', TOP_N), 120),
+    }
+
+    # Pollers keep running this long after the last REST read / subscriber
+    DEMAND_WINDOW_SECONDS = 300
+    # A snapshot is served to REST callers while younger than this many intervals
+    FRESHNESS_INTERVALS = 3
+    IDLE_CHECK_SECONDS = 1.0
+
+    def __init__(self):
+        self.enabled = os.getenv('MARKET_HUB_ENABLED', 'true').lower() != 'false'
+        self._cache = NearCache('market_hub', default_ttl=600, max_entries=16)
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Dict] = {}  # feed -> {data, version, updated_at}
+        self._demand: Dict[str, float] = {}  # feed -> last demand timestamp
+        self._subscribers: Dict[int, 'Subscription'] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._stop = threading.Event()
+
+    # =========================================================================
+    # Lifecycle
+    # =========================================================================
+
+    def start(self) -> None:
+        """Start one poller thread per feed (idempotent)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stop.clear()
+            for feed in self.FEEDS:
+                thread = self._threads.get(feed)
+                if thread and thread.is_alive():
+                    continue
+                thread = threading.Thread(target=self._poll_loop, args=(feed,),
+                                          name=f"market_hub_{feed}", daemon=True)
+                self._threads[feed] = thread
+                thread.start()
+        print(f"[MarketHub] Started {len(self.FEEDS)} feed pollers")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the pollers."""
+        self._stop.set()
+        for thread in list(self._threads.values()):
+            thread.join(timeout=timeout)
+        self._threads.clear()
+
+    def _has_demand(self, feed: str, now: float) -> bool:
+        if any(feed in sub.feeds for sub in list(self._subscribers.values())):
+            return True
+        return now - self._demand.get(feed, 0) < self.DEMAND_WINDOW_SECONDS
+
+    def _poll_loop(self, feed: str) -> None:
+        fetch, interval = self.FEEDS[feed]
+        while not self._stop.is_set():
+            now = time.time()
+            if not self._has_demand(feed, now):
+                self._stop.wait(self.IDLE_CHECK_SECONDS)
+                continue
+
+            snapshot = self._snapshots.get(feed)
+            if snapshot and now - snapshot['updated_at'] < interval:
+                self._stop.wait(min(interval - (now - snapshot['updated_at']), interval))
+                continue
+
+            self.refresh(feed, fetch)
+            # After a failed fetch, wait a full interval instead of retrying immediately
+            if feed not in self._snapshots or time.time() - self._snapshots[feed]['updated_at'] > interval:
+                self._stop.wait(interval)
+
+    def refresh(self, feed: str, fetch: Callable[[], Any] = None) -> Optional[Dict]:
+        """
+        Load a feed's snapshot (shared across workers) and publish it if changed.
+
+        Returns:
+            The feed's current snapshot entry, or None if it has never loaded
+        """
+        fetch = fetch or self.FEEDS[feed][0]
+        interval = self.FEEDS[feed][1]
+
+        def load():
+            data = fetch()
+            if data is None or data == [] or data == {}:
+                return None
+            return {'data': data, 'fetched_at': time.time()}
+
+        try:
+            entry = self._cache.get_or_load(feed, load, ttl=interval)
+        except Exception as e:
+            print(f"[MarketHub] {feed} fetch error: {e}")
+            entry = None
+
+        with self._lock:
+            current = self._snapshots.get(feed)
+            if entry:
+                if current is None or current['data'] != entry['data']:
+                    self._snapshots[feed] = {
+                        'data': entry['data'],
+                        'version': (current['version'] + 1) if current else 1,
+                        'updated_at': entry['fetched_at'],
+                    }
+                else:
+                    current['updated_at'] = max(current['updated_at'], entry['fetched_at'])
+            return self._snapshots.get(feed)
+
+    # =========================================================================
+    # Reads
+    # =========================================================================
+
+    def touch(self, *feeds: str) -> None:
+        """Record demand so the feeds' pollers keep (or start) running."""
+        now = time.time()
+        for feed in feeds:
+            self._demand[feed] = now
+
+    def snapshot(self, feed: str) -> Optional[Dict]:
+        """Latest {data, version, updated_at} for a feed, regardless of age."""
+        return self._snapshots.get(feed)
+
+    def get(self, feed: str) -> Optional[Any]:
+        """
+        Fresh snapshot data for a REST caller.
+
+        Records demand, so the next call is likely served from memory.
+
+        Returns:
+            Snapshot data, or None if the hub has nothing fresh (caller fetches directly)
+        """
+        if not self.enabled:
+            return None
+        self.touch(feed)
+        snapshot = self._snapshots.get(feed)
+        if not snapshot:
+            return None
+        if time.time() - snapshot['updated_at'] > self.FEEDS[feed][1] * self.FRESHNESS_INTERVALS:
+            return None
+        return snapshot['data']
+
+    def get_ranked(self, feed: str, limit: int) -> Optional[Dict]:
+        """
+        A ranked widget feed (gainers/losers) cut to ``limit`` rows per side.
+
+        Returns:
+            Snapshot data, or None if unavailable or ``limit`` exceeds ``TOP_N``
+        """
+        if limit > TOP_N:
+            return None
+        data = self.get(feed)
+        if not isinstance(data, dict):
+            return None
+        return {
+            **data,
+            'gainers': (data.get('gainers') or [])[:limit],
+            'losers': (data.get('losers') or [])[:limit],
+        }
+
+    def get_quotes(self, codes: Iterable[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Quotes for some symbols, sliced from the shared spot snapshot.
+
+        Returns:
+            {code: quote} for the codes present, or None if the hub has no fresh quotes
+        """
+        quotes = self.get(QUOTES_FEED)
+        if quotes is None:
+            return None
+        return {code: quotes[code] for code in codes if code in quotes}
+
+    # =========================================================================
+    # Subscriptions
+    # =========================================================================
+
+    def subscribe(self, feeds: Iterable[str] = (), symbols: Iterable[str] = ()) -> 'Subscription':
+        """
+        Register a push subscriber.
+
+        Args:
+            feeds: Widget feeds to receive (unknown names are ignored)
+            symbols: Stock codes to receive quotes for (implies the quotes feed)
+
+        Returns:
+            Subscription; call ``poll()`` for pending events and ``close()`` when done
+        """
+        subscription = Subscription(self, feeds, symbols)
+        with self._lock:
+            self._subscribers[id(subscription)] = subscription
+        self.touch(*subscription.feeds)
+        return subscription
+
+    def _unsubscribe(self, subscription: 'Subscription') -> None:
+        with self._lock:
+            self._subscribers.pop(id(subscription), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hub status for monitoring."""
+        now = time.time()
+        return {
+            'enabled': self.enabled,
+            'subscribers': len(self._subscribers),
+            'feeds': {
+                feed: {
+                    'version': snapshot['version'],
+                    'age_seconds': round(now - snapshot['updated_at'], 1),
+                    'active': self._has_demand(feed, now),
+                }
+                for feed, snapshot in list(self._snapshots.items())
+            },
+        }
+
+
+class Subscription:
+    """One client's view of the hub: which feeds/symbols it wants and what it has seen."""
+
+    def __init__(self, hub: MarketDataHub, feeds: Iterable[str], symbols: Iterable[str]):
+        self._hub = hub
+        self.feeds: List[str] = []
+        self.symbols: List[str] = []
+        self._versions: Dict[str, int] = {}
+        self._sent_quotes: Dict[str, Dict] = {}
+        self.update(feeds, symbols)
+
+    def update(self, feeds: Iterable[str] = None, symbols: Iterable[str] = None) -> None:
+        """Change what this subscriber receives; new items are sent on the next poll."""
+        if symbols is not None:
+            self.symbols = sorted({str(s).strip() for s in symbols if str(s).strip()})
+        if feeds is not None:
+            self.feeds = [f for f in dict.fromkeys(feeds) if f in self._hub.FEEDS and f != QUOTES_FEED]
+        self.feeds = [f for f in self.feeds if f != QUOTES_FEED]
+        if self.symbols:
+            self.feeds.append(QUOTES_FEED)
+
+        self._versions = {f: v for f, v in self._versions.items() if f in self.feeds}
+        # Newly added symbols must be sent even if the quotes snapshot hasn't changed
+        self._versions.pop(QUOTES_FEED, None)
+        self._sent_quotes = {c: q for c, q in self._sent_quotes.items() if c in self.symbols}
+        self._hub.touch(*self.feeds)
+
+    def poll(self) -> List[Tuple[str, Dict]]:
+        """
+        Events since the last poll.
+
+        Returns:
+            List of (event name, payload). Widget feeds send their whole snapshot
+            when it changes; the quotes feed sends only symbols whose quote changed.
+        """
+        self._hub.touch(*self.feeds)
+        events = []
+        for feed in self.feeds:
+            snapshot = self._hub.snapshot(feed)
+            if not snapshot or self._versions.get(feed) == snapshot['version']:
+                continue
+            self._versions[feed] = snapshot['version']
+            updated_at = datetime.fromtimestamp(snapshot['updated_at']).isoformat()
+
+            if feed == QUOTES_FEED:
+                quotes = snapshot['data']
+                changed = {
+                    code: quotes[code] for code in self.symbols
+                    if code in quotes and self._sent_quotes.get(code) != quotes[code]
+                }
+                if changed:
+                    self._sent_quotes.update(changed)
+                    events.append((feed, {'quotes': changed, 'updated_at': updated_at}))
+            else:
+                events.append((feed, {'data': snapshot['data'], 'updated_at': updated_at}))
+        return events
+
+    def close(self) -> None:
+        self._hub._unsubscribe(self)
+
+
+# Global instance
+market_hub = MarketDataHub()
@@ -0,0 +1,282 @@
+"""
+News Ingestor - Continuous ingestion of upstream news into the local store.
+
+Each source is polled on its own interval with a since-cursor (the newest
+``published_ts`` already stored). Articles are normalized, tagged with related
+stocks, deduplicated by ``generate_news_hash`` and upserted into
+``news_articles``; the news feeds then read that table instead of refetching
+from AkShare/TuShare per query.
+
+Runs on the scheduler leader (see ``SchedulerManager.add_news_ingestion_job``),
+so only one API worker polls upstream.
+
+Environment:
+    NEWS_INGESTION_ENABLED: Set to "false" to disable (feeds fetch live)
+    NEWS_RETENTION_DAYS: Days of articles to keep (default 7)
+"""
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from src.data_sources.tushare_client import tushare_call_with_retry, format_date_yyyymmdd
+from src.data_sources.circuit_breaker import circuit_breaker
+from src.storage.db import (
+    upsert_news_articles,
+    get_news_ingest_cursors,
+    update_news_ingest_cursor,
+    delete_old_news_articles,
+)
+from src.services.news_service import generate_news_hash, parse_published_at, news_service
+from src.services.stock_matcher import stock_matcher
+
+
+# Re-read upstream this far behind the cursor (late-published / edited items)
+CURSOR_OVERLAP_SECONDS = 300
+# First run backfills this far
+INITIAL_LOOKBACK_DAYS = 3
+
+ANNOUNCEMENT_KEYWORDS = ['公告', '公示', '披露', '报告', '决议', '通知', '公布']
+
+
+def _article(title: str, content: str, source: str, source_name: str, category: str,
+             pub_time: str, url: str = '', hash_source: str = None, importance: str = None) -> Dict:
+    """Normalize one upstream row into a news_articles record."""
+    published = parse_published_at(pub_time)
+    article = {
+        "id": generate_news_hash(title, hash_source or source, pub_time),
+        "title": title,
+        "content": content,
+        "source": source,
+        "source_name": source_name,
+        "category": category,
+        "published_at": published.strftime('%Y-%m-%d %H:%M:%S') if published != datetime.min else pub_time,
+        "published_ts": published.timestamp() if published != datetime.min else None,
+        "url": url,
+        "related_stocks": stock_matcher.tag(title, content),
+    }
+    if importance:
+        article["importance"] = importance
+    return article
+
+
+# =============================================================================
+# Sources: fetch(since: datetime) -> articles published at or after ``since``
+# (or everything the upstream returns, when it cannot filter by time)
+# =============================================================================
+
+def _fetch_tushare_news(since: datetime) -> List[Dict]:
+    """TuShare news (sina) - watchlist flash news, filtered server-side by time."""
+    if circuit_breaker.is_open("news"):
+        raise RuntimeError("TuShare news circuit open")
+    df = tushare_call_with_retry(
+        'news', src='sina',
+        start_date=since.strftime('%Y%m%d %H:%M:%S'),
+        end_date=datetime.now().strftime('%Y%m%d %H:%M:%S')
+    )
+    if df is None or df.empty:
+        circuit_breaker.record_failure("news")
+        return []
+    circuit_breaker.record_success("news")
+
+    return [
+        _article(
+            row.get('title', '') or '', (row.get('content', '') or '')[:500],
+            source="tushare", source_name=row.get('src', 'sina'), category="flash",
+            pub_time=str(row.get('datetime', '')), url=row.get('url', ''),
+        )
+        for _, row in df.iterrows()
+    ]
+
+
+def _fetch_tushare_major(since: datetime) -> List[Dict]:
+    """TuShare major_news - hot news (day-granular range)."""
+    if circuit_breaker.is_open("major_news"):
+        raise RuntimeError("TuShare major_news circuit open")
+    df = tushare_call_with_retry(
+        'major_news', src='',
+        start_date=format_date_yyyymmdd(since), end_date=format_date_yyyymmdd()
+    )
+    if df is None or df.empty:
+        circuit_breaker.record_failure("major_news")
+        return []
+    circuit_breaker.record_success("major_news")
+
+    return [
+        _article(
+            row.get('title', '') or '', (row.get('content', '') or '')[:500],
+            source="tushare", source_name=row.get('src', '主流媒体'), category="hot",
+            pub_time=str(row.get('pub_time', '')), url=row.get('url', ''),
+        )
+        for _, row in df.iterrows()
+    ]
+
+
+def _fetch_akshare_cls(since: datetime) -> List[Dict]:
+    """财联社 telegraph (latest items) - hot news and market announcements."""
+    import akshare as ak
+    df = ak.stock_info_global_cls()
+    if df is None or df.empty:
+        return []
+
+    articles = []
+    for _, row in df.iterrows():
+        title = str(row.iloc[0]).strip() if len(row) > 0 else ''
+        content = str(row.iloc[1]).strip() if len(row) > 1 else ''
+        # 发布日期 (date) + 发布时间 (time of day only)
+        pub_date = str(row.iloc[2]).strip() if len(row) > 2 else ''
+        pub_clock = str(row.iloc[3]).strip() if len(row) > 3 else ''
+        pub_time = f"{pub_date} {pub_clock}".strip()
+        if len(content) < 5:
+            continue
+        if any(kw in title or kw in content for kw in ANNOUNCEMENT_KEYWORDS):
+            articles.append(_article(
+                title, content[:500], source="akshare", source_name="财联社", category="announcement",
+                pub_time=pub_time, hash_source='announcement',
+                importance=news_service._classify_announcement_importance(title),
+            ))
+        else:
+            articles.append(_article(
+                title, content[:500], source="akshare", source_name="财联社", category="hot",
+                pub_time=pub_time,
+            ))
+    return articles
+
+
+def _fetch_akshare_realtime(since: datetime) -> List[Dict]:
+    """东方财富 global financial flash (latest 200)."""
+    import akshare as ak
+    df = ak.stock_info_global_em()
+    if df is None or df.empty:
+        return []
+
+    articles = []
+    for _, row in df.iterrows():
+        title = str(row.get('标题', '')).strip()
+        if not title or len(title) < 5:
+            continue
+        articles.append(_article(
+            title, str(row.get('摘要', '')).strip()[:500], source="akshare", source_name="东方财富",
+            category="realtime", pub_time=str(row.get('发布时间', '')).strip(),
+            url=str(row.get('链接', '')).strip(), hash_source='realtime',
+        ))
+    return articles
+
+
+def _fetch_akshare_morning(since: datetime) -> List[Dict]:
+    """东方财富 morning briefing (full history upstream; keep the window only)."""
+    import akshare as ak
+    df = ak.stock_info_cjzc_em()
+    if df is None or df.empty:
+        return []
+
+    since_day = since.strftime('%Y-%m-%d')
+    articles = []
+    for _, row in df.iterrows():
+        title = str(row.get('标题', '')).strip()
+        pub_time = str(row.get('发布时间', '')).strip()
+        if not title or pub_time[:10] < since_day:
+            continue
+        articles.append(_article(
+            title, str(row.get('摘要', '')).strip()[:2000], source="akshare",
+            source_name="东方财富财经早餐", category="morning", pub_time=pub_time,
+            url=str(row.get('链接', '')).strip(), hash_source='morning', importance="high",
+        ))
+    return articles
+
+
+class NewsIngestor:
+    """Polls news sources on their own intervals and upserts into the local store."""
+
+    # source -> (fetch function, poll interval in seconds)
+    SOURCES: Dict[str, tuple] = {
+        'tushare_news': (_fetch_tushare_news, 180),
+        'tushare_major': (_fetch_tushare_major, 300),
+        'akshare_cls': (_fetch_akshare_cls, 120),
+        'akshare_realtime': (_fetch_akshare_realtime, 60),
+        'akshare_morning': (_fetch_akshare_morning, 1800),
+    }
+
+    # A source's store is served while its last successful run is this many intervals old
+    FRESHNESS_INTERVALS = 3
+    CLEANUP_INTERVAL = 6 * 3600
+
+    def __init__(self):
+        self.enabled = os.getenv('NEWS_INGESTION_ENABLED', 'true').lower() != 'false'
+        self.retention_days = int(os.getenv('NEWS_RETENTION_DAYS', '7'))
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    def ingest_source(self, source: str, cursor: Optional[Dict] = None) -> int:
+        """
+        Fetch one source from its cursor and upsert new articles.
+
+        Returns:
+            Number of new articles
+        """
+        fetch: Callable = self.SOURCES[source][0]
+        last_ts = (cursor or {}).get('last_published_ts')
+        if last_ts:
+            since = datetime.fromtimestamp(last_ts - CURSOR_OVERLAP_SECONDS)
+        else:
+            since = datetime.now() - timedelta(days=INITIAL_LOOKBACK_DAYS)
+        since_ts = since.timestamp()
+
+        try:
+            articles = fetch(since)
+        except Exception as e:
+            print(f"[NewsIngestor] {source} fetch error: {e}")
+            update_news_ingest_cursor(source, count=0, error=str(e)[:500])
+            return 0
+
+        # Sources that can't filter upstream return their whole window; keep what's new
+        articles = [a for a in articles if a['title'] and (a['published_ts'] is None or a['published_ts'] >= since_ts)]
+        created = upsert_news_articles(articles)
+        # Clamp so a mis-dated (future) article can't push the cursor past now
+        newest = max((min(a['published_ts'], time.time()) for a in articles if a['published_ts']), default=None)
+        update_news_ingest_cursor(source, last_published_ts=newest, count=created)
+        if created:
+            print(f"[NewsIngestor] {source}: {created} new articles")
+        return created
+
+    def run_due(self) -> Dict[str, int]:
+        """Ingest every source whose interval has elapsed (called by the scheduler)."""
+        if not self.enabled or not self._lock.acquire(blocking=False):
+            return {}
+        try:
+            now = time.time()
+            cursors = get_news_ingest_cursors()
+            results = {}
+            for source, (_, interval) in self.SOURCES.items():
+                cursor = cursors.get(source)
+                if cursor and now - (cursor.get('last_run_at') or 0) < interval:
+                    continue
+                results[source] = self.ingest_source(source, cursor)
+
+            if now - self._last_cleanup > self.CLEANUP_INTERVAL:
+                self._last_cleanup = now
+                removed = delete_old_news_articles(self.retention_days)
+                if removed:
+                    print(f"[NewsIngestor] Removed {removed} articles older than {self.retention_days} days")
+            return results
+        finally:
+            self._lock.release()
+
+    def is_fresh(self, *sources: str) -> bool:
+        """Whether any of the sources ingested successfully recently enough to serve from the store."""
+        if not self.enabled:
+            return False
+        now = time.time()
+        cursors = get_news_ingest_cursors()
+        for source in sources:
+            cursor = cursors.get(source)
+            interval = self.SOURCES[source][1]
+            if (cursor and not cursor.get('last_error')
+                    and now - (cursor.get('last_run_at') or 0) < interval * self.FRESHNESS_INTERVALS):
+                return True
+        return False
+
+
+# Global instance
+news_ingestor = NewsIngestor()
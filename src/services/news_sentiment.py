@@ -0,0 +1,186 @@
+"""
+News Sentiment Batcher - Batched LLM sentiment/summary analysis for news.
+
+Packs many headlines into one structured prompt that returns a JSON array,
+runs a bounded number of such prompts concurrently and writes the results
+with one bulk insert, so a feed's worth of sentiment costs a handful of LLM
+calls instead of one per article.
+
+Runs in the background for newly ingested articles (see
+``SchedulerManager.add_news_sentiment_job``); opening a news item then mostly
+hits ``news_analysis_cache``.
+
+Environment:
+    NEWS_SENTIMENT_BATCH_SIZE: Articles per prompt (default 15)
+    NEWS_SENTIMENT_CONCURRENCY: Prompts in flight at once (default 2)
+    NEWS_SENTIMENT_MAX_ATTEMPTS: Background attempts per article before it is
+        left unanalyzed (default 3)
+"""
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from src.storage.db import save_news_analysis_batch, get_unanalyzed_news_articles, record_news_analysis_attempts
+from src.llm.client import get_llm_client
+
+
+VALID_SENTIMENTS = {'positive', 'negative', 'neutral'}
+
+BATCH_PROMPT = """分析以下{count}条财经新闻，逐条给出结构化分析。
+
+【新闻列表】
+{news_text}
+
+【输出要求】
+仅输出一个JSON数组，不要有任何其他文字。数组中每条新闻对应一个对象，按编号顺序：
+[{{"i": 1, "sentiment": "positive或negative或neutral", "sentiment_score": 0.5, "summary": "一句话摘要", "key_points": ["要点1"], "related_stocks": []}}]
+sentiment_score 取值 0-1（越大越利好）。"""
+
+
+def _parse_json_array(text: str) -> Optional[List]:
+    """Extract the first JSON array from an LLM response."""
+    if not text:
+        return None
+    text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+    try:
+        parsed = json.loads(text)
+        return parsed if isinstance(parsed, list) else None
+    except json.JSONDecodeError:
+        pass
+
+    start, end = text.find('['), text.rfind(']')
+    if start != -1 and end > start:
+        try:
+            parsed = json.loads(text[start:end + 1])
+            return parsed if isinstance(parsed, list) else None
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+class NewsSentimentBatcher:
+    """Batched, bounded-concurrency news analysis."""
+
+    CONTENT_CHARS = 300
+    # Background runs only look back this far
+    BACKGROUND_LOOKBACK_SECONDS = 2 * 86400
+
+    def __init__(self):
+        self.batch_size = int(os.getenv('NEWS_SENTIMENT_BATCH_SIZE', '15'))
+        self.concurrency = int(os.getenv('NEWS_SENTIMENT_CONCURRENCY', '2'))
+        self.max_attempts = int(os.getenv('NEWS_SENTIMENT_MAX_ATTEMPTS', '3'))
+        self._llm_client = None
+        self._lock = threading.Lock()
+
+    def _get_llm_client(self):
+        """Lazy initialization of LLM client"""
+        if self._llm_client is None:
+            try:
+                self._llm_client = get_llm_client()
+            except Exception as e:
+                print(f"Warning: LLM client initialization failed: {e}")
+        return self._llm_client
+
+    def _analyze_batch(self, llm, items: List[Dict]) -> List[Dict]:
+        """One prompt for a batch; returns analysis rows for the items the model answered."""
+        news_text = "\n".join(
+            f"{i + 1}. 【{item.get('title', '')}】{(item.get('content') or '')[:self.CONTENT_CHARS]}"
+            for i, item in enumerate(items)
+        )
+        try:
+            response = llm.generate_content(BATCH_PROMPT.format(count=len(items), news_text=news_text))
+        except Exception as e:
+            print(f"[NewsSentiment] Batch of {len(items)} failed: {e}")
+            return []
+
+        results = []
+        for entry in _parse_json_array(response) or []:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                idx = int(entry.get('i')) - 1
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= idx < len(items):
+                continue
+            sentiment = str(entry.get('sentiment', 'neutral')).lower()
+            try:
+                score = min(1.0, max(0.0, float(entry.get('sentiment_score', 0.5))))
+            except (TypeError, ValueError):
+                score = 0.5
+            results.append({
+                'news_hash': items[idx]['id'],
+                'sentiment': sentiment if sentiment in VALID_SENTIMENTS else 'neutral',
+                'sentiment_score': score,
+                'summary': entry.get('summary', ''),
+                'key_points': entry.get('key_points') or [],
+                # Stock tags from ingestion are more reliable than the model's guess
+                'related_stocks': items[idx].get('related_stocks') or entry.get('related_stocks') or [],
+            })
+        return results
+
+    def analyze(self, items: List[Dict]) -> Dict[str, Dict]:
+        """
+        Analyze news items in batched prompts and persist the results.
+
+        Args:
+            items: News dicts with id, title, content
+
+        Returns:
+            Dict mapping news id -> analysis (sentiment, sentiment_score,
+            summary, key_points, related_stocks); items the model skipped are absent
+        """
+        items = [item for item in items if item.get('id') and item.get('title')]
+        llm = self._get_llm_client() if items else None
+        if not llm:
+            return {}
+
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(batches))),
+                                thread_name_prefix="news_sentiment_") as executor:
+            rows = [row for batch_rows in executor.map(lambda b: self._analyze_batch(llm, b), batches)
+                    for row in batch_rows]
+
+        save_news_analysis_batch(rows)
+        print(f"[NewsSentiment] Analyzed {len(rows)}/{len(items)} articles in "
+              f"{len(batches)} prompts ({time.time() - start:.1f}s)")
+        return {
+            row['news_hash']: {key: value for key, value in row.items() if key != 'news_hash'}
+            for row in rows
+        }
+
+    def analyze_pending(self, limit: int = 120) -> int:
+        """
+        Analyze recently ingested articles that have no analysis yet (background job).
+
+        Articles the model skips or fails on are retried on later runs, up to
+        max_attempts times.
+        """
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            # Without a model nothing is attempted, so no attempts are counted
+            if not self._get_llm_client():
+                return 0
+            pending = get_unanalyzed_news_articles(
+                limit=limit, since_ts=time.time() - self.BACKGROUND_LOOKBACK_SECONDS,
+                max_attempts=self.max_attempts
+            )
+            if not pending:
+                return 0
+            analyzed = self.analyze(pending)
+            record_news_analysis_attempts([
+                item['id'] for item in pending if item.get('id') and item['id'] not in analyzed
+            ])
+            return len(analyzed)
+        finally:
+            self._lock.release()
+
+
+# Global instance
+news_sentiment_batcher = NewsSentimentBatcher()
@@ -6,8 +6,6 @@ Integrates TuShare (primary), AkShare (fallback), and Tavily (research).
 """
 
 import hashlib
-import time
-import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
@@ -23,6 +21,8 @@ from src.data_sources.tushare_client import (
 )
 from src.data_sources.rate_limiter import rate_limiter
 from src.data_sources.circuit_breaker import circuit_breaker
+from src.cache.near_cache import NearCache
+from src.services.stock_matcher import stock_matcher, StockMentionMatcher
 
 # Import database operations
 from src.storage.db import (
@@ -31,14 +31,16 @@ from src.storage.db import (
     get_news_analysis,
     save_news_analysis,
     get_multiple_news_analysis,
-    get_user_read_news_hashes,
+    get_news_statuses,
     get_user_bookmarked_news,
     mark_news_read,
     toggle_news_bookmark,
     set_news_bookmark,
-    get_news_status,
     get_all_stocks,
     get_all_funds,
+    index_news_items,
+    search_news_index,
+    query_news_articles,
 )
 
 # Import LLM client
@@ -90,6 +92,36 @@ def generate_news_hash(title: str, source: str, datetime_str: str = None) -> str
     return hashlib.md5(content.encode()).hexdigest()[:16]
 
 
+def parse_published_at(dt_str: Any) -> datetime:
+    """Parse published_at into datetime. Returns datetime.min if unknown."""
+    if not dt_str:
+        return datetime.min
+
+    s = str(dt_str).strip()
+    if not s:
+        return datetime.min
+
+    # Normalize common variants
+    s = s.replace('T', ' ').replace('/', '-').replace('Z', '')
+
+    fmts = [
+        ('%Y-%m-%d %H:%M:%S', 19),
+        ('%Y%m%d %H:%M:%S', 17),
+        ('%Y-%m-%d %H:%M', 16),
+        ('%Y%m%d %H:%M', 14),
+        ('%Y-%m-%d', 10),
+        ('%Y%m%d', 8),
+    ]
+
+    for fmt, length in fmts:
+        try:
+            return datetime.strptime(s[:length], fmt)
+        except Exception:
+            continue
+
+    return datetime.min
+
+
 class NewsService:
     """
     Unified News Aggregation Service
@@ -103,8 +135,8 @@ class NewsService:
     """
 
     def __init__(self):
-        self._cache: Dict[str, tuple] = {}  # key -> (data, expiry_time)
-        self._cache_lock = threading.Lock()
+        # Two-tier cache shared across API workers (L1 in-process, L2 Redis/SQLite)
+        self._cache = NearCache('news', default_ttl=600)
         self._llm_client = None
         self._tavily_client = None
 
@@ -128,19 +160,28 @@ class NewsService:
         return self._tavily_client
 
     def _get_cache(self, key: str) -> Optional[Any]:
-        """Get data from memory cache if not expired"""
-        with self._cache_lock:
-            if key in self._cache:
-                data, expiry = self._cache[key]
-                if time.time() < expiry:
-                    return data
-                del self._cache[key]
-        return None
+        """Get data from cache if not expired"""
+        return self._cache.get(key)
 
     def _set_cache(self, key: str, data: Any, ttl: int):
-        """Set data in memory cache with TTL"""
-        with self._cache_lock:
-            self._cache[key] = (data, time.time() + ttl)
+        """Set data in cache with TTL"""
+        self._cache.set(key, data, ttl)
+
+    def _read_store(self, sources: tuple, **query) -> Optional[List[Dict]]:
+        """
+        Read from the local news store if the ingestor keeps it fresh for these sources.
+
+        Returns:
+            Articles (possibly empty), or None to fall back to fetching live
+        """
+        from src.services.news_ingestor import news_ingestor
+
+        try:
+            if news_ingestor.is_fresh(*sources):
+                return query_news_articles(**query)
+        except Exception as e:
+            print(f"News store read error: {e}")
+        return None
 
     # =========================================================================
     # Core News Fetching Methods
@@ -152,6 +193,11 @@ class NewsService:
 
         Falls back to AkShare stock_info_global_cls if TuShare fails.
         """
+        since_ts = (datetime.now() - timedelta(days=1)).timestamp()
+        stored = self._read_store(('tushare_major', 'akshare_cls'), category="hot", since_ts=since_ts, limit=limit)
+        if stored is not None:
+            return stored
+
         cache_key = f"hot_news:{limit}"
         config = NEWS_CACHE_CONFIG[NewsCategory.HOT]
 
@@ -235,6 +281,10 @@ class NewsService:
         
         Uses stock_info_global_em (东方财富-全球财经快讯) which returns latest 200 items.
         """
+        stored = self._read_store(('akshare_realtime',), category="realtime", limit=limit)
+        if stored is not None:
+            return stored
+
         cache_key = f"realtime_news:{limit}"
         config = NEWS_CACHE_CONFIG[NewsCategory.REALTIME]
 
@@ -287,6 +337,11 @@ class NewsService:
         Uses stock_info_cjzc_em (东方财富-财经早餐) and filters to only show today's data.
         This data is updated daily around 6am.
         """
+        today_start = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+        stored = self._read_store(('akshare_morning',), category="morning", since_ts=today_start, limit=limit)
+        if stored is not None:
+            return stored
+
         cache_key = f"morning_briefing:{limit}"
         config = NEWS_CACHE_CONFIG[NewsCategory.MORNING]
 
@@ -348,7 +403,9 @@ class NewsService:
         """
         Get news related to specific stocks.
 
-        Uses TuShare news API with stock filtering.
+        Looks the codes up in the ingested news store (or, when ingestion is
+        not running, the shared stock-tagged TuShare news); AkShare per-stock
+        news fills in.
         """
         if not stock_codes:
             return []
@@ -360,48 +417,25 @@ class NewsService:
         if cached:
             return cached
 
-        news_list = []
-
-        try:
-            # TuShare news API
-            if not circuit_breaker.is_open("news"):
-                end_date = datetime.now().strftime('%Y%m%d %H:%M:%S')
-                start_date = (datetime.now() - timedelta(days=3)).strftime('%Y%m%d %H:%M:%S')
-
-                df = tushare_call_with_retry('news', src='sina', start_date=start_date, end_date=end_date)
+        wanted = {denormalize_ts_code(code) for code in stock_codes}
 
-                if df is not None and not df.empty:
-                    circuit_breaker.record_success("news")
+        # Ingested articles are tagged at ingest time; look up the per-stock index
+        news_list = self._read_store(('tushare_news',), codes=sorted(wanted), limit=limit)
 
-                    # Filter news by stock codes in title/content
-                    for _, row in df.iterrows():
-                        title = row.get('title', '')
-                        content = row.get('content', '')
+        if news_list is None:
+            # Tagged news is shared by all users; each feed is an index lookup by code
+            tagged = self._get_tagged_stock_news()
+            by_code = tagged['by_code']
+            if tagged['items'] and stock_matcher.is_empty:
+                # stock_basic not synced yet: match this watchlist's codes only
+                local_matcher = StockMentionMatcher([{'code': code} for code in wanted])
+                by_code = {}
+                for idx, item in enumerate(tagged['items']):
+                    for stock in local_matcher.tag(item['title'], item['content']):
+                        by_code.setdefault(stock['code'], []).append(idx)
 
-                        # Check if any stock code or name is mentioned
-                        for code in stock_codes:
-                            if code in title or code in content:
-                                news_list.append({
-                                    "id": generate_news_hash(title, 'tushare', str(row.get('datetime', ''))),
-                                    "title": title,
-                                    "content": content[:500] if content else '',
-                                    "source": "tushare",
-                                    "source_name": row.get('src', 'sina'),
-                                    "category": "flash",
-                                    "published_at": str(row.get('datetime', '')),
-                                    "url": row.get('url', ''),
-                                    "related_stocks": [{"code": code}],
-                                })
-                                break
-
-                        if len(news_list) >= limit:
-                            break
-                else:
-                    circuit_breaker.record_failure("news")
-
-        except Exception as e:
-            print(f"Stock news fetch error: {e}")
-            circuit_breaker.record_failure("news")
+            positions = sorted({idx for code in wanted for idx in by_code.get(code, [])})
+            news_list = [dict(tagged['items'][idx], category="flash") for idx in positions[:limit]]
 
         # Fallback: try AkShare stock_news_em for individual stocks
         if len(news_list) < limit // 2:
@@ -446,15 +480,78 @@ class NewsService:
 
         if unique_news:
             self._set_cache(cache_key, unique_news, config.ttl)
+            index_news_items(unique_news)
 
         return unique_news
 
+    def _get_tagged_stock_news(self) -> Dict[str, Any]:
+        """
+        Recent TuShare news (last 3 days), each tagged with every related stock.
+
+        Returns:
+            {'items': [...newest first...], 'by_code': {code: [item index, ...]}}
+        """
+        cache_key = f"tagged_stock_news:{stock_matcher.version}"
+        config = NEWS_CACHE_CONFIG[NewsCategory.FLASH]
+
+        cached = self._get_cache(cache_key)
+        if cached:
+            return cached
+
+        items = []
+        try:
+            if not circuit_breaker.is_open("news"):
+                end_date = datetime.now().strftime('%Y%m%d %H:%M:%S')
+                start_date = (datetime.now() - timedelta(days=3)).strftime('%Y%m%d %H:%M:%S')
+
+                df = tushare_call_with_retry('news', src='sina', start_date=start_date, end_date=end_date)
+
+                if df is not None and not df.empty:
+                    circuit_breaker.record_success("news")
+                    for _, row in df.iterrows():
+                        title = row.get('title', '') or ''
+                        content = row.get('content', '') or ''
+                        items.append({
+                            "id": generate_news_hash(title, 'tushare', str(row.get('datetime', ''))),
+                            "title": title,
+                            "content": content[:500],
+                            "source": "tushare",
+                            "source_name": row.get('src', 'sina'),
+                            "category": "flash",
+                            "published_at": str(row.get('datetime', '')),
+                            "url": row.get('url', ''),
+                            # One linear pass over the full text finds every mentioned stock
+                            "related_stocks": stock_matcher.tag(title, content),
+                        })
+                else:
+                    circuit_breaker.record_failure("news")
+
+        except Exception as e:
+            print(f"Stock news fetch error: {e}")
+            circuit_breaker.record_failure("news")
+
+        by_code: Dict[str, List[int]] = {}
+        for idx, item in enumerate(items):
+            for stock in item['related_stocks']:
+                by_code.setdefault(stock['code'], []).append(idx)
+
+        tagged = {'items': items, 'by_code': by_code}
+        if items:
+            self._set_cache(cache_key, tagged, config.ttl)
+            index_news_items(items)
+        return tagged
+
     def get_announcements(self, stock_code: str = None, limit: int = 20) -> List[Dict]:
         """
         Get company announcements.
 
         Uses AkShare as primary source (free), with stock-specific news fallback.
         """
+        if not stock_code:
+            stored = self._read_store(('akshare_cls',), category="announcement", limit=limit)
+            if stored is not None:
+                return stored
+
         cache_key = f"announcements:{stock_code or 'all'}:{limit}"
         config = NEWS_CACHE_CONFIG[NewsCategory.ANNOUNCEMENT]
 
@@ -622,39 +719,66 @@ class NewsService:
                 if df is not None and not df.empty:
                     research_keywords = ['研报', '研究', '券商', '分析师', '评级', '目标价', '买入', '增持', '推荐', '报告']
 
+                    items = []
                     for _, row in df.iterrows():
                         title = str(row.iloc[0]).strip() if len(row) > 0 else ''
                         content = str(row.iloc[1]).strip() if len(row) > 1 else ''
                         pub_time = str(row.iloc[3]).strip() if len(row) > 3 else ''
 
-                        # Check if content matches research keywords or query
-                        text = title + content
-                        is_research = any(kw in text for kw in research_keywords)
-                        matches_query = query.lower() in text.lower() if query else True
+                        items.append({
+                            "id": generate_news_hash(title, 'research', pub_time),
+                            "title": title,
+                            "content": content[:500],
+                            "source": "akshare",
+                            "source_name": "财联社",
+                            "category": "research",
+                            "published_at": pub_time,
+                            "url": "",
+                        })
 
-                        if is_research or matches_query:
-                            news_list.append({
-                                "id": generate_news_hash(title, 'research', pub_time),
-                                "title": title,
-                                "content": content[:500],
-                                "source": "akshare",
-                                "source_name": "财联社",
-                                "category": "research",
-                                "published_at": pub_time,
-                                "url": "",
-                            })
+                    # Query matches come from the full-text index (which now includes this batch)
+                    index_news_items(items)
+                    if query:
+                        news_list.extend(
+                            {**hit, "source": "akshare", "category": "research"}
+                            for hit in search_news_index(query, limit=limit)
+                        )
 
-                            if len(news_list) >= limit:
-                                break
+                    for item in items:
+                        if len(news_list) >= limit:
+                            break
+                        text = item['title'] + item['content']
+                        if not query or any(kw in text for kw in research_keywords):
+                            news_list.append(item)
 
             except Exception as e:
                 print(f"AkShare research fallback error: {e}")
 
+        # Index hits and keyword matches can overlap
+        seen = set()
+        unique_news = []
+        for item in news_list:
+            if item['id'] not in seen:
+                seen.add(item['id'])
+                unique_news.append(item)
+        news_list = unique_news
+
         if news_list:
             self._set_cache(cache_key, news_list, config.ttl)
 
         return news_list
 
+    def search_news(self, query: str, category: str = None, limit: int = 30) -> List[Dict]:
+        """
+        Search news seen by any feed (titles and content) via the full-text index.
+
+        Args:
+            query: Search text
+            category: Optional category filter (e.g. 'hot', 'flash')
+            limit: Maximum number of results
+        """
+        return search_news_index(query, category=category, limit=limit)
+
     # =========================================================================
     # Personalized News Aggregation
     # =========================================================================
@@ -712,7 +836,8 @@ class NewsService:
                 hot_limit = max(20, fetch_limit - stock_limit)
                 stock_news = self.get_stock_news(stock_codes, limit=stock_limit)
                 hot_news = self.get_hot_news(limit=hot_limit)
-                news_list = self._merge_and_sort_news(stock_news, hot_news)
+                # Sorted together with everything else below
+                news_list = stock_news + hot_news
             else:
                 # No watchlist: hot news only
                 news_list = self.get_hot_news(limit=fetch_limit)
@@ -757,15 +882,15 @@ class NewsService:
             # Daily morning briefing (today only)
             news_list = self.get_morning_briefing(limit=10)
 
-        # Deduplicate
+        # Deduplicate, parsing each timestamp once for filtering and sorting
         seen = set()
         unique_news = []
         for item in news_list:
             if item['id'] not in seen:
                 seen.add(item['id'])
-                unique_news.append(item)
+                unique_news.append((self._parse_published_at(item.get('published_at', '')), item))
 
-        # Optional: apply time range filter before adding user status/pagination
+        # Optional: apply time range filter before pagination
         if since_days is not None:
             try:
                 days = int(since_days)
@@ -774,68 +899,39 @@ class NewsService:
 
             if days > 0:
                 cutoff = datetime.now() - timedelta(days=days)
-                unique_news = [
-                    item for item in unique_news
-                    if self._parse_published_at(item.get('published_at', '')) >= cutoff
-                ]
-
-        # Add user status (read/bookmarked)
-        read_hashes = get_user_read_news_hashes(user_id)
-        for item in unique_news:
-            item['is_read'] = item['id'] in read_hashes
-            status = get_news_status(user_id, item['id'])
-            item['is_bookmarked'] = status.get('is_bookmarked', False) if status else False
+                unique_news = [entry for entry in unique_news if entry[0] >= cutoff]
 
         # Always sort by time (newest first) before pagination.
-        unique_news.sort(key=lambda x: self._parse_published_at(x.get('published_at', '')), reverse=True)
+        unique_news.sort(key=lambda entry: entry[0], reverse=True)
 
         # Pagination
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
-        result["news"] = unique_news[start_idx:end_idx]
+        page_items = [item for _, item in unique_news[start_idx:end_idx]]
+
+        # Add user status (read/bookmarked) and cached sentiment to this page only
+        page_ids = [item['id'] for item in page_items]
+        statuses = get_news_statuses(user_id, page_ids)
+        analyses = get_multiple_news_analysis(page_ids)
+        for item in page_items:
+            status = statuses.get(item['id'], {})
+            item['is_read'] = status.get('is_read', False)
+            item['is_bookmarked'] = status.get('is_bookmarked', False)
+            analysis = analyses.get(item['id'])
+            if analysis:
+                item['sentiment'] = analysis.get('sentiment')
+                item['sentiment_score'] = analysis.get('sentiment_score')
+                item.setdefault('summary', analysis.get('summary'))
+
+        result["news"] = page_items
         result["total"] = len(unique_news)
         result["has_more"] = end_idx < len(unique_news)
 
         return result
 
-    def _merge_and_sort_news(self, *news_lists) -> List[Dict]:
-        """Merge multiple news lists and sort by time"""
-        all_news = []
-        for news_list in news_lists:
-            all_news.extend(news_list)
-
-        # Sort by published_at (newest first)
-        all_news.sort(key=lambda x: self._parse_published_at(x.get('published_at', '')), reverse=True)
-        return all_news
-
     def _parse_published_at(self, dt_str: Any) -> datetime:
         """Parse published_at into datetime. Returns datetime.min if unknown."""
-        if not dt_str:
-            return datetime.min
-
-        s = str(dt_str).strip()
-        if not s:
-            return datetime.min
-
-        # Normalize common variants
-        s = s.replace('T', ' ').replace('/', '-').replace('Z', '')
-
-        fmts = [
-            ('%Y-%m-%d %H:%M:%S', 19),
-            ('%Y%m%d %H:%M:%S', 17),
-            ('%Y-%m-%d %H:%M', 16),
-            ('%Y%m%d %H:%M', 14),
-            ('%Y-%m-%d', 10),
-            ('%Y%m%d', 8),
-        ]
-
-        for fmt, length in fmts:
-            try:
-                return datetime.strptime(s[:length], fmt)
-            except Exception:
-                continue
-
-        return datetime.min
+        return parse_published_at(dt_str)
 
     # =========================================================================
     # AI Analysis
@@ -968,11 +1064,10 @@ class NewsService:
         # Find items that need analysis
         need_analysis = [item for item in news_items if item['id'] not in cached]
 
-        # Analyze missing items (limit to avoid overwhelming LLM)
-        for item in need_analysis[:5]:  # Only analyze top 5 at a time
-            result = self.analyze_news(item['id'], item.get('title', ''), item.get('content', ''))
-            if 'error' not in result:
-                cached[item['id']] = result
+        # Analyze missing items together in batched prompts
+        if need_analysis:
+            from src.services.news_sentiment import news_sentiment_batcher
+            cached.update(news_sentiment_batcher.analyze(need_analysis))
 
         return cached
 
@@ -1047,12 +1142,13 @@ class NewsService:
             news = self.get_stock_news(stock_codes, limit=20)
             summary["recent_news_count"] = len(news)
 
-            read_hashes = get_user_read_news_hashes(user_id)
-            summary["unread_count"] = len([n for n in news if n['id'] not in read_hashes])
+            statuses = get_news_statuses(user_id, [n['id'] for n in news])
+            summary["unread_count"] = len([n for n in news if not statuses.get(n['id'], {}).get('is_read')])
 
             # Get important news (with high sentiment score or announcements)
+            analyses = get_multiple_news_analysis([item['id'] for item in news[:5]])
             for item in news[:5]:
-                analysis = get_news_analysis(item['id'])
+                analysis = analyses.get(item['id'])
                 if analysis and analysis.get('sentiment') != 'neutral':
                     summary["important_news"].append({
                         "id": item['id'],
@@ -0,0 +1,298 @@
+"""
+Quote Store - Per-symbol realtime quote cache with batch fill.
+
+Quotes are cached one entry per stock code, so any watchlist or batch request
+is assembled from the same entries regardless of which other codes it asks
+for. Misses are filled in bulk, cheapest source first:
+
+1. The market hub's shared spot snapshot (no upstream call)
+2. One TuShare ``realtime_quote`` call for all remaining codes
+3. The full-market AkShare spot map (one call, shared 30s cache)
+
+Previous closes come from a single cross-sectional ``daily(trade_date=prev)``
+and valuations from a single cross-sectional ``daily_basic``, each cached per
+trade date, so no request makes per-stock upstream calls.
+
+Usage:
+    from src.services.quote_store import quote_store
+
+    quotes = quote_store.get_quotes(['600519', '000001'])
+    # -> {'600519': {'price': ..., 'change_pct': ..., ...}, ...}
+"""
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.cache.near_cache import NearCache
+from src.data_sources.tushare_client import (
+    tushare_call_with_retry,
+    get_latest_trade_date,
+    get_realtime_quotes,
+    normalize_ts_code,
+    denormalize_ts_code,
+)
+
+
+QUOTE_TTL = 30  # seconds
+DAILY_TTL = 6 * 3600  # cross-sectional daily / daily_basic, per trade date
+VALUATION_FIELDS = ('pe', 'pb', 'total_mv', 'turnover_rate')
+
+
+def _num(value) -> Optional[float]:
+    """Float or None (upstream frames carry NaN / empty strings)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _derive_changes(quote: Dict) -> Dict:
+    """Fill change_pct / change_val from price and prev_close where missing."""
+    price, prev_close = quote.get('price'), quote.get('prev_close')
+    if price is not None and prev_close:
+        if quote.get('change_pct') is None:
+            quote['change_pct'] = round((price - prev_close) / prev_close * 100, 2)
+        if quote.get('change_val') is None:
+            quote['change_val'] = round(price - prev_close, 3)
+    return quote
+
+
+def _quote(code: str, source: str, name: str = '', **fields) -> Dict:
+    """Normalized quote record (numeric fields coerced to float or None)."""
+    quote = {
+        'code': code,
+        'name': name or '',
+        'price': None,
+        'change_pct': None,
+        'change_val': None,
+        'prev_close': None,
+    }
+    quote.update({key: _num(value) for key, value in fields.items()})
+    quote['source'] = source
+    quote['updated_at'] = datetime.now().isoformat()
+    return _derive_changes(quote)
+
+
+class QuoteStore:
+    """Per-symbol quote cache; misses are fetched together in one bulk call."""
+
+    def __init__(self):
+        # Two-tier cache shared across API workers (L1 in-process, L2 Redis/SQLite)
+        self._cache = NearCache('quotes', default_ttl=QUOTE_TTL, max_entries=8192)
+
+    # =========================================================================
+    # Cross-sectional daily data (one call per trade date)
+    # =========================================================================
+
+    def _trade_dates(self) -> Dict[str, Optional[str]]:
+        """Latest trade date and the one whose close is today's previous close (cached hourly)."""
+        today = datetime.now().strftime('%Y%m%d')
+
+        def load():
+            latest = get_latest_trade_date()
+            if not latest:
+                return None
+            previous = get_latest_trade_date(offset=1) if latest == today else latest
+            return {'latest': latest, 'previous': previous}
+
+        return self._cache.get_or_load(f"trade_dates:{today}", load, ttl=3600) or {}
+
+    def latest_trade_date(self) -> Optional[str]:
+        """Most recent trade date (YYYYMMDD), cached hourly."""
+        return self._trade_dates().get('latest')
+
+    def get_prev_closes(self) -> Dict[str, float]:
+        """{code: previous close} for the whole market from one ``daily`` call."""
+        trade_date = self._trade_dates().get('previous')
+        if not trade_date:
+            return {}
+
+        def load():
+            df = tushare_call_with_retry('daily', trade_date=trade_date, fields='ts_code,close')
+            if df is None or df.empty:
+                return None
+            return {denormalize_ts_code(ts_code): float(close)
+                    for ts_code, close in zip(df['ts_code'], df['close']) if close == close}
+
+        return self._cache.get_or_load(f"prev_close:{trade_date}", load, ttl=DAILY_TTL) or {}
+
+    def get_daily_basics(self) -> Dict[str, Dict]:
+        """{code: {pe, pb, total_mv (亿元), turnover_rate}} for the latest trade date, one call."""
+        trade_date = self._trade_dates().get('latest')
+        if not trade_date:
+            return {}
+
+        def load():
+            df = tushare_call_with_retry(
+                'daily_basic', trade_date=trade_date, fields='ts_code,pe,pb,total_mv,turnover_rate'
+            )
+            if df is None or df.empty:
+                return None
+            basics = {}
+            for row in df.itertuples(index=False):
+                total_mv = _num(row.total_mv)
+                basics[denormalize_ts_code(row.ts_code)] = {
+                    'pe': _num(row.pe),
+                    'pb': _num(row.pb),
+                    'total_mv': round(total_mv / 10000, 2) if total_mv is not None else None,  # 万元 -> 亿元
+                    'turnover_rate': _num(row.turnover_rate),
+                }
+            return basics
+
+        return self._cache.get_or_load(f"daily_basic:{trade_date}", load, ttl=DAILY_TTL) or {}
+
+    # =========================================================================
+    # Batch fill
+    # =========================================================================
+
+    @staticmethod
+    def _from_hub(codes: List[str]) -> Dict[str, Dict]:
+        from src.services.market_hub import market_hub
+        hub_quotes = market_hub.get_quotes(codes) or {}
+        return {
+            code: _quote(
+                code, 'hub', price=q.get('price'), change_pct=q.get('change_pct'),
+                change_val=q.get('change_val'), name=q.get('name'),
+                volume=q['volume'] * 100 if q.get('volume') is not None else None,  # 手 -> 股
+                amount=q.get('amount'), **{f: q.get(f) for f in VALUATION_FIELDS}
+            )
+            for code, q in hub_quotes.items() if q.get('price') is not None
+        }
+
+    @staticmethod
+    def _from_tushare(codes: List[str]) -> Dict[str, Dict]:
+        try:
+            df = get_realtime_quotes(codes)
+        except Exception as e:
+            print(f"[QuoteStore] TuShare realtime quotes failed: {e}")
+            return {}
+        if df is None or df.empty:
+            return {}
+
+        wanted = set(codes)
+        quotes = {}
+        for _, row in df.iterrows():
+            code = denormalize_ts_code(str(row.get('ts_code', '')))
+            price = _num(row.get('price'))
+            if code not in wanted or not price:
+                continue
+            quotes[code] = _quote(
+                code, 'tushare', price=price, prev_close=row.get('pre_close'),
+                change_pct=row.get('pct_chg'), name=row.get('name'),
+                volume=row.get('volume', row.get('vol')), amount=row.get('amount'),
+                open=row.get('open'), high=row.get('high'), low=row.get('low'),
+            )
+        return quotes
+
+    @staticmethod
+    def _from_spot_map(codes: List[str]) -> Dict[str, Dict]:
+        from src.data_sources.akshare_api import get_all_stock_spot_map
+        spot = get_all_stock_spot_map() or {}
+        quotes = {}
+        for code in codes:
+            row = spot.get(code)
+            if not row or _num(row.get('最新价')) is None:
+                continue
+            total_mv = _num(row.get('总市值'))
+            volume = _num(row.get('成交量'))
+            quotes[code] = _quote(
+                code, 'akshare', price=row.get('最新价'), prev_close=row.get('昨收'),
+                change_pct=row.get('涨跌幅'), change_val=row.get('涨跌额'), name=row.get('名称'),
+                volume=volume * 100 if volume is not None else None, amount=row.get('成交额'),
+                open=row.get('今开'), high=row.get('最高'), low=row.get('最低'),
+                pe=row.get('市盈率-动态'), pb=row.get('市净率'), turnover_rate=row.get('换手率'),
+                total_mv=round(total_mv / 1e8, 2) if total_mv is not None else None,
+            )
+        return quotes
+
+    def _fill(self, codes: List[str]) -> Dict[str, Dict]:
+        """Fetch quotes for cache misses in bulk, cheapest source first."""
+        filled: Dict[str, Dict] = {}
+        for source in (self._from_hub, self._from_tushare, self._from_spot_map):
+            missing = [code for code in codes if code not in filled]
+            if not missing:
+                break
+            try:
+                filled.update(source(missing))
+            except Exception as e:
+                print(f"[QuoteStore] {source.__name__} failed: {e}")
+
+        # Some sources have no change fields; derive them from the cross-sectional daily
+        if any(q['change_pct'] is None for q in filled.values()):
+            prev_closes = self.get_prev_closes()
+            for code, quote in filled.items():
+                if quote['prev_close'] is None and code in prev_closes:
+                    quote['prev_close'] = prev_closes[code]
+                    _derive_changes(quote)
+
+        if filled:
+            self._cache.set_many(filled, ttl=QUOTE_TTL)
+        return filled
+
+    # =========================================================================
+    # Reads
+    # =========================================================================
+
+    def get_quotes(self, codes: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Realtime quotes for stock codes.
+
+        Args:
+            codes: Stock codes (6-digit; suffixes like .SH are stripped)
+
+        Returns:
+            Dict mapping code -> quote (code, name, price, change_pct, change_val,
+            prev_close, volume (shares), amount, ..., source, updated_at).
+            Codes no source could quote are absent.
+        """
+        codes = list(dict.fromkeys(denormalize_ts_code(str(c).strip()) for c in codes if c))
+        if not codes:
+            return {}
+        quotes = self._cache.get_many(codes)
+        missing = [code for code in codes if code not in quotes]
+        if missing:
+            quotes.update(self._fill(missing))
+        return {code: quotes[code] for code in codes if code in quotes}
+
+    def get_watchlist(self, codes: Iterable[str]) -> List[Dict]:
+        """
+        Quotes plus valuation fields (pe, pb, total_mv, turnover_rate) for a watchlist.
+
+        Returns:
+            One dict per quoted code, in input order
+        """
+        quotes = self.get_quotes(codes)
+        basics = None
+        rows = []
+        for code, quote in quotes.items():
+            row = dict(quote, ts_code=normalize_ts_code(code))
+            if any(row.get(f) is None for f in VALUATION_FIELDS):
+                if basics is None:
+                    basics = self.get_daily_basics()
+                for field in VALUATION_FIELDS:
+                    if row.get(field) is None:
+                        row[field] = basics.get(code, {}).get(field)
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def as_spot_row(quote: Dict) -> Dict:
+        """A quote in the AkShare spot-row shape (代码/名称/最新价/...) used by older endpoints."""
+        return {
+            '代码': quote['code'],
+            '名称': quote.get('name', ''),
+            '最新价': quote.get('price'),
+            '涨跌幅': quote.get('change_pct'),
+            '涨跌额': quote.get('change_val'),
+            '成交量': quote.get('volume'),
+            '成交额': quote.get('amount'),
+            '最高': quote.get('high'),
+            '最低': quote.get('low'),
+            '今开': quote.get('open'),
+            '昨收': quote.get('prev_close'),
+        }
+
+
+# Global instance
+quote_store = QuoteStore()
@@ -0,0 +1,234 @@
+"""
+Stock Detail - Cached quote, bounded price history and financials per stock.
+
+The stock detail page used to download the full-market spot table to read one
+row and the entire qfq price history to keep its last 60 bars. Here:
+
+1. The quote comes from ``quote_store`` (market hub snapshot, then one bulk
+   TuShare call, then the shared AkShare spot map), cached per symbol.
+2. Daily bars are fetched for a bounded date window only (TuShare ``daily`` +
+   ``adj_factor`` for qfq, AkShare ``stock_zh_a_hist`` with ``start_date`` as
+   fallback) and cached per (stock, window, adjustment, day). Valuation
+   callers get unadjusted closes; the detail page shows qfq bars.
+3. Financial indicators are fetched from a recent start year and cached.
+
+All caches are NearCache instances shared across API workers, so concurrent
+views of the same stock cost one upstream call per TTL.
+
+Usage:
+    from src.services.stock_detail import stock_detail_service
+
+    detail = stock_detail_service.get_detail('600519')
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.cache.near_cache import NearCache
+
+
+DETAIL_HISTORY_DAYS = 60
+HISTORY_TTL = 1800  # daily bars only change once a day; re-check every 30 min
+FINANCIAL_TTL = 12 * 3600
+FINANCIAL_YEARS = 2  # stock_financial_analysis_indicator scrapes one page per year
+
+# AkShare stock_zh_a_hist columns returned by the detail endpoint
+BAR_COLUMNS = ['日期', '开盘', '收盘', '最高', '最低', '成交量', '成交额', '振幅', '涨跌幅', '涨跌额', '换手率']
+
+
+def _num(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _window(days: int):
+    """(start, end) YYYYMMDD covering roughly `days` trading days."""
+    end = datetime.now()
+    start = end - timedelta(days=int(days * 1.6) + 10)  # weekends and holidays
+    return start.strftime('%Y%m%d'), end.strftime('%Y%m%d')
+
+
+def _turnover_from_tushare(ts_code: str, trade_dates: pd.Series, start_date: str, end_date: str) -> pd.Series:
+    """Turnover rate (%) per trade date from TuShare ``daily_basic``; NaN where unavailable."""
+    from src.data_sources.tushare_client import tushare_call_with_retry
+
+    try:
+        basic = tushare_call_with_retry('daily_basic', ts_code=ts_code, start_date=start_date,
+                                        end_date=end_date, fields='trade_date,turnover_rate')
+        if basic is not None and not basic.empty:
+            turnover = trade_dates.to_frame().merge(basic, on='trade_date', how='left')['turnover_rate']
+            return pd.to_numeric(turnover, errors='coerce').round(2)
+    except Exception as e:
+        print(f"[StockDetail] daily_basic failed for {ts_code}: {e}")
+    return pd.Series(float('nan'), index=trade_dates.index)
+
+
+def _bars_from_tushare(code: str, start_date: str, end_date: str, adjust: str = 'qfq') -> Optional[pd.DataFrame]:
+    """Daily bars from TuShare ``daily`` (+ ``adj_factor`` for qfq) in the AkShare column layout."""
+    from src.data_sources.tushare_client import tushare_call_with_retry, normalize_ts_code
+
+    ts_code = normalize_ts_code(code)
+    daily = tushare_call_with_retry('daily', ts_code=ts_code, start_date=start_date, end_date=end_date)
+    if daily is None or daily.empty:
+        return None
+    daily = daily.sort_values('trade_date').reset_index(drop=True)
+
+    # Forward-adjust prices to the latest factor (same as AkShare adjust="qfq")
+    scale = pd.Series(1.0, index=daily.index)
+    if adjust == 'qfq':
+        try:
+            adj = tushare_call_with_retry('adj_factor', ts_code=ts_code, start_date=start_date, end_date=end_date)
+            if adj is not None and not adj.empty:
+                factors = daily[['trade_date']].merge(adj[['trade_date', 'adj_factor']], on='trade_date', how='left')
+                factors = pd.to_numeric(factors['adj_factor'], errors='coerce').ffill().bfill()
+                if factors.notna().all() and factors.iloc[-1] > 0:
+                    scale = factors / factors.iloc[-1]
+        except Exception as e:
+            print(f"[StockDetail] adj_factor failed for {code}, using raw prices: {e}")
+
+    prices = {col: pd.to_numeric(daily[col], errors='coerce') * scale for col in ('open', 'close', 'high', 'low')}
+    pre_close = pd.to_numeric(daily['pre_close'], errors='coerce') * scale
+    return pd.DataFrame({
+        '日期': pd.to_datetime(daily['trade_date'].astype(str), format='%Y%m%d').dt.strftime('%Y-%m-%d'),
+        '开盘': prices['open'].round(2),
+        '收盘': prices['close'].round(2),
+        '最高': prices['high'].round(2),
+        '最低': prices['low'].round(2),
+        '成交量': pd.to_numeric(daily['vol'], errors='coerce'),  # 手
+        '成交额': pd.to_numeric(daily['amount'], errors='coerce') * 1000,  # 千元 -> 元
+        '振幅': ((prices['high'] - prices['low']) / pre_close * 100).round(2),
+        '涨跌幅': pd.to_numeric(daily['pct_chg'], errors='coerce').round(2),
+        '涨跌额': (prices['close'] - pre_close).round(2),
+        '换手率': _turnover_from_tushare(ts_code, daily['trade_date'], start_date, end_date),
+    })
+
+
+def _bars_from_akshare(code: str, start_date: str, end_date: str, adjust: str = 'qfq') -> Optional[pd.DataFrame]:
+    """Daily bars from AkShare, limited to the date window."""
+    import akshare as ak
+
+    df = ak.stock_zh_a_hist(symbol=code, period="daily", start_date=start_date, end_date=end_date, adjust=adjust)
+    if df is None or df.empty:
+        return None
+    df = df[[col for col in BAR_COLUMNS if col in df.columns]].copy()
+    df['日期'] = df['日期'].astype(str)
+    return df
+
+
+class StockDetailService:
+    """Per-stock detail lookups backed by shared caches."""
+
+    def __init__(self):
+        # Two-tier cache shared across API workers (L1 in-process, L2 Redis/SQLite)
+        self._cache = NearCache('stock_detail', default_ttl=HISTORY_TTL, max_entries=1024)
+
+    # =========================================================================
+    # Price history
+    # =========================================================================
+
+    def _load_bars(self, code: str, days: int, adjust: str) -> Optional[List[Dict]]:
+        start_date, end_date = _window(days)
+        for source in (_bars_from_tushare, _bars_from_akshare):
+            try:
+                df = source(code, start_date, end_date, adjust)
+            except Exception as e:
+                print(f"[StockDetail] {source.__name__} failed for {code}: {e}")
+                continue
+            if df is not None and not df.empty:
+                df = df.tail(days)
+                return df.astype(object).where(pd.notna(df), None).to_dict('records')
+        return None
+
+    def get_daily_bars(self, code: str, days: int = DETAIL_HISTORY_DAYS, adjust: str = 'qfq') -> List[Dict]:
+        """
+        Most recent daily bars for a stock.
+
+        Args:
+            code: 6-digit stock code
+            days: Number of trading days
+            adjust: 'qfq' (forward-adjusted, for charts) or '' (unadjusted)
+
+        Returns:
+            List of bars (AkShare stock_zh_a_hist columns), oldest first
+        """
+        today = datetime.now().strftime('%Y%m%d')
+        return self._cache.get_or_load(
+            f"bars:{code}:{days}:{adjust or 'raw'}:{today}", lambda: self._load_bars(code, days, adjust), ttl=HISTORY_TTL
+        ) or []
+
+    def get_history(self, code: str, days: int = 100, adjust: str = '') -> List[Dict]:
+        """
+        Closing price history in the chart shape.
+
+        Args:
+            adjust: '' (unadjusted, default: valuation and P&L use traded prices) or 'qfq'
+
+        Returns:
+            List of {date (YYYYMMDD), value, volume}, oldest first
+        """
+        return [
+            {'date': bar['日期'].replace('-', ''), 'value': _num(bar['收盘']), 'volume': _num(bar['成交量'])}
+            for bar in self.get_daily_bars(code, days, adjust) if _num(bar['收盘']) is not None
+        ]
+
+    # =========================================================================
+    # Quote and financials
+    # =========================================================================
+
+    def get_quote(self, code: str) -> Optional[Dict]:
+        """Cached quote with valuation fields (pe, pb, total_mv in 亿元), or None."""
+        from src.services.quote_store import quote_store
+
+        rows = quote_store.get_watchlist([code])
+        return rows[0] if rows else None
+
+    def get_financial_indicators(self, code: str) -> Dict:
+        """Latest financial analysis indicators (AkShare), cached for FINANCIAL_TTL."""
+        def load():
+            import akshare as ak
+            start_year = str(datetime.now().year - FINANCIAL_YEARS)
+            df = ak.stock_financial_analysis_indicator(symbol=code, start_year=start_year)
+            if df is None or df.empty:
+                return None
+            row = df.iloc[0]
+            return row.astype(object).where(pd.notna(row), None).to_dict()
+
+        try:
+            return self._cache.get_or_load(f"financial:{code}", load, ttl=FINANCIAL_TTL) or {}
+        except Exception as e:
+            print(f"[StockDetail] Financial indicators failed for {code}: {e}")
+            return {}
+
+    def get_detail(self, code: str, history_days: int = DETAIL_HISTORY_DAYS) -> Optional[Dict]:
+        """
+        Quote, recent daily bars and financial indicators for the detail page.
+
+        Returns:
+            Detail dict, or None when the stock cannot be quoted
+        """
+        quote = self.get_quote(code)
+        if not quote:
+            return None
+        total_mv = quote.get('total_mv')
+        return {
+            "code": code,
+            "name": quote.get('name'),
+            "price": quote.get('price'),
+            "change_pct": quote.get('change_pct'),
+            "volume": quote['volume'] / 100 if quote.get('volume') is not None else None,  # 股 -> 手
+            "turnover": quote.get('amount'),
+            "pe": quote.get('pe'),
+            "pb": quote.get('pb'),
+            "market_cap": total_mv * 1e8 if total_mv is not None else None,  # 亿元 -> 元
+            "history": self.get_daily_bars(code, history_days),
+            "financial": self.get_financial_indicators(code),
+        }
+
+
+# Global instance
+stock_detail_service = StockDetailService()
@@ -0,0 +1,205 @@
+"""
+Stock Mention Matcher - Link free text (news) to the stocks it mentions.
+
+Builds one Aho-Corasick automaton over every code, name and alias in
+``stock_basic`` so a news item is tagged with all related stocks in a single
+linear pass over its text, instead of substring-checking each watchlist code.
+
+The automaton is rebuilt only when ``stock_basic`` changes (row count or last
+update time), checked at most once per ``REFRESH_CHECK_INTERVAL``.
+
+Usage:
+    from src.services.stock_matcher import stock_matcher
+
+    stock_matcher.tag("贵州茅台(600519)发布年报")
+    # -> [{'code': '600519', 'name': '贵州茅台'}]
+"""
+import re
+import time
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.storage.db import get_all_stock_basic, get_stock_basic_count, get_stock_basic_last_updated
+
+
+# Names shorter than this are too ambiguous to match in free text (e.g. "万科" inside other words)
+MIN_NAME_LENGTH = 3
+
+_ST_PREFIX = re.compile(r'^\*?ST')
+_CLASS_SUFFIX = re.compile(r'(-[UWD]+|[AB])$')
+
+
+class _Automaton:
+    """Minimal Aho-Corasick automaton over str patterns."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]  # (pattern length, stock code)
+
+    def add(self, pattern: str, code: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if (len(pattern), code) not in self._out[node]:
+            self._out[node].append((len(pattern), code))
+
+    def build(self) -> None:
+        """Compute failure links (BFS) and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child].extend(self._out[self._fail[child]])
+
+    def iter(self, text: str):
+        """Yield (end_index, pattern_length, code) for every match."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, code in out[node]:
+                yield i, length, code
+
+    @property
+    def size(self) -> int:
+        return len(self._goto)
+
+
+class StockMentionMatcher:
+    """Tags text with the stocks it mentions by code, name or alias."""
+
+    REFRESH_CHECK_INTERVAL = 300  # seconds
+
+    def __init__(self, stocks: Optional[Iterable[Dict]] = None):
+        """
+        Args:
+            stocks: Fixed stock list (dicts with 'code'/'symbol' and 'name').
+                If omitted, patterns come from stock_basic and are kept in sync.
+        """
+        self._lock = threading.Lock()
+        self._automaton: Optional[_Automaton] = None
+        self._names: Dict[str, str] = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._static = stocks is not None
+        if self._static:
+            self._build(stocks)
+
+    # =========================================================================
+    # Build
+    # =========================================================================
+
+    @staticmethod
+    def _aliases(name: str) -> List[str]:
+        """Name variants used in headlines: without ST marks or share-class suffixes."""
+        variants = {name}
+        base = _ST_PREFIX.sub('', name)
+        variants.add(base)
+        variants.add(_CLASS_SUFFIX.sub('', base))
+        return [v for v in variants if len(v) >= MIN_NAME_LENGTH]
+
+    def _build(self, stocks: Iterable[Dict]) -> None:
+        automaton = _Automaton()
+        names = {}
+        for stock in stocks:
+            code = stock.get('symbol') or stock.get('code')
+            if not code:
+                continue
+            name = (stock.get('name') or '').strip()
+            names[code] = name
+            automaton.add(code, code)
+            for alias in self._aliases(name):
+                automaton.add(alias, code)
+        automaton.build()
+        self._automaton, self._names = automaton, names
+
+    def _ensure_current(self) -> None:
+        """Rebuild from stock_basic when it has changed."""
+        if self._static:
+            return
+        now = time.time()
+        if self._automaton is not None and now - self._checked_at < self.REFRESH_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._automaton is not None and now - self._checked_at < self.REFRESH_CHECK_INTERVAL:
+                return
+            self._checked_at = now
+            version = (get_stock_basic_count(), get_stock_basic_last_updated())
+            if version == self._version and self._automaton is not None:
+                return
+            start = time.time()
+            self._build(get_all_stock_basic())
+            self._version = version
+            print(f"[StockMatcher] Built automaton for {len(self._names)} stocks "
+                  f"({self._automaton.size} states) in {time.time() - start:.2f}s")
+
+    # =========================================================================
+    # Matching
+    # =========================================================================
+
+    @property
+    def is_empty(self) -> bool:
+        self._ensure_current()
+        return not self._names
+
+    @property
+    def version(self):
+        """Changes whenever the automaton is rebuilt (usable in cache keys)."""
+        self._ensure_current()
+        return self._version
+
+    def match_codes(self, text: str) -> List[str]:
+        """Codes of all stocks mentioned in text, in order of first mention."""
+        if not text:
+            return []
+        self._ensure_current()
+        automaton = self._automaton
+        if automaton is None:
+            return []
+
+        found = {}
+        for end, length, code in automaton.iter(text):
+            if code in found:
+                continue
+            start = end - length + 1
+            # Codes must stand alone, not be part of a longer number
+            if text[start:end + 1].isdigit() and (
+                (start > 0 and text[start - 1].isdigit()) or
+                (end + 1 < len(text) and text[end + 1].isdigit())
+            ):
+                continue
+            found[code] = start
+        return sorted(found, key=found.get)
+
+    def tag(self, *texts: str) -> List[Dict]:
+        """
+        Related stocks for a news item.
+
+        Args:
+            texts: Fields to scan (e.g. title, content)
+
+        Returns:
+            List of {'code', 'name'} dicts, in order of first mention
+        """
+        codes = self.match_codes('\n'.join(t for t in texts if t))
+        return [{'code': code, 'name': self._names.get(code, '')} for code in codes]
+
+
+# Global instance
+stock_matcher = StockMentionMatcher()
@@ -6,6 +6,12 @@ import threading
 from typing import List, Dict, Optional
 from datetime import datetime
 
+try:
+    from pypinyin import lazy_pinyin, Style as PinyinStyle
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
 # Define paths relative to this file
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Allow overriding via environment variable for Docker volumes
@@ -52,6 +58,83 @@ def execute_with_retry(operation, max_retries=5, base_delay=0.5):
                     pass
     raise last_error
 
+
+# --- Full-Text Search Indexes ---
+
+# External-content FTS5 tables over the basic-info caches: fts table -> (source table, indexed columns)
+SEARCH_INDEXES = {
+    'stock_basic_fts': ('stock_basic', ['symbol', 'name', 'industry']),
+    'fund_basic_fts': ('fund_basic', ['code', 'name', 'pinyin', 'pinyin_initials', 'fund_type', 'management']),
+}
+
+# The trigram tokenizer can only match substrings of at least 3 characters
+FTS_MIN_QUERY_LENGTH = 3
+
+_fts_ready: Dict[str, bool] = {}
+
+
+def _init_search_indexes(c):
+    """Create FTS5 trigram indexes and the triggers that keep them in sync."""
+    existing = {row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    for fts, (table, cols) in SEARCH_INDEXES.items():
+        if fts in existing:
+            continue
+        col_list = ', '.join(cols)
+        new_values = ', '.join(f'new.{col}' for col in cols)
+        old_values = ', '.join(f'old.{col}' for col in cols)
+        try:
+            c.execute(f'''
+                CREATE VIRTUAL TABLE {fts} USING fts5(
+                    {col_list}, content='{table}', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 trigram unavailable, search falls back to LIKE: {e}")
+            return
+
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        # Index rows that existed before the FTS table
+        c.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    # News items are indexed as they are cached (the cache itself stores JSON blobs)
+    if 'news_fts' not in existing:
+        c.execute('''
+            CREATE VIRTUAL TABLE news_fts USING fts5(
+                news_hash UNINDEXED, title, content, source_name UNINDEXED, category UNINDEXED,
+                published_at UNINDEXED, url UNINDEXED, indexed_at UNINDEXED, tokenize='trigram'
+            )
+        ''')
+
+
+def _has_search_index(conn, fts: str) -> bool:
+    """Whether an FTS index exists (cached per process)."""
+    if fts not in _fts_ready:
+        row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone()
+        _fts_ready[fts] = row is not None
+    return _fts_ready[fts]
+
+
+def _fts_phrase(query: str) -> str:
+    """Quote user input as a single FTS5 phrase (substring match under trigram)."""
+    return '"' + query.replace('"', '""') + '"'
+
+
 def init_db():
     conn = get_db_connection()
     c = conn.cursor()
@@ -152,6 +235,136 @@ def init_db():
         )
     ''')
 
+    # 26. Create Asset Daily Prices Table (adjusted close panel for evaluation/backtests)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS asset_daily_prices (
+            asset_type TEXT NOT NULL,
+            code TEXT NOT NULL,
+            trade_date TEXT NOT NULL,
+            close REAL,
+            PRIMARY KEY (asset_type, code, trade_date)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_asset_prices_date ON asset_daily_prices(asset_type, trade_date)')
+
+    # 27. Create Jobs Table (durable background job queue)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            job_type TEXT NOT NULL,
+            user_id INTEGER,
+            params_json TEXT,
+            dedup_key TEXT,
+            priority INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'queued',
+            progress REAL DEFAULT 0,
+            progress_message TEXT,
+            result_json TEXT,
+            error TEXT,
+            attempts INTEGER DEFAULT 0,
+            cancel_requested INTEGER DEFAULT 0,
+            worker_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            heartbeat_at REAL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(status, priority DESC, created_at)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs(user_id, created_at DESC)')
+    # At most one queued/running job per dedup key
+    c.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedup_active ON jobs(dedup_key)
+        WHERE status IN ('queued', 'running')
+    ''')
+
+    # 29. Create News Articles Table (normalized store filled by the news ingestor)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS news_articles (
+            news_hash TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            content TEXT,
+            source TEXT,
+            source_name TEXT,
+            category TEXT,
+            published_at TEXT,
+            published_ts REAL,
+            url TEXT,
+            importance TEXT,
+            related_stocks TEXT,
+            ingested_at REAL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_news_articles_time ON news_articles(published_ts DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_news_articles_category ON news_articles(category, published_ts DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_news_articles_source ON news_articles(source, published_ts DESC)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS news_article_stocks (
+            code TEXT NOT NULL,
+            news_hash TEXT NOT NULL,
+            published_ts REAL,
+            PRIMARY KEY (code, news_hash)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_news_article_stocks_time ON news_article_stocks(code, published_ts DESC)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS news_ingest_cursors (
+            source TEXT PRIMARY KEY,
+            last_published_ts REAL,
+            last_run_at REAL,
+            last_count INTEGER DEFAULT 0,
+            last_error TEXT
+        )
+    ''')
+
+    # 30. Create Fund Rankings Table (snapshot of 东方财富 open-fund rankings, all categories)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS fund_rankings (
+            category TEXT NOT NULL,
+            code TEXT NOT NULL,
+            name TEXT,
+            nav_date TEXT,
+            nav REAL,
+            acc_nav REAL,
+            daily_growth REAL,
+            return_1w REAL,
+            return_1m REAL,
+            return_3m REAL,
+            return_6m REAL,
+            return_1y REAL,
+            return_2y REAL,
+            return_3y REAL,
+            return_ytd REAL,
+            return_since_inception REAL,
+            fee TEXT,
+            updated_at REAL,
+            PRIMARY KEY (category, code)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_fund_rankings_code ON fund_rankings(code)')
+
+    # 31. Create Fund Holdings Table (stock holdings per fund and report quarter)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS fund_holdings (
+            fund_code TEXT NOT NULL,
+            quarter TEXT NOT NULL,
+            stock_code TEXT NOT NULL,
+            stock_name TEXT,
+            weight REAL,
+            shares REAL,
+            market_value REAL,
+            PRIMARY KEY (fund_code, quarter, stock_code)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_fund_holdings_stock ON fund_holdings(stock_code)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS fund_holdings_sync (
+            fund_code TEXT PRIMARY KEY,
+            latest_quarter TEXT,
+            checked_at REAL
+        )
+    ''')
+
     # 8. Create Dashboard Layouts Table
     c.execute('''
         CREATE TABLE IF NOT EXISTS dashboard_layouts (
@@ -562,6 +775,16 @@ def init_db():
     c.execute('CREATE INDEX IF NOT EXISTS idx_fund_basic_market ON fund_basic(market)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_fund_basic_status ON fund_basic(status)')
 
+    # 25. Create Scheduler Leases Table (leader election across API workers)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
     # 3. Migration: Add user_id to funds if not exists
     try:
         c.execute('ALTER TABLE funds ADD COLUMN user_id INTEGER REFERENCES users(id)')
@@ -575,6 +798,22 @@ def init_db():
         except sqlite3.OperationalError:
             pass
 
+    # Migration: Count background sentiment attempts per article
+    try:
+        c.execute('ALTER TABLE news_articles ADD COLUMN analysis_attempts INTEGER DEFAULT 0')
+    except sqlite3.OperationalError:
+        pass
+
+    # Migration: Add pinyin search columns to fund_basic if not exists
+    for col in ('pinyin', 'pinyin_initials'):
+        try:
+            c.execute(f'ALTER TABLE fund_basic ADD COLUMN {col} TEXT')
+        except sqlite3.OperationalError:
+            pass
+
+    # 28. Create Full-Text Search Indexes (FTS5 trigram, requires SQLite >= 3.34)
+    _init_search_indexes(c)
+
     conn.commit()
     conn.close()
 
@@ -682,6 +921,15 @@ def get_active_funds(user_id: int = None) -> List[Dict]:
     conn.close()
     return [_parse_focus(f) for f in funds]
 
+def get_active_funds_by_code(code: str) -> List[Dict]:
+    """Get every user's active entry for a fund code."""
+    conn = get_db_connection()
+    funds = conn.execute(
+        'SELECT * FROM funds WHERE code = ? AND is_active = 1', (code,)
+    ).fetchall()
+    conn.close()
+    return [_parse_focus(f) for f in funds]
+
 def get_fund_by_code(code: str, user_id: int = None) -> Optional[Dict]:
     # Note: Code might not be unique globally anymore if different users can watch same fund?
     # For now, let's assume users can have same funds. So we MUST filter by user_id if provided.
@@ -1313,6 +1561,41 @@ def get_news_status(user_id: int, news_hash: str) -> Optional[Dict]:
     return dict(row) if row else None
 
 
+def get_news_statuses(user_id: int, news_hashes: List[str]) -> Dict[str, Dict]:
+    """
+    Get read/bookmark status for many news items in one query.
+
+    Args:
+        user_id: User ID
+        news_hashes: News item hashes (e.g. one feed page)
+
+    Returns:
+        Dict mapping news_hash -> {'is_read': bool, 'is_bookmarked': bool};
+        items the user never touched are absent
+    """
+    if not news_hashes:
+        return {}
+
+    conn = get_db_connection()
+    result = {}
+    # Stay under SQLite's bound-parameter limit
+    for i in range(0, len(news_hashes), 500):
+        chunk = news_hashes[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f'''SELECT news_hash, is_read, is_bookmarked FROM user_news_status
+                WHERE user_id = ? AND news_hash IN ({placeholders})''',
+            (user_id, *chunk)
+        ).fetchall()
+        for row in rows:
+            result[row['news_hash']] = {
+                'is_read': bool(row['is_read']),
+                'is_bookmarked': bool(row['is_bookmarked']),
+            }
+    conn.close()
+    return result
+
+
 def get_user_bookmarked_news(user_id: int, limit: int = 50, offset: int = 0) -> List[Dict]:
     """Get all bookmarked news for a user."""
     conn = get_db_connection()
@@ -1463,10 +1746,120 @@ def set_news_cache(cache_key: str, data: any, source: str, ttl_seconds: int = 60
         VALUES (?, ?, ?, datetime('now', '+' || ? || ' seconds'))
     ''', (cache_key, cache_data, source, ttl_seconds))
 
+    if isinstance(data, list):
+        _index_news_items(conn, data)
+
     conn.commit()
     conn.close()
 
 
+# Most recent news items kept in the search index
+NEWS_INDEX_MAX_ROWS = 20000
+
+
+def index_news_items(items: List[Dict]):
+    """Add news items to the search index (for feeds not stored via set_news_cache)."""
+    if not items:
+        return
+
+    def operation(conn):
+        _index_news_items(conn, items)
+
+    execute_with_retry(operation)
+
+
+def _index_news_items(conn, items: List[Dict]):
+    """Add news items (dicts with id/title/content) to the news search index."""
+    items = [item for item in items if isinstance(item, dict) and item.get('id') and item.get('title')]
+    if not items or not _has_search_index(conn, 'news_fts'):
+        return
+
+    conn.executemany('DELETE FROM news_fts WHERE news_hash = ?', [(item['id'],) for item in items])
+    conn.executemany('''
+        INSERT INTO news_fts (news_hash, title, content, source_name, category, published_at, url, indexed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (
+            item['id'],
+            item.get('title', ''),
+            item.get('content', ''),
+            item.get('source_name', ''),
+            item.get('category', ''),
+            str(item.get('published_at', '') or ''),
+            item.get('url', ''),
+            time.time(),
+        )
+        for item in items
+    ])
+    # Rowids only grow, so trimming the oldest entries is a rowid range delete
+    conn.execute(
+        'DELETE FROM news_fts WHERE rowid <= (SELECT MAX(rowid) FROM news_fts) - ?',
+        (NEWS_INDEX_MAX_ROWS,)
+    )
+
+
+def search_news_index(query: str, category: str = None, limit: int = 50) -> List[Dict]:
+    """
+    Search cached news titles and content.
+
+    Args:
+        query: Substring to find (at least 3 characters for the trigram index)
+        category: Optional news category filter
+        limit: Maximum number of results
+
+    Returns:
+        List of news dicts (id, title, content, source_name, category, published_at, url),
+        best matches first
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+
+    conn = get_db_connection()
+    if not _has_search_index(conn, 'news_fts'):
+        conn.close()
+        return []
+
+    conditions = []
+    params = []
+    if len(query) >= FTS_MIN_QUERY_LENGTH:
+        conditions.append('news_fts MATCH ?')
+        params.append(_fts_phrase(query))
+        # Title hits outrank content hits, then newest first
+        order = 'bm25(news_fts, 0, 10.0, 1.0), rowid DESC'
+    else:
+        # Short queries: LIKE scan over the index
+        conditions.append('(title LIKE ? OR content LIKE ?)')
+        params.extend([f'%{query}%', f'%{query}%'])
+        order = 'rowid DESC'
+    if category:
+        conditions.append('category = ?')
+        params.append(category)
+    params.append(limit)
+
+    rows = conn.execute(f'''
+        SELECT news_hash, title, content, source_name, category, published_at, url
+        FROM news_fts
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {order}
+        LIMIT ?
+    ''', params).fetchall()
+    conn.close()
+
+    return [
+        {
+            'id': row['news_hash'],
+            'title': row['title'],
+            'content': row['content'],
+            'source_name': row['source_name'],
+            'category': row['category'],
+            'published_at': row['published_at'],
+            'url': row['url'],
+        }
+        for row in rows
+    ]
+
+
 def clear_expired_news_cache():
     """Remove expired cache entries."""
     conn = get_db_connection()
@@ -1475,6 +1868,178 @@ def clear_expired_news_cache():
     conn.close()
 
 
+# --- News Article Store Operations (filled by the news ingestor) ---
+
+def upsert_news_articles(articles: List[Dict]) -> int:
+    """
+    Insert or refresh normalized news articles, deduplicated by hash.
+
+    Args:
+        articles: Dicts with id (news hash), title, content, source, source_name,
+            category, published_at, published_ts, url, importance, related_stocks
+
+    Returns:
+        Number of articles not seen before
+    """
+    if not articles:
+        return 0
+
+    now = time.time()
+
+    def operation(conn):
+        hashes = [a['id'] for a in articles]
+        existing = set()
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            existing.update(
+                row[0] for row in conn.execute(
+                    f'SELECT news_hash FROM news_articles WHERE news_hash IN ({placeholders})', chunk
+                )
+            )
+
+        conn.executemany('''
+            INSERT INTO news_articles
+            (news_hash, title, content, source, source_name, category, published_at,
+             published_ts, url, importance, related_stocks, ingested_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(news_hash) DO UPDATE SET
+                content = excluded.content,
+                importance = COALESCE(excluded.importance, news_articles.importance),
+                related_stocks = excluded.related_stocks
+        ''', [
+            (
+                a['id'], a.get('title', ''), a.get('content', ''), a.get('source'), a.get('source_name'),
+                a.get('category'), a.get('published_at'), a.get('published_ts'), a.get('url', ''),
+                a.get('importance'), json.dumps(a.get('related_stocks') or [], ensure_ascii=False), now,
+            )
+            for a in articles
+        ])
+        conn.executemany(
+            'INSERT OR IGNORE INTO news_article_stocks (code, news_hash, published_ts) VALUES (?, ?, ?)',
+            [
+                (stock['code'], a['id'], a.get('published_ts'))
+                for a in articles for stock in (a.get('related_stocks') or []) if stock.get('code')
+            ]
+        )
+        _index_news_items(conn, [a for a in articles if a['id'] not in existing])
+        return len(set(hashes) - existing)
+
+    return execute_with_retry(operation)
+
+
+def _news_article_row_to_dict(row) -> Dict:
+    d = dict(row)
+    item = {
+        'id': d['news_hash'],
+        'title': d['title'],
+        'content': d['content'] or '',
+        'source': d['source'],
+        'source_name': d['source_name'],
+        'category': d['category'],
+        'published_at': d['published_at'] or '',
+        'url': d['url'] or '',
+        'related_stocks': json.loads(d['related_stocks']) if d.get('related_stocks') else [],
+    }
+    if d.get('importance'):
+        item['importance'] = d['importance']
+    return item
+
+
+def query_news_articles(category: str = None, source: str = None, codes: List[str] = None,
+                        since_ts: float = None, limit: int = 50, offset: int = 0) -> List[Dict]:
+    """
+    Read articles from the local news store, newest first.
+
+    Args:
+        category: Filter by category (e.g. 'hot', 'realtime', 'flash')
+        source: Filter by ingest source
+        codes: Only articles mentioning any of these stock codes
+        since_ts: Only articles published at or after this unix timestamp
+        limit: Maximum number of results
+        offset: Rows to skip
+
+    Returns:
+        List of news dicts in the shape the news feeds return
+    """
+    conditions = []
+    params: list = []
+
+    if codes:
+        placeholders = ','.join('?' * len(codes))
+        # Time-ordered per-stock index, then join the articles
+        from_clause = f'''news_articles a
+            JOIN (SELECT DISTINCT news_hash FROM news_article_stocks WHERE code IN ({placeholders})) s
+              ON s.news_hash = a.news_hash'''
+        params.extend(codes)
+    else:
+        from_clause = 'news_articles a'
+    if category:
+        conditions.append('a.category = ?')
+        params.append(category)
+    if source:
+        conditions.append('a.source = ?')
+        params.append(source)
+    if since_ts is not None:
+        conditions.append('a.published_ts >= ?')
+        params.append(since_ts)
+    params.extend([limit, offset])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    conn = get_db_connection()
+    rows = conn.execute(f'''
+        SELECT a.* FROM {from_clause}
+        {where}
+        ORDER BY a.published_ts DESC
+        LIMIT ? OFFSET ?
+    ''', params).fetchall()
+    conn.close()
+    return [_news_article_row_to_dict(row) for row in rows]
+
+
+def delete_old_news_articles(days_to_keep: int = 7) -> int:
+    """Delete articles published (or ingested, if undated) more than N days ago."""
+    cutoff = time.time() - days_to_keep * 86400
+
+    def operation(conn):
+        conn.execute('''
+            DELETE FROM news_article_stocks WHERE news_hash IN (
+                SELECT news_hash FROM news_articles WHERE COALESCE(published_ts, ingested_at) < ?
+            )
+        ''', (cutoff,))
+        return conn.execute(
+            'DELETE FROM news_articles WHERE COALESCE(published_ts, ingested_at) < ?', (cutoff,)
+        ).rowcount
+
+    return execute_with_retry(operation)
+
+
+def get_news_ingest_cursors() -> Dict[str, Dict]:
+    """Get all ingest cursors keyed by source."""
+    conn = get_db_connection()
+    rows = conn.execute('SELECT * FROM news_ingest_cursors').fetchall()
+    conn.close()
+    return {row['source']: dict(row) for row in rows}
+
+
+def update_news_ingest_cursor(source: str, last_published_ts: float = None,
+                              count: int = 0, error: str = None):
+    """Record an ingest run; the cursor only moves forward."""
+    def operation(conn):
+        conn.execute('''
+            INSERT INTO news_ingest_cursors (source, last_published_ts, last_run_at, last_count, last_error)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                last_published_ts = MAX(COALESCE(news_ingest_cursors.last_published_ts, 0),
+                                        COALESCE(excluded.last_published_ts, 0)),
+                last_run_at = excluded.last_run_at,
+                last_count = excluded.last_count,
+                last_error = excluded.last_error
+        ''', (source, last_published_ts, time.time(), count, error))
+
+    execute_with_retry(operation)
+
+
 # --- News Analysis Cache Operations ---
 
 def get_news_analysis(news_hash: str) -> Optional[Dict]:
@@ -1523,6 +2088,79 @@ def save_news_analysis(news_hash: str, sentiment: str, sentiment_score: float,
     conn.close()
 
 
+def save_news_analysis_batch(analyses: List[Dict]) -> int:
+    """
+    Save AI analysis results for many news items in one transaction.
+
+    Args:
+        analyses: Dicts with news_hash, sentiment, sentiment_score, summary,
+            key_points, related_stocks
+
+    Returns:
+        Number of rows written
+    """
+    if not analyses:
+        return 0
+
+    def operation(conn):
+        conn.executemany('''
+            INSERT OR REPLACE INTO news_analysis_cache
+            (news_hash, sentiment, sentiment_score, summary, key_points, related_stocks, analyzed_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', [
+            (
+                a['news_hash'],
+                a.get('sentiment'),
+                a.get('sentiment_score'),
+                a.get('summary'),
+                json.dumps(a['key_points'], ensure_ascii=False) if a.get('key_points') else None,
+                json.dumps(a['related_stocks'], ensure_ascii=False) if a.get('related_stocks') else None,
+            )
+            for a in analyses
+        ])
+        return len(analyses)
+
+    return execute_with_retry(operation)
+
+
+def get_unanalyzed_news_articles(limit: int = 100, since_ts: float = None,
+                                 max_attempts: int = None) -> List[Dict]:
+    """
+    Newest stored articles that have no AI analysis yet.
+
+    Args:
+        limit: Max articles
+        since_ts: Only articles published (or ingested) at or after this time
+        max_attempts: Skip articles already attempted this many times
+    """
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT a.* FROM news_articles a
+        LEFT JOIN news_analysis_cache n ON n.news_hash = a.news_hash
+        WHERE n.news_hash IS NULL AND COALESCE(a.published_ts, a.ingested_at) >= ?
+          AND COALESCE(a.analysis_attempts, 0) < ?
+        ORDER BY a.published_ts DESC
+        LIMIT ?
+    ''', (since_ts or 0, max_attempts if max_attempts is not None else 2 ** 31, limit)).fetchall()
+    conn.close()
+    return [_news_article_row_to_dict(row) for row in rows]
+
+
+def record_news_analysis_attempts(news_hashes: List[str]) -> int:
+    """Count one more unsuccessful analysis attempt for each article."""
+    if not news_hashes:
+        return 0
+
+    def operation(conn):
+        conn.executemany(
+            'UPDATE news_articles SET analysis_attempts = COALESCE(analysis_attempts, 0) + 1 WHERE news_hash = ?',
+            [(news_hash,) for news_hash in news_hashes]
+        )
+        return len(news_hashes)
+
+    return execute_with_retry(operation)
+
+
 def get_multiple_news_analysis(news_hashes: List[str]) -> Dict[str, Dict]:
     """Get cached AI analysis for multiple news items."""
     if not news_hashes:
@@ -1576,10 +2214,16 @@ def upsert_stock_basic_batch(stocks: List[Dict]) -> int:
     count = 0
     for stock in stocks:
         try:
+            # Upsert in place (keeps rowid stable so the FTS triggers see an UPDATE)
             c.execute('''
-                INSERT OR REPLACE INTO stock_basic
+                INSERT INTO stock_basic
                 (ts_code, symbol, name, area, industry, market, list_date, list_status, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(ts_code) DO UPDATE SET
+                    symbol = excluded.symbol, name = excluded.name, area = excluded.area,
+                    industry = excluded.industry, market = excluded.market,
+                    list_date = excluded.list_date, list_status = excluded.list_status,
+                    updated_at = CURRENT_TIMESTAMP
             ''', (
                 stock.get('ts_code'),
                 stock.get('symbol'),
@@ -1602,16 +2246,20 @@ def upsert_stock_basic_batch(stocks: List[Dict]) -> int:
 
 def search_stock_basic(query: str, limit: int = 50) -> List[Dict]:
     """
-    Search stocks by code prefix or name (fuzzy match).
+    Search stocks by code, name or industry.
+
+    Uses the FTS5 trigram index when available; matches are ranked exact
+    code, code prefix, name prefix, then relevance.
 
     Args:
-        query: Search query (code prefix or name substring)
+        query: Search query (code prefix or name/industry substring)
         limit: Maximum number of results
 
     Returns:
         List of matching stocks with fields: code, name, industry, market, area, list_date
     """
     conn = get_db_connection()
+    query = (query or '').strip()
 
     if not query:
         # Return first N stocks if no query
@@ -1619,16 +2267,32 @@ def search_stock_basic(query: str, limit: int = 50) -> List[Dict]:
             'SELECT symbol, name, industry, market, area, list_date FROM stock_basic WHERE list_status = ? ORDER BY symbol LIMIT ?',
             ('L', limit)
         ).fetchall()
+    elif len(query) >= FTS_MIN_QUERY_LENGTH and _has_search_index(conn, 'stock_basic_fts'):
+        rows = conn.execute('''
+            SELECT s.symbol, s.name, s.industry, s.market, s.area, s.list_date
+            FROM stock_basic_fts f
+            JOIN stock_basic s ON s.id = f.rowid
+            WHERE stock_basic_fts MATCH ? AND s.list_status = 'L'
+            ORDER BY
+              CASE WHEN s.symbol = ? THEN 0
+                   WHEN s.symbol LIKE ? THEN 1
+                   WHEN s.name LIKE ? THEN 2
+                   ELSE 3 END,
+              CASE WHEN s.symbol LIKE ? THEN s.symbol END,
+              bm25(stock_basic_fts),
+              s.symbol
+            LIMIT ?
+        ''', (_fts_phrase(query), query, f'{query}%', f'{query}%', f'{query}%', limit)).fetchall()
     else:
+        # 1-2 character queries are below the trigram length
         query_lower = query.lower()
-        # Search by code prefix OR name contains
         rows = conn.execute('''
             SELECT symbol, name, industry, market, area, list_date
             FROM stock_basic
             WHERE list_status = 'L'
               AND (symbol LIKE ? OR LOWER(name) LIKE ? OR LOWER(industry) LIKE ?)
             ORDER BY
-              CASE WHEN symbol LIKE ? THEN 0 ELSE 1 END,
+              CASE WHEN symbol LIKE ? THEN 0 WHEN name LIKE ? THEN 1 ELSE 2 END,
               symbol
             LIMIT ?
         ''', (
@@ -1636,6 +2300,7 @@ def search_stock_basic(query: str, limit: int = 50) -> List[Dict]:
             f'%{query_lower}%',    # name contains
             f'%{query_lower}%',    # industry contains
             f'{query}%',           # prefer code prefix matches
+            f'{query}%',           # then name prefix matches
             limit
         )).fetchall()
 
@@ -1686,6 +2351,15 @@ def get_stock_basic_last_updated() -> Optional[str]:
 
 # --- Fund Basic Operations (TuShare fund_basic cache - 全市场基金列表) ---
 
+def _name_pinyin(name: str) -> tuple:
+    """Full pinyin and initials for a fund name (e.g. '华夏成长' -> ('huaxiachengzhang', 'hxcz'))."""
+    if not name or not PYPINYIN_AVAILABLE:
+        return None, None
+    syllables = lazy_pinyin(name, errors='default')
+    initials = lazy_pinyin(name, style=PinyinStyle.FIRST_LETTER, errors='default')
+    return ''.join(syllables).lower(), ''.join(initials).lower()
+
+
 def upsert_fund_basic_batch(funds: List[Dict]) -> int:
     """
     Batch insert/update fund basic info.
@@ -1712,16 +2386,29 @@ def upsert_fund_basic_batch(funds: List[Dict]) -> int:
             # Extract pure code from ts_code (e.g., '000001.OF' -> '000001')
             code = ts_code.split('.')[0] if ts_code else ''
 
+            name = fund.get('name', '')
+            pinyin, pinyin_initials = _name_pinyin(name)
+
+            # Upsert in place (keeps rowid stable so the FTS triggers see an UPDATE)
             c.execute('''
-                INSERT OR REPLACE INTO fund_basic
+                INSERT INTO fund_basic
                 (ts_code, code, name, fund_type, invest_type, market, management,
                  custodian, found_date, list_date, delist_date, m_fee, c_fee,
-                 status, benchmark, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                 status, benchmark, pinyin, pinyin_initials, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(ts_code) DO UPDATE SET
+                    code = excluded.code, name = excluded.name, fund_type = excluded.fund_type,
+                    invest_type = excluded.invest_type, market = excluded.market,
+                    management = excluded.management, custodian = excluded.custodian,
+                    found_date = excluded.found_date, list_date = excluded.list_date,
+                    delist_date = excluded.delist_date, m_fee = excluded.m_fee, c_fee = excluded.c_fee,
+                    status = excluded.status, benchmark = excluded.benchmark,
+                    pinyin = excluded.pinyin, pinyin_initials = excluded.pinyin_initials,
+                    updated_at = CURRENT_TIMESTAMP
             ''', (
                 ts_code,
                 code,
-                fund.get('name', ''),
+                name,
                 fund.get('fund_type'),
                 fund.get('invest_type'),
                 fund.get('market'),
@@ -1734,6 +2421,8 @@ def upsert_fund_basic_batch(funds: List[Dict]) -> int:
                 fund.get('c_fee'),
                 fund.get('status', 'L'),
                 fund.get('benchmark'),
+                pinyin,
+                pinyin_initials,
             ))
             count += 1
         except Exception as e:
@@ -1747,10 +2436,13 @@ def upsert_fund_basic_batch(funds: List[Dict]) -> int:
 
 def search_fund_basic(query: str, market: str = None, limit: int = 50) -> List[Dict]:
     """
-    Search funds by code prefix or name (fuzzy match).
+    Search funds by code, name, pinyin, type or manager.
+
+    Uses the FTS5 trigram index when available; matches are ranked exact
+    code, code prefix, name/initials prefix, then relevance.
 
     Args:
-        query: Search query (code prefix or name substring)
+        query: Search query (code prefix, name substring or pinyin)
         market: Filter by market ('E'=场内, 'O'=场外), None for all
         limit: Maximum number of results
 
@@ -1758,29 +2450,52 @@ def search_fund_basic(query: str, market: str = None, limit: int = 50) -> List[D
         List of matching funds
     """
     conn = get_db_connection()
+    query = (query or '').strip()
+    query_lower = query.lower()
 
-    base_conditions = ["status = 'L'"]
+    columns = '''f.ts_code, f.code, f.name, f.fund_type, f.invest_type, f.market,
+               f.management, f.custodian, f.found_date, f.m_fee, f.c_fee, f.status'''
+    conditions = ["f.status = 'L'"]
     params = []
 
     if market:
-        base_conditions.append("market = ?")
+        conditions.append("f.market = ?")
         params.append(market)
 
-    if query:
-        query_lower = query.lower()
-        base_conditions.append("(code LIKE ? OR LOWER(name) LIKE ? OR LOWER(fund_type) LIKE ?)")
-        params.extend([f'{query}%', f'%{query_lower}%', f'%{query_lower}%'])
-
-    params.append(limit)
-
-    sql = f'''
-        SELECT ts_code, code, name, fund_type, invest_type, market,
-               management, custodian, found_date, m_fee, c_fee, status
-        FROM fund_basic
-        WHERE {' AND '.join(base_conditions)}
-        ORDER BY code
-        LIMIT ?
-    '''
+    if query and len(query) >= FTS_MIN_QUERY_LENGTH and _has_search_index(conn, 'fund_basic_fts'):
+        sql = f'''
+            SELECT {columns}
+            FROM fund_basic_fts
+            JOIN fund_basic f ON f.id = fund_basic_fts.rowid
+            WHERE fund_basic_fts MATCH ? AND {' AND '.join(conditions)}
+            ORDER BY
+              CASE WHEN f.code = ? THEN 0
+                   WHEN f.code LIKE ? THEN 1
+                   WHEN f.name LIKE ? OR f.pinyin_initials LIKE ? THEN 2
+                   ELSE 3 END,
+              CASE WHEN f.code LIKE ? THEN f.code END,
+              bm25(fund_basic_fts),
+              f.code
+            LIMIT ?
+        '''
+        params = [_fts_phrase(query)] + params + [
+            query, f'{query}%', f'{query}%', f'{query_lower}%', f'{query}%', limit
+        ]
+    else:
+        if query:
+            # 1-2 character queries are below the trigram length
+            conditions.append(
+                "(f.code LIKE ? OR LOWER(f.name) LIKE ? OR f.pinyin_initials LIKE ? OR LOWER(f.fund_type) LIKE ?)"
+            )
+            params.extend([f'{query}%', f'%{query_lower}%', f'{query_lower}%', f'%{query_lower}%'])
+        sql = f'''
+            SELECT {columns}
+            FROM fund_basic f
+            WHERE {' AND '.join(conditions)}
+            ORDER BY f.code
+            LIMIT ?
+        '''
+        params.append(limit)
 
     rows = conn.execute(sql, params).fetchall()
     conn.close()
@@ -1854,6 +2569,43 @@ def get_fund_basic_last_updated() -> Optional[str]:
     return row[0] if row and row[0] else None
 
 
+def get_fund_basic_profiles(status: str = 'L') -> Dict[str, Dict]:
+    """
+    Fund type, inception date and name per fund code (first ts_code wins for
+    codes listed on several markets).
+
+    Args:
+        status: Filter by status ('L'=正常), None for all
+
+    Returns:
+        Dict mapping code -> {ts_code, name, fund_type, found_date}
+    """
+    conn = get_db_connection()
+    where_clause = 'WHERE status = ?' if status else ''
+    rows = conn.execute(
+        f'SELECT code, ts_code, name, fund_type, found_date FROM fund_basic {where_clause} ORDER BY ts_code',
+        (status,) if status else ()
+    ).fetchall()
+    conn.close()
+
+    profiles = {}
+    for row in rows:
+        profiles.setdefault(row['code'], dict(row))
+    return profiles
+
+
+def get_tracked_fund_codes() -> List[str]:
+    """Distinct fund codes on any user's watchlist or in any portfolio."""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT code FROM funds
+        UNION SELECT asset_code FROM positions WHERE asset_type = 'fund'
+        UNION SELECT fund_code FROM fund_positions
+    ''').fetchall()
+    conn.close()
+    return sorted(r[0] for r in rows if r[0])
+
+
 # --- Fund Position Operations ---
 
 def get_user_positions(user_id: int) -> List[Dict]:
@@ -2054,15 +2806,44 @@ def save_diagnosis_cache(fund_code: str, diagnosis: Dict, score: int, ttl_hours:
     conn.close()
 
 
-def clear_diagnosis_cache(fund_code: str = None):
-    """Clear diagnosis cache (all or specific fund)."""
-    conn = get_db_connection()
-    if fund_code:
-        conn.execute('DELETE FROM fund_diagnosis_cache WHERE fund_code = ?', (fund_code,))
-    else:
-        conn.execute('DELETE FROM fund_diagnosis_cache')
-    conn.commit()
-    conn.close()
+def save_diagnosis_cache_batch(diagnoses: Dict[str, Dict], ttl_hours: int = 30) -> int:
+    """
+    Save many diagnoses in one transaction (nightly batch).
+
+    Args:
+        diagnoses: Dict mapping fund code -> diagnosis (with 'score')
+        ttl_hours: Hours until the entries expire
+
+    Returns:
+        Number of entries written
+    """
+    rows = [
+        (code, json.dumps(diagnosis, ensure_ascii=False), int(diagnosis.get('score') or 0), ttl_hours)
+        for code, diagnosis in diagnoses.items()
+    ]
+    if not rows:
+        return 0
+
+    def _save(conn):
+        conn.executemany('''
+            INSERT OR REPLACE INTO fund_diagnosis_cache
+            (fund_code, diagnosis_json, score, computed_at, expires_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP, datetime('now', '+' || ? || ' hours'))
+        ''', rows)
+        return len(rows)
+
+    return execute_with_retry(_save)
+
+
+def clear_diagnosis_cache(fund_code: str = None):
+    """Clear diagnosis cache (all or specific fund)."""
+    conn = get_db_connection()
+    if fund_code:
+        conn.execute('DELETE FROM fund_diagnosis_cache WHERE fund_code = ?', (fund_code,))
+    else:
+        conn.execute('DELETE FROM fund_diagnosis_cache')
+    conn.commit()
+    conn.close()
 
 
 def clear_expired_diagnosis_cache():
@@ -3317,6 +4098,47 @@ def get_fund_factors_batch(codes: List[str], trade_date: str) -> List[Dict]:
     return [dict(r) for r in results]
 
 
+def get_fund_factors_by_date(trade_date: str) -> List[Dict]:
+    """Get every fund's factors for a given date (cross-sectional post-passes)."""
+    conn = get_db_connection()
+    results = conn.execute(
+        'SELECT * FROM fund_factors_daily WHERE trade_date = ?', (trade_date,)
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in results]
+
+
+def update_fund_factor_ranks(trade_date: str, rows: List[Dict]) -> int:
+    """
+    Bulk-update return ranks and composite scores for a date in one transaction.
+
+    Args:
+        trade_date: Trade date (YYYY-MM-DD)
+        rows: Dicts with code, return_rank_1w, return_rank_1m, short_term_score, long_term_score
+
+    Returns:
+        Number of rows updated
+    """
+    params = [
+        (row.get('return_rank_1w'), row.get('return_rank_1m'),
+         row.get('short_term_score'), row.get('long_term_score'), row['code'], trade_date)
+        for row in rows
+    ]
+    if not params:
+        return 0
+
+    def operation(conn):
+        conn.executemany('''
+            UPDATE fund_factors_daily
+            SET return_rank_1w = ?, return_rank_1m = ?,
+                short_term_score = ?, long_term_score = ?
+            WHERE code = ? AND trade_date = ?
+        ''', params)
+        return len(params)
+
+    return execute_with_retry(operation)
+
+
 def get_top_funds_by_score(
     trade_date: str,
     score_type: str = 'short_term',
@@ -3407,10 +4229,11 @@ def get_pending_performance_records(check_type: str = '7d') -> List[Dict]:
     """Get pending recommendation records that need price checking."""
     conn = get_db_connection()
 
+    # rec_date is stored as YYYYMMDD
     if check_type == '7d':
-        condition = "check_date_7d IS NULL AND rec_date <= date('now', '-7 days')"
+        condition = "check_date_7d IS NULL AND rec_date <= strftime('%Y%m%d', 'now', '-7 days')"
     else:
-        condition = "check_date_30d IS NULL AND rec_date <= date('now', '-30 days')"
+        condition = "check_date_30d IS NULL AND rec_date <= strftime('%Y%m%d', 'now', '-30 days')"
 
     results = conn.execute(f'''
         SELECT * FROM recommendation_performance
@@ -3421,6 +4244,48 @@ def get_pending_performance_records(check_type: str = '7d') -> List[Dict]:
     return [dict(r) for r in results]
 
 
+def get_evaluable_performance_records(min_age_days: int = 7) -> List[Dict]:
+    """Get all pending recommendation records at least ``min_age_days`` old."""
+    conn = get_db_connection()
+    results = conn.execute('''
+        SELECT * FROM recommendation_performance
+        WHERE evaluation_status = 'pending' AND rec_date <= strftime('%Y%m%d', 'now', ?)
+        ORDER BY rec_date
+    ''', (f'-{min_age_days} days',)).fetchall()
+    conn.close()
+    return [dict(r) for r in results]
+
+
+def bulk_update_recommendation_performance(updates: List[Dict]) -> int:
+    """
+    Update many recommendation performance records in one transaction.
+
+    Args:
+        updates: Dicts with ``id`` plus the columns to set. All dicts must
+            share the same keys.
+
+    Returns:
+        Number of records updated
+    """
+    if not updates:
+        return 0
+
+    columns = [k for k in updates[0] if k != 'id']
+    set_clause = ', '.join(f'{col} = ?' for col in columns)
+    params = [tuple(u[col] for col in columns) + (u['id'],) for u in updates]
+
+    def operation(conn):
+        c = conn.cursor()
+        c.executemany(f'''
+            UPDATE recommendation_performance
+            SET {set_clause}, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', params)
+        return c.rowcount
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
 def get_recommendation_performance_stats(
     rec_type: Optional[str] = None,
     start_date: Optional[str] = None,
@@ -3429,7 +4294,7 @@ def get_recommendation_performance_stats(
     """Get aggregated performance statistics for recommendations."""
     conn = get_db_connection()
 
-    conditions = ["evaluation_status != 'pending'"]
+    conditions = ["evaluation_status NOT IN ('pending', 'no_data')"]
     params = []
 
     if rec_type:
@@ -3473,3 +4338,629 @@ def get_recommendation_performance_stats(
         for row in stats
     }
 
+
+# =============================================================================
+# Scheduler Leases (调度器选主)
+# =============================================================================
+
+def try_acquire_lease(name: str, holder: str, ttl_seconds: float) -> bool:
+    """
+    Acquire or renew a named lease.
+
+    Succeeds if the lease is free, expired, or already held by ``holder``.
+    A single UPSERT keeps the check-and-set atomic across processes.
+    """
+    def operation(conn):
+        now = time.time()
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO scheduler_leases (name, holder, expires_at, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE SET
+                holder = excluded.holder,
+                expires_at = excluded.expires_at,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE scheduler_leases.holder = excluded.holder
+               OR scheduler_leases.expires_at < ?
+        ''', (name, holder, now + ttl_seconds, now))
+        return c.rowcount > 0
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def release_lease(name: str, holder: str) -> bool:
+    """Release a lease if it is held by ``holder``."""
+    def operation(conn):
+        c = conn.cursor()
+        c.execute('DELETE FROM scheduler_leases WHERE name = ? AND holder = ?', (name, holder))
+        return c.rowcount > 0
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def get_lease_value(name: str) -> Optional[str]:
+    """Get the holder/value stored under a lease name (None if absent or expired)."""
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT holder FROM scheduler_leases WHERE name = ? AND (expires_at IS NULL OR expires_at >= ?)',
+        (name, time.time())
+    ).fetchone()
+    conn.close()
+    return row['holder'] if row else None
+
+
+def set_lease_value(name: str, value: str) -> None:
+    """Store a non-expiring value under a lease name (used for change stamps)."""
+    def operation(conn):
+        conn.execute('''
+            INSERT INTO scheduler_leases (name, holder, expires_at, updated_at)
+            VALUES (?, ?, NULL, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, updated_at = CURRENT_TIMESTAMP
+        ''', (name, value))
+
+    execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+# =============================================================================
+# Asset Daily Prices (价格面板 - 绩效评估/回测)
+# =============================================================================
+
+def upsert_asset_daily_prices(asset_type: str, rows: List[tuple]) -> int:
+    """
+    Insert or replace daily closes.
+
+    Args:
+        asset_type: 'stock' or 'fund'
+        rows: (code, trade_date YYYYMMDD, close) tuples
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+
+    def operation(conn):
+        conn.executemany(
+            'INSERT OR REPLACE INTO asset_daily_prices (asset_type, code, trade_date, close) VALUES (?, ?, ?, ?)',
+            [(asset_type, code, trade_date, close) for code, trade_date, close in rows]
+        )
+        return len(rows)
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def get_asset_price_dates(asset_type: str, start_date: str, end_date: str) -> List[str]:
+    """Get the trade dates (YYYYMMDD) that already have prices stored."""
+    conn = get_db_connection()
+    results = conn.execute('''
+        SELECT DISTINCT trade_date FROM asset_daily_prices
+        WHERE asset_type = ? AND trade_date BETWEEN ? AND ?
+    ''', (asset_type, start_date, end_date)).fetchall()
+    conn.close()
+    return [r['trade_date'] for r in results]
+
+
+def get_asset_price_rows(
+    asset_type: str,
+    start_date: str,
+    end_date: str,
+    codes: Optional[List[str]] = None
+) -> List[tuple]:
+    """
+    Get stored closes as (code, trade_date, close) tuples.
+
+    Returns plain tuples rather than dicts since panels can hold millions of rows.
+    """
+    conn = get_db_connection()
+    query = '''
+        SELECT code, trade_date, close FROM asset_daily_prices
+        WHERE asset_type = ? AND trade_date BETWEEN ? AND ?
+    '''
+    params = [asset_type, start_date, end_date]
+    if codes:
+        placeholders = ', '.join(['?' for _ in codes])
+        query += f' AND code IN ({placeholders})'
+        params.extend(codes)
+    results = conn.execute(query, params).fetchall()
+    conn.close()
+    return [tuple(r) for r in results]
+
+
+def get_factor_score_history(
+    asset_type: str,
+    score_type: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> List[tuple]:
+    """
+    Get composite score history as (code, trade_date, score) tuples.
+
+    Args:
+        asset_type: 'stock' or 'fund'
+        score_type: 'short_term' or 'long_term'
+        start_date: Start date (YYYY-MM-DD, inclusive)
+        end_date: End date (YYYY-MM-DD, inclusive)
+    """
+    table = 'stock_factors_daily' if asset_type == 'stock' else 'fund_factors_daily'
+    score_col = 'short_term_score' if score_type == 'short_term' else 'long_term_score'
+
+    conditions = [f'{score_col} IS NOT NULL']
+    params = []
+    if start_date:
+        conditions.append('trade_date >= ?')
+        params.append(start_date)
+    if end_date:
+        conditions.append('trade_date <= ?')
+        params.append(end_date)
+
+    conn = get_db_connection()
+    results = conn.execute(f'''
+        SELECT code, trade_date, {score_col} FROM {table}
+        WHERE {' AND '.join(conditions)}
+    ''', params).fetchall()
+    conn.close()
+    return [tuple(r) for r in results]
+
+
+# =============================================================================
+# Job Queue (后台任务队列)
+# =============================================================================
+
+JOB_ACTIVE_STATUSES = ('queued', 'running')
+JOB_FINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def _job_row_to_dict(row) -> Dict:
+    job = dict(row)
+    for field in ('params_json', 'result_json'):
+        raw = job.pop(field, None)
+        job[field[:-5]] = json.loads(raw) if raw else None
+    job['cancel_requested'] = bool(job.get('cancel_requested'))
+    return job
+
+
+def enqueue_job(
+    job_id: str,
+    job_type: str,
+    params: Dict,
+    user_id: Optional[int] = None,
+    priority: int = 0,
+    dedup_key: Optional[str] = None
+) -> tuple:
+    """
+    Insert a queued job unless an identical one is already queued or running.
+
+    Returns:
+        (job_id, created) - the existing job's id and False when deduplicated
+    """
+    def operation(conn):
+        try:
+            conn.execute('''
+                INSERT INTO jobs (id, job_type, user_id, params_json, dedup_key, priority, status)
+                VALUES (?, ?, ?, ?, ?, ?, 'queued')
+            ''', (job_id, job_type, user_id, json.dumps(params, ensure_ascii=False, default=str),
+                  dedup_key, priority))
+            return job_id, True
+        except sqlite3.IntegrityError:
+            existing = conn.execute(
+                "SELECT id FROM jobs WHERE dedup_key = ? AND status IN ('queued', 'running')",
+                (dedup_key,)
+            ).fetchone()
+            if existing is None:
+                raise
+            return existing['id'], False
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def claim_next_job(worker_id: str, job_types: List[str]) -> Optional[Dict]:
+    """Atomically move the highest-priority queued job to running and return it."""
+    if not job_types:
+        return None
+
+    placeholders = ', '.join(['?' for _ in job_types])
+
+    def operation(conn):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(f'''
+                SELECT id FROM jobs
+                WHERE status = 'queued' AND job_type IN ({placeholders})
+                ORDER BY priority DESC, created_at, rowid
+                LIMIT 1
+            ''', job_types).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute('''
+                UPDATE jobs
+                SET status = 'running', worker_id = ?, attempts = attempts + 1,
+                    started_at = CURRENT_TIMESTAMP, heartbeat_at = ?
+                WHERE id = ?
+            ''', (worker_id, time.time(), row['id']))
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            conn.commit()
+            return _job_row_to_dict(job)
+        except Exception:
+            conn.rollback()
+            raise
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def update_job_progress(job_id: str, progress: Optional[float] = None, message: Optional[str] = None) -> bool:
+    """
+    Record progress (0-100) and heartbeat for a running job.
+
+    Returns:
+        True if cancellation has been requested for the job
+    """
+    def operation(conn):
+        conn.execute('''
+            UPDATE jobs
+            SET progress = COALESCE(?, progress),
+                progress_message = COALESCE(?, progress_message),
+                heartbeat_at = ?
+            WHERE id = ?
+        ''', (progress, message, time.time(), job_id))
+        row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def finish_job(job_id: str, status: str, result=None, error: Optional[str] = None) -> None:
+    """Mark a job completed, failed or cancelled and store its result/error."""
+    def operation(conn):
+        conn.execute('''
+            UPDATE jobs
+            SET status = ?, result_json = ?, error = ?, finished_at = CURRENT_TIMESTAMP,
+                progress = CASE WHEN ? = 'completed' THEN 100 ELSE progress END
+            WHERE id = ?
+        ''', (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+              error, status, job_id))
+
+    execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def cancel_job(job_id: str, user_id: Optional[int] = None) -> Optional[str]:
+    """
+    Cancel a job. Queued jobs are cancelled immediately; running jobs are
+    flagged and stop at their next progress checkpoint.
+
+    Returns:
+        The job's resulting status, or None if not found
+    """
+    def operation(conn):
+        sql = 'SELECT status FROM jobs WHERE id = ?'
+        params = [job_id]
+        if user_id is not None:
+            sql += ' AND user_id = ?'
+            params.append(user_id)
+        row = conn.execute(sql, params).fetchone()
+        if row is None:
+            return None
+        if row['status'] == 'queued':
+            conn.execute('''
+                UPDATE jobs SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'queued'
+            ''', (job_id,))
+            return 'cancelled'
+        if row['status'] == 'running':
+            conn.execute('UPDATE jobs SET cancel_requested = 1 WHERE id = ?', (job_id,))
+            return 'cancelling'
+        return row['status']
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """Get a job by id."""
+    conn = get_db_connection()
+    row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    return _job_row_to_dict(row) if row else None
+
+
+def list_jobs(
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = 50
+) -> List[Dict]:
+    """List jobs, newest first (results omitted)."""
+    conditions = []
+    params = []
+    if user_id is not None:
+        conditions.append('user_id = ?')
+        params.append(user_id)
+    if status:
+        conditions.append('status = ?')
+        params.append(status)
+    if job_type:
+        conditions.append('job_type = ?')
+        params.append(job_type)
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    conn = get_db_connection()
+    rows = conn.execute(f'''
+        SELECT id, job_type, user_id, params_json, NULL AS result_json, priority, status,
+               progress, progress_message, error, attempts, cancel_requested,
+               created_at, started_at, finished_at
+        FROM jobs {where_clause}
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''', (*params, limit)).fetchall()
+    conn.close()
+    return [_job_row_to_dict(r) for r in rows]
+
+
+def requeue_stale_jobs(stale_after_seconds: float, max_attempts: int = 3, worker_id: Optional[str] = None) -> int:
+    """
+    Recover running jobs whose worker stopped heartbeating (e.g. process restart).
+    Jobs under ``max_attempts`` go back to the queue; the rest are failed.
+
+    Args:
+        stale_after_seconds: Heartbeat age after which a running job is orphaned
+        max_attempts: Attempts after which an orphaned job is failed instead
+        worker_id: Also recover every running job claimed by this worker id
+    """
+    cutoff = time.time() - stale_after_seconds
+    stale = "status = 'running' AND (heartbeat_at < ? OR worker_id = ?)"
+
+    def operation(conn):
+        c = conn.cursor()
+        c.execute(f'''
+            UPDATE jobs
+            SET status = CASE WHEN cancel_requested = 1 THEN 'cancelled' ELSE 'queued' END,
+                worker_id = NULL,
+                finished_at = CASE WHEN cancel_requested = 1 THEN CURRENT_TIMESTAMP ELSE NULL END
+            WHERE {stale} AND attempts < ?
+        ''', (cutoff, worker_id, max_attempts))
+        requeued = c.rowcount
+        c.execute(f'''
+            UPDATE jobs
+            SET status = 'failed', error = 'Worker stopped responding', finished_at = CURRENT_TIMESTAMP
+            WHERE {stale} AND attempts >= ?
+        ''', (cutoff, worker_id, max_attempts))
+        return requeued + c.rowcount
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+def delete_old_jobs(days_to_keep: int = 7) -> int:
+    """Delete finished jobs older than specified days."""
+    def operation(conn):
+        c = conn.cursor()
+        c.execute(f'''
+            DELETE FROM jobs
+            WHERE status IN {JOB_FINAL_STATUSES} AND finished_at < datetime('now', ?)
+        ''', (f'-{days_to_keep} days',))
+        return c.rowcount
+
+    return execute_with_retry(operation, max_retries=3, base_delay=0.2)
+
+
+# =============================================================================
+# Fund Rankings Snapshot (基金排行快照)
+# =============================================================================
+
+FUND_RANKING_RETURN_COLUMNS = (
+    'return_1w', 'return_1m', 'return_3m', 'return_6m', 'return_1y',
+    'return_2y', 'return_3y', 'return_ytd', 'return_since_inception',
+)
+FUND_RANKING_COLUMNS = (
+    'category', 'code', 'name', 'nav_date', 'nav', 'acc_nav', 'daily_growth',
+    *FUND_RANKING_RETURN_COLUMNS, 'fee', 'updated_at',
+)
+
+
+def replace_fund_rankings(category: str, rows: List[Dict]) -> int:
+    """
+    Replace one category's ranking snapshot in a single transaction.
+
+    Args:
+        category: Ranking category (e.g. 股票型)
+        rows: Dicts keyed by FUND_RANKING_COLUMNS (category/updated_at are filled in)
+
+    Returns:
+        Number of rows stored
+    """
+    now = time.time()
+    placeholders = ','.join('?' * len(FUND_RANKING_COLUMNS))
+
+    def operation(conn):
+        conn.execute('DELETE FROM fund_rankings WHERE category = ?', (category,))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO fund_rankings ({','.join(FUND_RANKING_COLUMNS)}) VALUES ({placeholders})",
+            [
+                tuple(
+                    category if col == 'category' else now if col == 'updated_at' else row.get(col)
+                    for col in FUND_RANKING_COLUMNS
+                )
+                for row in rows
+            ]
+        )
+        return len(rows)
+
+    return execute_with_retry(operation)
+
+
+def get_fund_rankings_by_codes(codes: List[str]) -> Dict[str, List[Dict]]:
+    """
+    All ranking rows for the given fund codes.
+
+    Returns:
+        Dict mapping code -> list of rows (one per category the fund is ranked in)
+    """
+    result: Dict[str, List[Dict]] = {}
+    codes = list(dict.fromkeys(codes))
+    conn = get_db_connection()
+    try:
+        for i in range(0, len(codes), 500):
+            chunk = codes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in conn.execute(f'SELECT * FROM fund_rankings WHERE code IN ({placeholders})', chunk):
+                result.setdefault(row['code'], []).append(dict(row))
+    finally:
+        conn.close()
+    return result
+
+
+def get_top_fund_rankings(category: str, sort_by: str = 'return_1m', limit: int = 50) -> List[Dict]:
+    """
+    Top funds of a category by one return column (NULLs excluded).
+
+    Args:
+        category: Ranking category
+        sort_by: One of FUND_RANKING_RETURN_COLUMNS
+        limit: Max rows
+    """
+    if sort_by not in FUND_RANKING_RETURN_COLUMNS:
+        raise ValueError(f"Invalid sort column: {sort_by}")
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT * FROM fund_rankings
+            WHERE category = ? AND {sort_by} IS NOT NULL
+            ORDER BY {sort_by} DESC
+            LIMIT ?
+        ''', (category, limit)).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def get_fund_ranking_stats() -> Dict[str, Dict]:
+    """
+    Per-category aggregates of the ranking snapshot.
+
+    Returns:
+        Dict mapping category -> {total_count, avg_return_1m, avg_return_3m,
+        avg_return_1y, updated_at}
+    """
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT category, COUNT(*) AS total_count,
+                   AVG(return_1m) AS avg_return_1m,
+                   AVG(return_3m) AS avg_return_3m,
+                   AVG(return_1y) AS avg_return_1y,
+                   MIN(updated_at) AS updated_at
+            FROM fund_rankings
+            GROUP BY category
+        ''').fetchall()
+    finally:
+        conn.close()
+    return {row['category']: dict(row) for row in rows}
+
+
+# =============================================================================
+# Fund Holdings (基金持仓, per report quarter)
+# =============================================================================
+
+FUND_HOLDING_COLUMNS = ('fund_code', 'quarter', 'stock_code', 'stock_name', 'weight', 'shares', 'market_value')
+
+
+def save_fund_holdings(fund_code: str, holdings: Dict[str, List[Dict]]) -> int:
+    """
+    Store a fund's holdings by report quarter and record the sync.
+
+    Args:
+        fund_code: Fund code
+        holdings: Dict mapping quarter (YYYYMMDD quarter end) -> list of
+            {stock_code, stock_name, weight (% of NAV), shares, market_value}
+
+    Returns:
+        Number of holding rows stored
+    """
+    now = time.time()
+    latest = max(holdings) if holdings else None
+    placeholders = ','.join('?' * len(FUND_HOLDING_COLUMNS))
+
+    def operation(conn):
+        rows = [
+            (fund_code, quarter, *(row.get(col) for col in FUND_HOLDING_COLUMNS[2:]))
+            for quarter, quarter_rows in holdings.items()
+            for row in quarter_rows
+        ]
+        for quarter in holdings:
+            conn.execute('DELETE FROM fund_holdings WHERE fund_code = ? AND quarter = ?', (fund_code, quarter))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO fund_holdings ({','.join(FUND_HOLDING_COLUMNS)}) VALUES ({placeholders})",
+            rows
+        )
+        conn.execute('''
+            INSERT INTO fund_holdings_sync (fund_code, latest_quarter, checked_at) VALUES (?, ?, ?)
+            ON CONFLICT(fund_code) DO UPDATE SET
+                latest_quarter = MAX(COALESCE(latest_quarter, ''), COALESCE(excluded.latest_quarter, '')),
+                checked_at = excluded.checked_at
+        ''', (fund_code, latest, now))
+        return len(rows)
+
+    return execute_with_retry(operation)
+
+
+def get_fund_holdings_sync(fund_codes: List[str]) -> Dict[str, Dict]:
+    """
+    Holdings sync state per fund.
+
+    Returns:
+        Dict mapping fund_code -> {latest_quarter, checked_at}; never-synced funds are absent
+    """
+    result = {}
+    codes = list(dict.fromkeys(fund_codes))
+    conn = get_db_connection()
+    try:
+        for i in range(0, len(codes), 500):
+            chunk = codes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in conn.execute(
+                f'SELECT * FROM fund_holdings_sync WHERE fund_code IN ({placeholders})', chunk
+            ):
+                result[row['fund_code']] = {'latest_quarter': row['latest_quarter'] or None,
+                                            'checked_at': row['checked_at']}
+    finally:
+        conn.close()
+    return result
+
+
+def get_latest_fund_holdings(fund_codes: List[str]) -> Dict[str, Dict]:
+    """
+    Holdings of each fund's latest stored quarter, largest weight first.
+
+    Stock names missing from the source are filled from stock_basic.
+
+    Returns:
+        Dict mapping fund_code -> {'quarter', 'holdings': [{code, name, weight, shares, market_value}]}
+    """
+    result: Dict[str, Dict] = {}
+    codes = list(dict.fromkeys(fund_codes))
+    conn = get_db_connection()
+    try:
+        for i in range(0, len(codes), 500):
+            chunk = codes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'''
+                SELECT h.fund_code, h.quarter, h.stock_code,
+                       COALESCE(NULLIF(h.stock_name, ''), sb.name, '') AS stock_name,
+                       h.weight, h.shares, h.market_value
+                FROM fund_holdings h
+                JOIN fund_holdings_sync s
+                  ON s.fund_code = h.fund_code AND s.latest_quarter = h.quarter
+                LEFT JOIN stock_basic sb ON sb.symbol = h.stock_code
+                WHERE h.fund_code IN ({placeholders})
+                ORDER BY h.fund_code, h.weight DESC
+            ''', chunk).fetchall()
+            for row in rows:
+                entry = result.setdefault(row['fund_code'], {'quarter': row['quarter'], 'holdings': []})
+                entry['holdings'].append({
+                    'code': row['stock_code'],
+                    'name': row['stock_name'],
+                    'weight': row['weight'] or 0.0,
+                    'shares': row['shares'],
+                    'market_value': row['market_value'],
+                })
+    finally:
+        conn.close()
+    return result
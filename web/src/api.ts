@@ -100,8 +100,48 @@ export const fetchMarketFunds = async (query: string): Promise<any[]> => {
   return response.data;
 };
 
+export interface Job {
+  id: string;
+  job_type: string;
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+  progress: number;
+  progress_message?: string;
+  result?: any;
+  error?: string;
+}
+
+export const fetchJob = async (jobId: string): Promise<Job> => {
+  const response = await api.get(`/jobs/${jobId}`);
+  return response.data;
+};
+
+export const cancelJob = async (jobId: string): Promise<{ job_id: string; status: string }> => {
+  const response = await api.delete(`/jobs/${jobId}`);
+  return response.data;
+};
+
+// Poll a background job until it finishes; rejects if it failed or was cancelled
+export const waitForJob = async (
+  jobId: string,
+  onProgress?: (job: Job) => void,
+  intervalMs: number = 2000
+): Promise<Job> => {
+  for (;;) {
+    const job = await fetchJob(jobId);
+    onProgress?.(job);
+    if (job.status === 'completed') return job;
+    if (job.status === 'failed' || job.status === 'cancelled') {
+      throw new Error(job.error || `Job ${job.status}`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
 export const generateReport = async (mode: 'pre' | 'post', fundCode?: string): Promise<void> => {
-  await api.post(`/generate/${mode}`, { fund_code: fundCode });
+  const response = await api.post(`/generate/${mode}`, { fund_code: fundCode });
+  if (response.data?.job_id) {
+    await waitForJob(response.data.job_id);
+  }
 };
 
 export interface FundItem {
@@ -1083,6 +1123,62 @@ export const fetchWidgetMainCapitalFlow = async (limit: number = 10): Promise<Ma
 };
 
 
+// --- Market Stream (SSE) ---
+// One EventSource per page, carrying the union of the feeds widgets listen to.
+
+type MarketFeedHandler = (payload: any) => void;
+const marketFeedHandlers = new Map<string, Set<MarketFeedHandler>>();
+const marketFeedErrorHandlers = new Set<() => void>();
+let marketStream: EventSource | null = null;
+
+const reconnectMarketStream = () => {
+    marketStream?.close();
+    marketStream = null;
+    const feeds = [...marketFeedHandlers.keys()];
+    if (feeds.length === 0) return;
+
+    const stream = new EventSource(`${API_BASE}/stream/market?feeds=${encodeURIComponent(feeds.join(','))}`);
+    feeds.forEach((feed) => {
+        stream.addEventListener(feed, (event) => {
+            const payload = JSON.parse((event as MessageEvent).data);
+            marketFeedHandlers.get(feed)?.forEach((handler) => handler(payload));
+        });
+    });
+    // EventSource retries on its own; listeners fall back to polling meanwhile
+    stream.onerror = () => marketFeedErrorHandlers.forEach((onError) => onError());
+    marketStream = stream;
+};
+
+/**
+ * Receive pushed snapshots of a market hub feed; returns an unsubscribe function.
+ * `onError` is called whenever the stream fails (e.g. a server without /api/stream).
+ */
+export const subscribeMarketFeed = (
+    feed: string,
+    handler: MarketFeedHandler,
+    onError?: () => void,
+): (() => void) => {
+    if (onError) marketFeedErrorHandlers.add(onError);
+    let handlers = marketFeedHandlers.get(feed);
+    if (!handlers) {
+        handlers = new Set();
+        marketFeedHandlers.set(feed, handlers);
+        handlers.add(handler);
+        reconnectMarketStream();
+    } else {
+        handlers.add(handler);
+    }
+    return () => {
+        if (onError) marketFeedErrorHandlers.delete(onError);
+        handlers!.delete(handler);
+        if (handlers!.size === 0) {
+            marketFeedHandlers.delete(feed);
+            reconnectMarketStream();
+        }
+    };
+};
+
+
 // --- Dashboard Layout API ---
 
 export const fetchDashboardLayouts = async (): Promise<{ layouts: DashboardLayout[] }> => {
@@ -1792,6 +1888,25 @@ export const fetchFundDrawdownHistory = async (code: string, threshold = 0.05):
 };
 
 
+// --- Fund Analytics Bundle (diagnosis + risk metrics + drawdowns, one NAV fetch) ---
+
+export interface FundAnalyticsResponse {
+    fund_code: string;
+    nav_date: string;
+    diagnosis: FundDiagnosisResponse;
+    risk_metrics: FundRiskMetricsResponse;
+    drawdown: FundDrawdownResponse;
+    computed_at: string;
+}
+
+export const fetchFundAnalytics = async (code: string, forceRefresh = false): Promise<FundAnalyticsResponse> => {
+    const response = await api.get(`/funds/${code}/analytics`, {
+        params: { force_refresh: forceRefresh }
+    });
+    return response.data;
+};
+
+
 // --- Advanced Fund Comparison (up to 10 funds) ---
 
 export interface FundNavCurve {
@@ -3066,6 +3181,10 @@ export const generateRecommendationsV2 = async (
     request: RecommendationRequestV2
 ): Promise<RecommendationResultV2> => {
     const response = await api.post('/recommend/generate', request);
+    if (response.data?.job_id) {
+        const job = await waitForJob(response.data.job_id);
+        return job.result;
+    }
     return response.data;
 };
 
@@ -14,6 +14,7 @@ import RefreshIcon from '@mui/icons-material/Refresh';
 import { useTranslation } from 'react-i18next';
 import type { WidgetConfig } from './types';
 import { getWidgetDefinition } from './registry';
+import { subscribeMarketFeed } from '../api';
 
 interface WidgetContainerProps {
     config: WidgetConfig;
@@ -115,7 +116,8 @@ export default function WidgetContainer({
 export function useWidgetData<T>(
     fetchFn: () => Promise<T>,
     refreshInterval: number = 60000,
-    enabled: boolean = true
+    enabled: boolean = true,
+    streamFeed?: string
 ) {
     const [data, setData] = useState<T | null>(null);
     const [loading, setLoading] = useState(true);
@@ -155,12 +157,37 @@ export function useWidgetData<T>(
 
     useEffect(() => {
         fetchData(false); // Initial load
+        if (!enabled) return;
 
-        if (refreshInterval > 0 && enabled) {
-            const interval = setInterval(() => fetchData(true), refreshInterval);
-            return () => clearInterval(interval);
-        }
-    }, [fetchData, refreshInterval, enabled]);
+        let interval: ReturnType<typeof setInterval> | null = null;
+        const startPolling = () => {
+            if (refreshInterval > 0 && interval === null) {
+                interval = setInterval(() => fetchData(true), refreshInterval);
+            }
+        };
+        const stopPolling = () => {
+            if (interval !== null) {
+                clearInterval(interval);
+                interval = null;
+            }
+        };
+
+        // Poll until the market hub stream delivers, and again whenever it fails
+        startPolling();
+        const unsubscribe = streamFeed
+            ? subscribeMarketFeed(streamFeed, (payload) => {
+                stopPolling();
+                setData(payload.data as T);
+                setLastUpdated(payload.updated_at);
+                setError(null);
+            }, startPolling)
+            : undefined;
+
+        return () => {
+            stopPolling();
+            unsubscribe?.();
+        };
+    }, [fetchData, refreshInterval, enabled, streamFeed]);
 
     return { data, loading, error, lastUpdated, refresh: () => fetchData(false) };
 }
@@ -18,7 +18,9 @@ export default function MarketIndicesWidget({ id, config, isEditing }: WidgetPro
 
     const { data, loading, error, lastUpdated, refresh } = useWidgetData<IndexData[]>(
         fetchMarketIndices,
-        config.refreshInterval ? config.refreshInterval * 1000 : 60000
+        config.refreshInterval ? config.refreshInterval * 1000 : 60000,
+        true,
+        'indices'
     );
 
     return (
@@ -18,7 +18,9 @@ export default function NorthboundFlowWidget({ id, config, isEditing }: WidgetPr
 
     const { data, loading, error, lastUpdated, refresh } = useWidgetData<NorthboundFlowData>(
         () => fetchWidgetNorthboundFlow(5),
-        config.refreshInterval ? config.refreshInterval * 1000 : 300000
+        config.refreshInterval ? config.refreshInterval * 1000 : 300000,
+        true,
+        'northbound_flow'
     );
 
     const formatAmount = (val: number) => {